@@ -1,11 +1,15 @@
 from __future__ import annotations
 
 import argparse
+import math
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
 
+from xauusd_bot.shared_dataset import pool_context
+
 
 R_CANDIDATES = (
     "r_multiple",
@@ -17,6 +21,10 @@ R_CANDIDATES = (
     "pnl_r",
 )
 
+BOOT_METHODS = ("iid", "block", "stationary")
+# Resamples per vectorized chunk (and per seed child); at 5k trades an iid chunk gathers a 500 x 5000 index matrix.
+BOOT_CHUNK = 500
+
 TS_CANDIDATES = (
     "entry_time",
     "open_time",
@@ -58,37 +66,104 @@ def _markdown_table(df: pd.DataFrame) -> str:
     return "\n".join(lines)
 
 
-def bootstrap_expectancy(
-    run_dir: Path,
+def default_block_len(n: int) -> float:
+    """Block length (mean length for the stationary bootstrap) used when none is given: n ** (1/3)."""
+    return float(max(1, round(n ** (1.0 / 3.0))))
+
+
+def _block_sums(prefix: np.ndarray, starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Sums of circular blocks of the trade series from its doubled prefix sum; lengths are at most n."""
+    return prefix[starts + lengths] - prefix[starts]
+
+
+def _stationary_lengths(rng: np.random.Generator, rows: int, n: int, mean_len: float) -> np.ndarray:
+    """Geometric block lengths per resample, with the block that crosses n cut so each row sums to exactly n."""
+    expected = n / mean_len
+    lengths = rng.geometric(1.0 / mean_len, size=(rows, int(math.ceil(expected + 5.0 * math.sqrt(expected))) + 4))
+    while (lengths.sum(axis=1) < n).any():
+        lengths = np.hstack([lengths, rng.geometric(1.0 / mean_len, size=(rows, lengths.shape[1]))])
+    before = np.cumsum(lengths, axis=1) - lengths
+    return np.clip(n - before, 0, lengths)
+
+
+def _resample_means(
+    r: np.ndarray, method: str, block_len: float, rows: int, seed: np.random.SeedSequence
+) -> np.ndarray:
+    """Means of `rows` bootstrap resamples of `r`.
+
+    Block methods draw uniform circular start points and sum each block as a difference of the doubled prefix
+    sum, so a resample costs one gather per block whatever the block length.
+    """
+    rng = np.random.default_rng(seed)
+    n = int(r.size)
+    if method == "iid":
+        return r[rng.integers(0, n, size=(rows, n))].mean(axis=1)
+    prefix = np.concatenate([[0.0], np.cumsum(np.concatenate([r, r]))])
+    if method == "block":
+        size = int(min(max(round(block_len), 1), n))
+        blocks = -(-n // size)
+        lengths = np.full(blocks, size, dtype=np.int64)
+        lengths[-1] = n - size * (blocks - 1)
+        lengths = np.broadcast_to(lengths, (rows, blocks))
+    elif method == "stationary":
+        lengths = _stationary_lengths(rng, rows, n, max(float(block_len), 1.0))
+    else:
+        raise ValueError(f"Unknown bootstrap method {method!r}; expected one of {BOOT_METHODS}")
+    starts = rng.integers(0, n, size=lengths.shape)
+    return _block_sums(prefix, starts, lengths).sum(axis=1) / n
+
+
+def expectancy_ci(
+    r: np.ndarray,
     resamples: int = 5000,
     seed: int = 42,
-) -> tuple[Path, Path]:
-    trades_path = run_dir / "trades.csv"
-    if not trades_path.exists():
-        raise FileNotFoundError(f"Missing trades.csv: {trades_path}")
+    method: str = "iid",
+    block_len: float | None = None,
+    workers: int = 1,
+) -> tuple[float, float, float]:
+    """Mean R and 95% percentile-bootstrap interval; NaNs when there are no trades.
 
-    trades = pd.read_csv(trades_path)
+    `method` is "iid", "block" (circular moving blocks of `block_len` trades) or "stationary" (geometric block
+    lengths with mean `block_len`). Resamples are drawn in chunks of `BOOT_CHUNK`, each from its own child of
+    `seed`, so `workers` only changes where the chunks run.
+    """
+    if method not in BOOT_METHODS:
+        raise ValueError(f"Unknown bootstrap method {method!r}; expected one of {BOOT_METHODS}")
+    n = int(r.size)
+    if n == 0:
+        return float("nan"), float("nan"), float("nan")
+    length = default_block_len(n) if block_len is None else float(block_len)
+    sizes = [min(BOOT_CHUNK, resamples - start) for start in range(0, resamples, BOOT_CHUNK)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = ([r] * len(sizes), [method] * len(sizes), [length] * len(sizes), sizes, seeds)
+    if workers <= 1 or len(sizes) == 1:
+        chunks = list(map(_resample_means, *args))
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(sizes)), mp_context=pool_context()) as pool:
+            chunks = list(pool.map(_resample_means, *args))
+    means = np.concatenate(chunks)
+    return float(r.mean()), float(np.quantile(means, 0.025)), float(np.quantile(means, 0.975))
+
+
+def write_boot_ci(
+    run_dir: Path,
+    trades: pd.DataFrame,
+    resamples: int = 5000,
+    seed: int = 42,
+    method: str = "iid",
+    block_len: float | None = None,
+    workers: int = 1,
+) -> tuple[Path, pd.DataFrame]:
+    """Write diagnostics/BOOT_expectancy_ci.csv for in-memory `trades` of the run in `run_dir`."""
     r_col = _find_first_col(trades, R_CANDIDATES)
     if r_col is None:
         raise ValueError(f"No R column found in trades.csv. Tried: {R_CANDIDATES}")
 
     r = pd.to_numeric(trades[r_col], errors="coerce").dropna().to_numpy(dtype=float)
-    n = int(r.size)
-
-    if n == 0:
-        mean_r = float("nan")
-        ci_low = float("nan")
-        ci_high = float("nan")
-    else:
-        rng = np.random.default_rng(seed)
-        means = np.empty(resamples, dtype=float)
-        for i in range(resamples):
-            sample = rng.choice(r, size=n, replace=True)
-            means[i] = float(sample.mean())
-        mean_r = float(r.mean())
-        ci_low = float(np.quantile(means, 0.025))
-        ci_high = float(np.quantile(means, 0.975))
-
+    length = None if method == "iid" else (default_block_len(r.size) if block_len is None else float(block_len))
+    mean_r, ci_low, ci_high = expectancy_ci(
+        r, resamples=resamples, seed=seed, method=method, block_len=length, workers=workers
+    )
     crosses_zero = bool((not pd.isna(ci_low)) and (not pd.isna(ci_high)) and (ci_low <= 0.0 <= ci_high))
 
     diag_dir = run_dir / "diagnostics"
@@ -99,17 +174,40 @@ def bootstrap_expectancy(
             {
                 "run_id": run_dir.name,
                 "r_col": r_col,
-                "n": n,
+                "n": int(r.size),
                 "seed": int(seed),
                 "resamples": int(resamples),
                 "mean": mean_r,
                 "ci_low": ci_low,
                 "ci_high": ci_high,
                 "crosses_zero": crosses_zero,
+                "method": method,
+                "block_len": length,
             }
         ]
     )
     out_df.to_csv(out_csv, index=False)
+    return out_csv, out_df
+
+
+def bootstrap_expectancy(
+    run_dir: Path,
+    resamples: int = 5000,
+    seed: int = 42,
+    method: str = "iid",
+    block_len: float | None = None,
+    workers: int = 1,
+) -> tuple[Path, Path]:
+    trades_path = run_dir / "trades.csv"
+    if not trades_path.exists():
+        raise FileNotFoundError(f"Missing trades.csv: {trades_path}")
+
+    trades = pd.read_csv(trades_path)
+    out_csv, out_df = write_boot_ci(
+        run_dir, trades, resamples=resamples, seed=seed, method=method, block_len=block_len, workers=workers
+    )
+    r_col = str(out_df["r_col"].iloc[0])
+    crosses_zero = bool(out_df["crosses_zero"].iloc[0])
 
     ts_col = _find_first_col(trades, TS_CANDIDATES)
     month_df = pd.DataFrame(columns=["month", "trades"])
@@ -139,6 +237,7 @@ def bootstrap_expectancy(
         f"- R column: `{r_col}`",
         f"- resamples: `{resamples}`",
         f"- seed: `{seed}`",
+        f"- method: `{method}`",
         "",
         "## Bootstrap CI (Expectancy_R)",
         _markdown_table(out_df),
@@ -160,12 +259,28 @@ def main() -> int:
     parser.add_argument("run_dir", help="Run directory path.")
     parser.add_argument("--resamples", type=int, default=5000, help="Number of bootstrap resamples.")
     parser.add_argument("--seed", type=int, default=42, help="Random seed.")
+    parser.add_argument(
+        "--method",
+        choices=BOOT_METHODS,
+        default="iid",
+        help="iid trades, circular moving blocks, or stationary (geometric-length) blocks.",
+    )
+    parser.add_argument(
+        "--block-len",
+        type=float,
+        default=None,
+        help="Block length (mean length for stationary); default n ** (1/3) trades.",
+    )
+    parser.add_argument("--workers", type=int, default=1, help="Processes for the resample chunks.")
     args = parser.parse_args()
 
     out_csv, out_md = bootstrap_expectancy(
         run_dir=Path(args.run_dir),
         resamples=args.resamples,
         seed=args.seed,
+        method=args.method,
+        block_len=args.block_len,
+        workers=args.workers,
     )
     print(f"Wrote: {out_csv}")
     print(f"Wrote: {out_md}")
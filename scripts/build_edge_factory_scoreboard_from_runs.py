@@ -9,6 +9,9 @@ from typing import Any
 
 import pandas as pd
 
+from xauusd_bot.kpi import kpi_records, run_kpis
+from xauusd_bot.run_archive import iter_runs, read_run_text, run_exists, run_file_exists
+
 try:
     from lib.edge_factory_eval import (
         apply_gates,
@@ -19,7 +22,6 @@ try:
         load_cost_stress,
         load_gates_config,
         load_temporal_flags,
-        load_trade_kpis,
         merge_metric_payload,
         resolve_stage_config,
     )
@@ -33,7 +35,6 @@ except ModuleNotFoundError:
         load_cost_stress,
         load_gates_config,
         load_temporal_flags,
-        load_trade_kpis,
         merge_metric_payload,
         resolve_stage_config,
     )
@@ -74,14 +75,12 @@ def _iter_run_meta(runs_root: Path) -> list[tuple[str, dict[str, Any], Path]]:
     out: list[tuple[str, dict[str, Any], Path]] = []
     if not runs_root.exists():
         return out
-    for run_dir in runs_root.iterdir():
-        if not run_dir.is_dir():
-            continue
+    for run_dir in iter_runs(runs_root):
         meta_path = run_dir / "run_meta.json"
-        if not meta_path.exists():
+        if not run_file_exists(meta_path):
             continue
         try:
-            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            meta = json.loads(read_run_text(meta_path))
         except Exception:
             continue
         out.append((run_dir.name, meta, run_dir))
@@ -156,8 +155,10 @@ def _select_run_for_config(
         note = str(from_progress.get("note", "")).strip()
         status = str(from_progress.get("status", "ok")).strip().lower() or "ok"
         run_dir = runs_root / run_id if run_id else None
-        if run_dir is not None and run_dir.exists():
+        if run_dir is not None and run_exists(run_dir):
             return run_id, run_dir, status, note
+        if status == "pruned":
+            return run_id, None, status, note
         return run_id, None, "failed", (note or "run from progress not found on disk")
 
     from_meta = run_meta_latest.get(cfg_key)
@@ -220,16 +221,25 @@ def build_edge_factory_scoreboard(
     baseline_trades = 0
     baseline_row: dict[str, Any] | None = None
 
-    rows: list[dict[str, Any]] = []
-    if baseline_config is not None:
-        b_run_id, b_run_dir, b_status, b_note = _select_run_for_config(
-            cfg_path=baseline_config.resolve(),
+    selections = {
+        cfg: _select_run_for_config(
+            cfg_path=cfg,
             runs_root=runs_root,
             progress_records=progress_records,
             run_meta_latest=run_meta_latest,
         )
+        for cfg in ([baseline_config.resolve()] if baseline_config is not None else []) + candidates
+    }
+    # Trade KPIs of every selected run in one grouped pass.
+    trade_kpis_by_run = kpi_records(
+        run_kpis({run_id: run_dir for run_id, run_dir, _, _ in selections.values() if run_dir is not None})
+    )
+
+    rows: list[dict[str, Any]] = []
+    if baseline_config is not None:
+        b_run_id, b_run_dir, b_status, b_note = selections[baseline_config.resolve()]
         if b_run_dir is not None:
-            tk = load_trade_kpis(b_run_dir)
+            tk = trade_kpis_by_run[b_run_id]
             bk = load_boot_ci(b_run_dir)
             merged = merge_metric_payload(
                 trade_kpis=tk,
@@ -272,25 +282,21 @@ def build_edge_factory_scoreboard(
         rows.append(baseline_row)
 
     for cfg in candidates:
-        run_id, run_dir, status, row_note = _select_run_for_config(
-            cfg_path=cfg,
-            runs_root=runs_root,
-            progress_records=progress_records,
-            run_meta_latest=run_meta_latest,
-        )
+        run_id, run_dir, status, row_note = selections[cfg]
         if run_dir is None:
+            pruned = status == "pruned"
             rows.append(
                 build_score_row(
                     candidate=cfg.stem,
                     config_path=cfg,
                     run_id=run_id,
-                    status="failed",
+                    status="pruned" if pruned else "failed",
                     is_baseline=False,
                     metrics={},
                     gate_result={
                         "gate_all": False,
                         "gate_flags": {},
-                        "fail_reasons": ["candidate run not found"],
+                        "fail_reasons": [f"pruned: {row_note}"] if pruned else ["candidate run not found"],
                         "pending_metrics": [],
                     },
                     note=row_note,
@@ -298,7 +304,7 @@ def build_edge_factory_scoreboard(
             )
             continue
 
-        trade_kpis = load_trade_kpis(run_dir)
+        trade_kpis = trade_kpis_by_run[run_id]
         boot_kpis = load_boot_ci(run_dir)
         cost_kpis = load_cost_stress(posthoc_csv, run_id)
         temporal_kpis = load_temporal_flags(temporal_summary_json, run_id)
@@ -368,6 +374,7 @@ def build_edge_factory_scoreboard(
         "rows_written": int(len(df)),
         "candidate_rows": int(len(candidates_df)) if not candidates_df.empty else 0,
         "pass_count": pass_count,
+        "pruned_count": int((candidates_df["status"] == "pruned").sum()) if not candidates_df.empty else 0,
         "run_ids_ok": run_ids_ok,
         "posthoc_csv": posthoc_csv.as_posix() if posthoc_csv is not None else "",
         "temporal_summary_json": temporal_summary_json.as_posix() if temporal_summary_json is not None else "",
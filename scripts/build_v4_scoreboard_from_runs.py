@@ -9,17 +9,11 @@ from typing import Any
 
 import pandas as pd
 
+from xauusd_bot.kpi import kpi_records, run_kpis
+from xauusd_bot.run_archive import iter_runs, read_run_csv, read_run_text, run_file_exists
+
 
 ROOT = Path(__file__).resolve().parents[1]
-R_COL_CANDIDATES = (
-    "r_multiple",
-    "R_net",
-    "r_net",
-    "net_R",
-    "net_r",
-    "pnl_R",
-    "pnl_r",
-)
 
 
 def _resolve(path: str) -> Path:
@@ -32,36 +26,6 @@ def _short(text: str, limit: int = 700) -> str:
     return s if len(s) <= limit else (s[: limit - 3] + "...")
 
 
-def _find_r_col(df: pd.DataFrame) -> str:
-    lowered = {c.lower(): c for c in df.columns}
-    for cand in R_COL_CANDIDATES:
-        c = lowered.get(cand.lower())
-        if c is not None:
-            return c
-    raise RuntimeError(f"No R column found in trades.csv. columns={list(df.columns)}")
-
-
-def _compute_trade_kpis(trades_path: Path) -> dict[str, Any]:
-    if not trades_path.exists():
-        return {"pf": math.nan, "expectancy_R": math.nan, "trades": 0, "winrate": math.nan}
-    trades = pd.read_csv(trades_path)
-    if trades.empty:
-        return {"pf": math.nan, "expectancy_R": math.nan, "trades": 0, "winrate": math.nan}
-    r_col = _find_r_col(trades)
-    r = pd.to_numeric(trades[r_col], errors="coerce").dropna()
-    if r.empty:
-        return {"pf": math.nan, "expectancy_R": math.nan, "trades": 0, "winrate": math.nan}
-    gross_win = float(r[r > 0].sum())
-    gross_loss = float((-r[r < 0]).sum())
-    pf = (gross_win / gross_loss) if gross_loss > 0 else (float("inf") if gross_win > 0 else math.nan)
-    return {
-        "pf": float(pf),
-        "expectancy_R": float(r.mean()),
-        "trades": int(r.size),
-        "winrate": float((r > 0).mean()),
-    }
-
-
 def _truthy_bool(value: Any) -> bool | None:
     if pd.isna(value):
         return None
@@ -77,9 +41,9 @@ def _truthy_bool(value: Any) -> bool | None:
 
 def _read_boot_row(run_dir: Path) -> dict[str, Any]:
     p = run_dir / "diagnostics" / "BOOT_expectancy_ci.csv"
-    if not p.exists():
+    if not run_file_exists(p):
         return {"ci_low": pd.NA, "ci_high": pd.NA, "crosses_zero": pd.NA, "boot_resamples_used": pd.NA}
-    df = pd.read_csv(p)
+    df = read_run_csv(p)
     if df.empty:
         return {"ci_low": pd.NA, "ci_high": pd.NA, "crosses_zero": pd.NA, "boot_resamples_used": pd.NA}
     row = df.iloc[0]
@@ -116,14 +80,12 @@ def _md_table(df: pd.DataFrame, float_cols: set[str] | None = None) -> str:
 
 def _iter_run_meta(runs_root: Path) -> list[tuple[str, dict[str, Any], Path]]:
     out: list[tuple[str, dict[str, Any], Path]] = []
-    for run_dir in runs_root.iterdir():
-        if not run_dir.is_dir():
-            continue
+    for run_dir in iter_runs(runs_root):
         meta_path = run_dir / "run_meta.json"
-        if not meta_path.exists():
+        if not run_file_exists(meta_path):
             continue
         try:
-            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            meta = json.loads(read_run_text(meta_path))
             out.append((run_dir.name, meta, run_dir))
         except Exception:
             continue
@@ -173,14 +135,17 @@ def main() -> int:
         if (prev is None) or (run_id > prev[0]):
             by_cfg_latest[cfg_key] = (run_id, run_dir)
 
+    # Trade KPIs of every matched run in one grouped pass.
+    kpis = kpi_records(run_kpis(dict(by_cfg_latest.values())))
+
     baseline_key = baseline_cfg.as_posix().lower().replace("\\", "/")
     baseline_rec = by_cfg_latest.get(baseline_key)
     baseline_run_id = ""
     baseline_trades = 0
     notes: list[str] = [args.note]
     if baseline_rec is not None:
-        baseline_run_id, baseline_run_dir = baseline_rec
-        baseline_trades = int(_compute_trade_kpis(baseline_run_dir / "trades.csv")["trades"])
+        baseline_run_id, _ = baseline_rec
+        baseline_trades = int(kpis[baseline_run_id]["trades"])
     else:
         notes.append(f"baseline missing run_meta match for {baseline_cfg.as_posix()}")
 
@@ -208,7 +173,9 @@ def main() -> int:
             continue
         run_id, run_dir = rec
         try:
-            k = _compute_trade_kpis(run_dir / "trades.csv")
+            k = kpis[run_id]
+            if k["trade_status"] == "missing_r_col":
+                raise ValueError(f"No R column found in {(run_dir / 'trades.csv').as_posix()}")
             b = _read_boot_row(run_dir)
             row.update(
                 {
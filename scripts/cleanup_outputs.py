@@ -5,14 +5,14 @@ import re
 import shutil
 from pathlib import Path
 
+from xauusd_bot.run_archive import archive_path, archive_run, iter_runs
+
 
 RUN_ID_RE = re.compile(r"\b\d{8}_\d{6}\b")
 
 
 def _run_dirs(runs_root: Path) -> list[Path]:
-    if not runs_root.exists():
-        return []
-    return sorted([p for p in runs_root.iterdir() if p.is_dir()], key=lambda p: p.name)
+    return iter_runs(runs_root)
 
 
 def _extract_run_ids_from_tree(root: Path) -> set[str]:
@@ -31,7 +31,7 @@ def _extract_run_ids_from_tree(root: Path) -> set[str]:
 
 
 def main() -> int:
-    parser = argparse.ArgumentParser(description="Prune old run directories to control disk usage.")
+    parser = argparse.ArgumentParser(description="Prune (or archive) old run directories to control disk usage.")
     parser.add_argument("--runs-root", default="outputs/runs")
     parser.add_argument("--keep-last", type=int, default=40)
     parser.add_argument("--keep-run-ids", nargs="*", default=[])
@@ -40,6 +40,11 @@ def main() -> int:
         default="",
         help="Directory tree to scan and keep run_ids referenced in text files (e.g., docs).",
     )
+    parser.add_argument(
+        "--archive",
+        action="store_true",
+        help="Pack dropped runs into <run_id>.runzip (readable in place by the report scripts) instead of deleting.",
+    )
     parser.add_argument("--dry-run", action="store_true")
     args = parser.parse_args()
 
@@ -58,6 +63,8 @@ def main() -> int:
     keep_by_age = {p.name for p in dirs[-keep_last:]} if keep_last > 0 else set()
     keep = keep_by_age | keep_ids
     drop = [p for p in dirs if p.name not in keep]
+    if args.archive:
+        drop = [p for p in drop if p.is_dir()]
 
     print(f"runs_root: {runs_root.as_posix()}")
     print(f"total_runs: {len(dirs)}")
@@ -66,7 +73,7 @@ def main() -> int:
         print(f"keep_referenced_in: {keep_ref_root.as_posix()}")
         print(f"keep_from_references_count: {len(keep_from_refs)}")
     print(f"keep_explicit: {sorted(keep_ids)}")
-    print(f"to_delete: {len(drop)}")
+    print(f"{'to_archive' if args.archive else 'to_delete'}: {len(drop)}")
 
     for p in drop:
         print(f"- {p.as_posix()}")
@@ -75,8 +82,20 @@ def main() -> int:
         print("Dry run only; nothing deleted.")
         return 0
 
+    if args.archive:
+        before = after = 0
+        for p in drop:
+            before += sum(f.stat().st_size for f in p.rglob("*") if f.is_file())
+            after += archive_run(p).stat().st_size
+        print(f"Archived {len(drop)} run directories ({before / 2**20:.1f} MiB -> {after / 2**20:.1f} MiB).")
+        return 0
+
     for p in drop:
-        shutil.rmtree(p, ignore_errors=False)
+        if p.is_dir():
+            shutil.rmtree(p, ignore_errors=False)
+        archive = archive_path(p)
+        if archive.is_file():
+            archive.unlink()
     print(f"Deleted {len(drop)} run directories.")
     return 0
 
@@ -5,6 +5,8 @@ from pathlib import Path
 
 import pandas as pd
 
+from xauusd_bot.dataset_registry import find_dataset, register_slice
+
 
 TS_ALIASES = ("timestamp", "time", "datetime", "date", "ts")
 
@@ -19,11 +21,29 @@ def _find_ts_col(columns: list[str]) -> str | None:
 
 def main() -> int:
     parser = argparse.ArgumentParser(description="Build DEV dataset from FULL history by start date.")
-    parser.add_argument("--input", required=True, help="Input FULL CSV path.")
-    parser.add_argument("--output", required=True, help="Output DEV CSV path.")
+    parser.add_argument("--input", default=None, help="Input FULL CSV path.")
+    parser.add_argument("--output", default=None, help="Output DEV CSV path.")
     parser.add_argument("--start", required=True, help="Inclusive start date, e.g. 2021-01-01.")
+    parser.add_argument("--end", default=None, help="Inclusive end (year, month or date) for --register.")
+    parser.add_argument(
+        "--register",
+        default=None,
+        metavar="NAME",
+        help="Register NAME as a time slice of --master in data/datasets.json instead of writing a CSV copy.",
+    )
+    parser.add_argument("--master", default="FULL", help="Registry dataset the --register slice is taken from.")
     args = parser.parse_args()
 
+    if args.register:
+        registry = register_slice(args.register, args.master, start=args.start, end=args.end)
+        dataset = find_dataset(args.register)
+        print(f"registry: {registry.as_posix()}")
+        print(f"dataset: {args.register} = {args.master}[{args.start}:{args.end or ''}]")
+        print(f"rows: {dataset.rows if dataset is not None else 0}")
+        return 0
+    if not args.input or not args.output:
+        parser.error("--input and --output are required unless --register is given")
+
     in_path = Path(args.input)
     out_path = Path(args.output)
     start_ts = pd.to_datetime(args.start, errors="raise")
@@ -5,8 +5,11 @@ from pathlib import Path
 
 import pandas as pd
 
+from xauusd_bot.data_loader import DEFAULT_CHUNK_ROWS
+from xauusd_bot.m5_validation import normalize_m5_stream
 
-REQUIRED_COLS = ("timestamp", "open", "high", "low", "close")
+
+BIG_GAP_MINUTES = 60.0
 
 
 def _emit(tag: str, message: str) -> None:
@@ -18,6 +21,12 @@ def main() -> int:
     parser.add_argument("--input", required=True, help="CSV path to validate.")
     parser.add_argument("--expected_tf_minutes", type=int, default=5)
     parser.add_argument("--max_report_rows", type=int, default=20)
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help="Rows per streamed chunk.")
+    parser.add_argument(
+        "--output",
+        default=None,
+        help="Optional normalized output written in the same pass (*.csv, otherwise a binary dataset directory).",
+    )
     args = parser.parse_args()
 
     in_path = Path(args.input)
@@ -26,112 +35,97 @@ def main() -> int:
         print("SUMMARY: FAIL")
         return 1
 
-    df = pd.read_csv(in_path)
-    if df.empty:
+    try:
+        report = normalize_m5_stream(
+            in_path,
+            args.output,
+            chunk_rows=args.chunk_rows,
+            expected_tf_minutes=args.expected_tf_minutes,
+            max_samples=args.max_report_rows,
+        )
+    except pd.errors.EmptyDataError:
         _emit("FAIL", "input csv is empty")
         print("SUMMARY: FAIL")
         return 1
-
-    df.columns = [str(c).strip().lower() for c in df.columns]
-    missing = [c for c in REQUIRED_COLS if c not in df.columns]
-    if missing:
-        _emit("FAIL", f"missing required columns: {missing}")
+    except ValueError as exc:
+        _emit("FAIL", str(exc))
+        print("SUMMARY: FAIL")
+        return 1
+    if report.rows_read == 0:
+        _emit("FAIL", "input csv is empty")
         print("SUMMARY: FAIL")
         return 1
 
     warn_count = 0
     fail_count = 0
 
-    ts_raw = pd.to_datetime(df["timestamp"], errors="coerce")
-    nat_count = int(ts_raw.isna().sum())
-    if nat_count > 0:
+    if report.nat_timestamps > 0:
         warn_count += 1
-        _emit("WARN", f"NaT timestamps: {nat_count}")
+        _emit("WARN", f"NaT timestamps: {report.nat_timestamps}")
     else:
         _emit("PASS", "NaT timestamps: 0")
-
-    working = df.copy()
-    working["timestamp"] = ts_raw
-    working = working.dropna(subset=["timestamp"]).copy()
-    if working.empty:
+    if report.nat_timestamps == report.rows_read:
         _emit("FAIL", "all timestamps became NaT after parse")
         print("SUMMARY: FAIL")
         return 1
 
-    dup = (
-        working.groupby("timestamp", as_index=False)
-        .size()
-        .rename(columns={"size": "count"})
-        .query("count > 1")
-        .sort_values(["count", "timestamp"], ascending=[False, True])
-    )
-    dup_count = int(dup["count"].sum() - len(dup)) if not dup.empty else 0
-    if dup_count > 0:
+    if report.duplicates > 0:
         warn_count += 1
-        _emit("WARN", f"duplicate timestamp rows: {dup_count}")
+        _emit("WARN", f"duplicate timestamp rows: {report.duplicates}")
         _emit("WARN", "duplicate samples:")
-        print(dup.head(int(args.max_report_rows)).to_string(index=False))
+        print(pd.DataFrame({"timestamp": report.duplicate_samples}).to_string(index=False))
     else:
         _emit("PASS", "duplicate timestamp rows: 0")
 
-    chrono_ok = working["timestamp"].is_monotonic_increasing
-    if chrono_ok:
+    if report.out_of_order == 0:
         _emit("PASS", "chronological order: increasing")
     else:
         warn_count += 1
-        _emit("WARN", "chronological order: not monotonic increasing")
+        _emit("WARN", f"chronological order: not monotonic increasing ({report.out_of_order} out-of-order rows)")
 
-    sorted_ts = working["timestamp"].sort_values().drop_duplicates()
-    diffs = sorted_ts.diff().dropna().dt.total_seconds().div(60.0)
-    dominant_delta = float(diffs.mode().iloc[0]) if not diffs.empty else float("nan")
-    if diffs.empty:
+    if report.dominant_delta_minutes is None:
         warn_count += 1
         _emit("WARN", "unable to compute deltas (not enough rows)")
     else:
-        _emit("PASS", f"dominant delta minutes: {dominant_delta:.2f}")
-        if round(dominant_delta) != int(args.expected_tf_minutes):
+        _emit("PASS", f"dominant delta minutes: {report.dominant_delta_minutes:.2f}")
+        if round(report.dominant_delta_minutes) != int(args.expected_tf_minutes):
             fail_count += 1
             _emit("FAIL", f"dominant delta != expected ({args.expected_tf_minutes})")
 
-    gap_df = pd.DataFrame(
-        {
-            "timestamp": sorted_ts.iloc[1:].values if len(sorted_ts) > 1 else [],
-            "gap_minutes": diffs.values if not diffs.empty else [],
-        }
-    )
-    big_gaps = gap_df[gap_df["gap_minutes"] > 60.0].sort_values("gap_minutes", ascending=False)
-    if big_gaps.empty:
+    print("gap histogram (kept rows):")
+    for label, count in report.gap_histogram.items():
+        print(f"  {label:>10}: {count}")
+    big_gaps = [gap for gap in report.largest_gaps if gap[2] > BIG_GAP_MINUTES]
+    big_gap_count = report.gaps_over(BIG_GAP_MINUTES)
+    if big_gap_count == 0:
         _emit("PASS", "gaps > 60 minutes: 0")
     else:
         warn_count += 1
-        _emit("WARN", f"gaps > 60 minutes: {len(big_gaps)}")
-        print(big_gaps.head(int(args.max_report_rows)).to_string(index=False))
-
-    for col in ("open", "high", "low", "close"):
-        working[col] = pd.to_numeric(working[col], errors="coerce")
-    nan_ohlc = int(working[["open", "high", "low", "close"]].isna().any(axis=1).sum())
-    if nan_ohlc > 0:
+        _emit("WARN", f"gaps > 60 minutes: {big_gap_count}")
+        print(
+            pd.DataFrame(big_gaps, columns=["prev_timestamp", "timestamp", "gap_minutes"])
+            .head(int(args.max_report_rows))
+            .to_string(index=False)
+        )
+
+    if report.non_numeric_ohlc > 0:
         warn_count += 1
-        _emit("WARN", f"rows with non-numeric OHLC values: {nan_ohlc}")
+        _emit("WARN", f"rows with non-numeric OHLC values: {report.non_numeric_ohlc}")
     else:
         _emit("PASS", "rows with non-numeric OHLC values: 0")
 
-    sane_mask = (
-        (working["high"] >= working[["open", "close"]].max(axis=1))
-        & (working["low"] <= working[["open", "close"]].min(axis=1))
-        & (working["high"] >= working["low"])
-    )
-    bad_ohlc = working[~sane_mask].copy()
-    if bad_ohlc.empty:
+    if report.ohlc_violations == 0:
         _emit("PASS", "OHLC sanity violations: 0")
     else:
         fail_count += 1
-        _emit("FAIL", f"OHLC sanity violations: {len(bad_ohlc)}")
-        cols = ["timestamp", "open", "high", "low", "close"]
-        print(bad_ohlc[cols].head(int(args.max_report_rows)).to_string(index=False))
-
-    _emit("PASS", f"rows_checked: {len(working)}")
-    _emit("PASS", f"range: {working['timestamp'].min()} -> {working['timestamp'].max()}")
+        _emit("FAIL", f"OHLC sanity violations: {report.ohlc_violations}")
+        print(pd.DataFrame(report.ohlc_samples).to_string(index=False))
+
+    _emit("PASS", f"rows_checked: {report.rows_read - report.nat_timestamps}")
+    _emit("PASS", f"range: {report.start_ts} -> {report.end_ts}")
+    if args.output:
+        _emit("PASS", f"normalized rows written: {report.rows_written} -> {Path(args.output).as_posix()}")
+    _emit("PASS", f"throughput: {report.rows_per_sec:,.0f} rows/sec ({report.elapsed_sec:.2f}s)")
 
     if fail_count > 0:
         summary = "FAIL"
@@ -2,12 +2,15 @@ from __future__ import annotations
 
 import argparse
 import json
+from collections.abc import Mapping
 from pathlib import Path
 from typing import Any
 
 import pandas as pd
 
 from xauusd_bot.csv_utils import read_csv_tolerant
+from xauusd_bot.funnel import FUNNEL_FILE, funnel_table, load_funnel
+from xauusd_bot.run_archive import ARCHIVE_SUFFIX, read_run_text, run_exists, run_file_exists
 
 
 DEFAULT_RUN_DIR = Path("outputs/runs/20260218_161547")
@@ -107,6 +110,26 @@ SIGNALS_STATE_CANDIDATES = (
 BLOCK_TARGETS = ("COST_FILTER_BLOCK", "SESSION_BLOCK", "SHOCK_BLOCK", "MAX_TRADES")
 RULE_TARGETS = ("HOUR_BLACKLIST", "HOUR_NOT_IN_WHITELIST", "COST_GATE_OVERRIDE_HOUR")
 
+# Upper-cased event type -> row mask, per block target / hour rule.
+BLOCK_MATCHERS = {
+    "SESSION_BLOCK": lambda s: s.str.contains("SESSION_BLOCK", regex=False),
+    "COST_FILTER_BLOCK": lambda s: s.str.contains("COST_FILTER_BLOCK", regex=False),
+    "SHOCK_BLOCK": lambda s: s.str.contains("SHOCK_BLOCK", regex=False),
+    "MAX_TRADES": lambda s: (
+        s.str.contains("MAX_TRADES_BLOCK", regex=False)
+        | s.str.contains("BLOCKED_MAX_TRADES_DAY", regex=False)
+        | s.str.contains("MAX_TRADES", regex=False)
+    ),
+}
+RULE_MATCHERS = {
+    "HOUR_BLACKLIST": lambda s: s.str.contains("HOUR_BLACKLIST", regex=False),
+    "HOUR_NOT_IN_WHITELIST": lambda s: s.str.contains("HOUR_NOT_IN_WHITELIST", regex=False),
+    "COST_GATE_OVERRIDE_HOUR": lambda s: (
+        s.str.contains("COST_GATE_OVERRIDE_HOUR", regex=False)
+        | s.str.contains("COST_FILTER_BLOCK_OVERRIDE_HOUR", regex=False)
+    ),
+}
+
 
 def _to_num(series: pd.Series) -> pd.Series:
     return pd.to_numeric(series, errors="coerce")
@@ -276,14 +299,7 @@ def _build_rules_by_hour(
         return pd.DataFrame(columns=cols)
     temp["hour_utc"] = temp["hour_utc"].astype(int)
 
-    matchers = {
-        "HOUR_BLACKLIST_count": lambda s: s.str.contains("HOUR_BLACKLIST", regex=False),
-        "HOUR_NOT_IN_WHITELIST_count": lambda s: s.str.contains("HOUR_NOT_IN_WHITELIST", regex=False),
-        "COST_GATE_OVERRIDE_HOUR_count": lambda s: (
-            s.str.contains("COST_GATE_OVERRIDE_HOUR", regex=False)
-            | s.str.contains("COST_FILTER_BLOCK_OVERRIDE_HOUR", regex=False)
-        ),
-    }
+    matchers = {f"{rule}_count": matcher for rule, matcher in RULE_MATCHERS.items()}
     base = pd.DataFrame({"hour_utc": list(range(24))})
     for out_col, matcher in matchers.items():
         mask = matcher(temp["_event_text"])
@@ -362,6 +378,132 @@ def _detect_opportunities(signals: pd.DataFrame, events: pd.DataFrame) -> tuple[
     return 0, "no_data"
 
 
+def _funnel_counts(funnel: dict[str, Any], name: str, label: str) -> pd.DataFrame:
+    """`text` (upper-cased `label`), `hour_utc`, `count` rows of one funnel.json table, summed over other labels."""
+    table = funnel_table(funnel, name)
+    table["text"] = table[label].str.upper()
+    return table.groupby(["text", "hour_utc"], as_index=False)["count"].sum()
+
+
+def _sum_matching(counts: pd.DataFrame, mask: pd.Series) -> int:
+    return int(counts.loc[mask, "count"].sum())
+
+
+def _hourly_sum_0_23(counts: pd.DataFrame, mask: pd.Series, out_col: str) -> pd.DataFrame:
+    by_hour = counts.loc[mask].groupby("hour_utc")["count"].sum()
+    return pd.DataFrame({"hour_utc": list(range(24)), out_col: [int(by_hour.get(h, 0)) for h in range(24)]})
+
+
+def _detect_opportunities_from_counts(signal_counts: pd.DataFrame, event_counts: pd.DataFrame) -> tuple[int, str]:
+    """Same denominator rules as `_detect_opportunities`, applied to engine counters instead of CSV rows."""
+    if not signal_counts.empty:
+        et = signal_counts["text"]
+        n_entry = _sum_matching(
+            signal_counts,
+            et.str.contains("ENTRY_ATTEMPT", regex=False) | et.str.contains("ENTRY_CHECK", regex=False),
+        )
+        if n_entry > 0:
+            return n_entry, "signals.event_type contains ENTRY_ATTEMPT/ENTRY_CHECK"
+        n_sig = _sum_matching(signal_counts, et.str.contains("SIGNAL_DETECTED", regex=False))
+        if n_sig > 0:
+            return n_sig, "signals.event_type == SIGNAL_DETECTED"
+        n_sig_fb = _sum_matching(
+            signal_counts,
+            et.str.contains("SIGNAL_CHECK", regex=False) | et.str.contains("SIGNAL_TRIGGER", regex=False),
+        )
+        if n_sig_fb > 0:
+            return n_sig_fb, "signals.event_type contains SIGNAL_CHECK/SIGNAL_TRIGGER"
+        n_generic = _sum_matching(signal_counts, et.str.contains("SIGNAL", regex=False))
+        if n_generic > 0:
+            return n_generic, "signals.event_type contains SIGNAL"
+
+    if not event_counts.empty:
+        et = event_counts["text"]
+        n = _sum_matching(
+            event_counts,
+            et.str.contains("ENTRY_ATTEMPT", regex=False)
+            | et.str.contains("ENTRY_CHECK", regex=False)
+            | et.str.contains("SIGNAL", regex=False),
+        )
+        if n > 0:
+            return n, "events.event_type contains ENTRY_/SIGNAL"
+
+    if not signal_counts.empty:
+        return int(signal_counts["count"].sum()), "len(signals)"
+    if not event_counts.empty:
+        return int(event_counts["count"].sum()), "len(events)"
+    return 0, "no_data"
+
+
+def _funnel_signals_by_hour(
+    signal_counts: pd.DataFrame,
+    event_counts: pd.DataFrame,
+    warnings: list[str],
+) -> tuple[pd.DataFrame, str]:
+    signal_mask = signal_counts["text"] == "SIGNAL_DETECTED"
+    if _sum_matching(signal_counts, signal_mask) > 0:
+        return _hourly_sum_0_23(signal_counts, signal_mask, "opportunities"), "signals.event_type == SIGNAL_DETECTED"
+    warnings.append("Signals timestamp unavailable/invalid for SIGNAL_DETECTED; fallback to events for hourly opportunities.")
+    event_mask = event_counts["text"] == "SIGNAL_DETECTED"
+    if _sum_matching(event_counts, event_mask) > 0:
+        return _hourly_sum_0_23(event_counts, event_mask, "opportunities"), "events.event_type == SIGNAL_DETECTED"
+    warnings.append("No valid hourly SIGNAL_DETECTED rows found for G_signals_by_hour_utc.")
+    return pd.DataFrame(columns=["hour_utc", "opportunities"]), "no_hourly_signal_detected"
+
+
+def _funnel_blocks_by_hour(
+    event_counts: pd.DataFrame,
+    opportunities_by_hour: pd.DataFrame,
+    warnings: list[str],
+) -> pd.DataFrame:
+    cols = ["hour_utc", "opportunities", *(f"{name}_{kind}" for name in BLOCK_MATCHERS for kind in ("count", "pct"))]
+    if event_counts.empty:
+        warnings.append("Cannot build F_blocks_by_hour_utc: events dataframe is empty.")
+        return pd.DataFrame(columns=cols)
+    base = pd.DataFrame({"hour_utc": list(range(24))})
+    if opportunities_by_hour.empty:
+        base["opportunities"] = 0
+    else:
+        base = base.merge(opportunities_by_hour[["hour_utc", "opportunities"]], on="hour_utc", how="left")
+        base["opportunities"] = pd.to_numeric(base["opportunities"], errors="coerce").fillna(0).astype(int)
+    for block_name, matcher in BLOCK_MATCHERS.items():
+        counts = _hourly_sum_0_23(event_counts, matcher(event_counts["text"]), f"{block_name}_count")
+        base = base.merge(counts, on="hour_utc", how="left")
+        base[f"{block_name}_pct"] = base[f"{block_name}_count"] / base["opportunities"].replace(0, pd.NA)
+    return base[cols]
+
+
+def _funnel_rules_by_hour(event_counts: pd.DataFrame, warnings: list[str]) -> pd.DataFrame:
+    cols = ["hour_utc", "total_blocks", *(f"{rule}_count" for rule in RULE_MATCHERS)]
+    if event_counts.empty:
+        warnings.append("Cannot build P_rules_by_hour_utc: events dataframe is empty.")
+        return pd.DataFrame(columns=cols)
+    base = pd.DataFrame({"hour_utc": list(range(24))})
+    for rule, matcher in RULE_MATCHERS.items():
+        base = base.merge(_hourly_sum_0_23(event_counts, matcher(event_counts["text"]), f"{rule}_count"), on="hour_utc")
+    base["total_blocks"] = base[[f"{rule}_count" for rule in RULE_MATCHERS]].sum(axis=1)
+    return base[cols]
+
+
+def _funnel_signals_state_counts(funnel: dict[str, Any]) -> pd.DataFrame:
+    cols = ["scope", "hour_utc", "state", "count"]
+    table = funnel_table(funnel, "signals")
+    if table.empty:
+        return pd.DataFrame(columns=cols)
+    table["state"] = table["state"].replace("", "UNKNOWN")
+    global_df = table.groupby("state", as_index=False)["count"].sum()
+    global_df = global_df.sort_values(["count", "state"], ascending=[False, True]).reset_index(drop=True)
+    global_df["scope"] = "global"
+    global_df["hour_utc"] = pd.NA
+    hourly_df = table.groupby(["hour_utc", "state"], as_index=False)["count"].sum()
+    hourly_df = hourly_df.sort_values(["hour_utc", "count", "state"], ascending=[True, False, True])
+    hourly_df["scope"] = "hourly"
+    out = pd.concat([global_df[cols], hourly_df[cols]], ignore_index=True)
+    out["hour_utc"] = pd.to_numeric(out["hour_utc"], errors="coerce").astype("Int64")
+    out["count"] = out["count"].astype(int)
+    return out
+
+
 def _build_perf_table(df: pd.DataFrame, group_cols: list[str], r_col: str) -> pd.DataFrame:
     if df.empty:
         cols = group_cols + ["pf", "expectancy_R", "winrate", "avg_R", "trades"]
@@ -617,18 +759,7 @@ def _build_blocks_by_hour(
     temp = pd.DataFrame({"hour_utc": hours, "_event_text": text}).dropna(subset=["hour_utc"])
     temp["hour_utc"] = temp["hour_utc"].astype(int)
 
-    block_matchers = {
-        "SESSION_BLOCK": lambda s: s.str.contains("SESSION_BLOCK", regex=False),
-        "COST_FILTER_BLOCK": lambda s: s.str.contains("COST_FILTER_BLOCK", regex=False),
-        "SHOCK_BLOCK": lambda s: s.str.contains("SHOCK_BLOCK", regex=False),
-        "MAX_TRADES": lambda s: (
-            s.str.contains("MAX_TRADES_BLOCK", regex=False)
-            | s.str.contains("BLOCKED_MAX_TRADES_DAY", regex=False)
-            | s.str.contains("MAX_TRADES", regex=False)
-        ),
-    }
-
-    for block_name, matcher in block_matchers.items():
+    for block_name, matcher in BLOCK_MATCHERS.items():
         if temp.empty:
             counts = pd.DataFrame({"hour_utc": list(range(24)), f"{block_name}_count": [0] * 24})
         else:
@@ -892,9 +1023,9 @@ def _resolve_regime_segment_end_ts(
             return pd.Timestamp(e_max), "events_max_ts"
 
     run_meta = run_dir / "run_meta.json"
-    if run_meta.exists():
+    if run_file_exists(run_meta):
         try:
-            meta = json.loads(run_meta.read_text(encoding="utf-8"))
+            meta = json.loads(read_run_text(run_meta))
             data_path_raw = meta.get("data_path")
             if isinstance(data_path_raw, str) and data_path_raw.strip():
                 data_path = Path(data_path_raw)
@@ -1127,14 +1258,17 @@ def _build_signals_by_regime(
     return out[cols]
 
 
-def diagnose_run(run_dir: Path) -> int:
+def diagnose_run(run_dir: Path, tables: Mapping[str, pd.DataFrame] | None = None) -> int:
+    """Write the diagnostics of `run_dir`. `tables` may hold the trades/fills/events/signals frames a caller
+    already has in memory (e.g. a backtest suite result); only the missing ones are read from the run."""
+    tables = tables or {}
     trades_path = run_dir / "trades.csv"
     fills_path = run_dir / "fills.csv"
     events_path = run_dir / "events.csv"
     signals_path = run_dir / "signals.csv"
 
-    required = [trades_path]
-    missing = [str(p) for p in required if not p.exists()]
+    required = [] if "trades" in tables else [trades_path]
+    missing = [str(p) for p in required if not run_file_exists(p)]
     if missing:
         print("ERROR: Missing required CSV files:")
         for p in missing:
@@ -1142,10 +1276,16 @@ def diagnose_run(run_dir: Path) -> int:
         return 2
 
     warnings: list[str] = []
-    trades = read_csv_tolerant(trades_path, label="diagnose.trades", warnings=warnings, required=True)
-    fills = read_csv_tolerant(fills_path, label="diagnose.fills", warnings=warnings)
-    events = read_csv_tolerant(events_path, label="diagnose.events", warnings=warnings)
-    signals = read_csv_tolerant(signals_path, label="diagnose.signals", warnings=warnings)
+
+    def _table(name: str, path: Path, required: bool = False) -> pd.DataFrame:
+        if name in tables:
+            return tables[name]
+        return read_csv_tolerant(path, label=f"diagnose.{name}", warnings=warnings, required=required)
+
+    trades = _table("trades", trades_path, required=True)
+    fills = _table("fills", fills_path)
+    events = _table("events", events_path)
+    signals = _table("signals", signals_path)
 
     trades_prepared, found = _prepare_trade_base(trades, warnings)
     trades_cost = _build_cost_r(trades_prepared, fills, found, warnings)
@@ -1204,10 +1344,25 @@ def diagnose_run(run_dir: Path) -> int:
     signals_event_col = _find_first_col(signals, EVENT_TYPE_CANDIDATES)
     signals_state_col = _find_first_col(signals, SIGNALS_STATE_CANDIDATES)
     event_col = _find_first_col(events, EVENT_TYPE_CANDIDATES)
-    block_counts = _extract_block_counts(events, event_col)
-    rule_counts = _extract_rule_counts(events, event_col)
-
-    opportunities, denom_src = _detect_opportunities(signals, events)
+    # Engine counters cover every logged event and signal row, so blocks/opportunities need no CSV row scans.
+    funnel = load_funnel(run_dir / FUNNEL_FILE)
+    if funnel is not None:
+        verbosity = funnel.get("log_verbosity") or {}
+        levels = [verbosity.get("default", "full"), *(verbosity.get("events") or {}).values()]
+        if any(level != "full" for level in [*levels, *(verbosity.get("signals") or {}).values()]):
+            warnings.append(
+                "events/signals CSVs were thinned by log_verbosity; tables E/F/G/J/O/P use funnel.json, "
+                "row-based tables (K-N) may be incomplete."
+            )
+        event_counts = _funnel_counts(funnel, "events", "event_type")
+        signal_counts = _funnel_counts(funnel, "signals", "event_type")
+        block_counts = {k: _sum_matching(event_counts, m(event_counts["text"])) for k, m in BLOCK_MATCHERS.items()}
+        rule_counts = {k: _sum_matching(event_counts, m(event_counts["text"])) for k, m in RULE_MATCHERS.items()}
+        opportunities, denom_src = _detect_opportunities_from_counts(signal_counts, event_counts)
+    else:
+        block_counts = _extract_block_counts(events, event_col)
+        rule_counts = _extract_rule_counts(events, event_col)
+        opportunities, denom_src = _detect_opportunities(signals, events)
     e_rows: list[dict[str, Any]] = []
     for key in BLOCK_TARGETS:
         count = int(block_counts.get(key, 0))
@@ -1237,31 +1392,40 @@ def diagnose_run(run_dir: Path) -> int:
         )
     o_df = pd.DataFrame(o_rows).sort_values("count", ascending=False).reset_index(drop=True)
 
-    g_df, g_source = _build_signals_by_hour(
-        signals_hourly=signals_hourly,
-        events_hourly=events_hourly,
-        signals_event_col=signals_event_col,
-        events_event_col=event_col,
-        warnings=warnings,
-    )
+    if funnel is not None:
+        g_df, g_source = _funnel_signals_by_hour(signal_counts, event_counts, warnings)
+    else:
+        g_df, g_source = _build_signals_by_hour(
+            signals_hourly=signals_hourly,
+            events_hourly=events_hourly,
+            signals_event_col=signals_event_col,
+            events_event_col=event_col,
+            warnings=warnings,
+        )
     if not g_df.empty:
         g_df["hour_utc"] = pd.to_numeric(g_df["hour_utc"], errors="coerce").astype("Int64")
         g_df["opportunities"] = pd.to_numeric(g_df["opportunities"], errors="coerce").fillna(0).astype(int)
 
-    f_df = _build_blocks_by_hour(
-        events_hourly=events_hourly,
-        event_col=event_col,
-        opportunities_by_hour=g_df,
-        warnings=warnings,
-    )
+    if funnel is not None:
+        f_df = _funnel_blocks_by_hour(event_counts, g_df, warnings)
+    else:
+        f_df = _build_blocks_by_hour(
+            events_hourly=events_hourly,
+            event_col=event_col,
+            opportunities_by_hour=g_df,
+            warnings=warnings,
+        )
     if not f_df.empty:
         f_df["hour_utc"] = pd.to_numeric(f_df["hour_utc"], errors="coerce").astype("Int64")
         f_df["opportunities"] = pd.to_numeric(f_df["opportunities"], errors="coerce").fillna(0).astype(int)
-    p_df = _build_rules_by_hour(
-        events_hourly=events_hourly,
-        event_col=event_col,
-        warnings=warnings,
-    )
+    if funnel is not None:
+        p_df = _funnel_rules_by_hour(event_counts, warnings)
+    else:
+        p_df = _build_rules_by_hour(
+            events_hourly=events_hourly,
+            event_col=event_col,
+            warnings=warnings,
+        )
     if not p_df.empty:
         p_df["hour_utc"] = pd.to_numeric(p_df["hour_utc"], errors="coerce").astype("Int64")
         p_df["total_blocks"] = pd.to_numeric(p_df["total_blocks"], errors="coerce").fillna(0).astype(int)
@@ -1284,11 +1448,14 @@ def diagnose_run(run_dir: Path) -> int:
         warnings.append("Missing `regime_at_entry` in trades; I_perf_by_regime_at_entry generated as empty.")
         i_df = pd.DataFrame(columns=["regime_at_entry", "pf", "expectancy_R", "winrate", "avg_R", "trades"])
 
-    j_df = _build_signals_state_counts(
-        signals_hourly=signals_hourly,
-        state_col=signals_state_col,
-        warnings=warnings,
-    )
+    if funnel is not None:
+        j_df = _funnel_signals_state_counts(funnel)
+    else:
+        j_df = _build_signals_state_counts(
+            signals_hourly=signals_hourly,
+            state_col=signals_state_col,
+            warnings=warnings,
+        )
     k_df = _build_regime_event_counts(
         events_hourly=events_hourly,
         event_col=event_col,
@@ -1369,7 +1536,7 @@ def diagnose_run(run_dir: Path) -> int:
         f"- events timestamp column used: `{events_ts_col}` (parsed as UTC; naive assumed UTC)",
         f"- session bucket source: `{'trades column ' + found['session_col'] if found['session_col'] else 'derived by hour (ASIA 00-07, MODE_SESSION 07-17, OFF_SESSION 17-24 UTC)'}`",
         f"- risk denominator source: `{found['risk_col'] if found['risk_col'] else 'abs(entry-sl)'}`",
-        f"- event type source for blocks: `{event_col}`",
+        f"- event type source for blocks: `{FUNNEL_FILE + ' (engine counters)' if funnel is not None else event_col}`",
         f"- opportunities denominator: `{opportunities}` from `{denom_src}`",
         f"- opportunities by hour source (G/F): `{g_source}`",
         f"- regime enter events found (L/M/N): `{len(regime_enters_df)}`",
@@ -1545,7 +1712,9 @@ def main(argv: list[str] | None = None) -> int:
     parser = build_parser()
     args = parser.parse_args(argv)
     run_dir = Path(args.run_dir)
-    if not run_dir.exists():
+    if run_dir.name.endswith(ARCHIVE_SUFFIX):
+        run_dir = run_dir.with_name(run_dir.name[: -len(ARCHIVE_SUFFIX)])
+    if not run_exists(run_dir):
         print(f"ERROR: run_dir not found: {run_dir.as_posix()}")
         return 2
     return diagnose_run(run_dir)
@@ -8,40 +8,14 @@ from typing import Any
 import pandas as pd
 import yaml
 
-
-R_COL_CANDIDATES = (
-    "r_multiple",
-    "R_net",
-    "r_net",
-    "net_R",
-    "net_r",
-    "pnl_R",
-    "pnl_r",
-)
-
-TS_COL_CANDIDATES = (
-    "entry_time",
-    "open_time",
-    "entry_ts",
-    "timestamp",
-    "time",
-    "ts",
-)
+from xauusd_bot.kpi import retention_pct
+from xauusd_bot.run_archive import read_run_csv, run_file_exists
 
 
 def _norm_path(value: str | Path) -> str:
     return str(value).replace("\\", "/").strip().lower()
 
 
-def _find_col(df: pd.DataFrame, candidates: tuple[str, ...]) -> str | None:
-    lowered = {str(c).strip().lower(): c for c in df.columns}
-    for cand in candidates:
-        col = lowered.get(str(cand).lower())
-        if col is not None:
-            return col
-    return None
-
-
 def _as_bool(value: Any) -> bool | None:
     if value is None or pd.isna(value):
         return None
@@ -65,91 +39,6 @@ def _safe_float(value: Any) -> float:
     return out
 
 
-def _profit_factor(r: pd.Series) -> float:
-    gross_win = float(r[r > 0].sum())
-    gross_loss = float((-r[r < 0]).sum())
-    if gross_loss <= 0.0:
-        return float("inf") if gross_win > 0 else math.nan
-    return gross_win / gross_loss
-
-
-def _max_drawdown_r(r: pd.Series) -> float:
-    if r.empty:
-        return math.nan
-    cum = r.cumsum()
-    peak = cum.cummax()
-    dd = peak - cum
-    return float(dd.max()) if not dd.empty else math.nan
-
-
-def _retention_vs_baseline(trades: int, baseline_trades: int) -> float:
-    if baseline_trades <= 0:
-        return math.nan
-    return float(100.0 * float(trades) / float(baseline_trades))
-
-
-def load_trade_kpis(run_dir: Path) -> dict[str, Any]:
-    trades_path = run_dir / "trades.csv"
-    out: dict[str, Any] = {
-        "trade_status": "ok",
-        "trades": 0,
-        "winrate": math.nan,
-        "expectancy_R": math.nan,
-        "median_R": math.nan,
-        "sum_R": math.nan,
-        "pf": math.nan,
-        "max_drawdown_r": math.nan,
-        "active_months": math.nan,
-        "active_years": math.nan,
-        "r_col": "",
-        "ts_col": "",
-    }
-    if not trades_path.exists():
-        out["trade_status"] = "missing_trades"
-        return out
-
-    trades = pd.read_csv(trades_path)
-    if trades.empty:
-        out["trade_status"] = "empty_trades"
-        return out
-
-    r_col = _find_col(trades, R_COL_CANDIDATES)
-    if r_col is None:
-        out["trade_status"] = "missing_r_col"
-        return out
-
-    r = pd.to_numeric(trades[r_col], errors="coerce").dropna()
-    if r.empty:
-        out["trade_status"] = "invalid_r_col"
-        return out
-
-    ts_col = _find_col(trades, TS_COL_CANDIDATES)
-    active_months = math.nan
-    active_years = math.nan
-    if ts_col is not None:
-        ts = pd.to_datetime(trades[ts_col], errors="coerce", utc=True).dropna()
-        if not ts.empty:
-            active_months = float(ts.dt.to_period("M").nunique())
-            active_years = float(ts.dt.year.nunique())
-
-    out.update(
-        {
-            "trades": int(r.size),
-            "winrate": float((r > 0).mean()),
-            "expectancy_R": float(r.mean()),
-            "median_R": float(r.median()),
-            "sum_R": float(r.sum()),
-            "pf": float(_profit_factor(r)),
-            "max_drawdown_r": float(_max_drawdown_r(r)),
-            "active_months": active_months,
-            "active_years": active_years,
-            "r_col": str(r_col),
-            "ts_col": str(ts_col) if ts_col is not None else "",
-        }
-    )
-    return out
-
-
 def load_boot_ci(run_dir: Path) -> dict[str, Any]:
     p = run_dir / "diagnostics" / "BOOT_expectancy_ci.csv"
     out: dict[str, Any] = {
@@ -159,11 +48,11 @@ def load_boot_ci(run_dir: Path) -> dict[str, Any]:
         "crosses_zero": None,
         "boot_resamples_used": math.nan,
     }
-    if not p.exists():
+    if not run_file_exists(p):
         out["boot_status"] = "missing_boot"
         return out
 
-    df = pd.read_csv(p)
+    df = read_run_csv(p)
     if df.empty:
         out["boot_status"] = "empty_boot"
         return out
@@ -517,7 +406,7 @@ def merge_metric_payload(
     merged.update(boot_kpis)
     merged.update(cost_kpis)
     merged.update(temporal_kpis)
-    merged["retention_vs_b4_pct"] = _retention_vs_baseline(
+    merged["retention_vs_b4_pct"] = retention_pct(
         trades=int(merged.get("trades", 0) or 0),
         baseline_trades=int(baseline_trades),
     )
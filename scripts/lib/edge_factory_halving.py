@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import math
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from xauusd_bot.configuration import load_config
+from xauusd_bot.engine import SimulationEngine
+from xauusd_bot.logger import CsvLogger
+
+
+PRUNE_MODES = ("sound", "projected")
+
+
+def parse_rungs(text: str) -> list[float]:
+    """Parse "0.25,0.5" into increasing prefix fractions of the trading days; empty text disables screening."""
+    out: list[float] = []
+    for part in str(text).split(","):
+        part = part.strip()
+        if not part:
+            continue
+        value = float(part)
+        if not (0.0 < value < 1.0):
+            raise ValueError(f"Rung fractions must be in (0, 1): {part}")
+        out.append(value)
+    if out != sorted(set(out)):
+        raise ValueError(f"Rung fractions must be strictly increasing: {text}")
+    return out
+
+
+def required_trades(stage_cfg: dict[str, Any], baseline_trades: int) -> int:
+    """Smallest final trade count that can pass the stage's min_trades and retention gates."""
+    need = 0
+    min_trades = stage_cfg.get("min_trades")
+    if min_trades is not None:
+        need = max(need, math.ceil(float(min_trades)))
+    min_ret = stage_cfg.get("min_retention_vs_baseline_pct")
+    if min_ret is not None and baseline_trades > 0:
+        need = max(need, math.ceil(float(min_ret) * baseline_trades / 100.0 - 1e-9))
+    return need
+
+
+def trading_days(timestamps: pd.Series, bar_delta: pd.Timedelta) -> np.ndarray:
+    """Sorted distinct bar-open days, the keys the engine counts `max_trades_per_day` against."""
+    opens = pd.to_datetime(timestamps) - bar_delta
+    return np.unique(opens.dt.normalize().to_numpy(dtype="datetime64[ns]"))
+
+
+@dataclass(slots=True)
+class GateScreen:
+    """Engine stop check that prunes a candidate whose stage gates can no longer pass.
+
+    Sound checks run at every day boundary and only use bounds the rest of the run cannot undo: drawdown in R never
+    shrinks, and `max_trades_per_day` caps how many trades the remaining days can add (not available for V3, whose cap
+    is per session). `projected` mode also prunes at each rung on linear trade projection and on PF/expectancy so far,
+    which is faster but not exact. Reaching the last rung alive ends the screen with `promoted` set.
+    """
+
+    stage_cfg: dict[str, Any]
+    days: np.ndarray
+    rung_days: list[tuple[float, np.datetime64]]
+    need_trades: int
+    mode: str = "sound"
+    pruned_reason: str | None = None
+    promoted: bool = False
+    snapshots: list[dict[str, Any]] = field(default_factory=list)
+    _seen: int = 0
+    _cum: float = 0.0
+    _peak: float = -math.inf
+    _max_dd: float = 0.0
+    _next_rung: int = 0
+
+    def __call__(self, engine: SimulationEngine, open_ts: pd.Timestamp) -> str | None:
+        r_values = engine.closed_trade_r
+        # Same running drawdown as `kpi.max_drawdown_r`: the peak starts at the first trade.
+        for value in r_values[self._seen :]:
+            self._cum += value
+            self._peak = max(self._peak, self._cum)
+            self._max_dd = max(self._max_dd, self._peak - self._cum)
+        self._seen = len(r_values)
+        day = np.datetime64(open_ts.normalize().to_datetime64(), "ns")
+        opened = int(sum(engine.trades_opened_per_day.values()))
+        remaining_days = len(self.days) - int(np.searchsorted(self.days, day, side="left"))
+        upper = None if engine.enable_strategy_v3 else opened + int(engine.max_trades_per_day) * remaining_days
+
+        day_label = pd.Timestamp(day).date()
+        max_dd = self.stage_cfg.get("max_drawdown_r")
+        if max_dd is not None and self._max_dd > float(max_dd):
+            return self._prune(f"max_drawdown_r={self._max_dd:.4f} > {float(max_dd):.4f} before {day_label}")
+        if upper is not None and upper < self.need_trades:
+            return self._prune(f"trades can reach at most {upper} < {self.need_trades} required (from {day_label})")
+
+        if self._next_rung >= len(self.rung_days) or day < self.rung_days[self._next_rung][1]:
+            return None
+        fraction, _ = self.rung_days[self._next_rung]
+        self._next_rung += 1
+        snapshot = self._snapshot(fraction, day, opened, upper, r_values)
+        self.snapshots.append(snapshot)
+        if self.mode == "projected":
+            reason = self._projected_reason(snapshot)
+            if reason is not None:
+                return self._prune(f"projected at rung {fraction:.2f}: {reason}")
+        if self._next_rung >= len(self.rung_days):
+            self.promoted = True
+            return f"screen passed rung {fraction:.2f}"
+        return None
+
+    def _prune(self, reason: str) -> str:
+        self.pruned_reason = reason
+        return reason
+
+    def _snapshot(
+        self,
+        fraction: float,
+        day: np.datetime64,
+        opened: int,
+        upper: int | None,
+        r_values: list[float],
+    ) -> dict[str, Any]:
+        r = np.asarray(r_values, dtype="float64")
+        gross_loss = float(-r[r < 0].sum())
+        gross_win = float(r[r > 0].sum())
+        if gross_loss > 0:
+            pf = gross_win / gross_loss
+        else:
+            pf = math.inf if gross_win > 0 else math.nan
+        return {
+            "rung": fraction,
+            "day": str(pd.Timestamp(day).date()),
+            "days_done": int(np.searchsorted(self.days, day, side="left")),
+            "trades_opened": opened,
+            "trades_closed": int(r.size),
+            "trades_upper_bound": upper,
+            "pf": pf,
+            "expectancy_R": float(r.mean()) if r.size else math.nan,
+            "max_drawdown_r": self._max_dd,
+        }
+
+    def _projected_reason(self, snapshot: dict[str, Any]) -> str | None:
+        done = max(int(snapshot["days_done"]), 1)
+        projected = float(snapshot["trades_opened"]) * len(self.days) / done
+        if projected < self.need_trades:
+            return f"projected trades {projected:.1f} < {self.need_trades}"
+        min_pf = self.stage_cfg.get("min_pf")
+        if min_pf is not None and snapshot["pf"] < float(min_pf):
+            return f"pf={snapshot['pf']:.4f} < {float(min_pf):.4f}"
+        min_exp = self.stage_cfg.get("min_expectancy_r")
+        if min_exp is not None and snapshot["expectancy_R"] < float(min_exp):
+            return f"expectancy_R={snapshot['expectancy_R']:.4f} < {float(min_exp):.4f}"
+        return None
+
+
+def screen_candidate(
+    config_path: Path,
+    data: pd.DataFrame,
+    stage_cfg: dict[str, Any],
+    *,
+    rungs: list[float],
+    baseline_trades: int = 0,
+    mode: str = "sound",
+) -> dict[str, Any]:
+    """Run one candidate over the shortest prefix that covers `rungs`, stopping early once its gates are lost.
+
+    Prefix runs share every trade closed before the cut with the full run, so sound pruning never drops a candidate
+    the full run would pass. Artifacts go to a scratch directory; only the verdict and rung snapshots are returned.
+    """
+    if mode not in PRUNE_MODES:
+        raise ValueError(f"Unknown prune mode `{mode}`; expected one of {PRUNE_MODES}")
+    started = time.perf_counter()
+    cfg = load_config(config_path)
+    cfg["progress_every_days"] = 0
+    cfg["stdout_trade_events"] = False
+
+    deltas = data["timestamp"].diff().dropna()
+    bar_delta = deltas.median() if len(deltas) and deltas.median() > pd.Timedelta(0) else pd.Timedelta(minutes=5)
+    days = trading_days(data["timestamp"], bar_delta)
+    rung_days = [(fraction, days[min(math.ceil(fraction * len(days)), len(days) - 1)]) for fraction in rungs]
+    screen = GateScreen(
+        stage_cfg=stage_cfg,
+        days=days,
+        rung_days=rung_days,
+        need_trades=required_trades(stage_cfg, baseline_trades),
+        mode=mode,
+    )
+    # Bars up to the end of the last rung day are enough: the stop check fires on that day's first bar.
+    cut = pd.Timestamp(rung_days[-1][1]) + pd.Timedelta(days=1) + bar_delta if rung_days else None
+    window = data if cut is None else data.loc[data["timestamp"] < cut]
+    with tempfile.TemporaryDirectory(prefix="edge_screen_") as tmp:
+        cfg["output_dir"] = tmp
+        engine = SimulationEngine(config=cfg, logger=CsvLogger(output_dir=Path(tmp), reset=True))
+        summary = engine.run(window, stop_check=screen)
+
+    if screen.pruned_reason is not None:
+        status = "pruned"
+        note = screen.pruned_reason
+    else:
+        status = "promoted"
+        note = "" if screen.promoted else f"screen ended at {summary['sim_end_ts']} before the last rung"
+    return {
+        "candidate": config_path.stem,
+        "config": config_path.as_posix(),
+        "status": status,
+        "note": note,
+        "mode": mode,
+        "need_trades": screen.need_trades,
+        "rungs": screen.snapshots,
+        "screen_sec": round(time.perf_counter() - started, 3),
+    }
@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+
+JOB_OK = "ok"
+JOB_FAILED = "failed"
+JOB_TIMEOUT = "timeout"
+JOB_STALLED = "stalled"
+JOB_SKIPPED = "skipped"
+JOB_RESUMED = "resumed"
+
+# A command list, or a callable that builds it from the finished dependencies (None skips the job).
+CommandSpec = list[str] | Callable[[dict[str, "JobResult"]], "list[str] | None"]
+
+
+@dataclass(slots=True)
+class Job:
+    name: str
+    cmd: CommandSpec
+    deps: tuple[str, ...] = ()
+    after: tuple[str, ...] = ()
+    timeout_sec: float | None = None
+    retries: int = 0
+    retry_cmd: list[str] | None = None
+    retry_delay_sec: float = 0.0
+    # Kill the job when `heartbeat` (e.g. a run's progress.jsonl) has not been written for `stall_sec` seconds.
+    heartbeat: Path | None = None
+    stall_sec: float | None = None
+
+
+@dataclass(slots=True)
+class JobResult:
+    name: str
+    status: str
+    returncode: int | None = None
+    attempts: int = 0
+    stdout: str = ""
+    stderr: str = ""
+    cmd: list[str] = field(default_factory=list)
+    elapsed_sec: float = 0.0
+    note: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return self.status in (JOB_OK, JOB_RESUMED)
+
+
+def load_completed_jobs(progress_path: Path) -> dict[str, dict[str, Any]]:
+    """Latest successful record per job name in a progress JSONL; other record kinds are ignored."""
+    done: dict[str, dict[str, Any]] = {}
+    if not progress_path.exists():
+        return done
+    for raw in progress_path.read_text(encoding="utf-8", errors="replace").splitlines():
+        try:
+            rec = json.loads(raw)
+        except Exception:
+            continue
+        name = str(rec.get("job", "")).strip() if isinstance(rec, dict) else ""
+        if not name:
+            continue
+        if str(rec.get("status", "")) == JOB_OK:
+            done[name] = rec
+        else:
+            done.pop(name, None)
+    return done
+
+
+def _check_graph(jobs: list[Job]) -> None:
+    names = [job.name for job in jobs]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate job names: {sorted({n for n in names if names.count(n) > 1})}")
+    known = set(names)
+    for job in jobs:
+        missing = [dep for dep in (*job.deps, *job.after) if dep not in known]
+        if missing:
+            raise ValueError(f"Job `{job.name}` depends on unknown jobs: {missing}")
+    deps = {job.name: {*job.deps, *job.after} for job in jobs}
+    while deps:
+        ready = [name for name, pending in deps.items() if not pending]
+        if not ready:
+            raise ValueError(f"Job graph has a cycle among: {sorted(deps)}")
+        for name in ready:
+            deps.pop(name)
+        for pending in deps.values():
+            pending.difference_update(ready)
+
+
+class JobGraphRunner:
+    """Run a DAG of subprocess jobs with a bounded pool, per-job timeouts, retries and resumable progress.
+
+    Each finished job appends one JSON line (`job`, `status`, `returncode`, ...) to `progress_path`. With
+    `resume=True`, jobs whose latest record there is `ok` for the same command are not rerun; a callable `cmd`
+    is built first and compared the same way.
+    Jobs in `deps` must succeed or the dependent is skipped; jobs in `after` only need to have finished.
+    A job with `stall_sec` is killed (status `stalled`, retried like a failure) once its heartbeat file goes quiet.
+    """
+
+    def __init__(
+        self,
+        jobs: Iterable[Job],
+        *,
+        max_parallel: int = 1,
+        cwd: Path | None = None,
+        progress_path: Path | None = None,
+        resume: bool = False,
+        on_done: Callable[[JobResult], None] | None = None,
+    ):
+        self.jobs = list(jobs)
+        _check_graph(self.jobs)
+        self.max_parallel = max(1, int(max_parallel))
+        self.cwd = cwd
+        self.progress_path = progress_path
+        self.on_done = on_done
+        self.completed = load_completed_jobs(progress_path) if (resume and progress_path is not None) else {}
+        self.results: dict[str, JobResult] = {}
+
+    def run(self) -> dict[str, JobResult]:
+        return asyncio.run(self._run_all())
+
+    async def _run_all(self) -> dict[str, JobResult]:
+        slots = asyncio.Semaphore(self.max_parallel)
+        finished = {job.name: asyncio.Event() for job in self.jobs}
+
+        async def _one(job: Job) -> None:
+            try:
+                for dep in (*job.deps, *job.after):
+                    await finished[dep].wait()
+                result = await self._run_job(job, slots)
+            except Exception as exc:
+                result = JobResult(name=job.name, status=JOB_FAILED, note=f"{exc.__class__.__name__}: {exc}")
+            self._finish(result)
+            finished[job.name].set()
+
+        await asyncio.gather(*(_one(job) for job in self.jobs))
+        return {job.name: self.results[job.name] for job in self.jobs}
+
+    async def _run_job(self, job: Job, slots: asyncio.Semaphore) -> JobResult:
+        failed = [dep for dep in job.deps if not self.results[dep].ok]
+        if failed:
+            return JobResult(name=job.name, status=JOB_SKIPPED, note=f"dependency not ok: {', '.join(failed)}")
+        cmd = job.cmd(dict(self.results)) if callable(job.cmd) else list(job.cmd)
+        if cmd is None:
+            return JobResult(name=job.name, status=JOB_SKIPPED, note="nothing to run")
+        prior = self.completed.get(job.name)
+        if prior is not None and prior.get("cmd") in (cmd, job.retry_cmd):
+            return JobResult(
+                name=job.name,
+                status=JOB_RESUMED,
+                returncode=prior.get("returncode"),
+                cmd=cmd,
+                note=f"completed at {prior.get('ts_utc', '')}",
+            )
+
+        result = JobResult(name=job.name, status=JOB_FAILED, cmd=cmd)
+        started = time.perf_counter()
+        async with slots:
+            for attempt in range(1, int(job.retries) + 2):
+                if attempt > 1:
+                    if job.retry_cmd is not None:
+                        cmd = list(job.retry_cmd)
+                        result.cmd = cmd
+                    if job.retry_delay_sec > 0:
+                        await asyncio.sleep(job.retry_delay_sec)
+                result.attempts = attempt
+                result.status, result.returncode, result.stdout, result.stderr = await self._spawn(cmd, job)
+                if result.status == JOB_OK:
+                    break
+        result.elapsed_sec = round(time.perf_counter() - started, 3)
+        return result
+
+    async def _spawn(self, cmd: list[str], job: Job) -> tuple[str, int | None, str, str]:
+        timeout_sec = job.timeout_sec
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            cwd=str(self.cwd) if self.cwd is not None else None,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        if job.heartbeat is not None and job.stall_sec:
+            return await self._watch(proc, job)
+        try:
+            out, err = await asyncio.wait_for(proc.communicate(), timeout=timeout_sec or None)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            return JOB_TIMEOUT, proc.returncode, "", f"timed out after {timeout_sec}s"
+        status = JOB_OK if proc.returncode == 0 else JOB_FAILED
+        return status, proc.returncode, _decode(out), _decode(err)
+
+    async def _watch(self, proc: asyncio.subprocess.Process, job: Job) -> tuple[str, int | None, str, str]:
+        """Wait for `proc`, polling its heartbeat file; the attempt start counts as the first beat."""
+        stall_sec = float(job.stall_sec or 0.0)
+        started = time.time()
+        deadline = started + job.timeout_sec if job.timeout_sec else None
+        output = asyncio.ensure_future(proc.communicate())
+        verdict = ""
+        while verdict == "":
+            done, _ = await asyncio.wait({output}, timeout=min(max(stall_sec / 4.0, 0.05), 1.0))
+            if done:
+                break
+            now = time.time()
+            try:
+                last_beat = max(started, job.heartbeat.stat().st_mtime)  # type: ignore[union-attr]
+            except OSError:
+                last_beat = started
+            if deadline is not None and now >= deadline:
+                verdict = JOB_TIMEOUT
+            elif now - last_beat > stall_sec:
+                verdict = JOB_STALLED
+        if verdict:
+            # Same as a timeout: grandchildren may still hold the pipes, so only wait for the process itself.
+            output.cancel()
+            proc.kill()
+            await proc.wait()
+            if verdict == JOB_TIMEOUT:
+                return JOB_TIMEOUT, proc.returncode, "", f"timed out after {job.timeout_sec}s"
+            return JOB_STALLED, proc.returncode, "", f"no heartbeat in {job.heartbeat} for {stall_sec}s"
+        out, err = output.result()
+        status = JOB_OK if proc.returncode == 0 else JOB_FAILED
+        return status, proc.returncode, _decode(out), _decode(err)
+
+    def _finish(self, result: JobResult) -> None:
+        self.results[result.name] = result
+        if self.progress_path is not None and result.status != JOB_RESUMED:
+            self.progress_path.parent.mkdir(parents=True, exist_ok=True)
+            record = {
+                "ts_utc": datetime.now(timezone.utc).isoformat(),
+                "job": result.name,
+                "status": result.status,
+                "returncode": result.returncode,
+                "attempts": result.attempts,
+                "elapsed_sec": result.elapsed_sec,
+                "cmd": result.cmd,
+                "note": result.note,
+            }
+            with self.progress_path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=True) + "\n")
+        if self.on_done is not None:
+            self.on_done(result)
+
+
+def _decode(data: bytes | None) -> str:
+    return (data or b"").decode("utf-8", errors="replace")
@@ -1,10 +1,14 @@
 from __future__ import annotations
 
+import argparse
 import math
 from pathlib import Path
 
 import pandas as pd
 
+from xauusd_bot.binary_dataset import open_columns
+from xauusd_bot.dataset_registry import find_dataset, register_slice
+
 
 ROOT = Path(__file__).resolve().parents[1]
 INPUT_CSV = ROOT / "data" / "xauusd_m5_backtest_ready.csv"
@@ -47,7 +51,60 @@ def _md_table(rows: list[dict[str, object]]) -> str:
     return "\n".join(lines)
 
 
+def _slice_row(name: str) -> dict[str, object]:
+    dataset = find_dataset(name)
+    if dataset is None:
+        raise ValueError(f"Dataset {name!r} is not registered.")
+    timestamps = open_columns(dataset.master_path)["timestamp"]
+    if dataset.rows == 0:
+        return {"dataset": name, "rows": 0, "start_ts": "NA", "end_ts": "NA"}
+    return {
+        "dataset": name,
+        "rows": dataset.rows,
+        "start_ts": _fmt_ts(pd.Timestamp(int(timestamps[dataset.start_row]))),
+        "end_ts": _fmt_ts(pd.Timestamp(int(timestamps[dataset.stop_row - 1]))),
+    }
+
+
+def split_virtual(master: str) -> int:
+    """Register DEV80/HOLDOUT20 as fraction slices of registry master `master` instead of writing CSV copies."""
+    if find_dataset(master) is None:
+        raise ValueError(f"Master dataset {master!r} is not registered in data/datasets.json.")
+    registry = register_slice("DEV80", master, fraction=(0.0, 0.8))
+    register_slice("HOLDOUT20", master, fraction=(0.8, 1.0))
+    rows = [_slice_row(master), _slice_row("DEV80"), _slice_row("HOLDOUT20")]
+    md = "\n".join(
+        [
+            "# HOLDOUT Split (80/20, Time-Ordered)",
+            "",
+            f"- Input: registry master `{master}` ({registry.as_posix()})",
+            "- Split rule: `cut = floor(0.8 * n_rows)`, registered as `DEV80` = `[0.0:0.8]` and `HOLDOUT20` = `[0.8:1.0]`",
+            "- No CSV copies: pass `--data DEV80` / `--data HOLDOUT20` to the runners.",
+            "",
+            "## Date Ranges",
+            "",
+            _md_table(rows),
+            "",
+        ]
+    )
+    DOC_PATH.parent.mkdir(parents=True, exist_ok=True)
+    DOC_PATH.write_text(md, encoding="utf-8")
+    print(f"Registered DEV80 and HOLDOUT20 in {registry.as_posix()}")
+    print(f"Wrote: {DOC_PATH.as_posix()}")
+    return 0
+
+
 def main() -> int:
+    parser = argparse.ArgumentParser(description="Time-ordered 80/20 DEV/HOLDOUT split.")
+    parser.add_argument(
+        "--master",
+        default=None,
+        help="Registry master to split virtually (slices in data/datasets.json) instead of writing CSV copies.",
+    )
+    args = parser.parse_args()
+    if args.master:
+        return split_virtual(args.master)
+
     if not INPUT_CSV.exists():
         raise FileNotFoundError(f"Missing input dataset: {INPUT_CSV.as_posix()}")
 
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import tempfile
+from contextlib import redirect_stdout
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from xauusd_bot.configuration import load_config
+from xauusd_bot.data_loader import load_m5_csv
+from xauusd_bot.engine import SimulationEngine
+from xauusd_bot.logger import CsvLogger
+from xauusd_bot.null_model import entry_indices, null_bars, null_percentile, null_templates, simulate_null
+
+try:
+    from bootstrap_expectancy import R_CANDIDATES, _find_first_col
+except ModuleNotFoundError:
+    from scripts.bootstrap_expectancy import R_CANDIDATES, _find_first_col
+
+
+def write_null_expectancy(
+    run_dir: Path,
+    trades: pd.DataFrame,
+    m5: pd.DataFrame,
+    config: dict,
+    strategies: int = 10_000,
+    seed: int = 42,
+    batch: int = 250,
+    workers: int = 1,
+    hold_bars: int | None = None,
+) -> tuple[Path, pd.DataFrame]:
+    """Write diagnostics/NULL_expectancy.csv (and the null means) for the candidate `trades` of `run_dir`.
+
+    The null strategies re-enter the candidate's trades at random bars of the same entry hour with random
+    direction, keeping bracket distances in ATRs, costs and the family's time stop / trade-window close.
+    """
+    r_col = _find_first_col(trades, R_CANDIDATES)
+    if r_col is None:
+        raise ValueError(f"No R column found in trades.csv. Tried: {R_CANDIDATES}")
+    r = pd.to_numeric(trades[r_col], errors="coerce").dropna().to_numpy(dtype=float)
+    candidate = float(r.mean()) if r.size else float("nan")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = SimulationEngine(config=config, logger=CsvLogger(output_dir=tmp))
+        prepared = engine.prepare_m5_features(m5)
+    if hold_bars is None:
+        held = pd.to_numeric(trades.get("bars_in_trade", pd.Series(dtype=float)), errors="coerce")
+        hold_bars = int(held.max()) if held.notna().any() else engine.time_stop_bars
+    if engine.enable_strategy_vtm:
+        hold_bars = engine.vtm_holding_bars
+    bars = null_bars(engine, prepared, hold_bars)
+    templates = null_templates(bars, trades, entry_indices(prepared, trades["entry_time"]))
+    null_means = simulate_null(bars, templates, strategies, seed=seed, batch=batch, workers=workers)
+    percentile, p_value = null_percentile(candidate, null_means)
+
+    def quantile(q: float) -> float:
+        return float(np.quantile(null_means, q)) if null_means.size else float("nan")
+
+    diag_dir = run_dir / "diagnostics"
+    diag_dir.mkdir(parents=True, exist_ok=True)
+    out_csv = diag_dir / "NULL_expectancy.csv"
+    out_df = pd.DataFrame(
+        [
+            {
+                "run_id": run_dir.name,
+                "r_col": r_col,
+                "n": int(r.size),
+                "templates": len(templates),
+                "hold_bars": int(hold_bars),
+                "seed": int(seed),
+                "strategies": int(null_means.size),
+                "candidate_mean": candidate,
+                "null_mean": float(null_means.mean()) if null_means.size else float("nan"),
+                "null_p05": quantile(0.05),
+                "null_p50": quantile(0.50),
+                "null_p95": quantile(0.95),
+                "percentile": percentile,
+                "p_value": p_value,
+            }
+        ]
+    )
+    out_df.to_csv(out_csv, index=False)
+    pd.DataFrame({"strategy": np.arange(null_means.size), "mean_r": null_means}).to_csv(
+        diag_dir / "NULL_expectancy_dist.csv", index=False
+    )
+    return out_csv, out_df
+
+
+def _run_meta_path(run_dir: Path, key: str) -> Path | None:
+    meta_path = run_dir / "run_meta.json"
+    if not meta_path.exists():
+        return None
+    value = json.loads(meta_path.read_text(encoding="utf-8")).get(key)
+    return Path(value) if value else None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Random-entry null model for expectancy_R of a run's trades.csv.")
+    parser.add_argument("run_dir", help="Run directory path.")
+    parser.add_argument("--data", default=None, help="M5 CSV of the run (default: data_path in run_meta.json).")
+    parser.add_argument("--config", default=None, help="Config of the run (default: config_used.yaml).")
+    parser.add_argument("--strategies", type=int, default=10_000, help="Number of null strategies.")
+    parser.add_argument("--batch", type=int, default=250, help="Null strategies simulated per vectorized batch.")
+    parser.add_argument("--workers", type=int, default=1, help="Processes for the batches.")
+    parser.add_argument("--hold-bars", type=int, default=None, help="Time stop for families without one.")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed.")
+    args = parser.parse_args()
+
+    run_dir = Path(args.run_dir)
+    trades_path = run_dir / "trades.csv"
+    if not trades_path.exists():
+        raise FileNotFoundError(f"Missing trades.csv: {trades_path}")
+    data_path = Path(args.data) if args.data else _run_meta_path(run_dir, "data_path")
+    if data_path is None:
+        raise ValueError("No --data given and run_meta.json has no data_path.")
+    config_path = Path(args.config) if args.config else run_dir / "config_used.yaml"
+
+    with redirect_stdout(io.StringIO()):
+        m5 = load_m5_csv(data_path)
+    out_csv, out_df = write_null_expectancy(
+        run_dir,
+        pd.read_csv(trades_path),
+        m5,
+        load_config(config_path),
+        strategies=args.strategies,
+        seed=args.seed,
+        batch=args.batch,
+        workers=args.workers,
+        hold_bars=args.hold_bars,
+    )
+    row = out_df.iloc[0]
+    print(f"candidate={row['candidate_mean']:.4f}R percentile={row['percentile']:.2f} p={row['p_value']:.4f}")
+    print(f"Wrote: {out_csv}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -8,6 +8,8 @@ from typing import Any
 import pandas as pd
 from PIL import Image, ImageDraw, ImageFont
 
+from xauusd_bot.run_archive import read_run_csv, run_file_exists
+
 
 PLOT_EVENT_TYPES = {"SIGNAL_DETECTED", "TRADE_OPEN", "TRADE_CLOSE"}
 
@@ -42,9 +44,9 @@ def _load_m5(data_path: Path, bars: int) -> pd.DataFrame:
 
 
 def _load_signals(signals_path: Path) -> pd.DataFrame:
-    if not signals_path.exists():
+    if not run_file_exists(signals_path):
         return pd.DataFrame(columns=["ts", "event_type", "signal", "entry_price_candidate", "outcome", "payload_json"])
-    df = pd.read_csv(signals_path)
+    df = read_run_csv(signals_path)
     if df.empty:
         return df
     timestamp_col = "ts" if "ts" in df.columns else "timestamp" if "timestamp" in df.columns else None
@@ -10,6 +10,10 @@ from typing import Any
 import numpy as np
 import pandas as pd
 
+from xauusd_bot.configuration import load_config
+from xauusd_bot.cost_replay import CostScenario, replay_costs
+from xauusd_bot.csv_utils import read_csv_tolerant
+
 
 R_COL_CANDIDATES = (
     "r_multiple",
@@ -229,6 +233,47 @@ def _detect_cost_model(trades: pd.DataFrame) -> tuple[pd.Series, pd.Series, pd.S
     )
 
 
+def _replay_r_by_factor(
+    run_dir: Path, trades: pd.DataFrame, factors: list[float]
+) -> tuple[dict[float, pd.Series], dict[float, int], dict[str, Any]] | None:
+    fills = read_csv_tolerant(run_dir / "fills.csv", label="fills")
+    required = {"trade_id", "fill_type", "qty", "mid_price", "spread_usd", "slippage_usd", "cost_multiplier"}
+    if fills.empty or not required.issubset(fills.columns) or not {"trade_id", "entry_mid", "size"}.issubset(trades.columns):
+        return None
+    entries = fills.loc[fills["fill_type"].astype(str).str.upper() == "ENTRY"]
+    mult = pd.to_numeric(entries["cost_multiplier"], errors="coerce")
+    base_spread = (pd.to_numeric(entries["spread_usd"], errors="coerce") / mult).round(6)
+    base_slip = (pd.to_numeric(entries["slippage_usd"], errors="coerce") / mult).round(6)
+    if base_spread.nunique() != 1 or base_slip.nunique() != 1:
+        return None
+
+    config_path = run_dir / "config_used.yaml"
+    config = load_config(config_path) if config_path.exists() else {}
+    config = {**config, "spread_usd": float(base_spread.iloc[0]), "slippage_usd": float(base_slip.iloc[0])}
+    events = read_csv_tolerant(run_dir / "events.csv", label="events") if config_path.exists() else pd.DataFrame()
+    trade_ids = pd.to_numeric(trades["trade_id"], errors="coerce")
+
+    r_by_factor: dict[float, pd.Series] = {}
+    flagged: dict[float, int] = {}
+    for factor in factors:
+        scenario = CostScenario(
+            name=f"f{factor}",
+            spread_usd=config["spread_usd"] * factor,
+            slippage_usd=config["slippage_usd"] * factor,
+        )
+        replay = replay_costs(trades, fills, config, scenario, events=events)
+        r_map = replay.trades.set_index("trade_id")["r_multiple"]
+        r_by_factor[factor] = pd.Series(trade_ids.map(r_map).to_numpy(dtype=float), index=trades.index)
+        flagged[factor] = int(replay.flags["trade_id"].nunique()) if config_path.exists() else -1
+    meta = {
+        "formula_id": "fills_replay",
+        "base_spread_usd": config["spread_usd"],
+        "base_slippage_usd": config["slippage_usd"],
+        "gate_config": config_path.as_posix() if config_path.exists() else None,
+    }
+    return r_by_factor, flagged, meta
+
+
 def _find_risk_series(trades: pd.DataFrame, pnl_net: pd.Series, r_col: str | None) -> tuple[pd.Series, str]:
     risk_col = _find_first_col(trades, RISK_COL_CANDIDATES)
     if risk_col is not None:
@@ -310,9 +355,32 @@ def run_posthoc_cost_stress(
 
     r_col = _find_first_col(trades, R_COL_CANDIDATES)
 
+    factors = factors or [1.2, 1.5]
+    factor_values = [1.0] + [float(f) for f in factors]
+    seen: set[float] = set()
+    uniq_factors: list[float] = []
+    for f in factor_values:
+        if f not in seen:
+            seen.add(f)
+            uniq_factors.append(f)
+    factor_values = uniq_factors
+
+    try:
+        replayed = _replay_r_by_factor(run_dir, trades, [0.0] + factor_values)
+    except (ValueError, KeyError) as exc:
+        print(f"WARN: fills replay unavailable, falling back to trades-only cost model: {_short(str(exc))}")
+        replayed = None
+
     try:
-        pnl_net, pnl_gross, cost, model_meta = _detect_cost_model(trades)
-        risk, risk_source = _find_risk_series(trades, pnl_net, r_col)
+        if replayed is not None:
+            pnl_net = pd.to_numeric(trades[_find_first_col(trades, PNL_NET_COL_CANDIDATES) or "pnl"], errors="coerce")
+            risk, risk_source = _find_risk_series(trades, pnl_net, r_col)
+            pnl_gross = replayed[0][0.0] * risk
+            cost = pnl_gross - pnl_net
+            model_meta = replayed[2]
+        else:
+            pnl_net, pnl_gross, cost, model_meta = _detect_cost_model(trades)
+            risk, risk_source = _find_risk_series(trades, pnl_net, r_col)
     except Exception as exc:
         if limitation_doc is not None:
             _write_limitation_doc(limitation_doc, run_dir, str(exc), list(trades.columns))
@@ -330,16 +398,6 @@ def run_posthoc_cost_stress(
     if (cost < -1e-9).any():
         raise RuntimeError("Negative costs detected after model inference.")
 
-    factors = factors or [1.2, 1.5]
-    factor_values = [1.0] + [float(f) for f in factors]
-    seen: set[float] = set()
-    uniq_factors: list[float] = []
-    for f in factor_values:
-        if f not in seen:
-            seen.add(f)
-            uniq_factors.append(f)
-    factor_values = uniq_factors
-
     per_trade = trades.copy()
     per_trade["pnl_net_base"] = pnl_net
     per_trade["pnl_gross_base"] = pnl_gross
@@ -348,8 +406,12 @@ def run_posthoc_cost_stress(
 
     rows: list[dict[str, Any]] = []
     for factor in factor_values:
-        pnl_net_post = pnl_gross - (cost * factor)
-        r_post = pnl_net_post / risk
+        if replayed is not None:
+            r_post = replayed[0][factor]
+            pnl_net_post = r_post * risk
+        else:
+            pnl_net_post = pnl_gross - (cost * factor)
+            r_post = pnl_net_post / risk
         if r_post.isna().any():
             raise RuntimeError(f"NaN values in post-hoc R for factor={factor}")
 
@@ -371,6 +433,7 @@ def run_posthoc_cost_stress(
                 "crosses_zero": crosses_zero,
                 "seed": int(seed),
                 "resamples": int(resamples),
+                "flagged_trades": replayed[1][factor] if replayed is not None else -1,
             }
         )
 
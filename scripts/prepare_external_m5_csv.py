@@ -3,25 +3,19 @@ from __future__ import annotations
 import argparse
 from pathlib import Path
 
-import pandas as pd
-
-
-TS_ALIASES = ("timestamp", "time", "datetime", "date", "ts")
-REQUIRED = ("open", "high", "low", "close")
-
-
-def _find_timestamp_column(columns: list[str]) -> str | None:
-    lower = {c.lower(): c for c in columns}
-    for alias in TS_ALIASES:
-        if alias in lower:
-            return lower[alias]
-    return None
+from xauusd_bot.data_loader import DEFAULT_CHUNK_ROWS
+from xauusd_bot.m5_validation import normalize_m5_stream
 
 
 def main() -> int:
     parser = argparse.ArgumentParser(description="Normalize external M5 CSV into backtest-ready format.")
     parser.add_argument("--input", required=True, help="Path to source CSV.")
-    parser.add_argument("--output", required=True, help="Path to normalized CSV.")
+    parser.add_argument(
+        "--output",
+        required=True,
+        help="Normalized output: *.csv, otherwise a binary dataset directory readable by the backtest CLI.",
+    )
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help="Rows per streamed chunk.")
     args = parser.parse_args()
 
     in_path = Path(args.input)
@@ -30,57 +24,27 @@ def main() -> int:
     if not in_path.exists():
         raise FileNotFoundError(f"Input CSV not found: {in_path.as_posix()}")
 
-    df = pd.read_csv(in_path)
-    if df.empty:
+    try:
+        report = normalize_m5_stream(in_path, out_path, chunk_rows=args.chunk_rows)
+    except ValueError as exc:
+        raise RuntimeError(str(exc)) from exc
+    if report.rows_read == 0:
         raise RuntimeError("Input CSV is empty.")
 
-    ts_col = _find_timestamp_column(list(df.columns))
-    if ts_col is None:
-        raise RuntimeError(f"No timestamp-like column found. columns={list(df.columns)}")
-
-    cols_lower = {c.lower(): c for c in df.columns}
-    missing = [c for c in REQUIRED if c not in cols_lower]
-    if missing:
-        raise RuntimeError(f"Missing required OHLC columns: {missing}")
-
-    out = pd.DataFrame(
-        {
-            "timestamp": pd.to_datetime(df[ts_col], errors="coerce"),
-            "open": pd.to_numeric(df[cols_lower["open"]], errors="coerce"),
-            "high": pd.to_numeric(df[cols_lower["high"]], errors="coerce"),
-            "low": pd.to_numeric(df[cols_lower["low"]], errors="coerce"),
-            "close": pd.to_numeric(df[cols_lower["close"]], errors="coerce"),
-        }
-    )
-    if "volume" in cols_lower:
-        out["volume"] = pd.to_numeric(df[cols_lower["volume"]], errors="coerce")
-    else:
-        out["volume"] = 0.0
-
-    before = len(out)
-    out = out.dropna(subset=["timestamp", "open", "high", "low", "close"]).copy()
-    dropped_na = before - len(out)
-
-    out = out.sort_values("timestamp").drop_duplicates(subset=["timestamp"], keep="last").reset_index(drop=True)
-    dropped_dupes = before - dropped_na - len(out)
-
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    out.to_csv(out_path, index=False)
-
-    min_ts = out["timestamp"].min()
-    max_ts = out["timestamp"].max()
-    unique_days = int(out["timestamp"].dt.date.nunique())
-    median_delta_min = float(out["timestamp"].diff().dropna().dt.total_seconds().median() / 60.0)
-
     print(f"input: {in_path.as_posix()}")
     print(f"output: {out_path.as_posix()}")
-    print(f"rows_out: {len(out)}")
-    print(f"min_ts: {min_ts}")
-    print(f"max_ts: {max_ts}")
-    print(f"unique_days: {unique_days}")
-    print(f"median_delta_minutes: {median_delta_min:.2f}")
-    print(f"dropped_na_rows: {dropped_na}")
-    print(f"dropped_duplicate_timestamps: {dropped_dupes}")
+    print(f"rows_out: {report.rows_written}")
+    print(f"min_ts: {report.start_ts}")
+    print(f"max_ts: {report.end_ts}")
+    print(f"unique_days: {report.unique_days}")
+    median = report.median_delta_minutes
+    print(f"median_delta_minutes: {median:.2f}" if median is not None else "median_delta_minutes: nan")
+    print(f"dropped_na_rows: {report.nat_timestamps + report.non_numeric_ohlc}")
+    print(f"dropped_duplicate_timestamps: {report.duplicates}")
+    print(f"resorted_out_of_order_rows: {report.out_of_order}")
+    print(f"throughput_rows_per_sec: {report.rows_per_sec:.0f}")
+    if report.out_of_order:
+        print("WARNING: input is not time-ordered; rows were sorted by timestamp before writing.")
     return 0
 
 
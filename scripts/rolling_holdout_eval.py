@@ -1,27 +1,54 @@
 from __future__ import annotations
 
 import argparse
+import io
 import json
 import math
+import os
 import re
-import subprocess
-import sys
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
 import pandas as pd
 
-
-R_COL_CANDIDATES = (
-    "r_multiple",
-    "R_net",
-    "r_net",
-    "net_R",
-    "net_r",
-    "pnl_R",
-    "pnl_r",
-)
+from xauusd_bot.configuration import load_config
+from xauusd_bot.data_loader import load_m5_csv, registry_dataset
+from xauusd_bot.kpi import trade_kpis
+from xauusd_bot.suite import run_backtest_suite
+from xauusd_bot.shared_dataset import AttachedDataset, SharedDataset, SharedDatasetSpec, attach_dataset, pool_context
+
+try:
+    from bootstrap_expectancy import write_boot_ci
+    from diagnose_run import diagnose_run
+    from run_and_tag import reserve_run_dir, write_run_meta
+except ModuleNotFoundError:
+    from scripts.bootstrap_expectancy import write_boot_ci
+    from scripts.diagnose_run import diagnose_run
+    from scripts.run_and_tag import reserve_run_dir, write_run_meta
+
+
+# Dataset shared by every window: loaded once in the parent, published to shared memory for pool workers, which
+# attach to the same pages. Windows are `iloc` views into it, so no window is copied or written to disk.
+_DATASET: pd.DataFrame | None = None
+_ATTACHED: AttachedDataset | None = None
+
+
+@dataclass(slots=True)
+class WindowTask:
+    label: str
+    i0: int
+    i1: int
+    run_id: str
+    data_path: str
+    config_path: str
+    runs_root: str
+    resamples: int
+    seed: int
 
 
 def _short(text: str, limit: int = 600) -> str:
@@ -31,106 +58,73 @@ def _short(text: str, limit: int = 600) -> str:
     return clean[: limit - 3] + "..."
 
 
-def _run_cmd(cmd: list[str]) -> subprocess.CompletedProcess[str]:
-    return subprocess.run(
-        cmd,
-        capture_output=True,
-        text=True,
-        encoding="utf-8",
-        errors="replace",
-    )
-
-
-def _extract_run_id(output: str) -> str:
-    m = re.search(r"run_id:\s*([0-9_]+)", output)
-    if not m:
-        raise ValueError(f"Unable to parse run_id from output: {_short(output, 300)}")
-    return m.group(1)
-
-
-def _find_r_col(df: pd.DataFrame) -> str:
-    lowered = {c.lower(): c for c in df.columns}
-    for cand in R_COL_CANDIDATES:
-        col = lowered.get(cand.lower())
-        if col is not None:
-            return col
-    raise ValueError(f"No R column found in trades. columns={list(df.columns)}")
-
-
-def _compute_trade_kpis(trades_path: Path) -> dict[str, Any]:
-    if not trades_path.exists():
-        return {
-            "pf": math.nan,
-            "expectancy_R": math.nan,
-            "trades": 0,
-            "winrate": math.nan,
-            "r_col": "",
-        }
-    trades = pd.read_csv(trades_path)
-    if trades.empty:
-        return {
-            "pf": math.nan,
-            "expectancy_R": math.nan,
-            "trades": 0,
-            "winrate": math.nan,
-            "r_col": "",
-        }
-    r_col = _find_r_col(trades)
-    r = pd.to_numeric(trades[r_col], errors="coerce").dropna()
-    n = int(r.size)
-    if n == 0:
-        return {
-            "pf": math.nan,
-            "expectancy_R": math.nan,
-            "trades": 0,
-            "winrate": math.nan,
-            "r_col": r_col,
-        }
-    gross_win = float(r[r > 0].sum())
-    gross_loss = float((-r[r < 0]).sum())
-    if gross_loss > 0:
-        pf = gross_win / gross_loss
-    else:
-        pf = float("inf") if gross_win > 0 else math.nan
-    return {
-        "pf": float(pf),
-        "expectancy_R": float(r.mean()),
-        "trades": n,
-        "winrate": float((r > 0).mean()),
-        "r_col": r_col,
-    }
-
-
-def _read_boot_row(run_dir: Path) -> dict[str, Any]:
-    p = run_dir / "diagnostics" / "BOOT_expectancy_ci.csv"
-    if not p.exists():
-        return {
-            "boot_n": pd.NA,
-            "boot_mean": pd.NA,
-            "boot_ci_low": pd.NA,
-            "boot_ci_high": pd.NA,
-            "boot_crosses_zero": pd.NA,
-            "boot_resamples_file": pd.NA,
-        }
-    df = pd.read_csv(p)
-    if df.empty:
-        return {
-            "boot_n": pd.NA,
-            "boot_mean": pd.NA,
-            "boot_ci_low": pd.NA,
-            "boot_ci_high": pd.NA,
-            "boot_crosses_zero": pd.NA,
-            "boot_resamples_file": pd.NA,
+def _load_dataset(data_path: Path) -> pd.DataFrame:
+    with redirect_stdout(io.StringIO()):
+        return load_m5_csv(data_path)
+
+
+def _init_worker(spec: SharedDatasetSpec) -> None:
+    global _ATTACHED, _DATASET
+    _ATTACHED = attach_dataset(spec)
+    _DATASET = _ATTACHED.frame()
+
+
+def _evaluate_window(task: WindowTask) -> dict[str, Any]:
+    """Backtest suite, diagnostics and bootstrap for one window; returns the result columns of its row."""
+    if _DATASET is None:
+        raise RuntimeError("Window worker started without a dataset.")
+    window_df = _DATASET.iloc[task.i0 : task.i1]
+    run_dir = Path(task.runs_root) / task.run_id
+    config_path = Path(task.config_path)
+    out: dict[str, Any] = {"note": ""}
+
+    console = io.StringIO()
+    try:
+        with redirect_stdout(console):
+            suite = run_backtest_suite(window_df, load_config(config_path), run_dir, output_dir=run_dir)
+            write_run_meta(
+                run_dir=run_dir,
+                run_id=task.run_id,
+                data_path=task.data_path if registry_dataset(task.data_path) else Path(task.data_path).resolve(),
+                config_path=config_path.resolve(),
+                postprocess_ok=True,
+                postprocess_error="",
+                process_returncode=0,
+                extra={"window": task.label, "data_rows": [task.i0, task.i1]},
+            )
+            shutil.copyfile(config_path, run_dir / "config_used.yaml")
+            full = suite["full_result"]
+            # signals.csv is the one table the suite does not load; diagnose_run reads just that from disk.
+            diag_rc = diagnose_run(run_dir, {name: full[name] for name in ("trades", "fills", "events")})
+    finally:
+        (run_dir / "console.log").write_text(console.getvalue(), encoding="utf-8")
+    if diag_rc != 0:
+        raise RuntimeError(f"diagnose_run failed rc={diag_rc}; see {(run_dir / 'console.log').as_posix()}")
+
+    trades = suite["full_result"]["trades"]
+    boot_used = int(task.resamples)
+    try:
+        _, boot_df = write_boot_ci(run_dir, trades, resamples=boot_used, seed=task.seed)
+    except MemoryError:
+        boot_used = 2000
+        _, boot_df = write_boot_ci(run_dir, trades, resamples=boot_used, seed=task.seed)
+        out["note"] = "bootstrap fallback to 2000 resamples due prior failure"
+    boot = boot_df.iloc[0]
+    k = trade_kpis(trades)
+    out.update(
+        {
+            "status": "ok",
+            "pf": k["pf"],
+            "expectancy_R": k["expectancy_R"],
+            "trades": k["trades"],
+            "winrate": k["winrate"],
+            "boot_ci_low": boot["ci_low"],
+            "boot_ci_high": boot["ci_high"],
+            "boot_crosses_zero": boot["crosses_zero"],
+            "boot_resamples_used": boot_used,
         }
-    row = df.iloc[0]
-    return {
-        "boot_n": row.get("n", pd.NA),
-        "boot_mean": row.get("mean", pd.NA),
-        "boot_ci_low": row.get("ci_low", pd.NA),
-        "boot_ci_high": row.get("ci_high", pd.NA),
-        "boot_crosses_zero": row.get("crosses_zero", pd.NA),
-        "boot_resamples_file": row.get("resamples", pd.NA),
-    }
+    )
+    return out
 
 
 def _parse_windows(text: str) -> list[tuple[float, float]]:
@@ -187,6 +181,7 @@ def _to_bool(value: Any) -> bool | None:
 
 
 def main() -> int:
+    global _DATASET
     parser = argparse.ArgumentParser(description="Rolling holdout OOS evaluation for one config.")
     parser.add_argument("--data", default="data/xauusd_m5_backtest_ready.csv")
     parser.add_argument("--config", default="configs/config_v3_AUTO_EXP_B.yaml")
@@ -200,7 +195,12 @@ def main() -> int:
     parser.add_argument("--resamples", type=int, default=5000)
     parser.add_argument("--seed", type=int, default=42)
     parser.add_argument("--report", default="docs/ROLLING_HOLDOUT.md")
-    parser.add_argument("--tmp-dir", default="data/tmp_rolling")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="Windows evaluated concurrently (0 = one per window up to the CPU count, 1 = sequential in-process).",
+    )
     args = parser.parse_args()
 
     data_path = Path(args.data)
@@ -208,45 +208,38 @@ def main() -> int:
     runs_root = Path(args.runs_root)
     out_dir = Path(args.out_dir)
     report_path = Path(args.report)
-    tmp_dir = Path(args.tmp_dir)
 
     notes: list[str] = []
 
-    if not data_path.exists():
+    if not data_path.exists() and registry_dataset(args.data) is None:
         raise FileNotFoundError(f"Missing data file: {data_path.as_posix()}")
     if not config_path.exists():
         raise FileNotFoundError(f"Missing config file: {config_path.as_posix()}")
 
     windows = _parse_windows(args.windows)
     out_dir.mkdir(parents=True, exist_ok=True)
-    tmp_dir.mkdir(parents=True, exist_ok=True)
 
-    data = pd.read_csv(data_path)
-    if "timestamp" not in data.columns:
-        raise RuntimeError("Input data must include `timestamp` column.")
-    data["timestamp"] = pd.to_datetime(data["timestamp"], errors="coerce")
-    data = data.dropna(subset=["timestamp"]).sort_values("timestamp").reset_index(drop=True)
+    _DATASET = _load_dataset(data_path)
+    data = _DATASET
     n = len(data)
     if n == 0:
         raise RuntimeError("Input data has 0 valid rows after timestamp parse.")
 
     rows: list[dict[str, Any]] = []
+    tasks: list[WindowTask] = []
     for idx, (start, end) in enumerate(windows, start=1):
         label = f"W{idx}"
         i0 = int(math.floor(start * n))
         i1 = int(math.floor(end * n))
-        window_df = data.iloc[i0:i1].copy()
-        tmp_csv = tmp_dir / f"{label}_{int(start*100)}_{int(end*100)}.csv"
-        window_df.to_csv(tmp_csv, index=False)
-
+        window_ts = data["timestamp"].iloc[i0:i1]
         row: dict[str, Any] = {
             "window": label,
             "start_pct": start,
             "end_pct": end,
-            "rows": int(len(window_df)),
-            "start_ts": str(window_df["timestamp"].iloc[0]) if not window_df.empty else "NA",
-            "end_ts": str(window_df["timestamp"].iloc[-1]) if not window_df.empty else "NA",
-            "data_csv": tmp_csv.as_posix(),
+            "rows": int(len(window_ts)),
+            "start_ts": str(window_ts.iloc[0]) if not window_ts.empty else "NA",
+            "end_ts": str(window_ts.iloc[-1]) if not window_ts.empty else "NA",
+            "data_rows": f"{i0}:{i1}",
             "run_id": "",
             "status": "pending",
             "note": "",
@@ -259,96 +252,64 @@ def main() -> int:
             "boot_crosses_zero": pd.NA,
             "boot_resamples_used": pd.NA,
         }
-
-        if window_df.empty:
+        rows.append(row)
+        if window_ts.empty:
             row["status"] = "failed"
             row["note"] = "Window produced 0 rows."
             notes.append(f"{label}: empty window rows for range {start}:{end}")
-            rows.append(row)
             continue
-
-        try:
-            run_cmd = [
-                sys.executable,
-                "scripts/run_and_tag.py",
-                "--data",
-                tmp_csv.as_posix(),
-                "--config",
-                config_path.as_posix(),
-                "--runs-root",
-                runs_root.as_posix(),
-            ]
-            run_res = _run_cmd(run_cmd)
-            if run_res.returncode != 0:
-                raise RuntimeError(
-                    f"run_and_tag failed rc={run_res.returncode}; stderr={_short(run_res.stderr)}"
-                )
-            run_id = _extract_run_id(run_res.stdout)
-            row["run_id"] = run_id
-
-            run_dir = runs_root / run_id
-            diag_cmd = [sys.executable, "scripts/diagnose_run.py", run_dir.as_posix()]
-            diag_res = _run_cmd(diag_cmd)
-            if diag_res.returncode != 0:
-                raise RuntimeError(
-                    f"diagnose_run failed rc={diag_res.returncode}; stderr={_short(diag_res.stderr)}"
-                )
-
-            boot_cmd = [
-                sys.executable,
-                "scripts/bootstrap_expectancy.py",
-                run_dir.as_posix(),
-                "--resamples",
-                str(int(args.resamples)),
-                "--seed",
-                str(int(args.seed)),
-            ]
-            boot_res = _run_cmd(boot_cmd)
-            boot_used = int(args.resamples)
-            if boot_res.returncode != 0:
-                # Resource fallback requested by instruction.
-                fallback_cmd = [
-                    sys.executable,
-                    "scripts/bootstrap_expectancy.py",
-                    run_dir.as_posix(),
-                    "--resamples",
-                    "2000",
-                    "--seed",
-                    str(int(args.seed)),
-                ]
-                fallback_res = _run_cmd(fallback_cmd)
-                if fallback_res.returncode != 0:
-                    raise RuntimeError(
-                        "bootstrap_expectancy failed at requested and fallback resamples; "
-                        f"stderr={_short(fallback_res.stderr)}"
-                    )
-                boot_used = 2000
-                row["note"] = "bootstrap fallback to 2000 resamples due prior failure"
-                notes.append(
-                    f"{label}: bootstrap failed at {args.resamples}, fallback to 2000 applied."
-                )
-
-            k = _compute_trade_kpis(run_dir / "trades.csv")
-            boot = _read_boot_row(run_dir)
-            row.update(
-                {
-                    "status": "ok",
-                    "pf": k["pf"],
-                    "expectancy_R": k["expectancy_R"],
-                    "trades": k["trades"],
-                    "winrate": k["winrate"],
-                    "boot_ci_low": boot["boot_ci_low"],
-                    "boot_ci_high": boot["boot_ci_high"],
-                    "boot_crosses_zero": boot["boot_crosses_zero"],
-                    "boot_resamples_used": boot_used,
-                }
+        tasks.append(
+            WindowTask(
+                label=label,
+                i0=i0,
+                i1=i1,
+                run_id="",
+                data_path=data_path.as_posix(),
+                config_path=config_path.as_posix(),
+                runs_root=runs_root.as_posix(),
+                resamples=int(args.resamples),
+                seed=int(args.seed),
             )
-        except Exception as exc:
-            row["status"] = "failed"
-            row["note"] = _short(str(exc))
-            notes.append(f"{label}: {row['note']}")
+        )
 
-        rows.append(row)
+    for task in tasks:
+        task.run_id = reserve_run_dir(runs_root).name
+    row_by_label = {row["window"]: row for row in rows}
+    workers = int(args.workers) or min(len(tasks), os.cpu_count() or 1)
+    if workers <= 1 or len(tasks) <= 1:
+        outcomes = []
+        for task in tasks:
+            try:
+                outcomes.append(_evaluate_window(task))
+            except Exception as exc:
+                outcomes.append(exc)
+    else:
+        shareable = data.select_dtypes(include=["number", "bool", "datetime"])
+        with SharedDataset(shareable) as shared, ProcessPoolExecutor(
+            max_workers=min(workers, len(tasks)),
+            mp_context=pool_context(),
+            initializer=_init_worker,
+            initargs=(shared.spec,),
+        ) as pool:
+            futures = [pool.submit(_evaluate_window, task) for task in tasks]
+            outcomes = []
+            for future in futures:
+                try:
+                    outcomes.append(future.result())
+                except Exception as exc:
+                    outcomes.append(exc)
+
+    for task, outcome in zip(tasks, outcomes):
+        row = row_by_label[task.label]
+        row["run_id"] = task.run_id
+        if isinstance(outcome, Exception):
+            row["status"] = "failed"
+            row["note"] = _short(str(outcome))
+            notes.append(f"{task.label}: {row['note']}")
+            continue
+        row.update(outcome)
+        if outcome["note"]:
+            notes.append(f"{task.label}: bootstrap failed at {args.resamples}, fallback to 2000 applied.")
 
     runs_df = pd.DataFrame(rows)
     runs_csv = out_dir / "rolling_holdout_runs.csv"
@@ -6,11 +6,12 @@ import json
 import shutil
 import subprocess
 import sys
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from importlib.metadata import version
 from pathlib import Path
 from typing import Any
 
-import pandas as pd
+from xauusd_bot.progress import PROGRESS_FILE
 
 
 def _sha256_file(path: Path) -> str:
@@ -51,20 +52,37 @@ def _git_commit_or_na(workdir: Path) -> str:
         return "NA"
 
 
-def _list_run_dirs(runs_root: Path) -> list[Path]:
-    if not runs_root.exists():
-        return []
-    return [p for p in runs_root.iterdir() if p.is_dir()]
+def _kernel_backend_or_na(config_path: Path) -> str:
+    """Kernel backend a run of `config_path` resolves to in this environment (config plus XAUUSD_KERNEL_BACKEND)."""
+    # Imported on use, like the registry below: loading the config pulls in numpy/pandas.
+    from xauusd_bot.configuration import load_config
+    from xauusd_bot.kernels import resolve_backend
 
+    try:
+        return resolve_backend(load_config(config_path).get("kernel_backend"))
+    except Exception:
+        return "NA"
+
+
+def _registry_dataset(data: Path | str) -> Any:
+    # Imported on use: the registry pulls in pandas, which `run_and_tag.py --help` must not pay for.
+    from xauusd_bot.data_loader import registry_dataset
 
-def _select_created_run(before: list[Path], after: list[Path]) -> Path:
-    before_set = {str(p.resolve()) for p in before}
-    created = [p for p in after if str(p.resolve()) not in before_set]
-    if created:
-        return sorted(created, key=lambda p: p.stat().st_mtime, reverse=True)[0]
-    if after:
-        return sorted(after, key=lambda p: p.stat().st_mtime, reverse=True)[0]
-    raise RuntimeError("No runs found in outputs/runs after execution.")
+    return registry_dataset(data)
+
+
+def reserve_run_dir(runs_root: Path) -> Path:
+    """Create and return a fresh YYYYmmdd_HHMMSS run directory; concurrent callers never get the same one."""
+    runs_root.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now(timezone.utc).replace(microsecond=0)
+    while True:
+        run_dir = runs_root / stamp.strftime("%Y%m%d_%H%M%S")
+        try:
+            run_dir.mkdir()
+        except FileExistsError:
+            stamp += timedelta(seconds=1)
+            continue
+        return run_dir
 
 
 def _serialize_run_error(exc: BaseException | None) -> str:
@@ -75,15 +93,16 @@ def _serialize_run_error(exc: BaseException | None) -> str:
     return f"{exc.__class__.__name__}: {exc}"
 
 
-def _write_run_meta(
+def write_run_meta(
     *,
     run_dir: Path,
     run_id: str,
-    data_path: Path,
+    data_path: Path | str,
     config_path: Path,
     postprocess_ok: bool,
     postprocess_error: str,
     process_returncode: int,
+    extra: dict[str, Any] | None = None,
 ) -> Path:
     run_meta: dict[str, Any] = {
         "run_id": run_id,
@@ -94,12 +113,17 @@ def _write_run_meta(
         "ablation_force_regime": _read_ablation_force_regime(config_path),
         "git_commit": _git_commit_or_na(Path.cwd()),
         "python_version": sys.version.split()[0],
-        "pandas_version": pd.__version__,
+        "pandas_version": version("pandas"),
+        "kernel_backend": _kernel_backend_or_na(config_path),
         "postprocess_ok": bool(postprocess_ok),
         "process_returncode": int(process_returncode),
     }
+    dataset = _registry_dataset(data_path)
+    if dataset is not None:
+        run_meta["dataset"] = dataset.meta()
     if not postprocess_ok:
         run_meta["postprocess_error"] = postprocess_error
+    run_meta.update(extra or {})
 
     run_meta_path = run_dir / "run_meta.json"
     run_meta_path.write_text(json.dumps(run_meta, indent=2), encoding="utf-8")
@@ -108,22 +132,44 @@ def _write_run_meta(
 
 def main() -> int:
     parser = argparse.ArgumentParser(description="Run backtest and persist run metadata/artifacts.")
-    parser.add_argument("--data", required=True, help="Path to input OHLC data CSV.")
+    parser.add_argument("--data", required=True, help="Path to input OHLC data CSV, or a registry dataset name.")
     parser.add_argument("--config", required=True, help="Path to YAML config.")
     parser.add_argument("--runs-root", default="outputs/runs", help="Runs root directory.")
+    parser.add_argument("--run-id", default="", help="Run id under --runs-root to use instead of reserving a new one.")
+    parser.add_argument(
+        "--log-verbosity",
+        action="append",
+        default=[],
+        metavar="[EVENT_TYPE=]LEVEL",
+        help="Forwarded to the simulator: off|counters|sampled|full, optionally per event type. Repeatable.",
+    )
+    parser.add_argument("--log-sample-every", type=int, default=None, help="Forwarded to the simulator.")
+    parser.add_argument(
+        "--progress-every-sec",
+        type=float,
+        default=None,
+        help=f"Wall-clock cadence of the JSONL progress records written to <run_dir>/{PROGRESS_FILE}.",
+    )
+    parser.add_argument("--workers", type=int, default=None, help="Forwarded to the simulator.")
     args = parser.parse_args()
 
-    data_path = Path(args.data).resolve()
+    # A registry name (`DEV80`, `FULL[2021:2023]`) is kept as given; run_meta.json then records its slice.
+    dataset = _registry_dataset(args.data)
+    data_path: Path | str = args.data if dataset is not None else Path(args.data).resolve()
     config_path = Path(args.config).resolve()
     runs_root = Path(args.runs_root).resolve()
 
-    if not data_path.exists():
+    if dataset is None and not Path(data_path).exists():
         raise FileNotFoundError(f"Missing data file: {data_path}")
     if not config_path.exists():
         raise FileNotFoundError(f"Missing config file: {config_path}")
 
-    runs_root.mkdir(parents=True, exist_ok=True)
-    before = _list_run_dirs(runs_root)
+    if args.run_id:
+        run_dir = runs_root / args.run_id
+        run_dir.mkdir(parents=True, exist_ok=True)
+    else:
+        run_dir = reserve_run_dir(runs_root)
+    run_id = run_dir.name
 
     cmd = [
         sys.executable,
@@ -134,7 +180,19 @@ def main() -> int:
         str(data_path),
         "--config",
         str(config_path),
+        "--run-dir",
+        str(run_dir),
+        "--progress-jsonl",
+        str(run_dir / PROGRESS_FILE),
     ]
+    for entry in args.log_verbosity:
+        cmd += ["--log-verbosity", entry]
+    if args.log_sample_every is not None:
+        cmd += ["--log-sample-every", str(args.log_sample_every)]
+    if args.progress_every_sec is not None:
+        cmd += ["--progress-every-sec", str(args.progress_every_sec)]
+    if args.workers is not None:
+        cmd += ["--workers", str(args.workers)]
     print("Executing:", " ".join(cmd))
     run_error: BaseException | None = None
     process_returncode = 0
@@ -147,16 +205,7 @@ def main() -> int:
         run_error = exc
         process_returncode = 1
 
-    after = _list_run_dirs(runs_root)
-    try:
-        run_dir = _select_created_run(before, after)
-    except Exception:
-        fallback_run_id = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
-        run_dir = runs_root / fallback_run_id
-        run_dir.mkdir(parents=True, exist_ok=True)
-    run_id = run_dir.name
-
-    run_meta_path = _write_run_meta(
+    run_meta_path = write_run_meta(
         run_dir=run_dir,
         run_id=run_id,
         data_path=data_path,
@@ -164,6 +213,11 @@ def main() -> int:
         postprocess_ok=(run_error is None),
         postprocess_error=_serialize_run_error(run_error),
         process_returncode=process_returncode,
+        extra=(
+            {"log_verbosity_args": args.log_verbosity, "log_sample_every": args.log_sample_every}
+            if args.log_verbosity or args.log_sample_every is not None
+            else None
+        ),
     )
 
     config_used_path = run_dir / "config_used.yaml"
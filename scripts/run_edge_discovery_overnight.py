@@ -2,35 +2,31 @@ from __future__ import annotations
 
 import argparse
 import json
+import os
 import shlex
-import subprocess
 import sys
 from datetime import datetime, timezone
 from pathlib import Path
 
-
-ROOT = Path(__file__).resolve().parents[1]
+try:
+    from lib.job_graph import Job, JobGraphRunner, JobResult
+except ModuleNotFoundError:
+    from scripts.lib.job_graph import Job, JobGraphRunner, JobResult
 
 
-def _run(cmd: list[str]) -> subprocess.CompletedProcess[str]:
-    return subprocess.run(
-        cmd,
-        cwd=str(ROOT),
-        capture_output=True,
-        text=True,
-        encoding="utf-8",
-        errors="replace",
-    )
+ROOT = Path(__file__).resolve().parents[1]
 
 
-def _append(log: list[str], title: str, cp: subprocess.CompletedProcess[str]) -> None:
-    log.append(f"[{title}] rc={cp.returncode}")
-    if cp.stdout.strip():
+def _append(log: list[str], title: str, res: JobResult) -> None:
+    log.append(f"[{title}] {res.status} rc={res.returncode} attempts={res.attempts} elapsed={res.elapsed_sec}s")
+    if res.note:
+        log.append(f"note: {res.note}")
+    if res.stdout.strip():
         log.append("stdout:")
-        log.append(cp.stdout.strip())
-    if cp.stderr.strip():
+        log.append(res.stdout.strip())
+    if res.stderr.strip():
         log.append("stderr:")
-        log.append(cp.stderr.strip())
+        log.append(res.stderr.strip())
     log.append("")
 
 
@@ -38,6 +34,23 @@ def _cmd_str(cmd: list[str]) -> str:
     return " ".join(shlex.quote(x) for x in cmd)
 
 
+def _scoreboard_run_ids(summary_json: Path) -> list[str]:
+    summary = json.loads(summary_json.read_text(encoding="utf-8"))
+    run_ids = []
+    base_run = str(summary.get("baseline_run_id", "")).strip()
+    if base_run:
+        run_ids.append(base_run)
+    run_ids.extend([str(x).strip() for x in summary.get("run_ids_ok", []) if str(x).strip()])
+    # dedupe keep order
+    dedup: list[str] = []
+    seen: set[str] = set()
+    for rid in run_ids:
+        if rid not in seen:
+            seen.add(rid)
+            dedup.append(rid)
+    return dedup
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(description="One-command overnight edge discovery run.")
     parser.add_argument("--data", default="data_local/xauusd_m5_DEV_2021_2023.csv")
@@ -50,6 +63,10 @@ def main() -> int:
     parser.add_argument("--max-bars", type=int, default=0)
     parser.add_argument("--snapshot-root", default="docs/_snapshots")
     parser.add_argument("--snapshot-prefix", default="edge_discovery_overnight")
+    parser.add_argument("--max-parallel", type=int, default=0, help="Concurrent steps (0 = CPU count).")
+    parser.add_argument("--job-timeout-sec", type=float, default=0.0, help="Kill a step after N seconds (0 = no limit).")
+    parser.add_argument("--retries", type=int, default=0, help="Extra attempts for a failed or timed-out step.")
+    parser.add_argument("--resume", action="store_true", help="Skip steps already ok in the progress JSONL.")
     args = parser.parse_args()
 
     out_dir = Path(args.out_dir)
@@ -84,12 +101,83 @@ def main() -> int:
         args.snapshot_prefix,
     ]
     log_lines.append("CMD_QUEUE=" + _cmd_str(run_queue_cmd))
-    cp_queue = _run(run_queue_cmd)
-    _append(log_lines, "run_vtm_candidates", cp_queue)
 
     scoreboard_csv = out_dir / "vtm_candidates_scoreboard.csv"
     summary_json = out_dir / "vtm_candidates_scoreboard_summary.json"
-    if (cp_queue.returncode != 0) or (not summary_json.exists()) or (not scoreboard_csv.exists()):
+    posthoc_csv = Path("outputs/posthoc_cost_stress/edge_discovery_overnight_posthoc.csv")
+    posthoc_summary = Path("outputs/posthoc_cost_stress/edge_discovery_overnight_posthoc_summary.json")
+    posthoc_per_trade = Path("outputs/posthoc_cost_stress/edge_discovery_overnight_per_trade")
+    run_ids: list[str] = []
+
+    def _posthoc_cmd(_: dict[str, JobResult]) -> list[str] | None:
+        if not (summary_json.exists() and scoreboard_csv.exists()):
+            return None
+        run_ids.extend(_scoreboard_run_ids(summary_json))
+        cmd = [
+            sys.executable,
+            "scripts/posthoc_cost_stress_batch.py",
+            "--runs",
+            *run_ids,
+            "--runs-root",
+            args.runs_root,
+            "--factors",
+            "1.2",
+            "1.5",
+            "--seed",
+            str(int(args.seed)),
+            "--resamples",
+            str(int(args.resamples)),
+            "--out",
+            posthoc_csv.as_posix(),
+            "--summary-json",
+            posthoc_summary.as_posix(),
+            "--per-trade-dir",
+            posthoc_per_trade.as_posix(),
+        ]
+        log_lines.append("CMD_POSTHOC=" + _cmd_str(cmd))
+        return cmd
+
+    def _temporal_cmd(_: dict[str, JobResult]) -> list[str] | None:
+        if not scoreboard_csv.exists():
+            return None
+        cmd = [
+            sys.executable,
+            "scripts/edge_temporal_review.py",
+            "--scoreboard",
+            scoreboard_csv.as_posix(),
+            "--runs-root",
+            args.runs_root,
+            "--out-dir",
+            args.out_dir,
+            "--segments",
+            "4",
+        ]
+        log_lines.append("CMD_TEMPORAL=" + _cmd_str(cmd))
+        return cmd
+
+    # Cost stress and temporal review only need the queue's scoreboard, so they run side by side.
+    timeout = float(args.job_timeout_sec) if float(args.job_timeout_sec) > 0 else None
+    retries = int(args.retries)
+    titles = {
+        "queue": "run_vtm_candidates",
+        "posthoc": "posthoc_cost_stress_batch",
+        "temporal": "edge_temporal_review",
+    }
+    results = JobGraphRunner(
+        [
+            Job(name="queue", cmd=run_queue_cmd, timeout_sec=timeout, retries=retries),
+            Job(name="posthoc", cmd=_posthoc_cmd, deps=("queue",), timeout_sec=timeout, retries=retries),
+            Job(name="temporal", cmd=_temporal_cmd, deps=("queue",), timeout_sec=timeout, retries=retries),
+        ],
+        max_parallel=int(args.max_parallel) or (os.cpu_count() or 1),
+        cwd=ROOT,
+        progress_path=out_dir / "edge_discovery_orchestration_progress.jsonl",
+        resume=bool(args.resume),
+        on_done=lambda res: _append(log_lines, titles[res.name], res),
+    ).run()
+    res_queue, res_posthoc, res_temporal = results["queue"], results["posthoc"], results["temporal"]
+
+    if (not res_queue.ok) or (not summary_json.exists()) or (not scoreboard_csv.exists()):
         notes.append("queue step failed or missing artifacts; orchestration stopped before posthoc/temporal")
         payload = {
             "generated_utc": datetime.now(timezone.utc).isoformat(),
@@ -107,72 +195,14 @@ def main() -> int:
         print(f"Wrote: {(out_dir / 'edge_discovery_orchestration.log').as_posix()}")
         return 1
 
-    summary = json.loads(summary_json.read_text(encoding="utf-8"))
-    run_ids = []
-    base_run = str(summary.get("baseline_run_id", "")).strip()
-    if base_run:
-        run_ids.append(base_run)
-    run_ids.extend([str(x).strip() for x in summary.get("run_ids_ok", []) if str(x).strip()])
-    # dedupe keep order
-    dedup: list[str] = []
-    seen: set[str] = set()
-    for rid in run_ids:
-        if rid not in seen:
-            seen.add(rid)
-            dedup.append(rid)
-    run_ids = dedup
-
-    posthoc_csv = Path("outputs/posthoc_cost_stress/edge_discovery_overnight_posthoc.csv")
-    posthoc_summary = Path("outputs/posthoc_cost_stress/edge_discovery_overnight_posthoc_summary.json")
-    posthoc_per_trade = Path("outputs/posthoc_cost_stress/edge_discovery_overnight_per_trade")
-    posthoc_cmd = [
-        sys.executable,
-        "scripts/posthoc_cost_stress_batch.py",
-        "--runs",
-        *run_ids,
-        "--runs-root",
-        args.runs_root,
-        "--factors",
-        "1.2",
-        "1.5",
-        "--seed",
-        str(int(args.seed)),
-        "--resamples",
-        str(int(args.resamples)),
-        "--out",
-        posthoc_csv.as_posix(),
-        "--summary-json",
-        posthoc_summary.as_posix(),
-        "--per-trade-dir",
-        posthoc_per_trade.as_posix(),
-    ]
-    log_lines.append("CMD_POSTHOC=" + _cmd_str(posthoc_cmd))
-    cp_posthoc = _run(posthoc_cmd)
-    _append(log_lines, "posthoc_cost_stress_batch", cp_posthoc)
-    if cp_posthoc.returncode != 0:
+    if not res_posthoc.ok:
         notes.append("posthoc batch failed")
-
-    temporal_cmd = [
-        sys.executable,
-        "scripts/edge_temporal_review.py",
-        "--scoreboard",
-        scoreboard_csv.as_posix(),
-        "--runs-root",
-        args.runs_root,
-        "--out-dir",
-        args.out_dir,
-        "--segments",
-        "4",
-    ]
-    log_lines.append("CMD_TEMPORAL=" + _cmd_str(temporal_cmd))
-    cp_temporal = _run(temporal_cmd)
-    _append(log_lines, "edge_temporal_review", cp_temporal)
-    if cp_temporal.returncode != 0:
+    if not res_temporal.ok:
         notes.append("temporal review failed")
 
     payload = {
         "generated_utc": datetime.now(timezone.utc).isoformat(),
-        "status": "ok" if (cp_queue.returncode == 0 and cp_posthoc.returncode == 0 and cp_temporal.returncode == 0) else "partial",
+        "status": "ok" if all(res.ok for res in results.values()) else "partial",
         "resamples": int(args.resamples),
         "seed": int(args.seed),
         "run_ids": run_ids,
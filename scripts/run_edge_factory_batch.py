@@ -1,10 +1,11 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
 import json
+import os
 import re
 import shutil
-import subprocess
 import sys
 from datetime import datetime, timezone
 from pathlib import Path
@@ -12,13 +13,26 @@ from typing import Any
 
 import pandas as pd
 
+from xauusd_bot.data_loader import load_m5_csv
+from xauusd_bot.kpi import load_trade_kpis
+from xauusd_bot.progress import PROGRESS_FILE
+
 try:
     from build_edge_factory_scoreboard_from_runs import build_edge_factory_scoreboard
+    from lib.edge_factory_eval import config_key, data_key, load_gates_config, resolve_stage_config
+    from lib.edge_factory_halving import PRUNE_MODES, parse_rungs, screen_candidate
+    from lib.job_graph import JOB_SKIPPED, Job, JobGraphRunner, JobResult
+    from run_and_tag import reserve_run_dir
 except ModuleNotFoundError:
     from scripts.build_edge_factory_scoreboard_from_runs import build_edge_factory_scoreboard
+    from scripts.lib.edge_factory_eval import config_key, data_key, load_gates_config, resolve_stage_config
+    from scripts.lib.edge_factory_halving import PRUNE_MODES, parse_rungs, screen_candidate
+    from scripts.lib.job_graph import JOB_SKIPPED, Job, JobGraphRunner, JobResult
+    from scripts.run_and_tag import reserve_run_dir
 
 
 ROOT = Path(__file__).resolve().parents[1]
+FALLBACK_RESAMPLES = 2000
 
 
 def _resolve(path: str) -> Path:
@@ -30,17 +44,6 @@ def _now_utc_compact() -> str:
     return datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
 
 
-def _run_cmd(cmd: list[str]) -> subprocess.CompletedProcess[str]:
-    return subprocess.run(
-        cmd,
-        cwd=str(ROOT),
-        capture_output=True,
-        text=True,
-        encoding="utf-8",
-        errors="replace",
-    )
-
-
 def _short(text: str, limit: int = 800) -> str:
     clean = re.sub(r"\s+", " ", str(text)).strip()
     if len(clean) <= limit:
@@ -48,13 +51,6 @@ def _short(text: str, limit: int = 800) -> str:
     return clean[: limit - 3] + "..."
 
 
-def _extract_run_id(output: str) -> str:
-    m = re.search(r"run_id:\s*([0-9_]+)", output)
-    if not m:
-        return ""
-    return m.group(1)
-
-
 def _append_progress(progress_path: Path, payload: dict[str, Any]) -> None:
     progress_path.parent.mkdir(parents=True, exist_ok=True)
     with progress_path.open("a", encoding="utf-8") as f:
@@ -86,88 +82,80 @@ def _materialize_input(data_path: Path, max_bars: int, stamp: str) -> Path:
     return out
 
 
-def _execute_candidate(
+def _candidate_jobs(
     *,
+    key: str,
     cfg_path: Path,
     data_path: Path,
     runs_root: Path,
+    run_id: str,
     resamples: int,
     seed: int,
-    log_lines: list[str],
-) -> dict[str, Any]:
-    row: dict[str, Any] = {
-        "candidate": cfg_path.stem,
-        "config": cfg_path.as_posix(),
-        "run_id": "",
-        "status": "ok",
-        "note": "",
-        "boot_resamples_used": int(resamples),
-    }
-
-    run_cmd = [
-        sys.executable,
-        "scripts/run_and_tag.py",
-        "--data",
-        data_path.as_posix(),
-        "--config",
-        cfg_path.as_posix(),
-        "--runs-root",
-        runs_root.as_posix(),
-    ]
-    run_res = _run_cmd(run_cmd)
-    rid = _extract_run_id(f"{run_res.stdout}\n{run_res.stderr}")
-    row["run_id"] = rid
-    log_lines.append(f"{cfg_path.stem}: run_and_tag rc={run_res.returncode} run_id={rid}")
-    if run_res.returncode != 0:
-        row["status"] = "failed"
-        row["note"] = _short(run_res.stderr or run_res.stdout)
-        return row
-    if not rid:
-        row["status"] = "failed"
-        row["note"] = "run_and_tag finished but run_id missing in output"
-        return row
-
-    run_dir = runs_root / rid
-    diag_cmd = [sys.executable, "scripts/diagnose_run.py", run_dir.as_posix()]
-    diag_res = _run_cmd(diag_cmd)
-    log_lines.append(f"{cfg_path.stem}: diagnose rc={diag_res.returncode}")
-    if diag_res.returncode != 0:
-        row["status"] = "failed"
-        row["note"] = _short(diag_res.stderr or diag_res.stdout)
-        return row
-
-    boot_cmd = [
-        sys.executable,
-        "scripts/bootstrap_expectancy.py",
-        run_dir.as_posix(),
-        "--resamples",
-        str(int(resamples)),
-        "--seed",
-        str(int(seed)),
+    timeout_sec: float | None,
+    retries: int,
+    stall_sec: float | None = None,
+) -> list[Job]:
+    """run_and_tag -> diagnose -> bootstrap for one config; bootstrap retries once at a smaller resample count."""
+    run_dir = runs_root / run_id
+    boot_cmd = [sys.executable, "scripts/bootstrap_expectancy.py", run_dir.as_posix(), "--seed", str(int(seed))]
+    return [
+        Job(
+            name=f"{key}:run",
+            cmd=[
+                sys.executable,
+                "scripts/run_and_tag.py",
+                "--data",
+                data_path.as_posix(),
+                "--config",
+                cfg_path.as_posix(),
+                "--runs-root",
+                runs_root.as_posix(),
+                "--run-id",
+                run_id,
+            ],
+            timeout_sec=timeout_sec,
+            retries=retries,
+            heartbeat=run_dir / PROGRESS_FILE,
+            stall_sec=stall_sec,
+        ),
+        Job(
+            name=f"{key}:diagnose",
+            cmd=[sys.executable, "scripts/diagnose_run.py", run_dir.as_posix()],
+            deps=(f"{key}:run",),
+            timeout_sec=timeout_sec,
+            retries=retries,
+        ),
+        Job(
+            name=f"{key}:bootstrap",
+            cmd=[*boot_cmd, "--resamples", str(int(resamples))],
+            deps=(f"{key}:diagnose",),
+            timeout_sec=timeout_sec,
+            retries=max(1, retries),
+            retry_cmd=[*boot_cmd, "--resamples", str(FALLBACK_RESAMPLES)],
+        ),
     ]
-    boot_res = _run_cmd(boot_cmd)
-    if boot_res.returncode != 0:
-        fallback_cmd = [
-            sys.executable,
-            "scripts/bootstrap_expectancy.py",
-            run_dir.as_posix(),
-            "--resamples",
-            "2000",
-            "--seed",
-            str(int(seed)),
-        ]
-        fallback = _run_cmd(fallback_cmd)
-        log_lines.append(f"{cfg_path.stem}: bootstrap rc={boot_res.returncode} fallback_rc={fallback.returncode}")
-        if fallback.returncode != 0:
-            row["status"] = "failed"
-            row["note"] = _short(fallback.stderr or fallback.stdout)
-            return row
-        row["boot_resamples_used"] = 2000
-        row["note"] = "bootstrap fallback to 2000 resamples"
-    else:
-        log_lines.append(f"{cfg_path.stem}: bootstrap rc=0 resamples={resamples}")
 
-    return row
+
+def _completed_candidates(progress_path: Path, data_path: Path, runs_root: Path) -> dict[str, str]:
+    """config key -> run_id for configs whose latest progress record on this data is ok and still on disk."""
+    if not progress_path.exists():
+        return {}
+    data_k = data_key(data_path)
+    latest: dict[str, dict[str, Any]] = {}
+    for raw in progress_path.read_text(encoding="utf-8", errors="replace").splitlines():
+        try:
+            rec = json.loads(raw)
+        except Exception:
+            continue
+        if not isinstance(rec, dict) or not rec.get("config") or data_key(str(rec.get("data_path", ""))) != data_k:
+            continue
+        latest[config_key(str(rec["config"]))] = rec
+    out: dict[str, str] = {}
+    for key, rec in latest.items():
+        rid = str(rec.get("run_id", "")).strip()
+        if str(rec.get("status", "")).lower() == "ok" and rid and (runs_root / rid).exists():
+            out[key] = rid
+    return out
 
 
 def _read_manifest_used_data(manifest_path: Path) -> Path | None:
@@ -226,9 +214,34 @@ def main() -> int:
     parser.add_argument("--max-bars", type=int, default=0)
     parser.add_argument("--gates-config", default="configs/research_gates/default_edge_factory.yaml")
     parser.add_argument("--stage", choices=["smoke", "dev_fast", "dev_robust"], default="dev_fast")
+    parser.add_argument(
+        "--rungs",
+        default="",
+        help="Prefix fractions (e.g. 0.25,0.5) to screen candidates in-process before full runs; empty disables.",
+    )
+    parser.add_argument(
+        "--prune",
+        choices=list(PRUNE_MODES),
+        default="sound",
+        help="sound: prune only when a stage gate is unreachable; projected: also prune on rung projections (not exact).",
+    )
     parser.add_argument("--snapshot-root", default="docs/_snapshots")
     parser.add_argument("--snapshot-prefix", default="edge_factory_batch")
     parser.add_argument("--rebuild-only", action="store_true")
+    parser.add_argument("--max-parallel", type=int, default=0, help="Concurrent subprocess jobs (0 = CPU count).")
+    parser.add_argument("--job-timeout-sec", type=float, default=0.0, help="Kill a job after N seconds (0 = no limit).")
+    parser.add_argument("--retries", type=int, default=0, help="Extra attempts for a failed or timed-out job.")
+    parser.add_argument(
+        "--stall-sec",
+        type=float,
+        default=0.0,
+        help=f"Kill a run whose {PROGRESS_FILE} has not been written for N seconds (0 = off).",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip configs already ok in the progress JSONL for this data and jobs already ok with the same command.",
+    )
     parser.add_argument("--with-posthoc", dest="with_posthoc", action="store_true")
     parser.add_argument("--no-posthoc", dest="with_posthoc", action="store_false")
     parser.set_defaults(with_posthoc=None)
@@ -238,6 +251,7 @@ def main() -> int:
     args = parser.parse_args()
 
     stage = str(args.stage)
+    rungs = parse_rungs(args.rungs)
     with_posthoc = bool(args.with_posthoc) if args.with_posthoc is not None else bool(stage == "dev_robust")
     with_temporal = bool(args.with_temporal) if args.with_temporal is not None else bool(stage == "dev_robust")
 
@@ -279,7 +293,9 @@ def main() -> int:
             f"data={used_data.as_posix()}",
         ]
     else:
-        used_data = _materialize_input(data_path=data_path, max_bars=int(args.max_bars), stamp=stamp)
+        # A resumed batch keeps the input it materialized before, so its progress records still match.
+        resumed_data = _read_manifest_used_data(manifest_path) if args.resume else None
+        used_data = resumed_data or _materialize_input(data_path=data_path, max_bars=int(args.max_bars), stamp=stamp)
         run_log_lines = [
             f"generated_utc={datetime.now(timezone.utc).isoformat()}",
             "mode=run",
@@ -301,6 +317,8 @@ def main() -> int:
         "resamples": int(args.resamples),
         "seed": int(args.seed),
         "max_bars": int(args.max_bars),
+        "rungs": rungs,
+        "prune": str(args.prune) if rungs else "",
         "with_posthoc": bool(with_posthoc),
         "with_temporal": bool(with_temporal),
         "batch_start_run_id": batch_start_run_id,
@@ -310,72 +328,154 @@ def main() -> int:
     }
     _write_json(manifest_path, manifest_payload)
 
-    executed_rows: list[dict[str, Any]] = []
-    if not args.rebuild_only:
-        if baseline_cfg is not None:
-            baseline_row = _execute_candidate(
-                cfg_path=baseline_cfg,
-                data_path=used_data,
-                runs_root=runs_root,
-                resamples=int(args.resamples),
-                seed=int(args.seed),
-                log_lines=run_log_lines,
+    job_timeout = float(args.job_timeout_sec) if float(args.job_timeout_sec) > 0 else None
+    stall_sec = float(args.stall_sec) if float(args.stall_sec) > 0 else None
+    max_parallel = int(args.max_parallel) or (os.cpu_count() or 1)
+    manifest_payload["max_parallel"] = max_parallel
+
+    def _run_graph(jobs: list[Job]) -> dict[str, JobResult]:
+        def _on_done(result: JobResult) -> None:
+            run_log_lines.append(
+                f"{result.name}: {result.status} rc={result.returncode} attempts={result.attempts} "
+                f"elapsed={result.elapsed_sec}s {result.note}".rstrip()
             )
-            baseline_row["candidate"] = "__baseline__"
-            executed_rows.append(baseline_row)
+            key, _, step = result.name.rpartition(":")
+            cand = candidate_by_key.get(key)
+            if cand is None or result.status == JOB_SKIPPED:
+                return
+            if result.ok and step != "bootstrap":
+                return
+            note = ""
+            if not result.ok:
+                note = _short(result.stderr or result.stdout or result.note)
+            elif result.attempts > 1:
+                note = f"bootstrap fallback to {FALLBACK_RESAMPLES} resamples"
             _append_progress(
                 progress_path,
                 {
                     "ts_utc": datetime.now(timezone.utc).isoformat(),
                     "stage": stage,
-                    "candidate": "__baseline__",
-                    "config": baseline_cfg.as_posix(),
+                    "candidate": key,
+                    "config": cand["config"].as_posix(),
                     "data_path": used_data.as_posix(),
-                    "run_id": baseline_row.get("run_id", ""),
-                    "status": baseline_row.get("status", "failed"),
-                    "note": baseline_row.get("note", ""),
+                    "run_id": cand["run_id"],
+                    "status": "ok" if result.ok else "failed",
+                    "note": note,
                 },
             )
+
+        return JobGraphRunner(
+            jobs,
+            max_parallel=max_parallel,
+            cwd=ROOT,
+            progress_path=progress_path,
+            resume=bool(args.resume),
+            on_done=_on_done,
+        ).run()
+
+    def _chain(key: str, cfg_path: Path) -> list[Job]:
+        run_id = reserve_run_dir(runs_root).name
+        candidate_by_key[key] = {"config": cfg_path, "run_id": run_id}
+        return _candidate_jobs(
+            key=key,
+            cfg_path=cfg_path,
+            data_path=used_data,
+            runs_root=runs_root,
+            run_id=run_id,
+            resamples=int(args.resamples),
+            seed=int(args.seed),
+            timeout_sec=job_timeout,
+            retries=int(args.retries),
+            stall_sec=stall_sec,
+        )
+
+    candidate_by_key: dict[str, dict[str, Any]] = {}
+    jobs: list[Job] = []
+    if not args.rebuild_only:
+        done_before = _completed_candidates(progress_path, used_data, runs_root) if args.resume else {}
+        pending = [cfg for cfg in candidates if config_key(cfg) not in done_before]
         for cfg in candidates:
-            row = _execute_candidate(
-                cfg_path=cfg,
-                data_path=used_data,
-                runs_root=runs_root,
-                resamples=int(args.resamples),
-                seed=int(args.seed),
-                log_lines=run_log_lines,
-            )
-            executed_rows.append(row)
-            _append_progress(
-                progress_path,
-                {
-                    "ts_utc": datetime.now(timezone.utc).isoformat(),
-                    "stage": stage,
-                    "candidate": cfg.stem,
-                    "config": cfg.as_posix(),
-                    "data_path": used_data.as_posix(),
-                    "run_id": row.get("run_id", ""),
-                    "status": row.get("status", "failed"),
-                    "note": row.get("note", ""),
-                },
+            if config_key(cfg) in done_before:
+                run_log_lines.append(f"{cfg.stem}: resumed run_id={done_before[config_key(cfg)]}")
+        if baseline_cfg is not None and config_key(baseline_cfg) in done_before:
+            run_log_lines.append(f"__baseline__: resumed run_id={done_before[config_key(baseline_cfg)]}")
+        elif baseline_cfg is not None:
+            jobs.extend(_chain("__baseline__", baseline_cfg))
+
+        if rungs:
+            # Screening needs the baseline trade count for the retention bound, so the baseline finishes first.
+            if jobs:
+                _run_graph(jobs)
+                jobs = []
+            screen_data = load_m5_csv(used_data)
+            stage_cfg = resolve_stage_config(load_gates_config(gates_cfg), stage)
+            baseline_trades = 0
+            baseline_run = _completed_candidates(progress_path, used_data, runs_root).get(
+                config_key(baseline_cfg) if baseline_cfg is not None else ""
             )
+            if baseline_run:
+                baseline_trades = int(load_trade_kpis(runs_root / baseline_run).get("trades", 0) or 0)
+            screen_rows: list[dict[str, Any]] = []
+            survivors: list[Path] = []
+            for cfg in pending:
+                screen = screen_candidate(
+                    cfg,
+                    screen_data,
+                    stage_cfg,
+                    rungs=rungs,
+                    baseline_trades=baseline_trades,
+                    mode=str(args.prune),
+                )
+                screen_rows.append(screen)
+                run_log_lines.append(
+                    f"{cfg.stem}: screen {screen['status']} in {screen['screen_sec']}s {screen['note']}".rstrip()
+                )
+                if screen["status"] != "pruned":
+                    survivors.append(cfg)
+                    continue
+                _append_progress(
+                    progress_path,
+                    {
+                        "ts_utc": datetime.now(timezone.utc).isoformat(),
+                        "stage": stage,
+                        "candidate": cfg.stem,
+                        "config": cfg.as_posix(),
+                        "data_path": used_data.as_posix(),
+                        "run_id": "",
+                        "status": "pruned",
+                        "note": screen["note"],
+                        "rungs": screen["rungs"],
+                    },
+                )
+            pending = survivors
+            if screen_rows:
+                halving_csv = out_dir / "edge_factory_halving.csv"
+                pd.DataFrame(
+                    [{key: value for key, value in item.items() if key != "rungs"} for item in screen_rows]
+                ).to_csv(halving_csv, index=False)
+                manifest_payload["halving_csv"] = halving_csv.as_posix()
+                manifest_payload["pruned_count"] = sum(1 for item in screen_rows if item["status"] == "pruned")
+
+        for cfg in pending:
+            jobs.extend(_chain(cfg.stem, cfg))
     else:
         run_log_lines.append("skip run/diagnose/bootstrap; rebuilding from existing artifacts")
 
-    run_ids_ok = _collect_run_ids_from_progress(progress_path=progress_path, data_path=used_data)
-    posthoc_csv: Path | None = None
-    posthoc_summary: Path | None = None
-    temporal_summary: Path | None = None
-
-    if with_posthoc and run_ids_ok:
-        posthoc_csv = out_dir / "edge_factory_posthoc.csv"
-        posthoc_summary = out_dir / "edge_factory_posthoc_summary.json"
-        posthoc_per_trade = out_dir / "edge_factory_posthoc_per_trade"
-        posthoc_cmd = [
+    posthoc_out = out_dir / "edge_factory_posthoc.csv"
+    posthoc_summary_out = out_dir / "edge_factory_posthoc_summary.json"
+    posthoc_per_trade = out_dir / "edge_factory_posthoc_per_trade"
+    # Post-processing waits for every candidate chain, whatever its outcome, then reads the ok runs from progress.
+    candidate_tails = tuple(job.name for job in jobs if job.name.endswith(":bootstrap"))
+
+    def _posthoc_cmd(_: dict[str, JobResult]) -> list[str] | None:
+        run_ids = _collect_run_ids_from_progress(progress_path=progress_path, data_path=used_data)
+        if not run_ids:
+            return None
+        cmd = [
             sys.executable,
             "scripts/posthoc_cost_stress_batch.py",
             "--runs",
-            *run_ids_ok,
+            *run_ids,
             "--runs-root",
             runs_root.as_posix(),
             "--factors",
@@ -386,26 +486,24 @@ def main() -> int:
             "--resamples",
             str(int(args.resamples)),
             "--out",
-            posthoc_csv.as_posix(),
+            posthoc_out.as_posix(),
             "--summary-json",
-            posthoc_summary.as_posix(),
+            posthoc_summary_out.as_posix(),
             "--per-trade-dir",
             posthoc_per_trade.as_posix(),
         ]
-        run_log_lines.append("CMD_POSTHOC=" + " ".join(posthoc_cmd))
-        posthoc_res = _run_cmd(posthoc_cmd)
-        run_log_lines.append(f"posthoc rc={posthoc_res.returncode}")
-        if posthoc_res.returncode != 0:
-            manifest_payload["notes"].append("posthoc failed")
-            posthoc_csv = None
-            posthoc_summary = None
-    elif with_posthoc and (not run_ids_ok):
-        manifest_payload["notes"].append("posthoc skipped: no successful run_ids")
-
-    if with_temporal and run_ids_ok:
-        temporal_input = out_dir / "edge_factory_runs_input.csv"
-        pd.DataFrame([{"run_id": rid, "status": "ok"} for rid in run_ids_ok]).to_csv(temporal_input, index=False)
-        temporal_cmd = [
+        run_log_lines.append("CMD_POSTHOC=" + " ".join(cmd))
+        return cmd
+
+    def _temporal_cmd(_: dict[str, JobResult]) -> list[str] | None:
+        run_ids = _collect_run_ids_from_progress(progress_path=progress_path, data_path=used_data)
+        if not run_ids:
+            return None
+        # Keyed by the run set, so a resumed batch reruns the review when more candidates have finished.
+        digest = hashlib.sha256("\n".join(run_ids).encode("utf-8")).hexdigest()[:12]
+        temporal_input = out_dir / f"edge_factory_runs_input_{digest}.csv"
+        pd.DataFrame([{"run_id": rid, "status": "ok"} for rid in run_ids]).to_csv(temporal_input, index=False)
+        cmd = [
             sys.executable,
             "scripts/edge_temporal_review.py",
             "--scoreboard",
@@ -417,16 +515,32 @@ def main() -> int:
             "--segments",
             "4",
         ]
-        run_log_lines.append("CMD_TEMPORAL=" + " ".join(temporal_cmd))
-        temporal_res = _run_cmd(temporal_cmd)
-        run_log_lines.append(f"temporal rc={temporal_res.returncode}")
-        if temporal_res.returncode == 0:
-            temporal_summary = out_dir / "edge_discovery_temporal_summary.json"
-        else:
-            manifest_payload["notes"].append("temporal review failed")
-            temporal_summary = None
-    elif with_temporal and (not run_ids_ok):
-        manifest_payload["notes"].append("temporal skipped: no successful run_ids")
+        run_log_lines.append("CMD_TEMPORAL=" + " ".join(cmd))
+        return cmd
+
+    for name, cmd, wanted in (("posthoc", _posthoc_cmd, with_posthoc), ("temporal", _temporal_cmd, with_temporal)):
+        if wanted:
+            jobs.append(Job(name=name, cmd=cmd, after=candidate_tails, timeout_sec=job_timeout, retries=int(args.retries)))
+    results = _run_graph(jobs) if jobs else {}
+
+    run_ids_ok = _collect_run_ids_from_progress(progress_path=progress_path, data_path=used_data)
+    posthoc_csv: Path | None = None
+    posthoc_summary: Path | None = None
+    temporal_summary: Path | None = None
+    posthoc_result = results.get("posthoc")
+    if posthoc_result is not None and posthoc_result.ok:
+        posthoc_csv, posthoc_summary = posthoc_out, posthoc_summary_out
+    elif posthoc_result is not None:
+        skipped = posthoc_result.status == JOB_SKIPPED
+        manifest_payload["notes"].append("posthoc skipped: no successful run_ids" if skipped else "posthoc failed")
+    temporal_result = results.get("temporal")
+    if temporal_result is not None and temporal_result.ok:
+        temporal_summary = out_dir / "edge_discovery_temporal_summary.json"
+    elif temporal_result is not None:
+        skipped = temporal_result.status == JOB_SKIPPED
+        manifest_payload["notes"].append(
+            "temporal skipped: no successful run_ids" if skipped else "temporal review failed"
+        )
 
     build_note = "rebuild-only from existing artifacts" if args.rebuild_only else "built from current batch artifacts"
     built = build_edge_factory_scoreboard(
@@ -466,6 +580,7 @@ def main() -> int:
         out_dir / "edge_discovery_yearly.csv",
         out_dir / "edge_discovery_hourly.csv",
         temporal_summary,
+        out_dir / "edge_factory_halving.csv" if rungs and not args.rebuild_only else None,
     ]
     for p in optional_artifacts:
         if p is not None and Path(p).exists():
@@ -484,6 +599,8 @@ def main() -> int:
         "resamples": int(args.resamples),
         "seed": int(args.seed),
         "max_bars": int(args.max_bars),
+        "rungs": rungs,
+        "prune": str(args.prune) if rungs else "",
         "with_posthoc": bool(with_posthoc),
         "with_temporal": bool(with_temporal),
         "run_ids_ok": run_ids_ok,
@@ -12,17 +12,10 @@ from typing import Any
 
 import pandas as pd
 
+from xauusd_bot.kpi import load_trade_kpis
+
 
 ROOT = Path(__file__).resolve().parents[1]
-R_COL_CANDIDATES = (
-    "r_multiple",
-    "R_net",
-    "r_net",
-    "net_R",
-    "net_r",
-    "pnl_R",
-    "pnl_r",
-)
 
 
 def _short(text: str, limit: int = 700) -> str:
@@ -50,39 +43,6 @@ def _extract_run_id(output: str) -> str:
     return m.group(1)
 
 
-def _find_r_col(df: pd.DataFrame) -> str:
-    lowered = {c.lower(): c for c in df.columns}
-    for cand in R_COL_CANDIDATES:
-        c = lowered.get(cand.lower())
-        if c is not None:
-            return c
-    raise RuntimeError(f"No R column found in trades.csv. columns={list(df.columns)}")
-
-
-def _compute_trade_kpis(trades_path: Path) -> dict[str, Any]:
-    if not trades_path.exists():
-        return {"pf": math.nan, "expectancy_R": math.nan, "trades": 0, "winrate": math.nan}
-    trades = pd.read_csv(trades_path)
-    if trades.empty:
-        return {"pf": math.nan, "expectancy_R": math.nan, "trades": 0, "winrate": math.nan}
-    r_col = _find_r_col(trades)
-    r = pd.to_numeric(trades[r_col], errors="coerce").dropna()
-    if r.empty:
-        return {"pf": math.nan, "expectancy_R": math.nan, "trades": 0, "winrate": math.nan}
-    gross_win = float(r[r > 0].sum())
-    gross_loss = float((-r[r < 0]).sum())
-    if gross_loss > 0:
-        pf = gross_win / gross_loss
-    else:
-        pf = float("inf") if gross_win > 0 else math.nan
-    return {
-        "pf": float(pf),
-        "expectancy_R": float(r.mean()),
-        "trades": int(r.size),
-        "winrate": float((r > 0).mean()),
-    }
-
-
 def _read_boot_row(run_dir: Path) -> dict[str, Any]:
     p = run_dir / "diagnostics" / "BOOT_expectancy_ci.csv"
     if not p.exists():
@@ -202,7 +162,7 @@ def _evaluate_config(
             boot_used = 2000
             row["note"] = "bootstrap fallback to 2000 resamples"
 
-        k = _compute_trade_kpis(run_dir / "trades.csv")
+        k = load_trade_kpis(run_dir, require_r_col=True)
         boot = _read_boot_row(run_dir)
         row.update(
             {
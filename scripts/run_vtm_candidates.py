@@ -12,17 +12,10 @@ from typing import Any
 
 import pandas as pd
 
+from xauusd_bot.kpi import load_trade_kpis
+
 
 ROOT = Path(__file__).resolve().parents[1]
-R_COL_CANDIDATES = (
-    "r_multiple",
-    "R_net",
-    "r_net",
-    "net_R",
-    "net_r",
-    "pnl_R",
-    "pnl_r",
-)
 
 
 def _now_utc_compact() -> str:
@@ -57,36 +50,6 @@ def _extract_run_id(output: str) -> str:
     return m.group(1)
 
 
-def _find_r_col(df: pd.DataFrame) -> str:
-    lowered = {c.lower(): c for c in df.columns}
-    for cand in R_COL_CANDIDATES:
-        c = lowered.get(cand.lower())
-        if c is not None:
-            return c
-    raise RuntimeError(f"No R column found in trades.csv. columns={list(df.columns)}")
-
-
-def _compute_trade_kpis(trades_path: Path) -> dict[str, Any]:
-    if not trades_path.exists():
-        return {"pf": math.nan, "expectancy_R": math.nan, "trades": 0, "winrate": math.nan}
-    trades = pd.read_csv(trades_path)
-    if trades.empty:
-        return {"pf": math.nan, "expectancy_R": math.nan, "trades": 0, "winrate": math.nan}
-    r_col = _find_r_col(trades)
-    r = pd.to_numeric(trades[r_col], errors="coerce").dropna()
-    if r.empty:
-        return {"pf": math.nan, "expectancy_R": math.nan, "trades": 0, "winrate": math.nan}
-    gross_win = float(r[r > 0].sum())
-    gross_loss = float((-r[r < 0]).sum())
-    pf = (gross_win / gross_loss) if gross_loss > 0 else (float("inf") if gross_win > 0 else math.nan)
-    return {
-        "pf": float(pf),
-        "expectancy_R": float(r.mean()),
-        "trades": int(r.size),
-        "winrate": float((r > 0).mean()),
-    }
-
-
 def _truthy_bool(value: Any) -> bool | None:
     if pd.isna(value):
         return None
@@ -282,7 +245,7 @@ def _evaluate_config(
     else:
         log_lines.append(f"{cfg_path.stem}: bootstrap rc=0 resamples={resamples}")
 
-    k = _compute_trade_kpis(run_dir / "trades.csv")
+    k = load_trade_kpis(run_dir, require_r_col=True)
     b = _read_boot_row(run_dir)
     row.update(
         {
@@ -478,7 +441,7 @@ def main() -> int:
         b = by_cfg.get(baseline_key)
         if b is not None:
             b_run_id, b_run_dir = b
-            b_k = _compute_trade_kpis(b_run_dir / "trades.csv")
+            b_k = load_trade_kpis(b_run_dir, require_r_col=True)
             b_boot = _read_boot_row(b_run_dir)
             baseline_row = {
                 "run_id": b_run_id,
@@ -512,7 +475,7 @@ def main() -> int:
             }
             if rec is not None:
                 run_id, run_dir = rec
-                k = _compute_trade_kpis(run_dir / "trades.csv")
+                k = load_trade_kpis(run_dir, require_r_col=True)
                 b_row = _read_boot_row(run_dir)
                 row.update(
                     {
@@ -7,17 +7,10 @@ from typing import Any
 
 import pandas as pd
 
+from xauusd_bot.kpi import find_r_col, profit_factor
+
 
 ROOT = Path(__file__).resolve().parents[1]
-R_COL_CANDIDATES = (
-    "r_multiple",
-    "R_net",
-    "r_net",
-    "net_R",
-    "net_r",
-    "pnl_R",
-    "pnl_r",
-)
 
 
 def _resolve(path: str) -> Path:
@@ -37,15 +30,6 @@ def _load_scoreboard(primary: Path, fallback: Path) -> tuple[pd.DataFrame, Path]
     )
 
 
-def _find_r_col(df: pd.DataFrame) -> str:
-    lowered = {c.lower(): c for c in df.columns}
-    for cand in R_COL_CANDIDATES:
-        c = lowered.get(cand.lower())
-        if c is not None:
-            return c
-    raise ValueError(f"No R column found. Columns={list(df.columns)}")
-
-
 def _safe_float(value: Any) -> float:
     try:
         v = float(value)
@@ -54,14 +38,6 @@ def _safe_float(value: Any) -> float:
         return math.nan
 
 
-def _profit_factor(r: pd.Series) -> float:
-    gross_win = float(r[r > 0].sum())
-    gross_loss = float((-r[r < 0]).sum())
-    if gross_loss > 0:
-        return gross_win / gross_loss
-    return float("inf") if gross_win > 0 else math.nan
-
-
 def _md_table(df: pd.DataFrame, float_cols: set[str] | None = None) -> str:
     if df.empty:
         return "_No data_"
@@ -166,7 +142,7 @@ def main() -> int:
                 out["note"] = "trades.csv empty"
                 rows.append(out)
                 continue
-            r_col = _find_r_col(trades_df)
+            r_col = find_r_col(trades_df)
             r = pd.to_numeric(trades_df[r_col], errors="coerce").dropna()
             if r.empty:
                 out["status"] = "invalid_r"
@@ -178,7 +154,7 @@ def main() -> int:
             out["trades_calc"] = float(r.size)
             out["expectancy_calc"] = float(r.mean())
             out["median_r_calc"] = float(r.median())
-            out["pf_calc"] = float(_profit_factor(r))
+            out["pf_calc"] = float(profit_factor(r))
             out["winrate_calc"] = float((r > 0).mean())
             out["sum_r_calc"] = float(r.sum())
             out["min_r_calc"] = float(r.min())
@@ -12,6 +12,8 @@ from typing import Any
 
 import pandas as pd
 
+from xauusd_bot.kpi import load_trade_kpis
+
 
 ROOT = Path(__file__).resolve().parents[1]
 DEV_CSV = ROOT / "data" / "xauusd_m5_DEV80.csv"
@@ -34,16 +36,6 @@ FOLDS = [
     ("Fold4", 0.00, 0.70, 0.70, 0.80),
 ]
 
-R_COL_CANDIDATES = (
-    "r_multiple",
-    "R_net",
-    "r_net",
-    "net_R",
-    "net_r",
-    "pnl_R",
-    "pnl_r",
-)
-
 
 @dataclass
 class CmdResult:
@@ -95,58 +87,6 @@ def _extract_run_id(output: str) -> str:
     return m.group(1)
 
 
-def _find_r_col(df: pd.DataFrame) -> str:
-    lowered = {c.lower(): c for c in df.columns}
-    for cand in R_COL_CANDIDATES:
-        col = lowered.get(cand.lower())
-        if col is not None:
-            return col
-    raise ValueError(f"No R column found in trades.csv. columns={list(df.columns)}")
-
-
-def _compute_trade_kpis(run_dir: Path) -> dict[str, Any]:
-    trades_path = run_dir / "trades.csv"
-    if not trades_path.exists():
-        return {
-            "pf": float("nan"),
-            "expectancy_R": float("nan"),
-            "winrate": float("nan"),
-            "trades": 0,
-            "r_col": "",
-        }
-    trades = pd.read_csv(trades_path)
-    if trades.empty:
-        return {
-            "pf": float("nan"),
-            "expectancy_R": float("nan"),
-            "winrate": float("nan"),
-            "trades": 0,
-            "r_col": "",
-        }
-    r_col = _find_r_col(trades)
-    r = pd.to_numeric(trades[r_col], errors="coerce").dropna()
-    n = int(r.size)
-    if n == 0:
-        return {
-            "pf": float("nan"),
-            "expectancy_R": float("nan"),
-            "winrate": float("nan"),
-            "trades": 0,
-            "r_col": r_col,
-        }
-    gross_win = float(r[r > 0].sum())
-    gross_loss = float((-r[r < 0]).sum())
-    if gross_loss > 0:
-        pf = gross_win / gross_loss
-    else:
-        pf = float("inf") if gross_win > 0 else float("nan")
-    return {
-        "pf": float(pf),
-        "expectancy_R": float(r.mean()),
-        "winrate": float((r > 0).mean()),
-        "trades": n,
-        "r_col": r_col,
-    }
 
 
 def _md_table(df: pd.DataFrame, float_cols: set[str] | None = None) -> str:
@@ -491,7 +431,7 @@ def main() -> int:
             try:
                 run_id, _ = _run_and_tag(train_csv, cfg_path)
                 run_dir = RUNS_ROOT / run_id
-                k = _compute_trade_kpis(run_dir)
+                k = load_trade_kpis(run_dir, require_r_col=True)
                 row = {
                     "fold": fold_name,
                     "data_scope": "TRAIN",
@@ -525,7 +465,7 @@ def main() -> int:
             _run_diagnose(val_run_id)
             used_resamples, _ = _run_bootstrap(val_run_id, notes)
             val_run_dir = RUNS_ROOT / val_run_id
-            k_val = _compute_trade_kpis(val_run_dir)
+            k_val = load_trade_kpis(val_run_dir, require_r_col=True)
             boot = _read_boot_row(val_run_id)
             val_rows.append(
                 {
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import json
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+
+FORMAT_NAME = "xauusd_m5_columns"
+FORMAT_VERSION = 1
+META_FILE = "meta.json"
+BASE_COLUMNS = ("timestamp", "open", "high", "low", "close", "volume")
+OPTIONAL_COLUMNS = ("bid", "ask", "spread")
+COLUMN_DTYPES = {"timestamp": "<i8", **{name: "<f8" for name in BASE_COLUMNS[1:] + OPTIONAL_COLUMNS}}
+
+
+def is_binary_dataset(path: str | Path) -> bool:
+    meta_path = Path(path) / META_FILE
+    if not meta_path.is_file():
+        return False
+    try:
+        return json.loads(meta_path.read_text(encoding="utf-8")).get("format") == FORMAT_NAME
+    except (OSError, ValueError):
+        return False
+
+
+def read_meta(path: str | Path) -> dict[str, Any]:
+    meta_path = Path(path) / META_FILE
+    if not meta_path.is_file():
+        raise FileNotFoundError(f"Binary dataset metadata not found: {meta_path}")
+    meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    if meta.get("format") != FORMAT_NAME:
+        raise ValueError(f"Not an M5 binary dataset: {path}")
+    return meta
+
+
+class BinaryDatasetWriter:
+    """Append-only writer: one raw little-endian file per column plus meta.json written on close."""
+
+    def __init__(self, path: str | Path, columns: tuple[str, ...] | None = None):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        (self.path / META_FILE).unlink(missing_ok=True)
+        self.columns = columns
+        self.rows = 0
+        self.start_ts: pd.Timestamp | None = None
+        self.end_ts: pd.Timestamp | None = None
+        self._handles: dict[str, Any] = {}
+
+    def __enter__(self) -> BinaryDatasetWriter:
+        return self
+
+    def __exit__(self, exc_type: object, exc: object, tb: object) -> None:
+        self.close()
+
+    def append(self, df: pd.DataFrame) -> None:
+        if df.empty:
+            return
+        if self.columns is None:
+            self.columns = BASE_COLUMNS + tuple(col for col in OPTIONAL_COLUMNS if col in df.columns)
+        if not self._handles:
+            self._handles = {name: (self.path / f"{name}.bin").open("wb") for name in self.columns}
+        ts = pd.to_datetime(df["timestamp"])
+        for name in self.columns:
+            if name == "timestamp":
+                values = ts.to_numpy(dtype="datetime64[ns]").view("int64")
+            elif name in df.columns:
+                values = pd.to_numeric(df[name], errors="coerce").to_numpy(dtype="float64")
+            else:
+                values = np.zeros(len(df), dtype="float64")
+            self._handles[name].write(np.ascontiguousarray(values, dtype=COLUMN_DTYPES[name]).tobytes())
+        self.rows += len(df)
+        self.start_ts = pd.Timestamp(ts.iloc[0]) if self.start_ts is None else self.start_ts
+        self.end_ts = pd.Timestamp(ts.iloc[-1])
+
+    def close(self) -> None:
+        for handle in self._handles.values():
+            handle.close()
+        self._handles = {}
+        columns = self.columns or BASE_COLUMNS
+        for name in columns:
+            (self.path / f"{name}.bin").touch()
+        meta = {
+            "format": FORMAT_NAME,
+            "version": FORMAT_VERSION,
+            "rows": self.rows,
+            "columns": {name: COLUMN_DTYPES[name] for name in columns},
+            "start_ts": self.start_ts.isoformat() if self.start_ts is not None else None,
+            "end_ts": self.end_ts.isoformat() if self.end_ts is not None else None,
+        }
+        (self.path / META_FILE).write_text(json.dumps(meta, indent=2), encoding="utf-8")
+
+
+def open_columns(path: str | Path) -> dict[str, np.ndarray]:
+    """Read-only memory maps of every column (timestamp as int64 ns)."""
+    meta = read_meta(path)
+    rows = int(meta["rows"])
+    arrays: dict[str, np.ndarray] = {}
+    for name, dtype in meta["columns"].items():
+        if rows == 0:
+            arrays[name] = np.empty(0, dtype=dtype)
+        else:
+            arrays[name] = np.memmap(Path(path) / f"{name}.bin", dtype=dtype, mode="r", shape=(rows,))
+    return arrays
+
+
+def _frame(arrays: dict[str, np.ndarray], start: int, stop: int) -> pd.DataFrame:
+    out: dict[str, Any] = {}
+    for name, values in arrays.items():
+        part = np.array(values[start:stop])
+        out[name] = pd.to_datetime(part) if name == "timestamp" else part
+    return pd.DataFrame(out)
+
+
+def load_binary_dataset(path: str | Path, start: int = 0, stop: int | None = None) -> pd.DataFrame:
+    arrays = open_columns(path)
+    rows = len(arrays["timestamp"])
+    return _frame(arrays, max(start, 0), rows if stop is None else min(stop, rows))
+
+
+def iter_binary_dataset(path: str | Path, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    arrays = open_columns(path)
+    rows = len(arrays["timestamp"])
+    step = max(int(chunk_rows), 1)
+    for start in range(0, rows, step):
+        yield _frame(arrays, start, min(start + step, rows))
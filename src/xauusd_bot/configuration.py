@@ -5,6 +5,9 @@ from typing import Any
 
 import yaml
 
+from xauusd_bot.kernels import KERNEL_BACKENDS
+from xauusd_bot.log_policy import normalize_log_verbosity
+
 
 DEFAULT_CONFIG: dict[str, Any] = {
     "output_dir": "output",
@@ -70,6 +73,7 @@ DEFAULT_CONFIG: dict[str, Any] = {
         "time_stop": True,
         "exit_at_trade_end": True,
         "stop_mode": "box",
+        "fast_exit": False,
     },
     "vtm_vol_mr": {
         "signal_model": "standard",
@@ -143,6 +147,8 @@ DEFAULT_CONFIG: dict[str, Any] = {
     },
     "cost_gate_overrides_by_hour": {},
     "progress_every_days": 5,
+    "progress_every_sec": 5.0,
+    "kernel_backend": "auto",
     "year_test_mode": "last_365_days",
     "monte_carlo_sims": 300,
     "monte_carlo_seed": 42,
@@ -356,6 +362,7 @@ def load_config(config_path: str | Path) -> dict[str, Any]:
         raise ValueError("Config key 'v4_session_orb.rr' must be > 0.")
     v4_cfg["time_stop"] = bool(v4_cfg.get("time_stop", True))
     v4_cfg["exit_at_trade_end"] = bool(v4_cfg.get("exit_at_trade_end", True))
+    v4_cfg["fast_exit"] = bool(v4_cfg.get("fast_exit", False))
     stop_mode = str(v4_cfg.get("stop_mode", "box")).lower()
     if stop_mode not in {"box", "break_wick"}:
         raise ValueError("Config key 'v4_session_orb.stop_mode' must be 'box' or 'break_wick'.")
@@ -551,6 +558,14 @@ def load_config(config_path: str | Path) -> dict[str, Any]:
     cfg["cost_gate_overrides_by_hour"] = parsed_overrides
 
     _to_int(cfg, "progress_every_days", minimum=0)
+    _to_float(cfg, "progress_every_sec", minimum=0.0)
+
+    kernel_backend = str(cfg.get("kernel_backend", "auto")).strip().lower()
+    if kernel_backend not in KERNEL_BACKENDS:
+        raise ValueError(
+            f"Config key 'kernel_backend' must be one of: {', '.join(KERNEL_BACKENDS)}. Got: {kernel_backend}"
+        )
+    cfg["kernel_backend"] = kernel_backend
 
     year_test_mode = str(cfg.get("year_test_mode", "last_365_days"))
     if year_test_mode not in {"last_365_days", "last_12_full_calendar_months"}:
@@ -578,6 +593,8 @@ def load_config(config_path: str | Path) -> dict[str, Any]:
             else:
                 _ = float(item)
 
+    cfg["log_verbosity"] = normalize_log_verbosity(cfg.get("log_verbosity"))
+
     if not isinstance(cfg.get("output_dir"), str) or not cfg["output_dir"].strip():
         raise ValueError("Config key 'output_dir' must be a non-empty string.")
     if not isinstance(cfg.get("runs_output_dir"), str) or not cfg["runs_output_dir"].strip():
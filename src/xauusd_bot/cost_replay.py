@@ -0,0 +1,326 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from xauusd_bot.csv_utils import read_csv_tolerant
+
+
+BUCKET_MULT_KEYS = {
+    "MODE_SESSION": "cost_mult_trend_session",
+    "ASIA": "cost_mult_asia",
+    "OFF_SESSION": "cost_mult_off_session",
+}
+FLAG_COLUMNS = ["trade_id", "timestamp", "flag", "detail"]
+
+
+@dataclass(slots=True)
+class CostScenario:
+    name: str
+    spread_usd: float
+    slippage_usd: float
+    cost_multipliers: dict[str, float] = field(default_factory=dict)
+
+
+@dataclass(slots=True)
+class CostReplay:
+    scenario: CostScenario
+    trades: pd.DataFrame
+    fills: pd.DataFrame
+    flags: pd.DataFrame
+    final_equity: float
+
+    @property
+    def requires_resimulation(self) -> bool:
+        return not self.flags.empty
+
+
+def _event_details(events: pd.DataFrame, event_types: set[str]) -> list[tuple[pd.Timestamp, str, dict[str, Any]]]:
+    if events.empty or "event_type" not in events.columns:
+        return []
+    subset = events.loc[events["event_type"].astype(str).isin(event_types)]
+    out: list[tuple[pd.Timestamp, str, dict[str, Any]]] = []
+    for ts, event_type, raw in zip(subset["timestamp"], subset["event_type"], subset["details_json"]):
+        try:
+            details = json.loads(raw) if isinstance(raw, str) and raw else {}
+        except json.JSONDecodeError:
+            details = {}
+        out.append((pd.Timestamp(ts), str(event_type), details))
+    return out
+
+
+def _scenario_multiplier(scenario: CostScenario, bucket: str | None, recorded: float) -> float:
+    key = BUCKET_MULT_KEYS.get(str(bucket)) if bucket is not None else None
+    if key is not None and key in scenario.cost_multipliers:
+        return float(scenario.cost_multipliers[key])
+    return float(recorded)
+
+
+def _cost_gate_blocks(
+    config: dict[str, Any],
+    cost_total: float,
+    atr: float | None,
+    mode: str,
+    sl_distance: float,
+    tp_distance: float | None,
+) -> bool | None:
+    max_atr_mult = float(config.get("cost_max_atr_mult", 0.25))
+    if atr is None or not np.isfinite(atr):
+        return None
+    if cost_total > max_atr_mult * atr:
+        return True
+    if mode == "RANGE":
+        if tp_distance is None:
+            return None
+        return tp_distance <= 1e-9 or cost_total > float(config.get("cost_max_tp_frac_range", 0.20)) * tp_distance
+    return cost_total > float(config.get("cost_max_sl_frac", 0.15)) * sl_distance
+
+
+def _equity_at(fill_ts: np.ndarray, equity_after: np.ndarray, cutoff: np.datetime64, default: float) -> float:
+    pos = int(np.searchsorted(fill_ts, cutoff, side="right"))
+    return float(equity_after[pos - 1]) if pos > 0 else default
+
+
+def _governance_triggers(
+    exit_ts: list[pd.Timestamp],
+    pnl: np.ndarray,
+    r_multiple: np.ndarray,
+    fill_ts: np.ndarray,
+    equity_after: np.ndarray,
+    config: dict[str, Any],
+) -> list[tuple[bool, bool, bool]]:
+    starting = float(config.get("starting_balance", 10_000.0))
+    daily_stop_r = float(config.get("daily_stop_r", -2.0))
+    daily_stop_pct = float(config.get("daily_stop_pct", -0.015))
+    weekly_stop_r = float(config.get("weekly_stop_r", -5.0))
+    weekly_stop_pct = float(config.get("weekly_stop_pct", -0.04))
+    loss_streak_limit = int(config.get("loss_streak_limit", 3))
+
+    day_pnl: dict[pd.Timestamp, float] = {}
+    day_r: dict[pd.Timestamp, float] = {}
+    week_pnl: dict[pd.Timestamp, float] = {}
+    week_r: dict[pd.Timestamp, float] = {}
+    streak = 0
+    out: list[tuple[bool, bool, bool]] = []
+    for ts, trade_pnl, trade_r in zip(exit_ts, pnl, r_multiple):
+        day = ts.normalize()
+        week = day - pd.Timedelta(days=int(ts.dayofweek))
+        day_pnl[day] = day_pnl.get(day, 0.0) + float(trade_pnl)
+        day_r[day] = day_r.get(day, 0.0) + float(trade_r)
+        week_pnl[week] = week_pnl.get(week, 0.0) + float(trade_pnl)
+        week_r[week] = week_r.get(week, 0.0) + float(trade_r)
+        # The engine records period baselines on the first bar that opens inside the period,
+        # so a close stamped exactly at the boundary still sees the starting-balance fallback.
+        day_start = starting if ts == day else _equity_at(fill_ts, equity_after, day.to_datetime64(), starting)
+        week_start = starting if ts == week else _equity_at(fill_ts, equity_after, week.to_datetime64(), starting)
+        streak = streak + 1 if trade_pnl < 0 else 0
+        out.append(
+            (
+                day_r[day] <= daily_stop_r or day_pnl[day] <= day_start * daily_stop_pct,
+                week_r[week] <= weekly_stop_r or week_pnl[week] <= week_start * weekly_stop_pct,
+                streak >= loss_streak_limit,
+            )
+        )
+    return out
+
+
+def replay_costs(
+    trades: pd.DataFrame,
+    fills: pd.DataFrame,
+    config: dict[str, Any],
+    scenario: CostScenario,
+    events: pd.DataFrame | None = None,
+) -> CostReplay:
+    """Re-price a recorded run under another spread/slippage/multiplier set from the mid prices in fills.
+
+    Exits are driven by mid prices, so the trade path only depends on costs through the entry gates,
+    position sizing and governance stops; trades where any of those would change are returned in `flags`.
+    """
+    starting = float(config.get("starting_balance", 10_000.0))
+    risk_pct = float(config.get("risk_per_trade_pct", 0.01))
+    events = events if events is not None else pd.DataFrame()
+    flag_rows: list[dict[str, Any]] = []
+
+    if trades.empty or fills.empty:
+        return CostReplay(
+            scenario=scenario,
+            trades=trades.copy(),
+            fills=fills.copy(),
+            flags=pd.DataFrame(columns=FLAG_COLUMNS),
+            final_equity=starting,
+        )
+
+    t = trades.copy()
+    t["trade_id"] = pd.to_numeric(t["trade_id"], errors="coerce").astype("int64")
+    t = t.sort_values("trade_id").reset_index(drop=True)
+    for col in ("entry_mid", "sl", "tp", "size", "risk_amount", "pnl", "r_multiple", "cost_multiplier"):
+        t[col] = pd.to_numeric(t[col], errors="coerce").astype("float64")
+    t["entry_time"] = pd.to_datetime(t["entry_time"], errors="coerce")
+    t["exit_time"] = pd.to_datetime(t["exit_time"], errors="coerce")
+
+    f = fills.copy()
+    f["fill_id"] = pd.to_numeric(f["fill_id"], errors="coerce").astype("int64")
+    f = f.sort_values("fill_id").reset_index(drop=True)
+    f["trade_id"] = pd.to_numeric(f["trade_id"], errors="coerce").astype("int64")
+    for col in ("qty", "mid_price", "equity_after"):
+        f[col] = pd.to_numeric(f[col], errors="coerce").astype("float64")
+    f["timestamp"] = pd.to_datetime(f["timestamp"], errors="coerce")
+
+    opens = {int(d.get("trade_id", -1)): d for _, _, d in _event_details(events, {"TRADE_OPEN"})}
+    buckets = [opens.get(int(tid), {}).get("cost_bucket") for tid in t["trade_id"]]
+    mult_new = np.array(
+        [_scenario_multiplier(scenario, b, m) for b, m in zip(buckets, t["cost_multiplier"])], dtype="float64"
+    )
+    sign = np.where(t["direction"].astype(str).str.upper().isin({"LONG", "BUY"}), 1.0, -1.0)
+    entry_mid = t["entry_mid"].to_numpy()
+    size_old = t["size"].to_numpy()
+    dist = np.abs(entry_mid - t["sl"].to_numpy())
+    positive = size_old > 0
+    dist[positive] = t["risk_amount"].to_numpy()[positive] / size_old[positive]
+    dist = np.maximum(dist, 1e-9)
+    spread_eff = float(scenario.spread_usd) * mult_new
+    slip_eff = float(scenario.slippage_usd) * mult_new
+    half_cost = (spread_eff / 2.0) + slip_eff
+
+    pos = pd.Index(t["trade_id"]).get_indexer(f["trade_id"])
+    if (pos < 0).any():
+        raise ValueError("fills.csv references trade_id values missing from trades.csv.")
+    is_entry = (f["fill_type"].astype(str).str.upper() == "ENTRY").to_numpy()
+    frac = f["qty"].to_numpy() / np.where(size_old[pos] > 0, size_old[pos], 1.0)
+    unit_pnl = (f["mid_price"].to_numpy() - entry_mid[pos]) * sign[pos] - (2.0 * half_cost[pos])
+    unit_pnl[is_entry] = 0.0
+
+    r_new = np.bincount(pos, weights=frac * unit_pnl / dist[pos], minlength=len(t))
+    growth = 1.0 + (risk_pct * r_new)
+    equity_before = starting * np.concatenate(([1.0], np.cumprod(growth)[:-1]))
+    risk_new = np.maximum(equity_before * risk_pct, 0.0)
+    size_new = risk_new / dist
+
+    qty_new = frac * size_new[pos]
+    pnl_delta = unit_pnl * qty_new
+    fill_price = f["mid_price"].to_numpy() + np.where(is_entry, 1.0, -1.0) * sign[pos] * half_cost[pos]
+    equity_after = equity_before[pos] + pd.Series(pnl_delta).groupby(pos).cumsum().to_numpy()
+
+    out_fills = f.copy()
+    out_fills["qty"] = qty_new
+    out_fills["fill_price"] = fill_price
+    out_fills["spread_usd"] = spread_eff[pos]
+    out_fills["slippage_usd"] = slip_eff[pos]
+    out_fills["cost_multiplier"] = mult_new[pos]
+    out_fills["pnl_delta"] = pnl_delta
+    out_fills["equity_after"] = equity_after
+
+    exits = out_fills.loc[~is_entry]
+    last_exit_price = exits.groupby("trade_id")["fill_price"].last()
+    out_trades = t.copy()
+    out_trades["entry_price"] = entry_mid + sign * half_cost
+    out_trades["exit_price"] = out_trades["trade_id"].map(last_exit_price)
+    out_trades["spread"] = spread_eff
+    out_trades["size"] = size_new
+    out_trades["closed_size"] = np.bincount(pos, weights=np.where(is_entry, 0.0, qty_new), minlength=len(t))
+    out_trades["risk_amount"] = risk_new
+    out_trades["pnl"] = np.bincount(pos, weights=pnl_delta, minlength=len(t))
+    out_trades["r_multiple"] = r_new
+    out_trades["cost_multiplier"] = mult_new
+
+    def flag(trade_id: Any, ts: Any, name: str, detail: str) -> None:
+        flag_rows.append({"trade_id": trade_id, "timestamp": ts, "flag": name, "detail": detail})
+
+    mult_old = t["cost_multiplier"].to_numpy()
+    cost_old = (float(config.get("spread_usd", 0.41)) + float(config.get("slippage_usd", 0.05))) * mult_old
+    cost_new = spread_eff + slip_eff
+    overrides = {
+        int(hour): float(payload["max_cost_multiplier"])
+        for hour, payload in (config.get("cost_gate_overrides_by_hour") or {}).items()
+        if isinstance(payload, dict) and payload.get("max_cost_multiplier") is not None
+    }
+    cost_filter_on = not bool(config.get("ablation_disable_cost_filter", False))
+    sl_distance = np.abs(entry_mid - t["sl"].to_numpy())
+    tp_distance = np.abs(t["tp"].to_numpy() - entry_mid)
+    modes = t["mode"].astype(str).tolist()
+    for k, (trade_id, entry_ts) in enumerate(zip(t["trade_id"].tolist(), t["entry_time"].tolist())):
+        if risk_new[k] <= 0.0:
+            flag(trade_id, entry_ts, "SIZE_WOULD_BLOCK", f"equity_before={equity_before[k]:.2f}")
+        info = opens.get(int(trade_id), {})
+        hour = info.get("hour_utc")
+        if overrides and mult_new[k] != mult_old[k]:
+            if hour is None:
+                flag(trade_id, entry_ts, "COST_GATE_UNVERIFIED", "missing hour_utc for hour override")
+            elif int(hour) in overrides and mult_new[k] > overrides[int(hour)]:
+                flag(trade_id, entry_ts, "COST_GATE_WOULD_BLOCK", f"hour override max={overrides[int(hour)]}")
+        if not cost_filter_on or cost_new[k] <= cost_old[k] + 1e-12:
+            continue
+        atr = info.get("atr_signal")
+        blocked = _cost_gate_blocks(
+            config,
+            float(cost_new[k]),
+            float(atr) if atr is not None else None,
+            modes[k],
+            float(sl_distance[k]),
+            float(tp_distance[k]),
+        )
+        if blocked is None:
+            flag(trade_id, entry_ts, "COST_GATE_UNVERIFIED", "missing atr_signal in TRADE_OPEN event")
+        elif blocked:
+            flag(trade_id, entry_ts, "COST_GATE_WOULD_BLOCK", f"cost_total={cost_new[k]:.5f}")
+
+    fill_ts = f["timestamp"].to_numpy()
+    blocked_events = _event_details(
+        events, {"COST_FILTER_BLOCK", "COST_FILTER_BLOCK_OVERRIDE_HOUR", "BLOCKED_INVALID_SIZE"}
+    )
+    for ts, event_type, details in blocked_events:
+        if event_type == "BLOCKED_INVALID_SIZE":
+            if _equity_at(fill_ts, equity_after, ts.to_datetime64(), starting) > 0.0:
+                flag(pd.NA, ts, "SIZE_WOULD_ALLOW", "recorded size block with positive replay equity")
+            continue
+        mult = _scenario_multiplier(scenario, details.get("cost_bucket"), float(details.get("cost_multiplier", 1.0)))
+        if event_type == "COST_FILTER_BLOCK_OVERRIDE_HOUR":
+            if mult <= float(details.get("max_cost_multiplier_hour", float("inf"))):
+                flag(pd.NA, ts, "COST_GATE_WOULD_PASS", "hour override no longer blocks")
+            continue
+        blocked = _cost_gate_blocks(
+            config,
+            (float(scenario.spread_usd) + float(scenario.slippage_usd)) * mult,
+            float(details.get("atr_m5", float("nan"))),
+            str(details.get("mode", "")),
+            float(details.get("sl_distance", 0.0)),
+            float(details["tp_distance"]) if "tp_distance" in details else None,
+        )
+        if blocked is not None and not blocked:
+            flag(pd.NA, ts, "COST_GATE_WOULD_PASS", f"mode={details.get('mode', '')}")
+
+    family = str(config.get("strategy_family", "AUTO")).upper()
+    vtm_spread_max = float((config.get("vtm_vol_mr") or {}).get("spread_max_usd", 0.0))
+    if family == "VTM_VOL_MR" and vtm_spread_max > 0.0:
+        if (float(config.get("spread_usd", 0.41)) > vtm_spread_max) != (float(scenario.spread_usd) > vtm_spread_max):
+            flag(pd.NA, pd.NaT, "VTM_SPREAD_FILTER_CHANGED", f"spread_max_usd={vtm_spread_max}")
+
+    exit_ts = [pd.Timestamp(x) for x in t["exit_time"]]
+    recorded = _governance_triggers(
+        exit_ts, t["pnl"].to_numpy(), t["r_multiple"].to_numpy(), fill_ts, f["equity_after"].to_numpy(), config
+    )
+    replayed = _governance_triggers(exit_ts, out_trades["pnl"].to_numpy(), r_new, fill_ts, equity_after, config)
+    for trade_id, ts, before, after in zip(t["trade_id"].tolist(), exit_ts, recorded, replayed):
+        if before != after:
+            flag(trade_id, ts, "GOVERNANCE_CHANGED", f"daily/weekly/streak {before} -> {after}")
+
+    return CostReplay(
+        scenario=scenario,
+        trades=out_trades,
+        fills=out_fills,
+        flags=pd.DataFrame(flag_rows, columns=FLAG_COLUMNS),
+        final_equity=float(equity_before[-1] * growth[-1]),
+    )
+
+
+def replay_run_dir(run_dir: str | Path, config: dict[str, Any], scenario: CostScenario) -> CostReplay:
+    run_dir = Path(run_dir)
+    trades = read_csv_tolerant(run_dir / "trades.csv", label="trades", required=True)
+    fills = read_csv_tolerant(run_dir / "fills.csv", label="fills", required=True)
+    events = read_csv_tolerant(run_dir / "events.csv", label="events")
+    return replay_costs(trades, fills, config, scenario, events=events)
@@ -5,6 +5,8 @@ from typing import Any
 
 import pandas as pd
 
+from xauusd_bot.run_archive import read_run_csv, run_file_exists
+
 
 def read_csv_tolerant(
     path: Path,
@@ -15,7 +17,7 @@ def read_csv_tolerant(
     **kwargs: Any,
 ) -> pd.DataFrame:
     path = Path(path)
-    if not path.exists():
+    if not run_file_exists(path):
         msg = f"{label}: missing CSV at {path.as_posix()}"
         if required:
             raise FileNotFoundError(msg)
@@ -24,12 +26,12 @@ def read_csv_tolerant(
         return pd.DataFrame()
 
     try:
-        return pd.read_csv(path, **kwargs)
+        return read_run_csv(path, **kwargs)
     except Exception as exc_default:
         try:
             fallback_kwargs = dict(kwargs)
             fallback_kwargs.pop("low_memory", None)
-            df = pd.read_csv(
+            df = read_run_csv(
                 path,
                 engine="python",
                 on_bad_lines="skip",
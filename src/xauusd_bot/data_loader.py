@@ -1,9 +1,15 @@
 from __future__ import annotations
 
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Any
 
 import pandas as pd
 
+from xauusd_bot.binary_dataset import is_binary_dataset, iter_binary_dataset, load_binary_dataset
+from xauusd_bot.dataset_registry import DatasetSlice, find_dataset
+
 
 REQUIRED_COLUMNS = {"timestamp", "open", "high", "low", "close"}
 TIMESTAMP_ALIASES = {"timestamp", "time", "datetime", "date", "ts"}
@@ -60,11 +66,42 @@ def _read_raw_csv(csv_path: Path) -> pd.DataFrame:
     return df_no_header
 
 
+def registry_dataset(path: str | Path) -> DatasetSlice | None:
+    """The registry slice `path` names (`DEV80`, `FULL[2021:2023]`), or None when it is a file or unregistered."""
+    if Path(path).exists():
+        return None
+    return find_dataset(str(path))
+
+
 def load_m5_csv(path: str | Path) -> pd.DataFrame:
     csv_path = Path(path)
+    dataset = registry_dataset(path)
+    if dataset is not None:
+        df = dataset.frame()
+        _print_data_summary(
+            prefix=f"DATA SUMMARY (SLICE {dataset.spec} rows {dataset.start_row}:{dataset.stop_row})",
+            csv_path=dataset.master_path,
+            rows=len(df),
+            min_ts=df["timestamp"].min() if len(df) else "N/A",
+            max_ts=df["timestamp"].max() if len(df) else "N/A",
+            unique_days=int(df["timestamp"].dt.date.nunique()) if len(df) > 0 else 0,
+        )
+        return df
     if not csv_path.exists():
         raise FileNotFoundError(f"CSV not found: {csv_path}")
 
+    if is_binary_dataset(csv_path):
+        df = load_binary_dataset(csv_path)
+        _print_data_summary(
+            prefix="DATA SUMMARY (BINARY)",
+            csv_path=csv_path,
+            rows=len(df),
+            min_ts=df["timestamp"].min() if len(df) else "N/A",
+            max_ts=df["timestamp"].max() if len(df) else "N/A",
+            unique_days=int(df["timestamp"].dt.date.nunique()) if len(df) > 0 else 0,
+        )
+        return df
+
     df = _read_raw_csv(csv_path)
     raw_ts_col = _find_timestamp_col(df)
     if raw_ts_col is not None:
@@ -113,3 +150,135 @@ def load_m5_csv(path: str | Path) -> pd.DataFrame:
     )
 
     return df
+
+
+DEFAULT_CHUNK_ROWS = 200_000
+
+
+@dataclass(slots=True)
+class M5Scan:
+    rows: int
+    start_ts: pd.Timestamp
+    end_ts: pd.Timestamp
+    unique_days: int
+    bar_delta: pd.Timedelta | None
+
+
+def _clean_m5_chunk(df: pd.DataFrame) -> pd.DataFrame:
+    df.columns = [str(col).strip().lower() for col in df.columns]
+    missing = REQUIRED_COLUMNS - set(df.columns)
+    if missing:
+        raise ValueError(f"Missing required columns: {sorted(missing)}")
+
+    df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
+    df = df.dropna(subset=["timestamp"]).sort_values("timestamp").reset_index(drop=True)
+    numeric_columns = [col for col in ("open", "high", "low", "close", "volume", "bid", "ask", "spread") if col in df.columns]
+    for col in numeric_columns:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    df = df.dropna(subset=["open", "high", "low", "close"]).reset_index(drop=True)
+    if "volume" not in df.columns:
+        df["volume"] = 0.0
+    return df
+
+
+def csv_read_kwargs(csv_path: Path) -> dict[str, Any]:
+    """`pd.read_csv` keyword arguments for `csv_path`, naming the columns of headerless OHLCV exports."""
+    if not _looks_like_headerless_ohlcv(pd.read_csv(csv_path, nrows=1000)):
+        return {}
+    width = pd.read_csv(csv_path, header=None, nrows=1).shape[1]
+    names = HEADERLESS_BASE_COLUMNS[:width] + [f"col_{i}" for i in range(len(HEADERLESS_BASE_COLUMNS), width)]
+    return {"header": None, "names": names}
+
+
+def iter_raw_csv(path: str | Path, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Yield unparsed CSV chunks of at most `chunk_rows` rows (headerless files get the base OHLCV names)."""
+    csv_path = Path(path)
+    if not csv_path.exists():
+        raise FileNotFoundError(f"CSV not found: {csv_path}")
+    yield from pd.read_csv(csv_path, chunksize=max(int(chunk_rows), 1), **csv_read_kwargs(csv_path))
+
+
+def iter_m5_csv(path: str | Path, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Yield cleaned M5 chunks (same cleaning as load_m5_csv); the file must already be in time order.
+
+    `path` may also be a binary dataset directory (see `binary_dataset`) or a registry dataset name.
+    """
+    csv_path = Path(path)
+    dataset = registry_dataset(path)
+    if dataset is not None:
+        yield from dataset.iter_frames(chunk_rows)
+        return
+    if not csv_path.exists():
+        raise FileNotFoundError(f"CSV not found: {csv_path}")
+
+    if is_binary_dataset(csv_path):
+        yield from iter_binary_dataset(csv_path, chunk_rows)
+        return
+
+    last_ts: pd.Timestamp | None = None
+    for raw in iter_raw_csv(csv_path, chunk_rows=chunk_rows):
+        chunk = _clean_m5_chunk(raw)
+        if chunk.empty:
+            continue
+        if last_ts is not None and chunk["timestamp"].iloc[0] < last_ts:
+            raise ValueError(f"CSV is not time-ordered around {chunk['timestamp'].iloc[0]}: {csv_path}")
+        last_ts = chunk["timestamp"].iloc[-1]
+        yield chunk
+
+
+def iter_m5_day_blocks(chunks: Iterable[pd.DataFrame], min_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Regroup time-ordered chunks into blocks of whole calendar days with at least `min_rows` rows (except the last)."""
+    pending: list[pd.DataFrame] = []
+    pending_rows = 0
+    for chunk in chunks:
+        pending.append(chunk)
+        pending_rows += len(chunk)
+        if pending_rows < min_rows:
+            continue
+        buffer = pd.concat(pending, ignore_index=True)
+        dates = buffer["timestamp"].dt.date
+        complete = dates < dates.iloc[-1]
+        if complete.any():
+            yield buffer.loc[complete].reset_index(drop=True)
+            buffer = buffer.loc[~complete].reset_index(drop=True)
+        pending = [buffer]
+        pending_rows = len(buffer)
+    if pending_rows:
+        yield pd.concat(pending, ignore_index=True)
+
+
+def scan_m5_csv(path: str | Path, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> M5Scan:
+    """Single streaming pass for row count, span, day count and the median bar spacing."""
+    rows = 0
+    start_ts: pd.Timestamp | None = None
+    end_ts: pd.Timestamp | None = None
+    days: set[object] = set()
+    delta_counts: dict[pd.Timedelta, int] = {}
+    for chunk in iter_m5_csv(path, chunk_rows=chunk_rows):
+        ts = chunk["timestamp"]
+        diffs = ts.diff()
+        if end_ts is not None:
+            diffs.iloc[0] = ts.iloc[0] - end_ts
+        for delta, count in diffs.dropna().value_counts().items():
+            delta_counts[delta] = delta_counts.get(delta, 0) + int(count)
+        rows += len(chunk)
+        start_ts = ts.iloc[0] if start_ts is None else start_ts
+        end_ts = ts.iloc[-1]
+        days.update(ts.dt.date.unique())
+    if start_ts is None or end_ts is None:
+        raise ValueError(f"No valid M5 rows in {path}")
+
+    bar_delta: pd.Timedelta | None = None
+    total = sum(delta_counts.values())
+    if total:
+        ordered = sorted(delta_counts.items())
+        wanted = [(total - 1) // 2, total // 2]
+        picked: list[pd.Timedelta] = []
+        seen = 0
+        for delta, count in ordered:
+            while wanted and wanted[0] < seen + count:
+                picked.append(delta)
+                wanted.pop(0)
+            seen += count
+        bar_delta = picked[0] + (picked[1] - picked[0]) / 2
+    return M5Scan(rows=rows, start_ts=start_ts, end_ts=end_ts, unique_days=len(days), bar_delta=bar_delta)
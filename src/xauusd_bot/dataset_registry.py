@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import re
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from xauusd_bot.binary_dataset import META_FILE, is_binary_dataset, open_columns, read_meta
+
+
+# Manifest of named datasets, relative to the working directory like the other `data/` paths. Master paths inside
+# it are relative to the manifest's own directory.
+DEFAULT_REGISTRY = Path("data") / "datasets.json"
+SPEC_PATTERN = re.compile(r"^(?P<name>[A-Za-z_][\w.-]*)(?:\[(?P<lo>[^:\]]*)(?::(?P<hi>[^\]]*))?\])?$")
+
+
+@dataclass(slots=True)
+class DatasetSlice:
+    """Row range [start_row, stop_row) of a memory-mapped master, resolved from a registry name or spec."""
+
+    spec: str
+    master: str
+    master_path: Path
+    start_row: int
+    stop_row: int
+    bounds: list[dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def rows(self) -> int:
+        return self.stop_row - self.start_row
+
+    def columns(self) -> dict[str, np.ndarray]:
+        """Read-only views into the master's memory maps (timestamp as int64 ns)."""
+        return {name: values[self.start_row : self.stop_row] for name, values in open_columns(self.master_path).items()}
+
+    def frame(self, start: int = 0, stop: int | None = None) -> pd.DataFrame:
+        """DataFrame over rows [start, stop) of the slice; the columns share pages with the master files."""
+        end = self.rows if stop is None else min(int(stop), self.rows)
+        data: dict[str, Any] = {}
+        for name, values in self.columns().items():
+            part = values[max(int(start), 0) : end].view(np.ndarray)
+            data[name] = part.view("datetime64[ns]") if name == "timestamp" else part
+        return pd.DataFrame(data, copy=False)
+
+    def iter_frames(self, chunk_rows: int) -> Iterator[pd.DataFrame]:
+        step = max(int(chunk_rows), 1)
+        for start in range(0, self.rows, step):
+            yield self.frame(start, start + step)
+
+    def meta(self) -> dict[str, Any]:
+        """Slice definition for run metadata: enough to rebuild the exact rows from the hashed master."""
+        timestamps = open_columns(self.master_path)["timestamp"]
+        first = pd.Timestamp(int(timestamps[self.start_row])).isoformat() if self.rows else None
+        last = pd.Timestamp(int(timestamps[self.stop_row - 1])).isoformat() if self.rows else None
+        return {
+            "spec": self.spec,
+            "master": self.master,
+            "master_path": self.master_path.resolve().as_posix(),
+            "master_hash": master_hash(self.master_path),
+            "bounds": self.bounds,
+            "start_row": self.start_row,
+            "stop_row": self.stop_row,
+            "start_ts": first,
+            "end_ts": last,
+        }
+
+
+def master_hash(path: str | Path) -> str:
+    """sha256 over a binary dataset's meta.json and column files, in column order."""
+    root = Path(path)
+    digest = hashlib.sha256((root / META_FILE).read_bytes())
+    for name in read_meta(root)["columns"]:
+        with (root / f"{name}.bin").open("rb") as handle:
+            for block in iter(lambda: handle.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def load_registry(registry: str | Path | None = None) -> dict[str, Any]:
+    path = Path(registry) if registry is not None else DEFAULT_REGISTRY
+    if not path.is_file():
+        return {"masters": {}, "slices": {}}
+    data = json.loads(path.read_text(encoding="utf-8"))
+    return {"masters": dict(data.get("masters", {})), "slices": dict(data.get("slices", {}))}
+
+
+def _save_registry(data: dict[str, Any], registry: str | Path | None) -> Path:
+    path = Path(registry) if registry is not None else DEFAULT_REGISTRY
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, indent=2) + "\n", encoding="utf-8")
+    return path
+
+
+def register_master(name: str, path: str | Path, registry: str | Path | None = None) -> Path:
+    """Add or replace master `name`; `path` must be a binary dataset directory (see `binary_dataset`)."""
+    if not is_binary_dataset(path):
+        raise ValueError(f"Dataset master must be a binary dataset directory: {path}")
+    manifest = Path(registry) if registry is not None else DEFAULT_REGISTRY
+    data = load_registry(manifest)
+    target = Path(path).resolve()
+    try:
+        stored = target.relative_to(manifest.parent.resolve()).as_posix()
+    except ValueError:
+        stored = target.as_posix()
+    data["masters"][name] = stored
+    return _save_registry(data, manifest)
+
+
+def register_slice(
+    name: str,
+    of: str,
+    *,
+    fraction: tuple[float, float] | None = None,
+    start: str | None = None,
+    end: str | None = None,
+    registry: str | Path | None = None,
+) -> Path:
+    """Add or replace slice `name` of the master or slice `of`, by row fraction or by time (end inclusive)."""
+    if (fraction is None) == (start is None and end is None):
+        raise ValueError(f"Slice {name!r} needs either a fraction or start/end bounds")
+    data = load_registry(registry)
+    if of not in data["masters"] and of not in data["slices"]:
+        raise ValueError(f"Unknown dataset {of!r} for slice {name!r}")
+    entry: dict[str, Any] = {"of": of}
+    if fraction is not None:
+        entry["fraction"] = [float(fraction[0]), float(fraction[1])]
+    else:
+        entry.update({"start": start, "end": end})
+    data["slices"][name] = entry
+    return _save_registry(data, registry)
+
+
+def _bracket_bounds(spec: str, lo: str, hi: str | None) -> dict[str, Any]:
+    """`[a:b]` of a spec as fraction bounds (0.2:0.4, :0.8) or time bounds (2021:2023, 2021-06:2021-08-15).
+
+    A single time token selects that whole period: `[2022]` is `[2022:2022]`.
+    """
+    tokens = [lo.strip(), lo.strip() if hi is None else hi.strip()]
+
+    def is_fraction(token: str) -> bool:
+        try:
+            value = float(token)
+        except ValueError:
+            return False
+        return ("." in token or token in {"0", "1"}) and 0.0 <= value <= 1.0
+
+    kinds = {is_fraction(token) for token in tokens if token}
+    if len(kinds) > 1:
+        raise ValueError(f"Dataset spec {spec!r} mixes fraction and time bounds")
+    if kinds == {True}:
+        if hi is None:
+            raise ValueError(f"Dataset spec {spec!r} needs both fraction bounds, e.g. [0.2:0.4]")
+        return {"fraction": [float(tokens[0]) if tokens[0] else 0.0, float(tokens[1]) if tokens[1] else 1.0]}
+    return {"start": tokens[0] or None, "end": tokens[1] or None}
+
+
+def _period(text: str, spec: str) -> pd.Period:
+    try:
+        return pd.Period(text)
+    except (ValueError, TypeError) as exc:
+        raise ValueError(f"Bad time bound {text!r} in dataset {spec!r}") from exc
+
+
+def _apply_bounds(
+    timestamps: np.ndarray, start_row: int, stop_row: int, bounds: dict[str, Any], spec: str
+) -> tuple[int, int]:
+    if "fraction" in bounds:
+        lo, hi = (float(x) for x in bounds["fraction"])
+        if not 0.0 <= lo <= hi <= 1.0:
+            raise ValueError(f"Fraction bounds of {spec!r} must satisfy 0 <= lo <= hi <= 1, got {bounds['fraction']}")
+        rows = stop_row - start_row
+        return start_row + int(math.floor(lo * rows)), start_row + int(math.floor(hi * rows))
+    window = timestamps[start_row:stop_row]
+    lo_row, hi_row = start_row, stop_row
+    if bounds.get("start"):
+        lo_row = start_row + int(np.searchsorted(window, _period(bounds["start"], spec).start_time.value, "left"))
+    if bounds.get("end"):
+        hi_row = start_row + int(np.searchsorted(window, _period(bounds["end"], spec).end_time.value, "right"))
+    return lo_row, max(lo_row, hi_row)
+
+
+def find_dataset(spec: str, registry: str | Path | None = None) -> DatasetSlice | None:
+    """Resolve `NAME` or `NAME[a:b]` against the registry; None when the name is not registered.
+
+    Slices nest (a slice may be `of` another slice) and bracket bounds apply last. Time bounds follow pandas
+    partial-string rules: `2021:2023` runs from 2021-01-01 through the last bar of 2023.
+    """
+    match = SPEC_PATTERN.match(str(spec).strip())
+    if match is None:
+        return None
+    data = load_registry(registry)
+    name = match["name"]
+    chain: list[dict[str, Any]] = []
+    seen: set[str] = set()
+    while name in data["slices"]:
+        if name in seen:
+            raise ValueError(f"Dataset registry has a slice cycle through {name!r}")
+        seen.add(name)
+        entry = data["slices"][name]
+        chain.append({key: value for key, value in entry.items() if key != "of"})
+        name = entry["of"]
+    if name not in data["masters"]:
+        return None
+    if match["lo"] is not None:
+        chain.insert(0, _bracket_bounds(spec, match["lo"], match["hi"]))
+
+    base = Path(registry).parent if registry is not None else DEFAULT_REGISTRY.parent
+    master_path = Path(data["masters"][name])
+    if not master_path.is_absolute():
+        master_path = base / master_path
+    if not is_binary_dataset(master_path):
+        raise ValueError(f"Dataset master {name!r} is not a binary dataset directory: {master_path}")
+    timestamps = open_columns(master_path)["timestamp"]
+    start_row, stop_row = 0, len(timestamps)
+    bounds = list(reversed(chain))
+    for step in bounds:
+        start_row, stop_row = _apply_bounds(timestamps, start_row, stop_row, step, str(spec))
+    return DatasetSlice(
+        spec=str(spec).strip(),
+        master=name,
+        master_path=master_path,
+        start_row=start_row,
+        stop_row=stop_row,
+        bounds=bounds,
+    )
@@ -1,16 +1,107 @@
 from __future__ import annotations
 
+import json
+from collections.abc import Callable, Iterable, Iterator
 from dataclasses import dataclass
 from datetime import datetime
+from itertools import chain
 from typing import Any
 
+import numpy as np
 import pandas as pd
 
-from xauusd_bot.indicators import atr_wilder, ema, rsi_wilder, true_range
+from xauusd_bot.data_loader import M5Scan
+from xauusd_bot.entry_signals import SignalArrays, v4_orb_signals, vtm_signals
+from xauusd_bot.exits import (
+    EXIT_END_OF_DATA,
+    EXIT_SL,
+    EXIT_TIME,
+    EXIT_TP,
+    BracketExit,
+    PathExit,
+    first_passage_exit,
+    first_true_index,
+)
+from xauusd_bot.funnel import FunnelCounters
+from xauusd_bot.indicators import atr_wilder, ema, rolling_mean, rsi_wilder, true_range
+from xauusd_bot.kernels import CODE_END_OF_DATA, CODE_SL, CODE_TIME, CODE_TP, load_kernels, resolve_backend
+from xauusd_bot.log_policy import OFF, LogPolicy
 from xauusd_bot.logger import CsvLogger
 from xauusd_bot.models import Bias, BiasContext, Confirmation, Direction, EngineState, EntrySignal, M15Context, Trade
+from xauusd_bot.progress import ProgressStream
 from xauusd_bot.risk import RiskManager
 from xauusd_bot.timeframes import resample_from_m5
+from xauusd_bot.trade_store import EQUITY_COLUMNS, ColumnStore
+
+# Called with the engine and the first bar-open time of each new trading day; a non-empty reason ends the run.
+StopCheck = Callable[["SimulationEngine", pd.Timestamp], str | None]
+
+_HOUR_NS = 3_600_000_000_000
+_DAY_NS = 24 * _HOUR_NS
+
+_KERNEL_EXIT_REASONS = {CODE_SL: EXIT_SL, CODE_TP: EXIT_TP, CODE_TIME: EXIT_TIME, CODE_END_OF_DATA: EXIT_END_OF_DATA}
+
+# `DataFrame.attrs` entry set by `SimulationEngine.prepare_m5_features`: {"key": m5_feature_key(), "rows": len(frame)}.
+M5_FEATURES_ATTR = "m5_features"
+
+
+@dataclass(frozen=True, slots=True)
+class M5Feature:
+    """A prepared M5 column: the prepared columns it is derived from and the engine settings its values depend on."""
+
+    requires: tuple[str, ...] = ()
+    params: tuple[str, ...] = ()
+
+
+M5_FEATURES: dict[str, M5Feature] = {
+    "tr_m5": M5Feature(),
+    "atr_m5": M5Feature(params=("atr_period",)),
+    "atr_v4": M5Feature(params=("v4_atr_period",)),
+    "atr_v3": M5Feature(params=("v3_atr_period_M",)),
+    "atr_vtm": M5Feature(params=("vtm_atr_period",)),
+    "rsi_v3": M5Feature(params=("v3_rsi_period",)),
+    "ema20_m5": M5Feature(params=("ema_m5",)),
+    "atr_ma_v3": M5Feature(requires=("atr_v3",), params=("v3_atr_period_M",)),
+    "atr_ma_vtm": M5Feature(requires=("atr_vtm",), params=("vtm_atr_period",)),
+    "sma_vtm": M5Feature(params=("vtm_ma_period",)),
+    "sma_vtm_slope": M5Feature(requires=("sma_vtm",), params=("vtm_slope_lookback",)),
+    "v3_hh_prev": M5Feature(params=("v3_breakout_N1",)),
+    "v3_ll_prev": M5Feature(params=("v3_breakout_N1",)),
+    "hh_prev": M5Feature(params=("bos_lookback",)),
+    "ll_prev": M5Feature(params=("bos_lookback",)),
+    "swing_low": M5Feature(params=("swing_lookback",)),
+    "swing_high": M5Feature(params=("swing_lookback",)),
+    "bar_range": M5Feature(),
+    "body_ratio": M5Feature(requires=("bar_range",)),
+    "upper_wick_ratio": M5Feature(requires=("bar_range",)),
+    "lower_wick_ratio": M5Feature(requires=("bar_range",)),
+    "wick_ok_long": M5Feature(requires=("upper_wick_ratio",), params=("wick_ratio_max",)),
+    "wick_ok_short": M5Feature(requires=("lower_wick_ratio",), params=("wick_ratio_max",)),
+    "strong_bull": M5Feature(requires=("body_ratio",), params=("body_ratio",)),
+    "strong_bear": M5Feature(requires=("body_ratio",), params=("body_ratio",)),
+    "v4_asia_high": M5Feature(params=("v4_asia_start", "v4_asia_end")),
+    "v4_asia_low": M5Feature(params=("v4_asia_start", "v4_asia_end")),
+}
+
+# Prepared M5 columns each strategy family reads; "core" columns are read by every run (shock filter, pending entries).
+STRATEGY_M5_FEATURES: dict[str, tuple[str, ...]] = {
+    "core": ("tr_m5", "atr_m5", "swing_low", "swing_high"),
+    "baseline": (
+        "ema20_m5",
+        "hh_prev",
+        "ll_prev",
+        "body_ratio",
+        "upper_wick_ratio",
+        "lower_wick_ratio",
+        "wick_ok_long",
+        "wick_ok_short",
+        "strong_bull",
+        "strong_bear",
+    ),
+    "v3": ("atr_v3", "atr_ma_v3", "rsi_v3", "v3_hh_prev", "v3_ll_prev"),
+    "v4": ("atr_v4", "v4_asia_high", "v4_asia_low"),
+    "vtm": ("atr_vtm", "atr_ma_vtm", "sma_vtm", "sma_vtm_slope"),
+}
 
 
 @dataclass(slots=True)
@@ -46,12 +137,68 @@ class Position:
     mode: str = "TREND"
     pending_exit_reason: str | None = None
     pending_exit_index: int | None = None
+    solved_exit: BracketExit | None = None
+    solved_path: PathExit | None = None
+
+
+@dataclass(slots=True)
+class PreparedBlock:
+    m5: pd.DataFrame
+    m15: pd.DataFrame
+    h1: pd.DataFrame
+    m5_start: int
+    m15_start: int
+    h1_start: int
+    next_bar: pd.Series | None = None
+
+
+class BarView:
+    """One prepared M5 bar read from its block's column arrays instead of a row Series built per bar.
+
+    Supports the `row[col]` / `row.get(col)` reads the engine makes and returns the same scalar types as `iloc`. `at`
+    repoints the view in place, so a view must not be kept past the bar it was read for.
+    """
+
+    __slots__ = ("_columns", "_index")
+
+    def __init__(self, frame: pd.DataFrame) -> None:
+        self._columns: dict[str, Any] = {
+            name: frame[name].array if pd.api.types.is_datetime64_any_dtype(frame[name]) else frame[name].to_numpy()
+            for name in frame.columns
+        }
+        self._index = 0
+
+    def at(self, index: int) -> BarView:
+        self._index = index
+        return self
+
+    def __getitem__(self, column: str) -> Any:
+        return self._columns[column][self._index]
+
+    def __contains__(self, column: str) -> bool:
+        return column in self._columns
+
+    def get(self, column: str, default: Any = None) -> Any:
+        values = self._columns.get(column)
+        return default if values is None else values[self._index]
+
+
+# A prepared M5 bar as the strategy code reads it: a row Series (tests, one-off reads) or the loop's `BarView`.
+M5Row = pd.Series | BarView
 
 
 class SimulationEngine:
-    def __init__(self, config: dict[str, Any], logger: CsvLogger):
+    def __init__(
+        self,
+        config: dict[str, Any],
+        logger: CsvLogger,
+        progress: ProgressStream | None = None,
+        progress_phase: str = "full",
+    ):
         self.config = config
         self.logger = logger
+        self.progress = progress
+        self.progress_phase = progress_phase
         self.risk = RiskManager(config)
 
         self.trade_id = 0
@@ -126,6 +273,7 @@ class SimulationEngine:
         self.v4_time_stop = bool(v4_cfg.get("time_stop", True))
         self.v4_exit_at_trade_end = bool(v4_cfg.get("exit_at_trade_end", True))
         self.v4_stop_mode = str(v4_cfg.get("stop_mode", "box")).lower()
+        self.v4_fast_exit = bool(v4_cfg.get("fast_exit", False))
         vtm_cfg = config.get("vtm_vol_mr", {}) or {}
         self.vtm_signal_model = str(vtm_cfg.get("signal_model", "standard")).strip().lower()
         self.vtm_atr_period = int(vtm_cfg.get("atr_period", 14))
@@ -209,6 +357,10 @@ class SimulationEngine:
 
         self.progress_every_days = max(0, int(config.get("progress_every_days", 5)))
         self.stdout_trade_events = bool(config.get("stdout_trade_events", False))
+        self.log_policy = LogPolicy(config.get("log_verbosity"))
+        # None runs position management and indicator recursions bar by bar in Python.
+        self.kernel_backend = resolve_backend(config.get("kernel_backend"))
+        self.kernels = load_kernels(self.kernel_backend)
 
         self.cooldown_until_index = -1
         self.shock_block_until_index = -1
@@ -225,38 +377,68 @@ class SimulationEngine:
         self.weekly_start_equity: dict[str, float] = {}
         self.trades_opened_per_day: dict[str, int] = {}
         self.trades_opened_per_session: dict[str, int] = {}
+        self.closed_trade_r: list[float] = []
+        self.funnel = FunnelCounters()
         self.regime_state = "NO_TRADE"
         self.regime_since_m15_idx: int | None = None
         self.regime_stats: dict[str, int] = {"TREND": 0, "RANGE": 0, "NO_TRADE": 0}
         self.last_touch_upper_m5_index: int | None = None
         self.last_touch_lower_m5_index: int | None = None
 
-        self.equity_curve: list[dict[str, Any]] = []
+        # Equity after each fill, as column arrays (see `trade_store`).
+        self.equity_curve = ColumnStore(EQUITY_COLUMNS)
         self.bar_delta = pd.Timedelta(minutes=5)
         self._m15_pullback_rsi_ok = False
         self._m15_pullback_start_idx: int | None = None
+        self._m15_pullback_start_ts: pd.Timestamp | None = None
         self._m15_last_reason = "INIT"
+        self._fast_exit_bars: dict[str, np.ndarray] | None = None
 
-    def run(self, m5_df: pd.DataFrame) -> dict[str, Any]:
+    def run(self, m5_df: pd.DataFrame, stop_check: StopCheck | None = None) -> dict[str, Any]:
         if m5_df.empty:
             raise ValueError("Input M5 data is empty.")
+        return self._run_blocks([m5_df], scan=None, stop_check=stop_check)
 
-        m5 = self._prepare_m5(m5_df)
-        if len(m5) > 1:
-            inferred = pd.Series(m5["timestamp"]).diff().dropna().median()
-            if pd.notna(inferred) and inferred > pd.Timedelta(0):
-                self.bar_delta = inferred
+    def run_chunked(self, blocks: Iterable[pd.DataFrame], scan: M5Scan, stop_check: StopCheck | None = None) -> dict[str, Any]:
+        """Run over time-ordered whole-day M5 blocks, carrying indicator and engine state; matches `run` on the concatenation."""
+        return self._run_blocks(blocks, scan=scan, stop_check=stop_check)
 
-        m15 = self._prepare_m15(m5)
-        h1 = self._prepare_h1(m5)
+    def _run_blocks(
+        self,
+        blocks: Iterable[pd.DataFrame],
+        scan: M5Scan | None,
+        stop_check: StopCheck | None = None,
+    ) -> dict[str, Any]:
+        prepared = self._iter_prepared_blocks(blocks, streamed=scan is not None)
+        first_block = next(prepared, None)
+        if first_block is None:
+            raise ValueError("Input M5 data is empty.")
+        m5 = first_block.m5
+        if scan is None:
+            if len(m5) > 1:
+                inferred = pd.Series(m5["timestamp"]).diff().dropna().median()
+                if pd.notna(inferred) and inferred > pd.Timedelta(0):
+                    self.bar_delta = inferred
+            self._fast_exit_bars = self._prepare_fast_exit_bars(m5)
+            sim_end_ts = pd.Timestamp(m5.iloc[-1]["timestamp"]).to_pydatetime()
+            total_bars = len(m5)
+        else:
+            if scan.bar_delta is not None:
+                self.bar_delta = scan.bar_delta
+            # Solved exits need the bars after entry, which a chunked run has not read yet.
+            self._fast_exit_bars = None
+            sim_end_ts = pd.Timestamp(scan.end_ts).to_pydatetime()
+            total_bars = scan.rows
 
         sim_start_ts = pd.Timestamp(m5.iloc[0]["timestamp"]).to_pydatetime()
-        sim_end_ts = pd.Timestamp(m5.iloc[-1]["timestamp"]).to_pydatetime()
         sim_days = (sim_end_ts - sim_start_ts).total_seconds() / 86400.0
-        total_bars = len(m5)
         total_seconds = max((sim_end_ts - sim_start_ts).total_seconds(), 1.0)
         progress_step = pd.Timedelta(days=self.progress_every_days) if self.progress_every_days > 0 else None
         next_progress_ts = (pd.Timestamp(sim_start_ts) + progress_step) if progress_step is not None else None
+        next_progress_ns = next_progress_ts.value if next_progress_ts is not None else None
+        progress = self.progress
+        if progress is not None:
+            progress.begin(self.progress_phase, bars_total=total_bars, sim_start=sim_start_ts, sim_end=sim_end_ts)
 
         state = EngineState.WAIT_H1_BIAS
         bias_context = BiasContext(bias=Bias.NONE, reason="INIT")
@@ -265,10 +447,10 @@ class SimulationEngine:
         open_position: Position | None = None
         closed_trades = 0
         states_visited = {state.value}
-        self.equity_curve = [{"timestamp": pd.Timestamp(sim_start_ts), "equity": self.risk.equity}]
+        first_ts = pd.Timestamp(m5["timestamp"].iloc[0])
+        self.equity_curve = ColumnStore.like(EQUITY_COLUMNS, first_ts)
+        self.equity_curve.append(pd.Timestamp(sim_start_ts).value, self.risk.equity)
 
-        m15_timestamps = m15["timestamp"].to_numpy()
-        h1_timestamps = h1["timestamp"].to_numpy()
         m15_end = 0
         h1_end = 0
         prev_m15_end = 0
@@ -280,577 +462,631 @@ class SimulationEngine:
         m15_state_bias = Bias.NONE
         self._m15_pullback_rsi_ok = False
         self._m15_pullback_start_idx = None
+        self._m15_pullback_start_ts = None
         self._m15_last_reason = "M15_CONFIRM_NOT_READY"
         self.trades_opened_per_day = {}
         self.trades_opened_per_session = {}
+        self.closed_trade_r = []
+        self.funnel = FunnelCounters()
+        self.log_policy.reset()
         self.regime_state = "NO_TRADE"
         self.regime_since_m15_idx = None
         self.regime_stats = {"TREND": 0, "RANGE": 0, "NO_TRADE": 0}
         self.last_touch_upper_m5_index = None
         self.last_touch_lower_m5_index = None
 
-        for i in range(total_bars):
-            row = m5.iloc[i]
-            ts = pd.Timestamp(row["timestamp"])
-            open_ts = ts - self.bar_delta
-            self._ensure_period_baselines(open_ts)
-
-            while m15_end < len(m15_timestamps) and pd.Timestamp(m15_timestamps[m15_end]) <= ts:
-                m15_end += 1
-            while h1_end < len(h1_timestamps) and pd.Timestamp(h1_timestamps[h1_end]) <= ts:
-                h1_end += 1
-
-            m15_last_row = m15.iloc[m15_end - 1] if m15_end > 0 else None
-            m15_new_close = m15_end > prev_m15_end
-            h1_new_close = h1_end > prev_h1_end
-
-            if h1_new_close:
-                bias_context = self._evaluate_h1_bias_fast(h1=h1, h1_end=h1_end)
-                prev_h1_end = h1_end
-                if bias_context.bias != m15_state_bias:
-                    m15_state_bias = bias_context.bias
-                    m15_pullback_active = False
-                    m15_confirm_idx = None
-                    m15_confirm_time = None
-                    self._m15_pullback_rsi_ok = False
-                    self._m15_pullback_start_idx = None
-                    self._m15_last_reason = "NO_H1_BIAS" if bias_context.bias == Bias.NONE else "M15_CONFIRM_NOT_READY"
-
-            if m15_new_close:
-                new_start = prev_m15_end
-                new_end = m15_end
-                for idx in range(new_start, new_end):
-                    m15_row = m15.iloc[idx]
-                    if bool(m15_row.get("touch_upper", False)):
-                        self.last_touch_upper_m5_index = i
-                    if bool(m15_row.get("touch_lower", False)):
-                        self.last_touch_lower_m5_index = i
-                    m15_pullback_active, m15_confirm_idx, m15_confirm_time = self._update_m15_confirmation_fast(
-                        bias=bias_context.bias,
-                        m15_row=m15_row,
-                        m15_index=idx,
-                        pullback_active=m15_pullback_active,
-                        confirm_idx=m15_confirm_idx,
-                        confirm_time=m15_confirm_time,
-                    )
-                prev_m15_end = m15_end
-
-                if m15_end > 0:
-                    if self.ablation_force_regime != "AUTO":
-                        self._force_regime_state(
-                            ts=ts,
-                            m15_index=m15_end - 1,
-                            forced_state=self.ablation_force_regime,
+        last_index = -1
+        open_day = -1
+        aborted_reason: str | None = None
+        m15_last_row: pd.Series | None = None
+        bar_delta_ns = self.bar_delta.value
+
+        # Per-bar bookkeeping runs on int64 nanosecond arrays; Timestamps and datetimes are built when a bar needs them.
+        for block in chain([first_block], prepared):
+            m5 = block.m5
+            m15 = block.m15
+            h1 = block.h1
+            bars = BarView(m5)
+            m5_ns = self._timestamps_ns(m5["timestamp"])
+            m5_wall_ns = self._timestamps_ns(m5["timestamp"], wall_clock=True)
+            m5_hours = (m5_wall_ns // _HOUR_NS) % 24
+            m5_open_days = (m5_wall_ns - bar_delta_ns) // _DAY_NS
+            m15_ns = self._timestamps_ns(m15["timestamp"])
+            h1_ns = self._timestamps_ns(h1["timestamp"])
+            m15_stop = block.m15_start + len(m15_ns)
+            h1_stop = block.h1_start + len(h1_ns)
+            m5_stop = block.m5_start + len(m5)
+            entry_signals = self._entry_signal_arrays(m5)
+            for i in range(block.m5_start, m5_stop):
+                k = i - block.m5_start
+                row = bars.at(k)
+                ts = row["timestamp"]
+                ts_ns = int(m5_ns[k])
+                if m5_open_days[k] != open_day:
+                    open_day = int(m5_open_days[k])
+                    open_ts = ts - self.bar_delta
+                    if stop_check is not None:
+                        aborted_reason = stop_check(self, open_ts) or None
+                        if aborted_reason is not None:
+                            self._log_event(open_ts.to_pydatetime(), "RUN_ABORTED", {"reason": aborted_reason})
+                            break
+                    self._ensure_period_baselines(open_ts)
+                last_index = i
+
+                while m15_end < m15_stop and m15_ns[m15_end - block.m15_start] <= ts_ns:
+                    m15_end += 1
+                while h1_end < h1_stop and h1_ns[h1_end - block.h1_start] <= ts_ns:
+                    h1_end += 1
+
+                m15_new_close = m15_end > prev_m15_end
+                h1_new_close = h1_end > prev_h1_end
+                if m15_new_close:
+                    m15_last_row = m15.iloc[m15_end - 1 - block.m15_start]
+
+                if h1_new_close:
+                    bias_context = self._evaluate_h1_bias_fast(h1=h1, h1_end=h1_end - block.h1_start)
+                    prev_h1_end = h1_end
+                    if bias_context.bias != m15_state_bias:
+                        m15_state_bias = bias_context.bias
+                        m15_pullback_active = False
+                        m15_confirm_idx = None
+                        m15_confirm_time = None
+                        self._m15_pullback_rsi_ok = False
+                        self._m15_pullback_start_idx = None
+                        self._m15_pullback_start_ts = None
+                        self._m15_last_reason = "NO_H1_BIAS" if bias_context.bias == Bias.NONE else "M15_CONFIRM_NOT_READY"
+
+                if m15_new_close:
+                    new_start = prev_m15_end
+                    new_end = m15_end
+                    for idx in range(new_start, new_end):
+                        m15_row = m15_last_row if idx == new_end - 1 else m15.iloc[idx - block.m15_start]
+                        if bool(m15_row.get("touch_upper", False)):
+                            self.last_touch_upper_m5_index = i
+                        if bool(m15_row.get("touch_lower", False)):
+                            self.last_touch_lower_m5_index = i
+                        m15_pullback_active, m15_confirm_idx, m15_confirm_time = self._update_m15_confirmation_fast(
+                            bias=bias_context.bias,
+                            m15_row=m15_row,
+                            m15_index=idx,
+                            pullback_active=m15_pullback_active,
+                            confirm_idx=m15_confirm_idx,
+                            confirm_time=m15_confirm_time,
                         )
+                    prev_m15_end = m15_end
+
+                    if m15_end > 0:
+                        if self.ablation_force_regime != "AUTO":
+                            self._force_regime_state(
+                                ts=ts,
+                                m15_index=m15_end - 1,
+                                forced_state=self.ablation_force_regime,
+                            )
+                        else:
+                            trend_score, range_score, dominant_reason, atr_rel, slope_h1, ema_sep_h1 = self._evaluate_regime_scores(
+                                h1=h1,
+                                h1_end=h1_end - block.h1_start,
+                                current_index=i,
+                            )
+                            self._update_regime_from_scores(
+                                ts=ts,
+                                m15_index=m15_end - 1,
+                                trend_score=trend_score,
+                                range_score=range_score,
+                                dominant_reason=dominant_reason,
+                                atr_rel=atr_rel,
+                                slope=slope_h1,
+                                ema_sep=ema_sep_h1,
+                            )
+
+                # Bias and M15 confirmation only change when an H1 or M15 bar closes.
+                if h1_new_close or m15_new_close or i == 0:
+                    if bias_context.bias == Bias.NONE:
+                        m15_context = M15Context(confirmation=Confirmation.NO, reason="NO_H1_BIAS")
+                    elif m15_end == 0:
+                        m15_context = M15Context(confirmation=Confirmation.NO, reason="NO_M15_BAR")
                     else:
-                        trend_score, range_score, dominant_reason, atr_rel, slope_h1, ema_sep_h1 = self._evaluate_regime_scores(
-                            h1=h1,
-                            h1_end=h1_end,
-                            current_index=i,
+                        latest_m15_idx = m15_end - 1
+                        pullback_start_time = (
+                            pd.Timestamp(self._m15_pullback_start_ts).to_pydatetime()
+                            if self._m15_pullback_start_idx is not None and self._m15_pullback_start_idx < m15_end
+                            else None
                         )
-                        self._update_regime_from_scores(
-                            ts=ts,
-                            m15_index=m15_end - 1,
-                            trend_score=trend_score,
-                            range_score=range_score,
-                            dominant_reason=dominant_reason,
-                            atr_rel=atr_rel,
-                            slope=slope_h1,
-                            ema_sep=ema_sep_h1,
-                        )
-
-            if bias_context.bias == Bias.NONE:
-                m15_context = M15Context(confirmation=Confirmation.NO, reason="NO_H1_BIAS")
-            elif m15_end == 0:
-                m15_context = M15Context(confirmation=Confirmation.NO, reason="NO_M15_BAR")
-            else:
-                latest_m15_idx = m15_end - 1
-                pullback_start_time = (
-                    pd.Timestamp(m15.iloc[self._m15_pullback_start_idx]["timestamp"]).to_pydatetime()
-                    if self._m15_pullback_start_idx is not None and self._m15_pullback_start_idx < m15_end
-                    else None
-                )
-                touched_zone = pullback_start_time is not None
-
-                if m15_confirm_idx is not None and (latest_m15_idx - m15_confirm_idx) < self.confirm_valid_m15_bars:
-                    m15_context = M15Context(
-                        confirmation=Confirmation.OK,
-                        touched_zone=touched_zone,
-                        pullback_start_time=pullback_start_time,
-                        confirmation_time=m15_confirm_time.to_pydatetime() if m15_confirm_time is not None else None,
-                        reason="M15_CONFIRM_OK",
-                    )
-                else:
-                    reason = "M15_CONFIRM_EXPIRED" if m15_confirm_idx is not None else self._m15_last_reason
-                    m15_context = M15Context(
-                        confirmation=Confirmation.NO,
-                        touched_zone=touched_zone,
-                        pullback_start_time=pullback_start_time,
-                        confirmation_time=m15_confirm_time.to_pydatetime() if m15_confirm_time is not None else None,
-                        reason=reason,
-                    )
-
-            self._register_shock(i, ts, row)
-
-            if open_position is None and pending_entry is not None and pending_entry.execute_index == i:
-                opened = self._try_execute_pending_entry(
-                    pending=pending_entry,
-                    row=row,
-                    ts=ts,
-                    current_index=i,
-                    bias_context=bias_context,
-                    m15_context=m15_context,
-                    state=state,
-                )
-                pending_entry = None
-                if opened is not None:
-                    open_position = opened
-
-            if open_position is not None:
-                open_mode = open_position.mode
-                if (not self.enable_strategy_v4_orb) and open_position.mode == "TREND" and self.regime_state != "TREND":
-                    self._schedule_position_exit_next_open(open_position, i, "REGIME_EXIT")
-                if (not self.enable_strategy_v4_orb) and open_position.mode == "RANGE" and self.regime_state == "TREND":
-                    self._schedule_position_exit_next_open(open_position, i, "KILL_SWITCH_REGIME_FLIP")
-
-                if self.enable_strategy_v3 and self._should_v3_session_close(open_mode, open_ts):
-                    if self._close_position_full(
-                        position=open_position,
-                        timestamp=ts,
-                        current_index=i,
-                        exit_mid=float(row["open"]),
-                        reason="V3_EXIT_SESSION_END",
-                        event_state=EngineState.WAIT_M5_ENTRY
-                        if (self.enable_strategy_v4_orb or self.enable_strategy_vtm)
-                        else EngineState.WAIT_H1_BIAS,
-                    ):
-                        closed_trades += 1
-                        self.cooldown_until_index = i + self.cooldown_after_trade_bars
-                        open_position = None
-
-                elif self.force_session_close and self._should_force_session_close(open_ts):
-                    if self._close_position_full(
-                        position=open_position,
-                        timestamp=ts,
+                        touched_zone = pullback_start_time is not None
+
+                        if m15_confirm_idx is not None and (latest_m15_idx - m15_confirm_idx) < self.confirm_valid_m15_bars:
+                            m15_context = M15Context(
+                                confirmation=Confirmation.OK,
+                                touched_zone=touched_zone,
+                                pullback_start_time=pullback_start_time,
+                                confirmation_time=m15_confirm_time.to_pydatetime() if m15_confirm_time is not None else None,
+                                reason="M15_CONFIRM_OK",
+                            )
+                        else:
+                            reason = "M15_CONFIRM_EXPIRED" if m15_confirm_idx is not None else self._m15_last_reason
+                            m15_context = M15Context(
+                                confirmation=Confirmation.NO,
+                                touched_zone=touched_zone,
+                                pullback_start_time=pullback_start_time,
+                                confirmation_time=m15_confirm_time.to_pydatetime() if m15_confirm_time is not None else None,
+                                reason=reason,
+                            )
+
+                self._register_shock(i, ts, row)
+
+                if open_position is None and pending_entry is not None and pending_entry.execute_index == i:
+                    opened = self._try_execute_pending_entry(
+                        pending=pending_entry,
+                        row=row,
+                        ts=ts,
                         current_index=i,
-                        exit_mid=float(row["open"]),
-                        reason="SESSION_FORCED_CLOSE",
-                        event_state=EngineState.WAIT_M5_ENTRY
-                        if (self.enable_strategy_v4_orb or self.enable_strategy_vtm)
-                        else EngineState.WAIT_H1_BIAS,
-                    ):
-                        closed_trades += 1
-                        self.cooldown_until_index = i + self.cooldown_after_trade_bars
-                        open_position = None
-
-                elif open_position.pending_exit_index is not None and open_position.pending_exit_index == i:
-                    reason = open_position.pending_exit_reason or "RULE_EXIT"
-                    if self._close_position_full(
+                        bias_context=bias_context,
+                        m15_context=m15_context,
+                        state=state,
+                    )
+                    pending_entry = None
+                    if opened is not None:
+                        open_position = opened
+
+                if open_position is not None:
+                    open_mode = open_position.mode
+                    open_ts = ts - self.bar_delta
+                    if (not self.enable_strategy_v4_orb) and open_position.mode == "TREND" and self.regime_state != "TREND":
+                        self._schedule_position_exit_next_open(open_position, i, "REGIME_EXIT")
+                    if (not self.enable_strategy_v4_orb) and open_position.mode == "RANGE" and self.regime_state == "TREND":
+                        self._schedule_position_exit_next_open(open_position, i, "KILL_SWITCH_REGIME_FLIP")
+
+                    if self.enable_strategy_v3 and self._should_v3_session_close(open_mode, open_ts):
+                        if self._close_position_full(
+                            position=open_position,
+                            timestamp=ts,
+                            current_index=i,
+                            exit_mid=float(row["open"]),
+                            reason="V3_EXIT_SESSION_END",
+                            event_state=EngineState.WAIT_M5_ENTRY
+                            if (self.enable_strategy_v4_orb or self.enable_strategy_vtm)
+                            else EngineState.WAIT_H1_BIAS,
+                        ):
+                            closed_trades += 1
+                            self.cooldown_until_index = i + self.cooldown_after_trade_bars
+                            open_position = None
+
+                    elif self.force_session_close and self._should_force_session_close(open_ts):
+                        if self._close_position_full(
+                            position=open_position,
+                            timestamp=ts,
+                            current_index=i,
+                            exit_mid=float(row["open"]),
+                            reason="SESSION_FORCED_CLOSE",
+                            event_state=EngineState.WAIT_M5_ENTRY
+                            if (self.enable_strategy_v4_orb or self.enable_strategy_vtm)
+                            else EngineState.WAIT_H1_BIAS,
+                        ):
+                            closed_trades += 1
+                            self.cooldown_until_index = i + self.cooldown_after_trade_bars
+                            open_position = None
+
+                    elif open_position.pending_exit_index is not None and open_position.pending_exit_index == i:
+                        reason = open_position.pending_exit_reason or "RULE_EXIT"
+                        if self._close_position_full(
+                            position=open_position,
+                            timestamp=ts,
+                            current_index=i,
+                            exit_mid=float(row["open"]),
+                            reason=reason,
+                            event_state=EngineState.WAIT_M5_ENTRY
+                            if (self.enable_strategy_v4_orb or self.enable_strategy_vtm)
+                            else EngineState.WAIT_H1_BIAS,
+                        ):
+                            closed_trades += 1
+                            self.cooldown_until_index = i + self.cooldown_after_trade_bars
+                            open_position = None
+
+                if open_position is not None:
+                    was_open = True
+                    still_open = self._manage_open_position(
                         position=open_position,
-                        timestamp=ts,
+                        row=row,
+                        ts=ts,
                         current_index=i,
-                        exit_mid=float(row["open"]),
-                        reason=reason,
-                        event_state=EngineState.WAIT_M5_ENTRY
-                        if (self.enable_strategy_v4_orb or self.enable_strategy_vtm)
-                        else EngineState.WAIT_H1_BIAS,
-                    ):
+                        m15_last_row=m15_last_row,
+                        m15_new_close=m15_new_close,
+                    )
+                    if was_open and (not still_open):
                         closed_trades += 1
                         self.cooldown_until_index = i + self.cooldown_after_trade_bars
                         open_position = None
 
-            if open_position is not None:
-                was_open = True
-                still_open = self._manage_open_position(
-                    position=open_position,
-                    row=row,
-                    ts=ts,
-                    current_index=i,
-                    m15_last_row=m15_last_row,
-                    m15_new_close=m15_new_close,
-                )
-                if was_open and (not still_open):
-                    closed_trades += 1
-                    self.cooldown_until_index = i + self.cooldown_after_trade_bars
-                    open_position = None
-
-            if open_position is None:
-                if self.enable_strategy_v4_orb or self.enable_strategy_vtm:
-                    state = EngineState.WAIT_M5_ENTRY
-                elif self.enable_strategy_v3:
-                    if self.regime_state in {"TREND", "RANGE"}:
-                        state = EngineState.WAIT_M5_ENTRY
-                    else:
-                        state = EngineState.WAIT_H1_BIAS
-                else:
-                    if self.regime_state == "NO_TRADE":
-                        state = EngineState.WAIT_H1_BIAS
-                    elif self.regime_state == "RANGE":
+                if open_position is None:
+                    if self.enable_strategy_v4_orb or self.enable_strategy_vtm:
                         state = EngineState.WAIT_M5_ENTRY
+                    elif self.enable_strategy_v3:
+                        if self.regime_state in {"TREND", "RANGE"}:
+                            state = EngineState.WAIT_M5_ENTRY
+                        else:
+                            state = EngineState.WAIT_H1_BIAS
                     else:
-                        if bias_context.bias == Bias.NONE:
+                        if self.regime_state == "NO_TRADE":
                             state = EngineState.WAIT_H1_BIAS
-                        elif m15_context.confirmation != Confirmation.OK:
-                            state = EngineState.WAIT_M15_CONFIRM
-                        else:
+                        elif self.regime_state == "RANGE":
                             state = EngineState.WAIT_M5_ENTRY
-            else:
-                state = EngineState.IN_TRADE
-
-            if pending_entry is not None and i < pending_entry.execute_index:
-                clear_reason: str | None = None
-                if self.enable_strategy_v4_orb or self.enable_strategy_vtm:
-                    clear_reason = None
-                elif self.enable_strategy_v3:
-                    if pending_entry.mode != self.regime_state:
-                        clear_reason = "REGIME_CHANGED_BEFORE_ENTRY"
-                elif pending_entry.mode == "TREND":
-                    if self.regime_state != "TREND":
-                        clear_reason = "REGIME_NOT_TREND"
-                    elif bias_context.bias == Bias.NONE or m15_context.confirmation != Confirmation.OK:
-                        clear_reason = "BIAS_OR_CONFIRMATION_LOST"
-                elif pending_entry.mode == "RANGE":
-                    if self.regime_state != "RANGE":
-                        clear_reason = "REGIME_NOT_RANGE"
-                if clear_reason is not None:
-                    self._log_signal(
-                        timestamp=ts.to_pydatetime(),
-                        state=state,
-                        event_type="PENDING_CLEARED",
-                        signal=pending_entry.signal,
-                        bias_context=bias_context,
-                        m15_context=m15_context,
-                        payload_json={"reason": clear_reason, "mode": pending_entry.mode},
-                    )
-                    pending_entry = None
-
-            if open_position is None and pending_entry is None and state == EngineState.WAIT_M5_ENTRY:
-                signal = EntrySignal.NONE
-                event_type = "SIGNAL_DETECTED"
-                pending_mode = "TREND"
-                fixed_sl_mid: float | None = None
-                fixed_tp_mid: float | None = None
-                setup_reason = ""
-                v3_payload: dict[str, Any] | None = None
-                v4_payload: dict[str, Any] | None = None
-                vtm_payload: dict[str, Any] | None = None
-
-                if self.enable_strategy_v4_orb:
-                    signal, event_type, v4_payload = self._evaluate_v4_entry_signal(row=row, signal_ts=ts)
-                    pending_mode = "V4_ORB"
-                    if signal != EntrySignal.NONE and v4_payload is not None:
-                        fixed_sl_mid = float(v4_payload["sl_mid"])
-                        setup_reason = str(v4_payload.get("setup_reason", "V4_SESSION_ORB"))
-                elif self.enable_strategy_vtm:
-                    signal, event_type, vtm_payload = self._evaluate_vtm_entry_signal(row=row, signal_ts=ts)
-                    pending_mode = "VTM"
-                    if signal != EntrySignal.NONE and vtm_payload is not None:
-                        sl_dist = float(vtm_payload["sl_dist"])
-                        if signal == EntrySignal.BUY:
-                            fixed_sl_mid = float(row["close"]) - sl_dist
                         else:
-                            fixed_sl_mid = float(row["close"]) + sl_dist
-                        fixed_tp_mid = float(vtm_payload["tp_mid"])
-                        setup_reason = str(vtm_payload.get("setup_reason", "VTM_SIGNAL_MEAN_REVERSION"))
-                elif self.enable_strategy_v3:
-                    pending_mode = self.regime_state
-                    signal, event_type, v3_payload = self._evaluate_v3_entry_signal(row=row, mode=self.regime_state)
-                    if signal != EntrySignal.NONE and v3_payload is not None:
-                        atr_for_sl = float(v3_payload["atr_t"])
-                        if signal == EntrySignal.BUY:
-                            fixed_sl_mid = float(row["close"]) - float(v3_payload["sl_dist"])
-                            fixed_tp_mid = float(row["close"]) + float(v3_payload["tp_dist"])
-                        else:
-                            fixed_sl_mid = float(row["close"]) + float(v3_payload["sl_dist"])
-                            fixed_tp_mid = float(row["close"]) - float(v3_payload["tp_dist"])
-                        setup_reason = "V3_TREND_BREAKOUT" if self.regime_state == "TREND" else "V3_RANGE_RSI"
-                        v3_payload["atr_for_sl"] = atr_for_sl
+                            if bias_context.bias == Bias.NONE:
+                                state = EngineState.WAIT_H1_BIAS
+                            elif m15_context.confirmation != Confirmation.OK:
+                                state = EngineState.WAIT_M15_CONFIRM
+                            else:
+                                state = EngineState.WAIT_M5_ENTRY
                 else:
-                    if self.regime_state == "TREND":
-                        signal = self._evaluate_m5_entry_fast(row=row, bias=bias_context.bias, m15_confirm=m15_context.confirmation)
-                        setup_reason = "TREND_MTF_TRIGGER"
-                    elif self.regime_state == "RANGE":
-                        pending_mode = "RANGE"
-                        event_type = "RANGE_SIGNAL_DETECTED"
-                        signal, range_setup = self._evaluate_range_entry_fast(
-                            row=row,
-                            m15_last_row=m15_last_row,
-                            current_index=i,
+                    state = EngineState.IN_TRADE
+
+                if pending_entry is not None and i < pending_entry.execute_index:
+                    clear_reason: str | None = None
+                    if self.enable_strategy_v4_orb or self.enable_strategy_vtm:
+                        clear_reason = None
+                    elif self.enable_strategy_v3:
+                        if pending_entry.mode != self.regime_state:
+                            clear_reason = "REGIME_CHANGED_BEFORE_ENTRY"
+                    elif pending_entry.mode == "TREND":
+                        if self.regime_state != "TREND":
+                            clear_reason = "REGIME_NOT_TREND"
+                        elif bias_context.bias == Bias.NONE or m15_context.confirmation != Confirmation.OK:
+                            clear_reason = "BIAS_OR_CONFIRMATION_LOST"
+                    elif pending_entry.mode == "RANGE":
+                        if self.regime_state != "RANGE":
+                            clear_reason = "REGIME_NOT_RANGE"
+                    if clear_reason is not None:
+                        self._log_signal(
+                            timestamp=ts.to_pydatetime(),
+                            state=state,
+                            event_type="PENDING_CLEARED",
+                            signal=pending_entry.signal,
+                            bias_context=bias_context,
+                            m15_context=m15_context,
+                            payload_json={"reason": clear_reason, "mode": pending_entry.mode},
                         )
-                        if range_setup is not None:
-                            fixed_sl_mid = float(range_setup["sl_mid"])
-                            fixed_tp_mid = float(range_setup["tp_mid"])
-                            setup_reason = "RANGE_BAND_REJECTION"
-
-                if signal != EntrySignal.NONE:
-                    if i + 1 < total_bars:
-                        next_open = float(m5.iloc[i + 1]["open"])
-                        if self.enable_strategy_v4_orb and v4_payload is not None and fixed_sl_mid is not None:
-                            rr = float(v4_payload["rr"])
-                            if signal == EntrySignal.BUY:
-                                fixed_tp_mid = next_open + (rr * abs(next_open - fixed_sl_mid))
-                            else:
-                                fixed_tp_mid = next_open - (rr * abs(next_open - fixed_sl_mid))
-                        elif self.enable_strategy_v3 and v3_payload is not None:
+                        pending_entry = None
+
+                if open_position is None and pending_entry is None and state == EngineState.WAIT_M5_ENTRY:
+                    signal = EntrySignal.NONE
+                    event_type = "SIGNAL_DETECTED"
+                    pending_mode = "TREND"
+                    fixed_sl_mid: float | None = None
+                    fixed_tp_mid: float | None = None
+                    setup_reason = ""
+                    v3_payload: dict[str, Any] | None = None
+                    v4_payload: dict[str, Any] | None = None
+                    vtm_payload: dict[str, Any] | None = None
+
+                    if self.enable_strategy_v4_orb:
+                        signal, event_type, v4_payload = self._entry_signal_at(entry_signals, k, row)
+                        pending_mode = "V4_ORB"
+                        if signal != EntrySignal.NONE and v4_payload is not None:
+                            fixed_sl_mid = float(v4_payload["sl_mid"])
+                            setup_reason = str(v4_payload.get("setup_reason", "V4_SESSION_ORB"))
+                    elif self.enable_strategy_vtm:
+                        signal, event_type, vtm_payload = self._entry_signal_at(entry_signals, k, row)
+                        pending_mode = "VTM"
+                        if signal != EntrySignal.NONE and vtm_payload is not None:
+                            sl_dist = float(vtm_payload["sl_dist"])
                             if signal == EntrySignal.BUY:
-                                fixed_sl_mid = next_open - float(v3_payload["sl_dist"])
-                                fixed_tp_mid = next_open + float(v3_payload["tp_dist"])
+                                fixed_sl_mid = float(row["close"]) - sl_dist
                             else:
-                                fixed_sl_mid = next_open + float(v3_payload["sl_dist"])
-                                fixed_tp_mid = next_open - float(v3_payload["tp_dist"])
-                        elif self.enable_strategy_vtm and vtm_payload is not None:
-                            sl_dist = float(vtm_payload["sl_dist"])
+                                fixed_sl_mid = float(row["close"]) + sl_dist
+                            fixed_tp_mid = float(vtm_payload["tp_mid"])
+                            setup_reason = str(vtm_payload.get("setup_reason", "VTM_SIGNAL_MEAN_REVERSION"))
+                    elif self.enable_strategy_v3:
+                        pending_mode = self.regime_state
+                        signal, event_type, v3_payload = self._evaluate_v3_entry_signal(row=row, mode=self.regime_state)
+                        if signal != EntrySignal.NONE and v3_payload is not None:
+                            atr_for_sl = float(v3_payload["atr_t"])
                             if signal == EntrySignal.BUY:
-                                fixed_sl_mid = next_open - sl_dist
+                                fixed_sl_mid = float(row["close"]) - float(v3_payload["sl_dist"])
+                                fixed_tp_mid = float(row["close"]) + float(v3_payload["tp_dist"])
                             else:
-                                fixed_sl_mid = next_open + sl_dist
-                            if self.vtm_signal_model == "shock_session":
-                                target_dist = float(vtm_payload.get("target_dist", 0.0))
-                                if target_dist > 0.0:
-                                    fixed_tp_mid = (
-                                        next_open + target_dist if signal == EntrySignal.BUY else next_open - target_dist
-                                    )
+                                fixed_sl_mid = float(row["close"]) + float(v3_payload["sl_dist"])
+                                fixed_tp_mid = float(row["close"]) - float(v3_payload["tp_dist"])
+                            setup_reason = "V3_TREND_BREAKOUT" if self.regime_state == "TREND" else "V3_RANGE_RSI"
+                            v3_payload["atr_for_sl"] = atr_for_sl
+                    else:
+                        if self.regime_state == "TREND":
+                            signal = self._evaluate_m5_entry_fast(row=row, bias=bias_context.bias, m15_confirm=m15_context.confirmation)
+                            setup_reason = "TREND_MTF_TRIGGER"
+                        elif self.regime_state == "RANGE":
+                            pending_mode = "RANGE"
+                            event_type = "RANGE_SIGNAL_DETECTED"
+                            signal, range_setup = self._evaluate_range_entry_fast(
+                                row=row,
+                                m15_last_row=m15_last_row,
+                                current_index=i,
+                            )
+                            if range_setup is not None:
+                                fixed_sl_mid = float(range_setup["sl_mid"])
+                                fixed_tp_mid = float(range_setup["tp_mid"])
+                                setup_reason = "RANGE_BAND_REJECTION"
+
+                    hour = int(m5_hours[k])
+                    self.funnel.count_stage(hour, "opportunities", pending_mode, self.regime_state)
+                    if signal != EntrySignal.NONE:
+                        self.funnel.count_stage(hour, "signals", pending_mode, self.regime_state)
+                        next_bar = m5.iloc[i + 1 - block.m5_start] if i + 1 < m5_stop else block.next_bar
+                        if next_bar is not None:
+                            next_open = float(next_bar["open"])
+                            if self.enable_strategy_v4_orb and v4_payload is not None and fixed_sl_mid is not None:
+                                rr = float(v4_payload["rr"])
+                                if signal == EntrySignal.BUY:
+                                    fixed_tp_mid = next_open + (rr * abs(next_open - fixed_sl_mid))
+                                else:
+                                    fixed_tp_mid = next_open - (rr * abs(next_open - fixed_sl_mid))
+                            elif self.enable_strategy_v3 and v3_payload is not None:
+                                if signal == EntrySignal.BUY:
+                                    fixed_sl_mid = next_open - float(v3_payload["sl_dist"])
+                                    fixed_tp_mid = next_open + float(v3_payload["tp_dist"])
+                                else:
+                                    fixed_sl_mid = next_open + float(v3_payload["sl_dist"])
+                                    fixed_tp_mid = next_open - float(v3_payload["tp_dist"])
+                            elif self.enable_strategy_vtm and vtm_payload is not None:
+                                sl_dist = float(vtm_payload["sl_dist"])
+                                if signal == EntrySignal.BUY:
+                                    fixed_sl_mid = next_open - sl_dist
+                                else:
+                                    fixed_sl_mid = next_open + sl_dist
+                                if self.vtm_signal_model == "shock_session":
+                                    target_dist = float(vtm_payload.get("target_dist", 0.0))
+                                    if target_dist > 0.0:
+                                        fixed_tp_mid = (
+                                            next_open + target_dist if signal == EntrySignal.BUY else next_open - target_dist
+                                        )
+                                    else:
+                                        fixed_tp_mid = float(vtm_payload["tp_mid"])
                                 else:
                                     fixed_tp_mid = float(vtm_payload["tp_mid"])
-                            else:
-                                fixed_tp_mid = float(vtm_payload["tp_mid"])
-                        pending_entry = PendingEntry(
-                            signal=signal,
-                            signal_index=i,
-                            execute_index=i + 1,
-                            signal_ts=ts,
-                            swing_low6=float(row["swing_low"]) if pd.notna(row["swing_low"]) else float("nan"),
-                            swing_high6=float(row["swing_high"]) if pd.notna(row["swing_high"]) else float("nan"),
-                            atr_signal=(
-                                float(row["atr_v3"])
-                                if (self.enable_strategy_v3 and pd.notna(row["atr_v3"]))
-                                else (
-                                    float(row["atr_vtm"])
-                                    if (self.enable_strategy_vtm and pd.notna(row.get("atr_vtm", pd.NA)))
-                                    else (float(row["atr_m5"]) if pd.notna(row["atr_m5"]) else 0.0)
-                                )
-                            ),
-                            trigger_price=float(row["close"]),
-                            mode=pending_mode,
-                            fixed_sl_mid=fixed_sl_mid,
-                            fixed_tp_mid=fixed_tp_mid,
-                            regime_state=self.regime_state,
-                            cost_multiplier=1.0,
-                            setup_reason=setup_reason,
-                            signal_high=float(row["high"]) if pd.notna(row["high"]) else None,
-                            signal_low=float(row["low"]) if pd.notna(row["low"]) else None,
-                        )
-                        if self.enable_strategy_v4_orb and v4_payload is not None:
-                            direction = "LONG" if signal == EntrySignal.BUY else "SHORT"
-                            signal_details = {
-                                "strategy": "V4_SESSION_ORB",
-                                "direction": direction,
-                                "close_t": float(row["close"]),
-                                "entry_open_t1": next_open,
-                                "entry_ts_t1": pd.Timestamp(m5.iloc[i + 1]["timestamp"]).isoformat(),
-                                "asia_high": float(v4_payload["asia_high"]),
-                                "asia_low": float(v4_payload["asia_low"]),
-                                "buffer": float(v4_payload["buffer"]),
-                                "break_level": float(v4_payload["break_level"]),
-                                "sl_mid": float(fixed_sl_mid) if fixed_sl_mid is not None else None,
-                                "tp_mid": float(fixed_tp_mid) if fixed_tp_mid is not None else None,
-                                "rr": float(v4_payload["rr"]),
-                                "stop_mode": self.v4_stop_mode,
-                                "params": self._v4_active_params(),
-                            }
-                            self.logger.log_event(ts.to_pydatetime(), event_type, signal_details)
-                        elif self.enable_strategy_vtm and vtm_payload is not None:
-                            direction = "LONG" if signal == EntrySignal.BUY else "SHORT"
-                            signal_details = {
-                                "strategy": "VTM_VOL_MR",
-                                "signal_model": self.vtm_signal_model,
-                                "direction": direction,
-                                "close_t": float(row["close"]),
-                                "entry_open_t1": next_open,
-                                "entry_ts_t1": pd.Timestamp(m5.iloc[i + 1]["timestamp"]).isoformat(),
-                                "atr_t": float(vtm_payload["atr_t"]),
-                                "atr_ma_t": vtm_payload.get("atr_ma_t"),
-                                "sma_t": (
-                                    float(vtm_payload["sma_t"])
-                                    if pd.notna(vtm_payload.get("sma_t", pd.NA))
-                                    else None
-                                ),
-                                "slope_t": (
-                                    float(vtm_payload["slope_t"])
-                                    if pd.notna(vtm_payload.get("slope_t", pd.NA))
-                                    else None
-                                ),
-                                "bar_range": float(vtm_payload["bar_range"]),
-                                "sl_dist": float(vtm_payload["sl_dist"]),
-                                "target_dist": float(vtm_payload.get("target_dist", 0.0)),
-                                "sl_mid": float(fixed_sl_mid) if fixed_sl_mid is not None else None,
-                                "tp_mid": float(fixed_tp_mid) if fixed_tp_mid is not None else None,
-                                "holding_bars": self.vtm_holding_bars,
-                                "params": self._vtm_active_params(),
-                            }
-                            self.logger.log_event(ts.to_pydatetime(), event_type, signal_details)
-                        elif self.enable_strategy_v3:
-                            direction = "LONG" if signal == EntrySignal.BUY else "SHORT"
-                            signal_details = {
-                                "regime": self.regime_state,
-                                "direction": direction,
-                                "close_t": float(row["close"]),
-                                "entry_open_t1": next_open,
-                                "entry_ts_t1": pd.Timestamp(m5.iloc[i + 1]["timestamp"]).isoformat(),
-                                "atr_t": float(row["atr_v3"]) if pd.notna(row["atr_v3"]) else None,
-                                "atr_ma_t": float(row["atr_ma_v3"]) if pd.notna(row["atr_ma_v3"]) else None,
-                                "rsi_t": float(row["rsi_v3"]) if pd.notna(row["rsi_v3"]) else None,
-                                "n1_high": float(row["v3_hh_prev"]) if pd.notna(row["v3_hh_prev"]) else None,
-                                "n1_low": float(row["v3_ll_prev"]) if pd.notna(row["v3_ll_prev"]) else None,
-                                "sl_dist": abs(next_open - float(fixed_sl_mid)) if fixed_sl_mid is not None else None,
-                                "tp_dist": abs(float(fixed_tp_mid) - next_open) if fixed_tp_mid is not None else None,
-                                "params": self._v3_active_params(),
-                            }
-                            self.logger.log_event(ts.to_pydatetime(), event_type, signal_details)
-                        self._log_signal(
-                            timestamp=ts.to_pydatetime(),
-                            state=state,
-                            event_type=event_type,
-                            signal=signal,
-                            bias_context=bias_context,
-                            m15_context=m15_context,
-                            entry_price_candidate=float(row["close"]),
-                            entry_price_side="MID",
-                            payload_json={
-                                "signal_index": i,
-                                "execute_index": i + 1,
-                                "mode": pending_mode,
-                                "regime": self.regime_state,
-                                "setup_reason": setup_reason,
-                                "trigger_price": float(row["close"]),
-                                "swing_low6": float(row["swing_low"]) if pd.notna(row["swing_low"]) else None,
-                                "swing_high6": float(row["swing_high"]) if pd.notna(row["swing_high"]) else None,
-                                "atr_signal": (
+                            pending_entry = PendingEntry(
+                                signal=signal,
+                                signal_index=i,
+                                execute_index=i + 1,
+                                signal_ts=ts,
+                                swing_low6=float(row["swing_low"]) if pd.notna(row["swing_low"]) else float("nan"),
+                                swing_high6=float(row["swing_high"]) if pd.notna(row["swing_high"]) else float("nan"),
+                                atr_signal=(
                                     float(row["atr_v3"])
                                     if (self.enable_strategy_v3 and pd.notna(row["atr_v3"]))
                                     else (
                                         float(row["atr_vtm"])
                                         if (self.enable_strategy_vtm and pd.notna(row.get("atr_vtm", pd.NA)))
-                                        else (float(row["atr_m5"]) if pd.notna(row["atr_m5"]) else None)
+                                        else (float(row["atr_m5"]) if pd.notna(row["atr_m5"]) else 0.0)
                                     )
                                 ),
-                                "fixed_sl_mid": fixed_sl_mid,
-                                "fixed_tp_mid": fixed_tp_mid,
-                                "v3": self.enable_strategy_v3,
-                                "v3_payload": v3_payload or {},
-                                "v4": self.enable_strategy_v4_orb,
-                                "vtm": self.enable_strategy_vtm,
-                                "vtm_payload": vtm_payload if self.enable_strategy_vtm else {},
-                            },
-                        )
-                        self._log_signal(
-                            timestamp=ts.to_pydatetime(),
-                            state=state,
-                            event_type="PENDING_SET",
-                            signal=signal,
-                            bias_context=bias_context,
-                            m15_context=m15_context,
-                            payload_json={"execute_index": i + 1, "mode": pending_mode, "regime": self.regime_state},
-                        )
-                    elif self.enable_strategy_v3:
-                        self.logger.log_event(
-                            ts.to_pydatetime(),
-                            "V3_BLOCK_NO_NEXT_BAR",
-                            {
-                                "regime": self.regime_state,
-                                "direction": "LONG" if signal == EntrySignal.BUY else "SHORT",
-                                "close_t": float(row["close"]),
-                                "params": self._v3_active_params(),
-                            },
-                        )
-                    elif self.enable_strategy_v4_orb:
-                        self.logger.log_event(
-                            ts.to_pydatetime(),
-                            "V4_BLOCK_NO_NEXT_BAR",
-                            {"strategy": "V4_SESSION_ORB", "close_t": float(row["close"]), "params": self._v4_active_params()},
-                        )
-                    elif self.enable_strategy_vtm:
-                        self.logger.log_event(
-                            ts.to_pydatetime(),
-                            "VTM_BLOCK_NO_NEXT_BAR",
-                            {"strategy": "VTM_VOL_MR", "close_t": float(row["close"]), "params": self._vtm_active_params()},
-                        )
-                    else:
-                        self._log_signal(
-                            timestamp=ts.to_pydatetime(),
-                            state=state,
-                            event_type="PENDING_IGNORED",
-                            signal=signal,
-                            bias_context=bias_context,
-                            m15_context=m15_context,
-                            payload_json={"reason": "NO_NEXT_BAR", "mode": pending_mode},
-                        )
-                elif self.enable_strategy_v3 and event_type.startswith("V3_BLOCK_"):
-                    self.logger.log_event(
-                        ts.to_pydatetime(),
-                        event_type,
-                        {
-                            "regime": self.regime_state,
-                            "close_t": float(row["close"]),
-                            "atr_t": float(row["atr_v3"]) if pd.notna(row["atr_v3"]) else None,
-                            "atr_ma_t": float(row["atr_ma_v3"]) if pd.notna(row["atr_ma_v3"]) else None,
-                            "rsi_t": float(row["rsi_v3"]) if pd.notna(row["rsi_v3"]) else None,
-                            "n1_high": float(row["v3_hh_prev"]) if pd.notna(row["v3_hh_prev"]) else None,
-                            "n1_low": float(row["v3_ll_prev"]) if pd.notna(row["v3_ll_prev"]) else None,
-                                "params": self._v3_active_params(),
-                            },
-                        )
-                elif self.enable_strategy_v4_orb and event_type.startswith("V4_BLOCK_"):
-                    self.logger.log_event(
-                        ts.to_pydatetime(),
-                        event_type,
-                        {
-                            "strategy": "V4_SESSION_ORB",
-                            "close_t": float(row["close"]),
-                            "atr_t": float(row["atr_v4"]) if pd.notna(row["atr_v4"]) else None,
-                            "params": self._v4_active_params(),
-                        },
-                    )
-                elif self.enable_strategy_vtm and event_type.startswith("VTM_BLOCK_"):
-                    self.logger.log_event(
-                        ts.to_pydatetime(),
-                        event_type,
-                        {
-                            "strategy": "VTM_VOL_MR",
-                            "close_t": float(row["close"]),
-                            "atr_t": float(row["atr_vtm"]) if pd.notna(row.get("atr_vtm", pd.NA)) else None,
-                            "sma_t": float(row["sma_vtm"]) if pd.notna(row.get("sma_vtm", pd.NA)) else None,
-                            "params": self._vtm_active_params(),
-                        },
+                                trigger_price=float(row["close"]),
+                                mode=pending_mode,
+                                fixed_sl_mid=fixed_sl_mid,
+                                fixed_tp_mid=fixed_tp_mid,
+                                regime_state=self.regime_state,
+                                cost_multiplier=1.0,
+                                setup_reason=setup_reason,
+                                signal_high=float(row["high"]) if pd.notna(row["high"]) else None,
+                                signal_low=float(row["low"]) if pd.notna(row["low"]) else None,
+                            )
+                            if self.enable_strategy_v4_orb and v4_payload is not None:
+                                direction = "LONG" if signal == EntrySignal.BUY else "SHORT"
+                                signal_details = {
+                                    "strategy": "V4_SESSION_ORB",
+                                    "direction": direction,
+                                    "close_t": float(row["close"]),
+                                    "entry_open_t1": next_open,
+                                    "entry_ts_t1": pd.Timestamp(next_bar["timestamp"]).isoformat(),
+                                    "asia_high": float(v4_payload["asia_high"]),
+                                    "asia_low": float(v4_payload["asia_low"]),
+                                    "buffer": float(v4_payload["buffer"]),
+                                    "break_level": float(v4_payload["break_level"]),
+                                    "sl_mid": float(fixed_sl_mid) if fixed_sl_mid is not None else None,
+                                    "tp_mid": float(fixed_tp_mid) if fixed_tp_mid is not None else None,
+                                    "rr": float(v4_payload["rr"]),
+                                    "stop_mode": self.v4_stop_mode,
+                                    "params": self._v4_active_params(),
+                                }
+                                self._log_event(ts.to_pydatetime(), event_type, signal_details)
+                            elif self.enable_strategy_vtm and vtm_payload is not None:
+                                direction = "LONG" if signal == EntrySignal.BUY else "SHORT"
+                                signal_details = {
+                                    "strategy": "VTM_VOL_MR",
+                                    "signal_model": self.vtm_signal_model,
+                                    "direction": direction,
+                                    "close_t": float(row["close"]),
+                                    "entry_open_t1": next_open,
+                                    "entry_ts_t1": pd.Timestamp(next_bar["timestamp"]).isoformat(),
+                                    "atr_t": float(vtm_payload["atr_t"]),
+                                    "atr_ma_t": vtm_payload.get("atr_ma_t"),
+                                    "sma_t": (
+                                        float(vtm_payload["sma_t"])
+                                        if pd.notna(vtm_payload.get("sma_t", pd.NA))
+                                        else None
+                                    ),
+                                    "slope_t": (
+                                        float(vtm_payload["slope_t"])
+                                        if pd.notna(vtm_payload.get("slope_t", pd.NA))
+                                        else None
+                                    ),
+                                    "bar_range": float(vtm_payload["bar_range"]),
+                                    "sl_dist": float(vtm_payload["sl_dist"]),
+                                    "target_dist": float(vtm_payload.get("target_dist", 0.0)),
+                                    "sl_mid": float(fixed_sl_mid) if fixed_sl_mid is not None else None,
+                                    "tp_mid": float(fixed_tp_mid) if fixed_tp_mid is not None else None,
+                                    "holding_bars": self.vtm_holding_bars,
+                                    "params": self._vtm_active_params(),
+                                }
+                                self._log_event(ts.to_pydatetime(), event_type, signal_details)
+                            elif self.enable_strategy_v3:
+                                direction = "LONG" if signal == EntrySignal.BUY else "SHORT"
+                                signal_details = {
+                                    "regime": self.regime_state,
+                                    "direction": direction,
+                                    "close_t": float(row["close"]),
+                                    "entry_open_t1": next_open,
+                                    "entry_ts_t1": pd.Timestamp(next_bar["timestamp"]).isoformat(),
+                                    "atr_t": float(row["atr_v3"]) if pd.notna(row["atr_v3"]) else None,
+                                    "atr_ma_t": float(row["atr_ma_v3"]) if pd.notna(row["atr_ma_v3"]) else None,
+                                    "rsi_t": float(row["rsi_v3"]) if pd.notna(row["rsi_v3"]) else None,
+                                    "n1_high": float(row["v3_hh_prev"]) if pd.notna(row["v3_hh_prev"]) else None,
+                                    "n1_low": float(row["v3_ll_prev"]) if pd.notna(row["v3_ll_prev"]) else None,
+                                    "sl_dist": abs(next_open - float(fixed_sl_mid)) if fixed_sl_mid is not None else None,
+                                    "tp_dist": abs(float(fixed_tp_mid) - next_open) if fixed_tp_mid is not None else None,
+                                    "params": self._v3_active_params(),
+                                }
+                                self._log_event(ts.to_pydatetime(), event_type, signal_details)
+                            self._log_signal(
+                                timestamp=ts.to_pydatetime(),
+                                state=state,
+                                event_type=event_type,
+                                signal=signal,
+                                bias_context=bias_context,
+                                m15_context=m15_context,
+                                entry_price_candidate=float(row["close"]),
+                                entry_price_side="MID",
+                                payload_json={
+                                    "signal_index": i,
+                                    "execute_index": i + 1,
+                                    "mode": pending_mode,
+                                    "regime": self.regime_state,
+                                    "setup_reason": setup_reason,
+                                    "trigger_price": float(row["close"]),
+                                    "swing_low6": float(row["swing_low"]) if pd.notna(row["swing_low"]) else None,
+                                    "swing_high6": float(row["swing_high"]) if pd.notna(row["swing_high"]) else None,
+                                    "atr_signal": (
+                                        float(row["atr_v3"])
+                                        if (self.enable_strategy_v3 and pd.notna(row["atr_v3"]))
+                                        else (
+                                            float(row["atr_vtm"])
+                                            if (self.enable_strategy_vtm and pd.notna(row.get("atr_vtm", pd.NA)))
+                                            else (float(row["atr_m5"]) if pd.notna(row["atr_m5"]) else None)
+                                        )
+                                    ),
+                                    "fixed_sl_mid": fixed_sl_mid,
+                                    "fixed_tp_mid": fixed_tp_mid,
+                                    "v3": self.enable_strategy_v3,
+                                    "v3_payload": v3_payload or {},
+                                    "v4": self.enable_strategy_v4_orb,
+                                    "vtm": self.enable_strategy_vtm,
+                                    "vtm_payload": vtm_payload if self.enable_strategy_vtm else {},
+                                },
+                            )
+                            self._log_signal(
+                                timestamp=ts.to_pydatetime(),
+                                state=state,
+                                event_type="PENDING_SET",
+                                signal=signal,
+                                bias_context=bias_context,
+                                m15_context=m15_context,
+                                payload_json={"execute_index": i + 1, "mode": pending_mode, "regime": self.regime_state},
+                            )
+                        elif self.enable_strategy_v3:
+                            self._log_event(
+                                ts.to_pydatetime(),
+                                "V3_BLOCK_NO_NEXT_BAR",
+                                {
+                                    "regime": self.regime_state,
+                                    "direction": "LONG" if signal == EntrySignal.BUY else "SHORT",
+                                    "close_t": float(row["close"]),
+                                    "params": self._v3_active_params(),
+                                },
+                            )
+                        elif self.enable_strategy_v4_orb:
+                            self._log_event(
+                                ts.to_pydatetime(),
+                                "V4_BLOCK_NO_NEXT_BAR",
+                                {"strategy": "V4_SESSION_ORB", "close_t": float(row["close"]), "params": self._v4_active_params()},
+                            )
+                        elif self.enable_strategy_vtm:
+                            self._log_event(
+                                ts.to_pydatetime(),
+                                "VTM_BLOCK_NO_NEXT_BAR",
+                                {"strategy": "VTM_VOL_MR", "close_t": float(row["close"]), "params": self._vtm_active_params()},
+                            )
+                        else:
+                            self._log_signal(
+                                timestamp=ts.to_pydatetime(),
+                                state=state,
+                                event_type="PENDING_IGNORED",
+                                signal=signal,
+                                bias_context=bias_context,
+                                m15_context=m15_context,
+                                payload_json={"reason": "NO_NEXT_BAR", "mode": pending_mode},
+                            )
+                    elif self.enable_strategy_v3 and event_type.startswith("V3_BLOCK_"):
+                        if self._count_event(ts, event_type):
+                            self.logger.log_event(
+                                ts.to_pydatetime(),
+                                event_type,
+                                {
+                                    "regime": self.regime_state,
+                                    "close_t": float(row["close"]),
+                                    "atr_t": float(row["atr_v3"]) if pd.notna(row["atr_v3"]) else None,
+                                    "atr_ma_t": float(row["atr_ma_v3"]) if pd.notna(row["atr_ma_v3"]) else None,
+                                    "rsi_t": float(row["rsi_v3"]) if pd.notna(row["rsi_v3"]) else None,
+                                    "n1_high": float(row["v3_hh_prev"]) if pd.notna(row["v3_hh_prev"]) else None,
+                                    "n1_low": float(row["v3_ll_prev"]) if pd.notna(row["v3_ll_prev"]) else None,
+                                    "params": self._v3_active_params(),
+                                },
+                            )
+                    elif self.enable_strategy_v4_orb and event_type.startswith("V4_BLOCK_"):
+                        if self._count_event(ts, event_type):
+                            self.logger.log_event(
+                                ts.to_pydatetime(),
+                                event_type,
+                                {
+                                    "strategy": "V4_SESSION_ORB",
+                                    "close_t": float(row["close"]),
+                                    "atr_t": float(row["atr_v4"]) if pd.notna(row["atr_v4"]) else None,
+                                    "params": self._v4_active_params(),
+                                },
+                            )
+                    elif self.enable_strategy_vtm and event_type.startswith("VTM_BLOCK_"):
+                        if self._count_event(ts, event_type):
+                            self.logger.log_event(
+                                ts.to_pydatetime(),
+                                event_type,
+                                {
+                                    "strategy": "VTM_VOL_MR",
+                                    "close_t": float(row["close"]),
+                                    "atr_t": float(row["atr_vtm"]) if pd.notna(row.get("atr_vtm", pd.NA)) else None,
+                                    "sma_t": float(row["sma_vtm"]) if pd.notna(row.get("sma_vtm", pd.NA)) else None,
+                                    "params": self._vtm_active_params(),
+                                },
+                            )
+
+                self.regime_stats[self.regime_state] = int(self.regime_stats.get(self.regime_state, 0)) + 1
+
+                if next_progress_ns is not None and ts_ns >= next_progress_ns:
+                    elapsed_seconds = max((ts.to_pydatetime() - sim_start_ts).total_seconds(), 0.0)
+                    progress_pct = max(0.0, min(100.0, (elapsed_seconds / total_seconds) * 100.0))
+                    elapsed_days = elapsed_seconds / 86400.0
+                    self._print_progress(
+                        ts=ts,
+                        bars_done=i + 1,
+                        bars_total=total_bars,
+                        elapsed_days=elapsed_days,
+                        total_days=sim_days,
+                        progress_pct=progress_pct,
+                        closed_trades=closed_trades,
                     )
-
-            self.regime_stats[self.regime_state] = int(self.regime_stats.get(self.regime_state, 0)) + 1
-
-            if next_progress_ts is not None and ts >= next_progress_ts:
-                elapsed_seconds = max((ts.to_pydatetime() - sim_start_ts).total_seconds(), 0.0)
-                progress_pct = max(0.0, min(100.0, (elapsed_seconds / total_seconds) * 100.0))
-                elapsed_days = elapsed_seconds / 86400.0
-                self._print_progress(
-                    ts=ts,
-                    bars_done=i + 1,
-                    bars_total=total_bars,
-                    elapsed_days=elapsed_days,
-                    total_days=sim_days,
-                    progress_pct=progress_pct,
-                    closed_trades=closed_trades,
-                )
-                while next_progress_ts is not None and ts >= next_progress_ts:
-                    next_progress_ts = next_progress_ts + progress_step  # type: ignore[operator]
-
-            states_visited.add(state.value)
-
-        if open_position is not None:
+                    while next_progress_ts is not None and ts >= next_progress_ts:
+                        next_progress_ts = next_progress_ts + progress_step  # type: ignore[operator]
+                    next_progress_ns = next_progress_ts.value
+                if progress is not None and progress.due():
+                    progress.update(bars_done=i + 1, sim_ts=ts, trades_closed=closed_trades, equity=self.risk.equity)
+
+                states_visited.add(state.value)
+            if aborted_reason is not None:
+                break
+
+        # An aborted run is discarded by its caller, so a position still open is left unclosed.
+        if open_position is not None and aborted_reason is None:
             last_row = m5.iloc[-1]
             last_ts = pd.Timestamp(last_row["timestamp"])
             self._close_position_full(
                 position=open_position,
                 timestamp=last_ts,
-                current_index=total_bars - 1,
+                current_index=last_index,
                 exit_mid=float(last_row["close"]),
                 reason="END_OF_DATA",
                 event_state=EngineState.WAIT_M5_ENTRY
@@ -859,86 +1095,248 @@ class SimulationEngine:
             )
             closed_trades += 1
 
+        self.logger.log_funnel(self.funnel, log_verbosity=self.log_policy.verbosity)
+        if progress is not None:
+            progress.end(
+                bars_done=last_index + 1,
+                trades_closed=closed_trades,
+                equity=self.risk.equity,
+                aborted_reason=aborted_reason,
+            )
         return {
             "events_path": str(self.logger.events_path),
             "trades_path": str(self.logger.trades_path),
             "signals_path": str(self.logger.signals_path),
             "fills_path": str(self.logger.fills_path),
+            "funnel_path": str(self.logger.funnel_path),
             "sim_start_ts": sim_start_ts.isoformat(),
             "sim_end_ts": sim_end_ts.isoformat(),
             "sim_days": round(sim_days, 4),
             "states_visited": sorted(states_visited),
             "closed_trades": closed_trades,
             "final_equity": round(self.risk.equity, 2),
-            "equity_curve": pd.DataFrame(self.equity_curve),
+            "equity_curve": self.equity_curve.to_frame(),
             "regime_stats": dict(self.regime_stats),
+            "aborted_reason": aborted_reason,
+            "kernel_backend": self.kernel_backend,
         }
 
-    def _prepare_m5(self, m5_df: pd.DataFrame) -> pd.DataFrame:
-        m5 = m5_df.sort_values("timestamp").reset_index(drop=True).copy()
-        m5["tr_m5"] = true_range(m5)
-        m5["atr_m5"] = atr_wilder(m5, self.atr_period)
-        m5["atr_v4"] = atr_wilder(m5, self.v4_atr_period)
-        m5["atr_v3"] = atr_wilder(m5, self.v3_atr_period_M)
-        m5["atr_vtm"] = atr_wilder(m5, self.vtm_atr_period)
-        m5["atr_ma_v3"] = m5["atr_v3"].rolling(self.v3_atr_period_M, min_periods=self.v3_atr_period_M).mean()
-        m5["atr_ma_vtm"] = m5["atr_vtm"].rolling(self.vtm_atr_period, min_periods=self.vtm_atr_period).mean()
-        m5["rsi_v3"] = rsi_wilder(m5["close"], self.v3_rsi_period)
-        m5["sma_vtm"] = m5["close"].rolling(self.vtm_ma_period, min_periods=self.vtm_ma_period).mean()
-        m5["sma_vtm_slope"] = (
-            (m5["sma_vtm"] - m5["sma_vtm"].shift(self.vtm_slope_lookback)) / float(max(1, self.vtm_slope_lookback))
-        )
-        m5["v3_hh_prev"] = (
-            m5["high"]
-            .rolling(self.v3_breakout_N1, min_periods=self.v3_breakout_N1)
-            .max()
-            .shift(1)
-        )
-        m5["v3_ll_prev"] = (
-            m5["low"]
-            .rolling(self.v3_breakout_N1, min_periods=self.v3_breakout_N1)
-            .min()
-            .shift(1)
-        )
-        m5["ema20_m5"] = ema(m5["close"], self.ema_m5)
-        m5["hh_prev"] = m5["high"].rolling(self.bos_lookback, min_periods=self.bos_lookback).max().shift(1)
-        m5["ll_prev"] = m5["low"].rolling(self.bos_lookback, min_periods=self.bos_lookback).min().shift(1)
-        m5["swing_low"] = m5["low"].rolling(self.swing_lookback, min_periods=self.swing_lookback).min()
-        m5["swing_high"] = m5["high"].rolling(self.swing_lookback, min_periods=self.swing_lookback).max()
-        rng = (m5["high"] - m5["low"]).clip(lower=0.0)
-        m5["bar_range"] = rng
-        body = (m5["close"] - m5["open"]).abs()
-        upper_wick = m5["high"] - m5[["open", "close"]].max(axis=1)
-        lower_wick = m5[["open", "close"]].min(axis=1) - m5["low"]
-        m5["body_ratio"] = (body / rng.replace(0.0, float("nan"))).astype("float64").fillna(0.0)
-        m5["upper_wick_ratio"] = (upper_wick / rng.replace(0.0, float("nan"))).astype("float64").fillna(1.0)
-        m5["lower_wick_ratio"] = (lower_wick / rng.replace(0.0, float("nan"))).astype("float64").fillna(1.0)
-        m5["wick_ok_long"] = m5["upper_wick_ratio"] <= self.wick_ratio_max
-        m5["wick_ok_short"] = m5["lower_wick_ratio"] <= self.wick_ratio_max
-        m5["strong_bull"] = (m5["close"] > m5["open"]) & (m5["body_ratio"] >= self.body_ratio)
-        m5["strong_bear"] = (m5["close"] < m5["open"]) & (m5["body_ratio"] >= self.body_ratio)
-
-        minute_utc = (m5["timestamp"].dt.hour * 60) + m5["timestamp"].dt.minute
-        day_key = m5["timestamp"].dt.date
-        asia_mask = minute_utc.apply(lambda m: self._in_any_window(int(m), [(self.v4_asia_start, self.v4_asia_end)]))
-        asia_slice = m5.loc[asia_mask].copy()
-        if asia_slice.empty:
-            m5["v4_asia_high"] = pd.NA
-            m5["v4_asia_low"] = pd.NA
+    def _iter_prepared_blocks(self, blocks: Iterable[pd.DataFrame], streamed: bool) -> Iterator[PreparedBlock]:
+        """Prepare M5/M15/H1 frames block by block; M15/H1 keep a short tail so lookbacks cross block edges."""
+        stream: dict[str, dict[str, Any]] | None = {"m5": {}, "m15": {}, "h1": {}} if streamed else None
+        raw_blocks = (block for block in blocks if not block.empty)
+        current = next(raw_blocks, None)
+        m5_start = 0
+        m15_emitted = 0
+        h1_emitted = 0
+        m15_tail: pd.DataFrame | None = None
+        h1_tail: pd.DataFrame | None = None
+        h1_keep = max(self.h1_bias_slope_lookback, 0) + 1
+        while current is not None:
+            upcoming = next(raw_blocks, None)
+            m5 = self._prepare_m5(current, stream=None if stream is None else stream["m5"])
+            m15 = self._prepare_m15(m5, stream=None if stream is None else stream["m15"])
+            h1 = self._prepare_h1(m5, stream=None if stream is None else stream["h1"])
+            next_bar: pd.Series | None = None
+            if upcoming is not None:
+                next_bar = upcoming.sort_values("timestamp").iloc[0]
+                last_ts = pd.Timestamp(m5["timestamp"].iloc[-1])
+                next_ts = pd.Timestamp(next_bar["timestamp"])
+                if next_ts < last_ts or next_ts.date() == last_ts.date():
+                    raise ValueError(
+                        f"Chunked M5 blocks must be time-ordered whole days: block ending {last_ts} "
+                        f"is followed by {next_ts}."
+                    )
+
+            m15_new = len(m15)
+            h1_new = len(h1)
+            if m15_tail is not None and m15_new:
+                m15 = pd.concat([m15_tail, m15], ignore_index=True)
+            elif m15_tail is not None:
+                m15 = m15_tail
+            if h1_tail is not None and h1_new:
+                h1 = pd.concat([h1_tail, h1], ignore_index=True)
+            elif h1_tail is not None:
+                h1 = h1_tail
+            m15_start = m15_emitted + m15_new - len(m15)
+            h1_start = h1_emitted + h1_new - len(h1)
+            yield PreparedBlock(
+                m5=m5,
+                m15=m15,
+                h1=h1,
+                m5_start=m5_start,
+                m15_start=m15_start,
+                h1_start=h1_start,
+                next_bar=next_bar,
+            )
+            m5_start += len(m5)
+            m15_emitted += m15_new
+            h1_emitted += h1_new
+            m15_tail = m15.tail(1).reset_index(drop=True) if len(m15) else None
+            h1_tail = h1.tail(h1_keep).reset_index(drop=True) if len(h1) else None
+            current = upcoming
+
+    def m5_features(self) -> list[str]:
+        """Prepared M5 columns the enabled strategy family needs, dependencies included, in registry order."""
+        if self.enable_strategy_v4_orb:
+            family = "v4"
+        elif self.enable_strategy_vtm:
+            family = "vtm"
+        elif self.enable_strategy_v3:
+            family = "v3"
         else:
-            asia_day = asia_slice["timestamp"].dt.date
-            asia_high_by_day = asia_slice.groupby(asia_day)["high"].max()
-            asia_low_by_day = asia_slice.groupby(asia_day)["low"].min()
-            m5["v4_asia_high"] = day_key.map(asia_high_by_day)
-            m5["v4_asia_low"] = day_key.map(asia_low_by_day)
+            family = "baseline"
+        needed: set[str] = set()
+        pending = [*STRATEGY_M5_FEATURES["core"], *STRATEGY_M5_FEATURES[family]]
+        while pending:
+            name = pending.pop()
+            if name not in needed:
+                needed.add(name)
+                pending.extend(M5_FEATURES[name].requires)
+        return [name for name in M5_FEATURES if name in needed]
+
+    def m5_feature_key(self) -> str:
+        """Prepared M5 columns and the config values they depend on; equal keys mean interchangeable prepared frames."""
+        features = self.m5_features()
+        params = {param: getattr(self, param) for name in features for param in M5_FEATURES[name].params}
+        return json.dumps({"features": features, "params": params}, sort_keys=True)
+
+    def prepare_m5_features(self, m5_df: pd.DataFrame) -> pd.DataFrame:
+        """Whole-frame M5 features, tagged so `run` on this frame (or a shared-memory copy of it) reuses them."""
+        m5 = self._prepare_m5(m5_df)
+        m5.attrs[M5_FEATURES_ATTR] = {"key": self.m5_feature_key(), "rows": len(m5)}
+        return m5
+
+    def _prepare_m5(self, m5_df: pd.DataFrame, stream: dict[str, Any] | None = None) -> pd.DataFrame:
+        tag = m5_df.attrs.get(M5_FEATURES_ATTR)
+        if stream is None and isinstance(tag, dict):
+            if tag.get("key") == self.m5_feature_key() and tag.get("rows") == len(m5_df):
+                return m5_df
+        m5 = m5_df.sort_values("timestamp").reset_index(drop=True).copy()
+        m5.attrs.pop(M5_FEATURES_ATTR, None)
+        features = set(self.m5_features())
+        state: dict[str, Any] = {} if stream is None else stream
+        if "tr_m5" in features:
+            m5["tr_m5"] = true_range(m5, state=state.setdefault("tr_m5", {}))
+        atr_periods = {
+            "atr_m5": self.atr_period,
+            "atr_v4": self.v4_atr_period,
+            "atr_v3": self.v3_atr_period_M,
+            "atr_vtm": self.vtm_atr_period,
+        }
+        for name, period in atr_periods.items():
+            if name in features:
+                m5[name] = atr_wilder(m5, period, state=state.setdefault(name, {}), kernels=self.kernels)
+        if "rsi_v3" in features:
+            m5["rsi_v3"] = rsi_wilder(
+                m5["close"], self.v3_rsi_period, state=state.setdefault("rsi_v3", {}), kernels=self.kernels
+            )
+        if "ema20_m5" in features:
+            m5["ema20_m5"] = ema(m5["close"], self.ema_m5, state=state.setdefault("ema20_m5", {}), kernels=self.kernels)
+
+        # Rolling columns are computed over the previous chunk's tail so chunked runs match the full-frame run.
+        tail: pd.DataFrame | None = state.get("tail")
+        warmup = 0 if tail is None else len(tail)
+        if tail is not None:
+            m5 = pd.concat([tail, m5], ignore_index=True)
+        state["tail"] = m5.tail(self._m5_warmup_bars()).copy()
+
+        if "atr_ma_v3" in features:
+            m5["atr_ma_v3"] = rolling_mean(m5["atr_v3"], self.v3_atr_period_M)
+        if "atr_ma_vtm" in features:
+            m5["atr_ma_vtm"] = rolling_mean(m5["atr_vtm"], self.vtm_atr_period)
+        if "sma_vtm" in features:
+            m5["sma_vtm"] = rolling_mean(m5["close"], self.vtm_ma_period)
+        if "sma_vtm_slope" in features:
+            m5["sma_vtm_slope"] = (
+                (m5["sma_vtm"] - m5["sma_vtm"].shift(self.vtm_slope_lookback)) / float(max(1, self.vtm_slope_lookback))
+            )
+        # name -> (source column, window, rolling max or min, shift so the current bar is excluded)
+        extremes = {
+            "v3_hh_prev": ("high", self.v3_breakout_N1, True, 1),
+            "v3_ll_prev": ("low", self.v3_breakout_N1, False, 1),
+            "hh_prev": ("high", self.bos_lookback, True, 1),
+            "ll_prev": ("low", self.bos_lookback, False, 1),
+            "swing_low": ("low", self.swing_lookback, False, 0),
+            "swing_high": ("high", self.swing_lookback, True, 0),
+        }
+        for name, (source, window, is_max, shift) in extremes.items():
+            if name in features:
+                rolling = m5[source].rolling(window, min_periods=window)
+                m5[name] = (rolling.max() if is_max else rolling.min()).shift(shift)
+        if warmup:
+            m5 = m5.iloc[warmup:].reset_index(drop=True)
+
+        if "bar_range" in features:
+            rng = (m5["high"] - m5["low"]).clip(lower=0.0)
+            m5["bar_range"] = rng
+            if "body_ratio" in features:
+                body = (m5["close"] - m5["open"]).abs()
+                m5["body_ratio"] = (body / rng.replace(0.0, float("nan"))).astype("float64").fillna(0.0)
+            if "upper_wick_ratio" in features:
+                upper_wick = m5["high"] - m5[["open", "close"]].max(axis=1)
+                m5["upper_wick_ratio"] = (upper_wick / rng.replace(0.0, float("nan"))).astype("float64").fillna(1.0)
+            if "lower_wick_ratio" in features:
+                lower_wick = m5[["open", "close"]].min(axis=1) - m5["low"]
+                m5["lower_wick_ratio"] = (lower_wick / rng.replace(0.0, float("nan"))).astype("float64").fillna(1.0)
+        if "wick_ok_long" in features:
+            m5["wick_ok_long"] = m5["upper_wick_ratio"] <= self.wick_ratio_max
+        if "wick_ok_short" in features:
+            m5["wick_ok_short"] = m5["lower_wick_ratio"] <= self.wick_ratio_max
+        if "strong_bull" in features:
+            m5["strong_bull"] = (m5["close"] > m5["open"]) & (m5["body_ratio"] >= self.body_ratio)
+        if "strong_bear" in features:
+            m5["strong_bear"] = (m5["close"] < m5["open"]) & (m5["body_ratio"] >= self.body_ratio)
+
+        if "v4_asia_high" in features or "v4_asia_low" in features:
+            minute_utc = ((m5["timestamp"].dt.hour * 60) + m5["timestamp"].dt.minute).to_numpy(dtype="int64")
+            day_key = m5["timestamp"].dt.date
+            asia_mask = self._window_mask(minute_utc, [(self.v4_asia_start, self.v4_asia_end)])
+            asia_slice = m5.loc[asia_mask].copy()
+            if asia_slice.empty:
+                m5["v4_asia_high"] = pd.NA
+                m5["v4_asia_low"] = pd.NA
+            else:
+                asia_day = asia_slice["timestamp"].dt.date
+                asia_high_by_day = asia_slice.groupby(asia_day)["high"].max()
+                asia_low_by_day = asia_slice.groupby(asia_day)["low"].min()
+                m5["v4_asia_high"] = day_key.map(asia_high_by_day)
+                m5["v4_asia_low"] = day_key.map(asia_low_by_day)
         return m5
 
-    def _prepare_m15(self, m5: pd.DataFrame) -> pd.DataFrame:
-        m15 = resample_from_m5(m5, "15min")
-        m15["ema20_m15"] = ema(m15["close"], self.ema_m15)
-        m15["ema50_m15"] = ema(m15["close"], 50)
-        m15["rsi14_m15"] = rsi_wilder(m15["close"], self.rsi_period_m15)
-        m15["atr_m15"] = atr_wilder(m15, self.atr_period)
+    def _m5_warmup_bars(self) -> int:
+        return 1 + max(
+            self.v3_atr_period_M,
+            self.vtm_atr_period,
+            self.vtm_ma_period + max(1, self.vtm_slope_lookback),
+            self.v3_breakout_N1 + 1,
+            self.bos_lookback + 1,
+            self.swing_lookback,
+        )
+
+    @staticmethod
+    def _resample_stream(m5: pd.DataFrame, rule: str, stream: dict[str, Any] | None) -> pd.DataFrame:
+        if stream is None:
+            return resample_from_m5(m5, rule)
+        # Rows of the bucket still open at the end of the chunk are held back until the next chunk closes it.
+        carry: pd.DataFrame | None = stream.get("carry")
+        source = m5 if carry is None else pd.concat([carry, m5], ignore_index=True)
+        if source.empty:
+            return resample_from_m5(source, rule)
+        last_closed = pd.Timestamp(source["timestamp"].iloc[-1]).floor(rule)
+        stream["carry"] = source.loc[source["timestamp"] > last_closed].copy()
+        return resample_from_m5(source.loc[source["timestamp"] <= last_closed], rule)
+
+    def _prepare_m15(self, m5: pd.DataFrame, stream: dict[str, Any] | None = None) -> pd.DataFrame:
+        state: dict[str, Any] = {} if stream is None else stream
+        m15 = self._resample_stream(m5, "15min", stream)
+        kernels = self.kernels
+        m15["ema20_m15"] = ema(m15["close"], self.ema_m15, state=state.setdefault("ema20_m15", {}), kernels=kernels)
+        m15["ema50_m15"] = ema(m15["close"], 50, state=state.setdefault("ema50_m15", {}), kernels=kernels)
+        m15["rsi14_m15"] = rsi_wilder(
+            m15["close"], self.rsi_period_m15, state=state.setdefault("rsi14_m15", {}), kernels=kernels
+        )
+        m15["atr_m15"] = atr_wilder(m15, self.atr_period, state=state.setdefault("atr_m15", {}), kernels=kernels)
         m15["range_mid"] = m15["ema20_m15"]
         m15["range_band"] = self.k_atr_range * m15["atr_m15"]
         m15["range_upper"] = m15["range_mid"] + m15["range_band"]
@@ -947,15 +1345,127 @@ class SimulationEngine:
         m15["touch_lower"] = m15["low"] <= m15["range_lower"]
         return m15
 
-    def _prepare_h1(self, m5: pd.DataFrame) -> pd.DataFrame:
-        h1 = resample_from_m5(m5, "1h")
-        h1["ema50_h1"] = ema(h1["close"], self.ema_h1_fast)
-        h1["ema200_h1"] = ema(h1["close"], self.ema_h1_slow)
-        h1["atr_h1"] = atr_wilder(h1, self.atr_period)
-        h1["atr_h1_sma"] = h1["atr_h1"].rolling(self.atr_rel_lookback, min_periods=self.atr_rel_lookback).mean()
+    def _prepare_h1(self, m5: pd.DataFrame, stream: dict[str, Any] | None = None) -> pd.DataFrame:
+        state: dict[str, Any] = {} if stream is None else stream
+        h1 = self._resample_stream(m5, "1h", stream)
+        kernels = self.kernels
+        h1["ema50_h1"] = ema(h1["close"], self.ema_h1_fast, state=state.setdefault("ema50_h1", {}), kernels=kernels)
+        h1["ema200_h1"] = ema(h1["close"], self.ema_h1_slow, state=state.setdefault("ema200_h1", {}), kernels=kernels)
+        h1["atr_h1"] = atr_wilder(h1, self.atr_period, state=state.setdefault("atr_h1", {}), kernels=kernels)
+        atr_tail: pd.Series | None = state.get("atr_tail")
+        atr_series = h1["atr_h1"] if atr_tail is None else pd.concat([atr_tail, h1["atr_h1"]], ignore_index=True)
+        state["atr_tail"] = atr_series.tail(self.atr_rel_lookback).reset_index(drop=True)
+        h1["atr_h1_sma"] = rolling_mean(atr_series, self.atr_rel_lookback).iloc[len(atr_series) - len(h1) :].to_numpy()
         h1["atr_h1_rel"] = (h1["atr_h1"] / h1["atr_h1_sma"]).replace([float("inf"), float("-inf")], pd.NA)
         return h1
 
+    def _prepare_fast_exit_bars(self, m5: pd.DataFrame) -> dict[str, np.ndarray] | None:
+        """Bar arrays for exits solved at entry: V4 with `fast_exit`, and V3 / V4 / VTM under compiled kernels."""
+        solve_v4 = self.enable_strategy_v4_orb and (self.v4_fast_exit or self.kernels is not None)
+        solve_path = (self.enable_strategy_v3 or self.enable_strategy_vtm) and self.kernels is not None
+        if not (solve_v4 or solve_path) or (self.enable_strategy_v4_orb and self.force_session_close):
+            return None
+        bars = {
+            "high": m5["high"].to_numpy(dtype="float64"),
+            "low": m5["low"].to_numpy(dtype="float64"),
+            "open": m5["open"].to_numpy(dtype="float64"),
+            "close": m5["close"].to_numpy(dtype="float64"),
+        }
+        if self.enable_strategy_v4_orb:
+            open_ts = m5["timestamp"] - self.bar_delta
+            minute = ((open_ts.dt.hour * 60) + open_ts.dt.minute).to_numpy(dtype="int64")
+            bars["outside_trade_window"] = ~self._window_mask(minute, [(self.v4_trade_start, self.v4_trade_end)])
+        if self.enable_strategy_vtm:
+            nan = pd.Series(np.nan, index=m5.index)
+            atr_now = m5["atr_m5"].astype("float64").fillna(0.0)
+            bars["sma_vtm"] = m5.get("sma_vtm", nan).to_numpy(dtype="float64", na_value=np.nan)
+            bars["atr_vtm"] = m5.get("atr_vtm", nan).astype("float64").fillna(atr_now).to_numpy(dtype="float64")
+        return bars
+
+    def _solve_v4_exit(self, position: Position, entry_index: int) -> None:
+        bars = self._fast_exit_bars
+        if bars is None:
+            return
+        time_exit_index: int | None = None
+        if self.v4_time_stop or self.v4_exit_at_trade_end:
+            window_end = first_true_index(bars["outside_trade_window"], entry_index)
+            if window_end is not None:
+                time_exit_index = window_end + 1
+        if self.kernels is not None:
+            position.solved_exit = self._kernel_bracket_exit(position, entry_index, time_exit_index)
+        else:
+            position.solved_exit = first_passage_exit(
+                bars["high"],
+                bars["low"],
+                bars["open"],
+                bars["close"],
+                start=entry_index,
+                is_long=position.trade.direction == Direction.LONG,
+                sl=position.current_sl_mid,
+                tp=position.tp1_mid,
+                time_exit_index=time_exit_index,
+            )
+        if time_exit_index is not None and position.solved_exit.index == time_exit_index:
+            self._schedule_position_exit_next_open(position, time_exit_index - 1, "V4_EXIT_TRADE_WINDOW_END")
+
+    def _kernel_bracket_exit(self, position: Position, entry_index: int, time_exit_index: int | None) -> BracketExit:
+        bars = self._fast_exit_bars
+        index, code, exit_mid = self.kernels.bracket_exit(
+            bars["high"],
+            bars["low"],
+            bars["open"],
+            bars["close"],
+            entry_index,
+            -1 if time_exit_index is None else int(time_exit_index),
+            position.trade.direction == Direction.LONG,
+            position.current_sl_mid,
+            position.tp1_mid,
+        )
+        return BracketExit(index=int(index), reason=_KERNEL_EXIT_REASONS[int(code)], exit_mid=float(exit_mid))
+
+    def _solve_position_path(self, position: Position, entry_index: int) -> None:
+        """Solve a V3 bracket or a VTM path at entry with the compiled kernels; the bar loop then only replays it."""
+        bars = self._fast_exit_bars
+        if bars is None or self.kernels is None:
+            return
+        if self.enable_strategy_v3:
+            position.solved_exit = self._kernel_bracket_exit(position, entry_index, None)
+            return
+        if not self.enable_strategy_vtm:
+            return
+        trade = position.trade
+        index, code, exit_mid, be_index, be_sl, be_logged, be_trigger_r, mfe, mae = self.kernels.vtm_exit(
+            bars["high"],
+            bars["low"],
+            bars["close"],
+            bars["sma_vtm"],
+            bars["atr_vtm"],
+            entry_index,
+            entry_index + max(self.vtm_holding_bars, 1),
+            trade.direction == Direction.LONG,
+            trade.entry_mid,
+            position.risk_distance,
+            position.current_sl_mid,
+            position.tp1_mid,
+            self.vtm_signal_model == "shock_session",
+            self.vtm_exit_on_sma_cross,
+            self.vtm_be_trigger_atr,
+            trade.mfe_r,
+            trade.mae_r,
+        )
+        position.solved_path = PathExit(
+            start=entry_index,
+            index=int(index),
+            reason=_KERNEL_EXIT_REASONS.get(int(code), ""),
+            exit_mid=float(exit_mid),
+            be_index=int(be_index),
+            be_sl=float(be_sl),
+            be_logged=bool(be_logged),
+            be_trigger_r=float(be_trigger_r),
+            mfe_r=mfe,
+            mae_r=mae,
+        )
+
     def _evaluate_h1_bias_fast(self, h1: pd.DataFrame, h1_end: int) -> BiasContext:
         if h1_end <= 0:
             return BiasContext(bias=Bias.NONE, reason="NO_H1_BAR")
@@ -999,6 +1509,16 @@ class SimulationEngine:
             windows.append((start, end))
         return windows
 
+    @staticmethod
+    def _window_mask(minutes: np.ndarray, windows: list[tuple[int, int]]) -> np.ndarray:
+        mask = np.zeros(len(minutes), dtype=bool)
+        for start, end in windows:
+            if start < end:
+                mask |= (minutes >= start) & (minutes < end)
+            else:
+                mask |= (minutes >= start) | (minutes < end)
+        return mask
+
     @staticmethod
     def _in_any_window(minute: int, windows: list[tuple[int, int]]) -> bool:
         for start, end in windows:
@@ -1128,7 +1648,7 @@ class SimulationEngine:
 
     def _evaluate_v4_entry_signal(
         self,
-        row: pd.Series,
+        row: M5Row,
         signal_ts: pd.Timestamp,
     ) -> tuple[EntrySignal, str, dict[str, Any] | None]:
         minute = int(signal_ts.hour) * 60 + int(signal_ts.minute)
@@ -1136,7 +1656,6 @@ class SimulationEngine:
         if not trade_window:
             return EntrySignal.NONE, "V4_BLOCK_OUTSIDE_TRADE_WINDOW", None
 
-        ts = pd.Timestamp(row["timestamp"])
         asia_high = float(row["v4_asia_high"]) if pd.notna(row["v4_asia_high"]) else float("nan")
         asia_low = float(row["v4_asia_low"]) if pd.notna(row["v4_asia_low"]) else float("nan")
         if pd.isna(asia_high) or pd.isna(asia_low):
@@ -1167,19 +1686,7 @@ class SimulationEngine:
             else:
                 sl_mid = asia_low - stop_buffer
                 setup_reason = "V4_ORB_BOX_LONG"
-            payload = {
-                "direction": "LONG",
-                "asia_high": asia_high,
-                "asia_low": asia_low,
-                "buffer": buffer,
-                "break_level": asia_high + buffer,
-                "rr": self.v4_rr,
-                "sl_mid": sl_mid,
-                "atr_t": atr_t,
-                "signal_ts": ts.isoformat(),
-                "setup_reason": setup_reason,
-                "params": self._v4_active_params(),
-            }
+            payload = self._v4_signal_payload(row, EntrySignal.BUY, sl_mid, setup_reason)
             return EntrySignal.BUY, "V4_SIGNAL_ORB_BREAKOUT", payload
 
         if self.v4_stop_mode == "break_wick":
@@ -1188,24 +1695,32 @@ class SimulationEngine:
         else:
             sl_mid = asia_high + stop_buffer
             setup_reason = "V4_ORB_BOX_SHORT"
-        payload = {
-            "direction": "SHORT",
+        payload = self._v4_signal_payload(row, EntrySignal.SELL, sl_mid, setup_reason)
+        return EntrySignal.SELL, "V4_SIGNAL_ORB_BREAKOUT", payload
+
+    def _v4_signal_payload(self, row: M5Row, signal: EntrySignal, sl_mid: float, setup_reason: str) -> dict[str, Any]:
+        asia_high = float(row["v4_asia_high"])
+        asia_low = float(row["v4_asia_low"])
+        atr_t = float(row["atr_v4"])
+        buffer = self.v4_buffer_atr_mult * atr_t
+        is_long = signal == EntrySignal.BUY
+        return {
+            "direction": "LONG" if is_long else "SHORT",
             "asia_high": asia_high,
             "asia_low": asia_low,
             "buffer": buffer,
-            "break_level": asia_low - buffer,
+            "break_level": asia_high + buffer if is_long else asia_low - buffer,
             "rr": self.v4_rr,
             "sl_mid": sl_mid,
             "atr_t": atr_t,
-            "signal_ts": ts.isoformat(),
+            "signal_ts": pd.Timestamp(row["timestamp"]).isoformat(),
             "setup_reason": setup_reason,
             "params": self._v4_active_params(),
         }
-        return EntrySignal.SELL, "V4_SIGNAL_ORB_BREAKOUT", payload
 
     def _evaluate_vtm_entry_signal(
         self,
-        row: pd.Series,
+        row: M5Row,
         signal_ts: pd.Timestamp,
     ) -> tuple[EntrySignal, str, dict[str, Any] | None]:
         minute = int(signal_ts.hour) * 60 + int(signal_ts.minute)
@@ -1222,10 +1737,7 @@ class SimulationEngine:
         low_t = float(row["low"])
         close_t = float(row["close"])
         bar_range = max(0.0, high_t - low_t)
-        spread_proxy = float(self.spread_usd)
-        spread_col = row.get("spread", pd.NA)
-        if pd.notna(spread_col):
-            spread_proxy = float(spread_col)
+        spread_proxy = self._vtm_spread_proxy(row)
         if self.vtm_spread_max_usd > 0.0 and spread_proxy > self.vtm_spread_max_usd:
             return EntrySignal.NONE, "VTM_BLOCK_SPREAD_FILTER", None
 
@@ -1241,40 +1753,14 @@ class SimulationEngine:
             sl_dist = self.vtm_stop_atr * atr_t
             target_dist = self.vtm_target_atr * atr_t
             if near_low:
-                payload = {
-                    "direction": "LONG",
-                    "close_t": close_t,
-                    "high_t": high_t,
-                    "low_t": low_t,
-                    "bar_range": bar_range,
-                    "atr_t": atr_t,
-                    "sl_dist": sl_dist,
-                    "target_dist": target_dist,
-                    "tp_mid": close_t + target_dist,
-                    "holding_bars": self.vtm_holding_bars,
-                    "spread_proxy": spread_proxy,
-                    "setup_reason": "VTM_SHOCK_MR_LONG",
-                    "params": self._vtm_active_params(),
-                }
+                payload = self._vtm_signal_payload(
+                    row, EntrySignal.BUY, sl_dist, close_t + target_dist, target_dist, "VTM_SHOCK_MR_LONG"
+                )
                 return EntrySignal.BUY, "VTM_SIGNAL_SHOCK_MR", payload
-            if near_high:
-                payload = {
-                    "direction": "SHORT",
-                    "close_t": close_t,
-                    "high_t": high_t,
-                    "low_t": low_t,
-                    "bar_range": bar_range,
-                    "atr_t": atr_t,
-                    "sl_dist": sl_dist,
-                    "target_dist": target_dist,
-                    "tp_mid": close_t - target_dist,
-                    "holding_bars": self.vtm_holding_bars,
-                    "spread_proxy": spread_proxy,
-                    "setup_reason": "VTM_SHOCK_MR_SHORT",
-                    "params": self._vtm_active_params(),
-                }
-                return EntrySignal.SELL, "VTM_SIGNAL_SHOCK_MR", payload
-            return EntrySignal.NONE, "VTM_BLOCK_TARGET_SIDE", None
+            payload = self._vtm_signal_payload(
+                row, EntrySignal.SELL, sl_dist, close_t - target_dist, target_dist, "VTM_SHOCK_MR_SHORT"
+            )
+            return EntrySignal.SELL, "VTM_SIGNAL_SHOCK_MR", payload
 
         atr_ma_t = float(row["atr_ma_vtm"]) if pd.notna(row.get("atr_ma_vtm", pd.NA)) else float("nan")
         sma_t = float(row["sma_vtm"]) if pd.notna(row.get("sma_vtm", pd.NA)) else float("nan")
@@ -1301,55 +1787,149 @@ class SimulationEngine:
         if (not near_high) and (not near_low):
             return EntrySignal.NONE, "VTM_BLOCK_NOT_CLOSE_EXTREME", None
 
+        sl_dist = self.vtm_stop_atr * atr_t
         if near_low and sma_t > close_t:
-            sl_dist = self.vtm_stop_atr * atr_t
-            payload = {
-                "direction": "LONG",
-                "close_t": close_t,
-                "high_t": high_t,
-                "low_t": low_t,
-                "bar_range": bar_range,
-                "atr_t": atr_t,
-                "atr_ma_t": atr_ma_t if pd.notna(atr_ma_t) else None,
-                "atr_rel": (atr_t / atr_ma_t) if (pd.notna(atr_ma_t) and atr_ma_t > 0.0) else None,
-                "sma_t": sma_t,
-                "slope_t": slope_t,
-                "sl_dist": sl_dist,
-                "tp_mid": sma_t,
-                "holding_bars": self.vtm_holding_bars,
-                "spread_proxy": spread_proxy,
-                "setup_reason": "VTM_LONG_EXTREME_TO_SMA",
-                "params": self._vtm_active_params(),
-            }
+            payload = self._vtm_signal_payload(row, EntrySignal.BUY, sl_dist, sma_t, None, "VTM_LONG_EXTREME_TO_SMA")
             return EntrySignal.BUY, "VTM_SIGNAL_MEAN_REVERSION", payload
-
         if near_high and sma_t < close_t:
-            sl_dist = self.vtm_stop_atr * atr_t
-            payload = {
-                "direction": "SHORT",
-                "close_t": close_t,
-                "high_t": high_t,
-                "low_t": low_t,
-                "bar_range": bar_range,
-                "atr_t": atr_t,
-                "atr_ma_t": atr_ma_t if pd.notna(atr_ma_t) else None,
-                "atr_rel": (atr_t / atr_ma_t) if (pd.notna(atr_ma_t) and atr_ma_t > 0.0) else None,
-                "sma_t": sma_t,
-                "slope_t": slope_t,
-                "sl_dist": sl_dist,
-                "tp_mid": sma_t,
+            payload = self._vtm_signal_payload(row, EntrySignal.SELL, sl_dist, sma_t, None, "VTM_SHORT_EXTREME_TO_SMA")
+            return EntrySignal.SELL, "VTM_SIGNAL_MEAN_REVERSION", payload
+
+        return EntrySignal.NONE, "VTM_BLOCK_TARGET_SIDE", None
+
+    def _vtm_spread_proxy(self, row: M5Row) -> float:
+        spread_col = row.get("spread", pd.NA)
+        return float(spread_col) if pd.notna(spread_col) else float(self.spread_usd)
+
+    def _vtm_signal_payload(
+        self,
+        row: M5Row,
+        signal: EntrySignal,
+        sl_dist: float,
+        tp_mid: float,
+        target_dist: float | None,
+        setup_reason: str,
+    ) -> dict[str, Any]:
+        high_t = float(row["high"])
+        low_t = float(row["low"])
+        atr_t = float(row["atr_vtm"])
+        payload: dict[str, Any] = {
+            "direction": "LONG" if signal == EntrySignal.BUY else "SHORT",
+            "close_t": float(row["close"]),
+            "high_t": high_t,
+            "low_t": low_t,
+            "bar_range": max(0.0, high_t - low_t),
+            "atr_t": atr_t,
+        }
+        if target_dist is not None:
+            payload.update({"sl_dist": sl_dist, "target_dist": target_dist, "tp_mid": tp_mid})
+        else:
+            atr_ma_t = float(row["atr_ma_vtm"]) if pd.notna(row.get("atr_ma_vtm", pd.NA)) else float("nan")
+            payload.update(
+                {
+                    "atr_ma_t": atr_ma_t if pd.notna(atr_ma_t) else None,
+                    "atr_rel": (atr_t / atr_ma_t) if (pd.notna(atr_ma_t) and atr_ma_t > 0.0) else None,
+                    "sma_t": float(row["sma_vtm"]),
+                    "slope_t": float(row["sma_vtm_slope"]) if pd.notna(row.get("sma_vtm_slope", pd.NA)) else 0.0,
+                    "sl_dist": sl_dist,
+                    "tp_mid": tp_mid,
+                }
+            )
+        payload.update(
+            {
                 "holding_bars": self.vtm_holding_bars,
-                "spread_proxy": spread_proxy,
-                "setup_reason": "VTM_SHORT_EXTREME_TO_SMA",
+                "spread_proxy": self._vtm_spread_proxy(row),
+                "setup_reason": setup_reason,
                 "params": self._vtm_active_params(),
             }
-            return EntrySignal.SELL, "VTM_SIGNAL_MEAN_REVERSION", payload
+        )
+        return payload
 
-        return EntrySignal.NONE, "VTM_BLOCK_TARGET_SIDE", None
+    def _entry_signal_arrays(self, m5: pd.DataFrame) -> SignalArrays | None:
+        """V4/VTM entry decisions for a whole prepared block, so the bar loop only builds payloads for signal bars."""
+        if not (self.enable_strategy_v4_orb or self.enable_strategy_vtm):
+            return None
+        minute = ((m5["timestamp"].dt.hour * 60) + m5["timestamp"].dt.minute).to_numpy(dtype="int64")
+        cols = {name: self._float_array(m5, name) for name in ("close", "high", "low")}
+        if self.enable_strategy_v4_orb:
+            return v4_orb_signals(
+                **cols,
+                atr=self._float_array(m5, "atr_v4"),
+                asia_high=self._float_array(m5, "v4_asia_high"),
+                asia_low=self._float_array(m5, "v4_asia_low"),
+                in_trade_window=self._window_mask(minute, [(self.v4_trade_start, self.v4_trade_end)]),
+                in_asia_window=self._window_mask(minute, [(self.v4_asia_start, self.v4_asia_end)]),
+                asia_not_finalized=(minute < self.v4_asia_end) & (self.v4_asia_start < self.v4_asia_end),
+                buffer_atr_mult=self.v4_buffer_atr_mult,
+                stop_buffer_atr_mult=self.v4_stop_buffer_atr_mult,
+                stop_mode=self.v4_stop_mode,
+            )
+        spread = np.full(len(m5), float(self.spread_usd))
+        if "spread" in m5.columns:
+            raw_spread = self._float_array(m5, "spread")
+            spread = np.where(np.isnan(raw_spread), spread, raw_spread)
+        return vtm_signals(
+            **cols,
+            atr=self._float_array(m5, "atr_vtm"),
+            atr_ma=self._float_array(m5, "atr_ma_vtm"),
+            sma=self._float_array(m5, "sma_vtm"),
+            slope=self._float_array(m5, "sma_vtm_slope"),
+            spread=spread,
+            excluded=self._window_mask(minute, self.vtm_excluded_windows),
+            in_entry_window=(
+                self._window_mask(minute, self.vtm_entry_windows)
+                if self.vtm_entry_windows
+                else np.ones(len(m5), dtype=bool)
+            ),
+            signal_model=self.vtm_signal_model,
+            spread_max_usd=self.vtm_spread_max_usd,
+            shock_threshold=self.vtm_shock_threshold,
+            threshold_range=self.vtm_threshold_range,
+            close_extreme_pct=self.vtm_close_extreme_pct,
+            close_extreme_frac=self.vtm_close_extreme_frac,
+            vol_filter_min=self.vtm_vol_filter_min,
+            slope_threshold=self.vtm_slope_threshold,
+            stop_atr=self.vtm_stop_atr,
+            target_atr=self.vtm_target_atr,
+        )
+
+    @staticmethod
+    def _timestamps_ns(stamps: pd.Series, wall_clock: bool = False) -> np.ndarray:
+        """Epoch nanoseconds, as `Timestamp.value`; `wall_clock` reads aware stamps as local time for hours and days."""
+        if stamps.dt.tz is not None:
+            stamps = stamps.dt.tz_localize(None) if wall_clock else stamps.dt.tz_convert(None)
+        return stamps.to_numpy(dtype="datetime64[ns]").view("int64")
+
+    @staticmethod
+    def _float_array(m5: pd.DataFrame, column: str) -> np.ndarray:
+        return pd.to_numeric(m5[column], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+
+    def _entry_signal_at(
+        self, arrays: SignalArrays, k: int, row: M5Row
+    ) -> tuple[EntrySignal, str, dict[str, Any] | None]:
+        """Scalar-path result for bar `k` of a block, read from its precomputed `SignalArrays`."""
+        event_type = arrays.events[arrays.event[k]]
+        direction = int(arrays.signal[k])
+        if direction == 0:
+            return EntrySignal.NONE, event_type, None
+        signal = EntrySignal.BUY if direction > 0 else EntrySignal.SELL
+        setup_reason = arrays.setups[arrays.setup[k]]
+        if self.enable_strategy_v4_orb:
+            return signal, event_type, self._v4_signal_payload(row, signal, float(arrays.sl_mid[k]), setup_reason)
+        target_dist = float(arrays.target_dist[k])
+        payload = self._vtm_signal_payload(
+            row,
+            signal,
+            float(arrays.sl_dist[k]),
+            float(arrays.tp_mid[k]),
+            None if np.isnan(target_dist) else target_dist,
+            setup_reason,
+        )
+        return signal, event_type, payload
 
     def _evaluate_v3_entry_signal(
         self,
-        row: pd.Series,
+        row: M5Row,
         mode: str,
     ) -> tuple[EntrySignal, str, dict[str, Any] | None]:
         close_t = float(row["close"])
@@ -1607,16 +2187,16 @@ class SimulationEngine:
         }
 
         if current == "TREND":
-            self.logger.log_event(ts.to_pydatetime(), "REGIME_TREND_EXIT", details)
+            self._log_event(ts.to_pydatetime(), "REGIME_TREND_EXIT", details)
         elif current == "RANGE":
-            self.logger.log_event(ts.to_pydatetime(), "REGIME_RANGE_EXIT", details)
+            self._log_event(ts.to_pydatetime(), "REGIME_RANGE_EXIT", details)
 
         if target == "TREND":
-            self.logger.log_event(ts.to_pydatetime(), "REGIME_TREND_ENTER", details)
+            self._log_event(ts.to_pydatetime(), "REGIME_TREND_ENTER", details)
         elif target == "RANGE":
-            self.logger.log_event(ts.to_pydatetime(), "REGIME_RANGE_ENTER", details)
+            self._log_event(ts.to_pydatetime(), "REGIME_RANGE_ENTER", details)
         else:
-            self.logger.log_event(ts.to_pydatetime(), "REGIME_NO_TRADE_ENTER", details)
+            self._log_event(ts.to_pydatetime(), "REGIME_NO_TRADE_ENTER", details)
 
         if current == "TREND":
             self._log_signal(
@@ -1659,7 +2239,7 @@ class SimulationEngine:
 
     def _evaluate_range_entry_fast(
         self,
-        row: pd.Series,
+        row: M5Row,
         m15_last_row: pd.Series | None,
         current_index: int,
     ) -> tuple[EntrySignal, dict[str, float] | None]:
@@ -1742,6 +2322,7 @@ class SimulationEngine:
         if bias == Bias.NONE:
             self._m15_pullback_rsi_ok = False
             self._m15_pullback_start_idx = None
+            self._m15_pullback_start_ts = None
             self._m15_last_reason = "NO_H1_BIAS"
             return False, None, None
 
@@ -1757,6 +2338,7 @@ class SimulationEngine:
             if close <= ema_val:
                 if not pullback_active:
                     self._m15_pullback_start_idx = m15_index
+                    self._m15_pullback_start_ts = ts
                     self._m15_pullback_rsi_ok = False
                 pullback_active = True
                 confirm_idx = None
@@ -1785,6 +2367,7 @@ class SimulationEngine:
         if close >= ema_val:
             if not pullback_active:
                 self._m15_pullback_start_idx = m15_index
+                self._m15_pullback_start_ts = ts
                 self._m15_pullback_rsi_ok = False
             pullback_active = True
             confirm_idx = None
@@ -1810,7 +2393,7 @@ class SimulationEngine:
             self._m15_last_reason = "M15_CONFIRM_NOT_READY"
         return pullback_active, confirm_idx, confirm_time
 
-    def _evaluate_m5_entry_fast(self, row: pd.Series, bias: Bias, m15_confirm: Confirmation) -> EntrySignal:
+    def _evaluate_m5_entry_fast(self, row: M5Row, bias: Bias, m15_confirm: Confirmation) -> EntrySignal:
         if bias == Bias.NONE or m15_confirm != Confirmation.OK:
             return EntrySignal.NONE
         close = float(row["close"])
@@ -1869,28 +2452,29 @@ class SimulationEngine:
             "swing_lookback": self.swing_lookback,
         }
 
-    def _register_shock(self, current_index: int, ts: pd.Timestamp, row: pd.Series) -> None:
+    def _register_shock(self, current_index: int, ts: pd.Timestamp, row: M5Row) -> None:
         atr_now = float(row["atr_m5"]) if pd.notna(row["atr_m5"]) else 0.0
         tr_now = float(row["tr_m5"]) if pd.notna(row["tr_m5"]) else 0.0
         if atr_now <= 0.0:
             return
         if tr_now >= self.shock_threshold * atr_now:
             self.shock_block_until_index = max(self.shock_block_until_index, current_index + self.shock_cooldown_bars)
-            self.logger.log_event(
-                ts.to_pydatetime(),
-                "SHOCK_DETECTED",
-                {
-                    "tr_m5": tr_now,
-                    "atr_m5": atr_now,
-                    "threshold": self.shock_threshold,
-                    "block_until_index": self.shock_block_until_index,
-                },
-            )
+            if self._count_event(ts, "SHOCK_DETECTED"):
+                self.logger.log_event(
+                    ts.to_pydatetime(),
+                    "SHOCK_DETECTED",
+                    {
+                        "tr_m5": tr_now,
+                        "atr_m5": atr_now,
+                        "threshold": self.shock_threshold,
+                        "block_until_index": self.shock_block_until_index,
+                    },
+                )
 
     def _try_execute_pending_entry(
         self,
         pending: PendingEntry,
-        row: pd.Series,
+        row: M5Row,
         ts: pd.Timestamp,
         current_index: int,
         bias_context: BiasContext,
@@ -1898,42 +2482,43 @@ class SimulationEngine:
         state: EngineState,
     ) -> Position | None:
         open_ts = ts - self.bar_delta
+        entry_dt = ts.to_pydatetime()
         if (not self.enable_strategy_v4_orb) and pending.mode == "TREND" and self.regime_state != "TREND":
-            self.logger.log_event(
-                ts.to_pydatetime(),
+            self._log_event(
+                entry_dt,
                 "REGIME_BLOCK",
                 {"index": current_index, "mode": pending.mode, "regime": self.regime_state},
             )
             self._log_signal(
-                timestamp=ts.to_pydatetime(),
+                timestamp=entry_dt,
                 state=state,
                 event_type="REGIME_BLOCK",
                 signal=pending.signal,
                 payload_json={"mode": pending.mode, "regime": self.regime_state},
             )
             if self.enable_strategy_v3:
-                self.logger.log_event(
-                    ts.to_pydatetime(),
+                self._log_event(
+                    entry_dt,
                     "V3_BLOCK_REGIME",
                     {"mode": pending.mode, "regime": self.regime_state, "params": self._v3_active_params()},
                 )
             return None
         if (not self.enable_strategy_v4_orb) and pending.mode == "RANGE" and self.regime_state != "RANGE":
-            self.logger.log_event(
-                ts.to_pydatetime(),
+            self._log_event(
+                entry_dt,
                 "REGIME_BLOCK",
                 {"index": current_index, "mode": pending.mode, "regime": self.regime_state},
             )
             self._log_signal(
-                timestamp=ts.to_pydatetime(),
+                timestamp=entry_dt,
                 state=state,
                 event_type="REGIME_BLOCK",
                 signal=pending.signal,
                 payload_json={"mode": pending.mode, "regime": self.regime_state},
             )
             if self.enable_strategy_v3:
-                self.logger.log_event(
-                    ts.to_pydatetime(),
+                self._log_event(
+                    entry_dt,
                     "V3_BLOCK_REGIME",
                     {"mode": pending.mode, "regime": self.regime_state, "params": self._v3_active_params()},
                 )
@@ -1954,13 +2539,13 @@ class SimulationEngine:
                     "rule_id": hour_rule,
                     "hour_utc": int(open_ts.hour),
                 }
-                self.logger.log_event(
-                    ts.to_pydatetime(),
+                self._log_event(
+                    entry_dt,
                     f"SESSION_BLOCK_{hour_rule}",
                     details,
                 )
                 self._log_signal(
-                    timestamp=ts.to_pydatetime(),
+                    timestamp=entry_dt,
                     state=state,
                     event_type=f"SESSION_BLOCK_{hour_rule}",
                     signal=pending.signal,
@@ -1969,16 +2554,16 @@ class SimulationEngine:
                     payload_json=details,
                 )
                 if self.enable_strategy_v3:
-                    self.logger.log_event(
-                        ts.to_pydatetime(),
+                    self._log_event(
+                        entry_dt,
                         f"V3_BLOCK_{hour_rule}",
                         {**details, "params": self._v3_active_params()},
                     )
                 return None
             session_allowed, session_reason = self._session_mode_allowed(pending.mode, open_ts)
             if not session_allowed:
-                self.logger.log_event(
-                    ts.to_pydatetime(),
+                self._log_event(
+                    entry_dt,
                     "SESSION_BLOCK",
                     {
                         "index": current_index,
@@ -1987,7 +2572,7 @@ class SimulationEngine:
                     },
                 )
                 self._log_signal(
-                    timestamp=ts.to_pydatetime(),
+                    timestamp=entry_dt,
                     state=state,
                     event_type="SESSION_BLOCK",
                     signal=pending.signal,
@@ -1996,8 +2581,8 @@ class SimulationEngine:
                     payload_json={"mode": pending.mode, "reason": session_reason},
                 )
                 if self.enable_strategy_v3:
-                    self.logger.log_event(
-                        ts.to_pydatetime(),
+                    self._log_event(
+                        entry_dt,
                         "V3_BLOCK_SESSION",
                         {"mode": pending.mode, "reason": session_reason, "params": self._v3_active_params()},
                     )
@@ -2005,9 +2590,9 @@ class SimulationEngine:
 
         block_reason = self._entry_block_reason(current_index, open_ts, pending.mode)
         if block_reason is not None:
-            self.logger.log_event(ts.to_pydatetime(), block_reason, {"index": current_index, "mode": pending.mode})
+            self._log_event(entry_dt, block_reason, {"index": current_index, "mode": pending.mode})
             self._log_signal(
-                timestamp=ts.to_pydatetime(),
+                timestamp=entry_dt,
                 state=state,
                 event_type=block_reason,
                 signal=pending.signal,
@@ -2017,8 +2602,8 @@ class SimulationEngine:
             )
             if self.enable_strategy_v3:
                 norm_reason = block_reason[8:] if block_reason.startswith("BLOCKED_") else block_reason
-                self.logger.log_event(
-                    ts.to_pydatetime(),
+                self._log_event(
+                    entry_dt,
                     f"V3_BLOCK_{norm_reason}",
                     {"mode": pending.mode, "reason": block_reason, "params": self._v3_active_params()},
                 )
@@ -2030,10 +2615,10 @@ class SimulationEngine:
         slippage_eff = self.slippage_usd * cost_mult
         atr_now = float(pending.atr_signal)
         if not pd.notna(atr_now) or atr_now <= 0.0:
-            self.logger.log_event(ts.to_pydatetime(), "BLOCKED_INVALID_ATR", {"atr_signal": pending.atr_signal})
+            self._log_event(entry_dt, "BLOCKED_INVALID_ATR", {"atr_signal": pending.atr_signal})
             if self.enable_strategy_v3:
-                self.logger.log_event(
-                    ts.to_pydatetime(),
+                self._log_event(
+                    entry_dt,
                     "V3_BLOCK_INVALID_ATR",
                     {"atr_signal": pending.atr_signal, "params": self._v3_active_params()},
                 )
@@ -2067,15 +2652,15 @@ class SimulationEngine:
         if self.enable_strategy_v4_orb or self.enable_strategy_vtm:
             block_event = "V4_BLOCK_INVALID_SL_SIDE" if self.enable_strategy_v4_orb else "VTM_BLOCK_INVALID_SL_SIDE"
             if direction == Direction.LONG and sl_mid >= entry_mid:
-                self.logger.log_event(
-                    ts.to_pydatetime(),
+                self._log_event(
+                    entry_dt,
                     block_event,
                     {"entry_mid": entry_mid, "sl_mid": sl_mid, "mode": pending.mode},
                 )
                 return None
             if direction == Direction.SHORT and sl_mid <= entry_mid:
-                self.logger.log_event(
-                    ts.to_pydatetime(),
+                self._log_event(
+                    entry_dt,
                     block_event,
                     {"entry_mid": entry_mid, "sl_mid": sl_mid, "mode": pending.mode},
                 )
@@ -2083,7 +2668,7 @@ class SimulationEngine:
 
         risk_distance = abs(entry_mid - sl_mid)
         if risk_distance <= 1e-9:
-            self.logger.log_event(ts.to_pydatetime(), "BLOCKED_INVALID_RISK_DISTANCE", {"risk_distance": risk_distance})
+            self._log_event(entry_dt, "BLOCKED_INVALID_RISK_DISTANCE", {"risk_distance": risk_distance})
             return None
 
         cost_total = (self.spread_usd + self.slippage_usd) * cost_mult
@@ -2098,9 +2683,9 @@ class SimulationEngine:
                 "rule_id": "COST_GATE_OVERRIDE_HOUR",
                 "max_cost_multiplier_hour": max_cost_mult_by_hour,
             }
-            self.logger.log_event(ts.to_pydatetime(), "COST_FILTER_BLOCK_OVERRIDE_HOUR", details)
+            self._log_event(entry_dt, "COST_FILTER_BLOCK_OVERRIDE_HOUR", details)
             self._log_signal(
-                timestamp=ts.to_pydatetime(),
+                timestamp=entry_dt,
                 state=state,
                 event_type="COST_FILTER_BLOCK_OVERRIDE_HOUR",
                 signal=pending.signal,
@@ -2109,7 +2694,7 @@ class SimulationEngine:
                 payload_json=details,
             )
             if self.enable_strategy_v3:
-                self.logger.log_event(ts.to_pydatetime(), "V3_BLOCK_COST_GATE_OVERRIDE_HOUR", details)
+                self._log_event(entry_dt, "V3_BLOCK_COST_GATE_OVERRIDE_HOUR", details)
             return None
 
         if not self.ablation_disable_cost_filter:
@@ -2137,9 +2722,9 @@ class SimulationEngine:
                 )
 
             if should_block:
-                self.logger.log_event(ts.to_pydatetime(), "COST_FILTER_BLOCK", details)
+                self._log_event(entry_dt, "COST_FILTER_BLOCK", details)
                 self._log_signal(
-                    timestamp=ts.to_pydatetime(),
+                    timestamp=entry_dt,
                     state=state,
                     event_type="COST_FILTER_BLOCK",
                     signal=pending.signal,
@@ -2148,15 +2733,15 @@ class SimulationEngine:
                     payload_json=details,
                 )
                 if self.enable_strategy_v3:
-                    self.logger.log_event(ts.to_pydatetime(), "V3_BLOCK_COST_FILTER", details)
+                    self._log_event(entry_dt, "V3_BLOCK_COST_FILTER", details)
                 return None
 
         size, risk_amount = self.risk.position_size(entry_mid, sl_mid)
         if size <= 0.0:
-            self.logger.log_event(ts.to_pydatetime(), "BLOCKED_INVALID_SIZE", {"size": size})
+            self._log_event(entry_dt, "BLOCKED_INVALID_SIZE", {"size": size})
             if self.enable_strategy_v3:
-                self.logger.log_event(
-                    ts.to_pydatetime(),
+                self._log_event(
+                    entry_dt,
                     "V3_BLOCK_INVALID_SIZE",
                     {"size": size, "params": self._v3_active_params()},
                 )
@@ -2168,7 +2753,7 @@ class SimulationEngine:
         trade = Trade(
             trade_id=self.trade_id,
             direction=direction,
-            entry_time=ts.to_pydatetime(),
+            entry_time=entry_dt,
             entry_price=entry_fill,
             sl=sl_mid,
             tp=tp1_mid,
@@ -2201,6 +2786,10 @@ class SimulationEngine:
             lowest_low=entry_mid,
             mode=pending.mode,
         )
+        if self.enable_strategy_v4_orb:
+            self._solve_v4_exit(position, current_index)
+        else:
+            self._solve_position_path(position, current_index)
         day_key = open_ts.date().isoformat()
         self.trades_opened_per_day[day_key] = int(self.trades_opened_per_day.get(day_key, 0)) + 1
         if self.enable_strategy_v3:
@@ -2227,8 +2816,9 @@ class SimulationEngine:
             }
         )
 
-        self.logger.log_event(
-            ts.to_pydatetime(),
+        self.funnel.count_stage(ts.hour, "entries", pending.mode, self.regime_state)
+        self._log_event(
+            entry_dt,
             "TRADE_OPEN",
             {
                 "trade_id": trade.trade_id,
@@ -2244,11 +2834,13 @@ class SimulationEngine:
                 "cost_multiplier": cost_mult,
                 "cost_bucket": cost_bucket,
                 "setup_reason": pending.setup_reason,
+                "atr_signal": atr_now,
+                "hour_utc": int(open_ts.hour),
             },
         )
         if self.enable_strategy_v3:
-            self.logger.log_event(
-                ts.to_pydatetime(),
+            self._log_event(
+                entry_dt,
                 "V3_ENTRY",
                 {
                     "trade_id": trade.trade_id,
@@ -2274,7 +2866,7 @@ class SimulationEngine:
             else ("VTM_ENTRY" if self.enable_strategy_vtm else ("V3_ENTRY" if self.enable_strategy_v3 else "TRADE_OPEN"))
         )
         self._log_signal(
-            timestamp=ts.to_pydatetime(),
+            timestamp=entry_dt,
             state=EngineState.IN_TRADE,
             event_type=entry_event_type,
             signal=pending.signal,
@@ -2302,12 +2894,28 @@ class SimulationEngine:
     def _manage_open_position(
         self,
         position: Position,
-        row: pd.Series,
+        row: M5Row,
         ts: pd.Timestamp,
         current_index: int,
         m15_last_row: pd.Series | None,
         m15_new_close: bool,
     ) -> bool:
+        if position.solved_exit is not None:
+            solved = position.solved_exit
+            if solved.reason not in {EXIT_SL, EXIT_TP} or current_index < solved.index:
+                return True
+            prefix = "V4" if self.enable_strategy_v4_orb else "V3"
+            return not self._close_position_full(
+                position=position,
+                timestamp=ts,
+                current_index=current_index,
+                exit_mid=solved.exit_mid,
+                reason=f"{prefix}_EXIT_SL" if solved.reason == EXIT_SL else f"{prefix}_EXIT_TP",
+                event_state=EngineState.WAIT_M5_ENTRY if self.enable_strategy_v4_orb else EngineState.WAIT_H1_BIAS,
+            )
+        if position.solved_path is not None:
+            return self._replay_vtm_path(position, ts, current_index)
+
         trade = position.trade
         high = float(row["high"])
         low = float(row["low"])
@@ -2432,7 +3040,7 @@ class SimulationEngine:
                         position.current_sl_mid = min(position.current_sl_mid, trade.entry_mid)
                     if abs(position.current_sl_mid - prev_sl) > 1e-9:
                         trade.be_moved = True
-                        self.logger.log_event(
+                        self._log_event(
                             ts.to_pydatetime(),
                             "VTM_BE_MOVE",
                             {
@@ -2620,7 +3228,7 @@ class SimulationEngine:
                     position.current_sl_mid = min(position.current_sl_mid, trade.entry_mid)
                 if abs(position.current_sl_mid - prev_sl) > 1e-9:
                     trade.be_moved = True
-                    self.logger.log_event(
+                    self._log_event(
                         ts.to_pydatetime(),
                         "BE_MOVE",
                         {"trade_id": trade.trade_id, "from": prev_sl, "to": position.current_sl_mid, "mfe_r": trade.mfe_r},
@@ -2648,7 +3256,7 @@ class SimulationEngine:
                     position.current_sl_mid = min(position.current_sl_mid, trail)
                 if abs(position.current_sl_mid - prev_sl) > 1e-9:
                     phase_event = "TRAIL_PHASE2" if trade.tp1_hit else "TRAIL_PHASE1"
-                    self.logger.log_event(
+                    self._log_event(
                         ts.to_pydatetime(),
                         phase_event,
                         {
@@ -2672,6 +3280,50 @@ class SimulationEngine:
 
         return True
 
+    def _replay_vtm_path(self, position: Position, ts: pd.Timestamp, current_index: int) -> bool:
+        """One bar of a VTM position whose path was solved at entry: same exits, BE move and time stop as the
+        bar-by-bar branch of `_manage_open_position`."""
+        path = position.solved_path
+        trade = position.trade
+        step = current_index - path.start
+        if step < len(path.mfe_r):
+            trade.mfe_r = float(path.mfe_r[step])
+            trade.mae_r = float(path.mae_r[step])
+        if current_index == path.index:
+            if path.reason == EXIT_SL:
+                exit_mid, reason = position.current_sl_mid, "VTM_EXIT_SL"
+            elif self.vtm_signal_model == "shock_session":
+                exit_mid, reason = path.exit_mid, "VTM_EXIT_TARGET"
+            else:
+                exit_mid, reason = path.exit_mid, "VTM_EXIT_MEAN_REVERT"
+            return not self._close_position_full(
+                position=position,
+                timestamp=ts,
+                current_index=current_index,
+                exit_mid=exit_mid,
+                reason=reason,
+                event_state=EngineState.WAIT_M5_ENTRY,
+            )
+        if current_index == path.be_index:
+            prev_sl = position.current_sl_mid
+            position.current_sl_mid = path.be_sl
+            if path.be_logged:
+                trade.be_moved = True
+                self._log_event(
+                    ts.to_pydatetime(),
+                    "VTM_BE_MOVE",
+                    {
+                        "trade_id": trade.trade_id,
+                        "from": prev_sl,
+                        "to": position.current_sl_mid,
+                        "mfe_r": trade.mfe_r,
+                        "be_trigger_r": path.be_trigger_r,
+                    },
+                )
+        if current_index - trade.entry_index + 1 >= self.vtm_holding_bars:
+            self._schedule_position_exit_next_open(position, current_index, "VTM_EXIT_TIME_STOP")
+        return True
+
     def _schedule_position_exit_next_open(self, position: Position, current_index: int, reason: str) -> None:
         next_index = current_index + 1
         if position.pending_exit_index is None or next_index < position.pending_exit_index:
@@ -2690,7 +3342,7 @@ class SimulationEngine:
 
         trade.tp1_hit = True
 
-        self.logger.log_event(
+        self._log_event(
             timestamp.to_pydatetime(),
             "TRADE_PARTIAL",
             {
@@ -2733,8 +3385,9 @@ class SimulationEngine:
 
         pnl_delta, fill_price, _ = self._apply_exit_fill(trade, qty, exit_mid, timestamp)
         position.remaining_qty = 0.0
+        exit_dt = timestamp.to_pydatetime()
 
-        trade.exit_time = timestamp.to_pydatetime()
+        trade.exit_time = exit_dt
         trade.exit_mid = exit_mid
         trade.exit_fill_price = fill_price
         trade.exit_price = fill_price
@@ -2742,12 +3395,12 @@ class SimulationEngine:
         trade.r_multiple = (trade.pnl / trade.risk_amount) if trade.risk_amount > 0 else 0.0
         trade.bars_in_trade = max(1, current_index - trade.entry_index + 1)
         trade.minutes_in_trade = max(
-            0.0, (timestamp.to_pydatetime() - trade.entry_time).total_seconds() / 60.0
+            0.0, (exit_dt - trade.entry_time).total_seconds() / 60.0
         )
 
         if self.enable_strategy_v3 and reason.startswith("V3_EXIT_"):
-            self.logger.log_event(
-                timestamp.to_pydatetime(),
+            self._log_event(
+                exit_dt,
                 reason,
                 {
                     "trade_id": trade.trade_id,
@@ -2768,8 +3421,8 @@ class SimulationEngine:
             )
 
         self._update_governance_after_trade_close(trade)
-        self.logger.log_event(
-            timestamp.to_pydatetime(),
+        self._log_event(
+            exit_dt,
             "TRADE_CLOSE",
             {
                 "trade_id": trade.trade_id,
@@ -2784,7 +3437,7 @@ class SimulationEngine:
             },
         )
         self._log_signal(
-            timestamp=timestamp.to_pydatetime(),
+            timestamp=exit_dt,
             state=event_state,
             event_type=reason if (self.enable_strategy_v3 and reason.startswith("V3_EXIT_")) else "TRADE_CLOSE",
             signal=EntrySignal.BUY if trade.direction == Direction.LONG else EntrySignal.SELL,
@@ -2805,6 +3458,7 @@ class SimulationEngine:
                 "exit_fill": fill_price,
             },
         )
+        self.closed_trade_r.append(float(trade.r_multiple))
         self.logger.log_trade(trade)
         if self.stdout_trade_events:
             self._print_trade_close(timestamp, trade)
@@ -2825,15 +3479,16 @@ class SimulationEngine:
         trade.pnl += pnl_delta
         trade.closed_size += qty
         equity_after = self.risk.register_fill_pnl(timestamp.to_pydatetime(), pnl_delta)
-        self.equity_curve.append({"timestamp": timestamp, "equity": equity_after})
+        self.equity_curve.append(timestamp.value, equity_after)
 
         self.fill_id += 1
+        fill_type = "EXIT" if abs(trade.closed_size - trade.size) <= 1e-9 else "PARTIAL"
         self.logger.log_fill(
             {
                 "fill_id": self.fill_id,
                 "trade_id": trade.trade_id,
                 "timestamp": timestamp.isoformat(),
-                "fill_type": "EXIT" if abs(trade.closed_size - trade.size) <= 1e-9 else "PARTIAL",
+                "fill_type": fill_type,
                 "side": side,
                 "qty": f"{qty:.8f}",
                 "mid_price": f"{exit_mid:.5f}",
@@ -2908,7 +3563,7 @@ class SimulationEngine:
             next_day = ts.normalize() + pd.Timedelta(days=1)
             if self.daily_block_until is None or next_day > self.daily_block_until:
                 self.daily_block_until = next_day
-                self.logger.log_event(
+                self._log_event(
                     ts.to_pydatetime(),
                     "BLOCKED_DAILY_STOP_SET",
                     {"until": self.daily_block_until.isoformat(), "day_r": day_r, "day_pnl": day_pnl},
@@ -2920,7 +3575,7 @@ class SimulationEngine:
             next_monday = ts.normalize() + pd.Timedelta(days=days_to_next_monday)
             if self.weekly_block_until is None or next_monday > self.weekly_block_until:
                 self.weekly_block_until = next_monday
-                self.logger.log_event(
+                self._log_event(
                     ts.to_pydatetime(),
                     "BLOCKED_WEEKLY_STOP_SET",
                     {"until": self.weekly_block_until.isoformat(), "week_r": week_r, "week_pnl": week_pnl},
@@ -2935,7 +3590,7 @@ class SimulationEngine:
             block_until = ts + pd.Timedelta(hours=self.loss_streak_block_hours)
             if self.loss_streak_block_until is None or block_until > self.loss_streak_block_until:
                 self.loss_streak_block_until = block_until
-                self.logger.log_event(
+                self._log_event(
                     ts.to_pydatetime(),
                     "BLOCKED_LOSS_STREAK_SET",
                     {"until": self.loss_streak_block_until.isoformat(), "loss_streak": self.loss_streak},
@@ -2966,6 +3621,19 @@ class SimulationEngine:
             return mid_price + (spread / 2.0) + slippage
         return mid_price - (spread / 2.0) - slippage
 
+    def _count_event(self, timestamp: datetime | pd.Timestamp, event_type: str, mode: str = "") -> bool:
+        """Count one `event_type` occurrence per the log policy; True when it also gets an events.csv row."""
+        level = self.log_policy.level("events", event_type)
+        if level == OFF:
+            return False
+        self.funnel.count_event(timestamp.hour, event_type, mode, self.regime_state)
+        return self.log_policy.write_row("events", event_type, level)
+
+    def _log_event(self, timestamp: datetime, event_type: str, details: dict[str, Any] | None = None) -> None:
+        mode = str(details.get("mode", "")) if details else ""
+        if self._count_event(timestamp, event_type, mode):
+            self.logger.log_event(timestamp, event_type, details)
+
     def _log_signal(
         self,
         timestamp: datetime,
@@ -2985,6 +3653,12 @@ class SimulationEngine:
         minutes_in_trade: float | None = None,
         payload_json: dict[str, Any] | None = None,
     ) -> None:
+        level = self.log_policy.level("signals", event_type)
+        if level == OFF:
+            return
+        self.funnel.count_signal(timestamp.hour, event_type, state.value, self.regime_state)
+        if not self.log_policy.write_row("signals", event_type, level):
+            return
         self.logger.log_signal(
             timestamp=timestamp,
             payload={
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+
+V4_EVENTS = (
+    "V4_SIGNAL_ORB_BREAKOUT",
+    "V4_BLOCK_OUTSIDE_TRADE_WINDOW",
+    "V4_BLOCK_NO_ASIA_BOX",
+    "V4_BLOCK_ASIA_STILL_OPEN",
+    "V4_BLOCK_ASIA_NOT_FINALIZED",
+    "V4_BLOCK_ATR_NA",
+    "V4_BLOCK_NO_BREAKOUT",
+)
+V4_SETUPS = ("", "V4_ORB_BREAK_WICK_LONG", "V4_ORB_BREAK_WICK_SHORT", "V4_ORB_BOX_LONG", "V4_ORB_BOX_SHORT")
+
+VTM_EVENTS = (
+    "VTM_SIGNAL_MEAN_REVERSION",
+    "VTM_SIGNAL_SHOCK_MR",
+    "VTM_BLOCK_EXCLUDED_WINDOW",
+    "VTM_BLOCK_OUTSIDE_ENTRY_WINDOW",
+    "VTM_BLOCK_INDICATOR_NA",
+    "VTM_BLOCK_SPREAD_FILTER",
+    "VTM_BLOCK_SHOCK_FILTER",
+    "VTM_BLOCK_VOL_FILTER_NA",
+    "VTM_BLOCK_VOL_FILTER",
+    "VTM_BLOCK_SLOPE_FILTER",
+    "VTM_BLOCK_RANGE_FILTER",
+    "VTM_BLOCK_NOT_CLOSE_EXTREME",
+    "VTM_BLOCK_TARGET_SIDE",
+)
+VTM_SETUPS = ("", "VTM_SHOCK_MR_LONG", "VTM_SHOCK_MR_SHORT", "VTM_LONG_EXTREME_TO_SMA", "VTM_SHORT_EXTREME_TO_SMA")
+
+
+@dataclass(slots=True)
+class SignalArrays:
+    """Per-bar entry decisions of one strategy; `event` and `setup` index into `events` and `setups`.
+
+    `signal` is +1 (buy), -1 (sell) or 0. The price columns are NaN on bars without a signal; `sl_mid` is the V4 stop
+    level, `sl_dist`/`tp_mid`/`target_dist` are the VTM stop distance, target level and shock target distance.
+    """
+
+    signal: np.ndarray
+    event: np.ndarray
+    setup: np.ndarray
+    events: tuple[str, ...]
+    setups: tuple[str, ...]
+    sl_mid: np.ndarray
+    sl_dist: np.ndarray
+    tp_mid: np.ndarray
+    target_dist: np.ndarray
+
+
+def _select(conditions: list[np.ndarray], events: tuple[str, ...], names: list[str], n: int) -> np.ndarray:
+    """Code of the first true condition per bar (checks in scalar order); bars passing every check get code 0."""
+    codes = np.zeros(n, dtype=np.int8)
+    decided = np.zeros(n, dtype=bool)
+    for cond, name in zip(conditions, names):
+        hit = cond & ~decided
+        codes[hit] = events.index(name)
+        decided |= hit
+    return codes
+
+
+def _setup_codes(setups: tuple[str, ...], signal: np.ndarray, long_name: str, short_name: str) -> np.ndarray:
+    return np.where(
+        signal > 0, setups.index(long_name), np.where(signal < 0, setups.index(short_name), 0)
+    ).astype(np.int8)
+
+
+def v4_orb_signals(
+    *,
+    close: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    atr: np.ndarray,
+    asia_high: np.ndarray,
+    asia_low: np.ndarray,
+    in_trade_window: np.ndarray,
+    in_asia_window: np.ndarray,
+    asia_not_finalized: np.ndarray,
+    buffer_atr_mult: float,
+    stop_buffer_atr_mult: float,
+    stop_mode: str,
+) -> SignalArrays:
+    """Session opening-range breakout decisions for every bar, mirroring `SimulationEngine._evaluate_v4_entry_signal`."""
+    n = len(close)
+    atr_na = np.isnan(atr) | ~(atr > 0.0)
+    buffer = buffer_atr_mult * atr
+    stop_buffer = stop_buffer_atr_mult * atr
+    long_break = close > (asia_high + buffer)
+    short_break = close < (asia_low - buffer)
+    event = _select(
+        [
+            ~in_trade_window,
+            np.isnan(asia_high) | np.isnan(asia_low),
+            in_asia_window,
+            asia_not_finalized,
+            atr_na,
+            ~long_break & ~short_break,
+        ],
+        V4_EVENTS,
+        [
+            "V4_BLOCK_OUTSIDE_TRADE_WINDOW",
+            "V4_BLOCK_NO_ASIA_BOX",
+            "V4_BLOCK_ASIA_STILL_OPEN",
+            "V4_BLOCK_ASIA_NOT_FINALIZED",
+            "V4_BLOCK_ATR_NA",
+            "V4_BLOCK_NO_BREAKOUT",
+        ],
+        n,
+    )
+    fires = event == 0
+    signal = np.where(fires & long_break, 1, np.where(fires, -1, 0)).astype(np.int8)
+    if stop_mode == "break_wick":
+        sl_mid = np.where(signal > 0, low - stop_buffer, high + stop_buffer)
+        setup = _setup_codes(V4_SETUPS, signal, "V4_ORB_BREAK_WICK_LONG", "V4_ORB_BREAK_WICK_SHORT")
+    else:
+        sl_mid = np.where(signal > 0, asia_low - stop_buffer, asia_high + stop_buffer)
+        setup = _setup_codes(V4_SETUPS, signal, "V4_ORB_BOX_LONG", "V4_ORB_BOX_SHORT")
+    nan = np.full(n, np.nan)
+    return SignalArrays(
+        signal=signal,
+        event=event,
+        setup=setup,
+        events=V4_EVENTS,
+        setups=V4_SETUPS,
+        sl_mid=np.where(fires, sl_mid, np.nan),
+        sl_dist=nan,
+        tp_mid=nan,
+        target_dist=nan,
+    )
+
+
+def vtm_signals(
+    *,
+    close: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    atr: np.ndarray,
+    atr_ma: np.ndarray,
+    sma: np.ndarray,
+    slope: np.ndarray,
+    spread: np.ndarray,
+    excluded: np.ndarray,
+    in_entry_window: np.ndarray,
+    signal_model: str,
+    spread_max_usd: float,
+    shock_threshold: float,
+    threshold_range: float,
+    close_extreme_pct: float,
+    close_extreme_frac: float,
+    vol_filter_min: float,
+    slope_threshold: float,
+    stop_atr: float,
+    target_atr: float,
+) -> SignalArrays:
+    """VTM mean-reversion or shock-session decisions for every bar, mirroring `_evaluate_vtm_entry_signal`.
+
+    `spread` is the per-bar spread proxy (the data's spread column, else the configured spread); `slope` NaNs count as 0.
+    """
+    n = len(close)
+    diff = high - low
+    bar_range = np.where(diff > 0.0, diff, 0.0)
+    gates = [excluded, ~in_entry_window, np.isnan(atr) | ~(atr > 0.0)]
+    names = ["VTM_BLOCK_EXCLUDED_WINDOW", "VTM_BLOCK_OUTSIDE_ENTRY_WINDOW", "VTM_BLOCK_INDICATOR_NA"]
+    if spread_max_usd > 0.0:
+        gates.append(spread > spread_max_usd)
+        names.append("VTM_BLOCK_SPREAD_FILTER")
+    sl_dist = stop_atr * atr
+
+    if signal_model == "shock_session":
+        band = close_extreme_pct * bar_range
+        near_high = close >= (high - band)
+        near_low = close <= (low + band)
+        gates += [bar_range < (shock_threshold * atr), ~near_high & ~near_low]
+        names += ["VTM_BLOCK_SHOCK_FILTER", "VTM_BLOCK_NOT_CLOSE_EXTREME"]
+        event = _select(gates, VTM_EVENTS, names, n)
+        fires = event == 0
+        event[fires] = VTM_EVENTS.index("VTM_SIGNAL_SHOCK_MR")
+        signal = np.where(fires & near_low, 1, np.where(fires, -1, 0)).astype(np.int8)
+        target_dist = target_atr * atr
+        tp_mid = np.where(signal > 0, close + target_dist, close - target_dist)
+        setup = _setup_codes(VTM_SETUPS, signal, "VTM_SHOCK_MR_LONG", "VTM_SHOCK_MR_SHORT")
+    else:
+        slope = np.where(np.isnan(slope), 0.0, slope)
+        gates.append(np.isnan(sma))
+        names.append("VTM_BLOCK_INDICATOR_NA")
+        if vol_filter_min > 0.0:
+            atr_ma_na = np.isnan(atr_ma) | ~(atr_ma > 0.0)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                atr_rel = atr / atr_ma
+            gates += [atr_ma_na, atr_rel < vol_filter_min]
+            names += ["VTM_BLOCK_VOL_FILTER_NA", "VTM_BLOCK_VOL_FILTER"]
+        if slope_threshold > 0.0:
+            gates.append(np.abs(slope) > slope_threshold)
+            names.append("VTM_BLOCK_SLOPE_FILTER")
+        band = close_extreme_frac * bar_range
+        near_high = close >= (high - band)
+        near_low = close <= (low + band)
+        go_long = near_low & (sma > close)
+        go_short = near_high & (sma < close)
+        gates += [bar_range < (threshold_range * atr), ~near_high & ~near_low, ~go_long & ~go_short]
+        names += ["VTM_BLOCK_RANGE_FILTER", "VTM_BLOCK_NOT_CLOSE_EXTREME", "VTM_BLOCK_TARGET_SIDE"]
+        event = _select(gates, VTM_EVENTS, names, n)
+        fires = event == 0
+        signal = np.where(fires & go_long, 1, np.where(fires, -1, 0)).astype(np.int8)
+        target_dist = np.full(n, np.nan)
+        tp_mid = sma
+        setup = _setup_codes(VTM_SETUPS, signal, "VTM_LONG_EXTREME_TO_SMA", "VTM_SHORT_EXTREME_TO_SMA")
+
+    return SignalArrays(
+        signal=signal,
+        event=event,
+        setup=setup,
+        events=VTM_EVENTS,
+        setups=VTM_SETUPS,
+        sl_mid=np.full(n, np.nan),
+        sl_dist=np.where(fires, sl_dist, np.nan),
+        tp_mid=np.where(fires, tp_mid, np.nan),
+        target_dist=np.where(fires, target_dist, np.nan),
+    )
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+
+EXIT_SL = "SL"
+EXIT_TP = "TP"
+EXIT_TIME = "TIME"
+EXIT_END_OF_DATA = "END_OF_DATA"
+
+
+@dataclass(slots=True)
+class BracketExit:
+    index: int
+    reason: str
+    exit_mid: float
+
+
+@dataclass(slots=True)
+class PathExit:
+    """A VTM position solved at entry: its exit (index -1 when it outlives the horizon), the bar where the stop
+    moves to entry (-1 for none) and the running MFE/MAE from the entry bar on."""
+
+    start: int
+    index: int
+    reason: str
+    exit_mid: float
+    be_index: int
+    be_sl: float
+    be_logged: bool
+    be_trigger_r: float
+    mfe_r: np.ndarray
+    mae_r: np.ndarray
+
+
+def first_true_index(mask: np.ndarray, start: int, stop: int | None = None, block: int = 256) -> int | None:
+    """First index >= start (and < stop) where mask is True, scanning in growing blocks."""
+    end = len(mask) if stop is None else min(int(stop), len(mask))
+    pos = max(int(start), 0)
+    step = max(int(block), 1)
+    while pos < end:
+        upper = min(pos + step, end)
+        hits = np.flatnonzero(mask[pos:upper])
+        if hits.size:
+            return pos + int(hits[0])
+        pos = upper
+        step *= 2
+    return None
+
+
+def first_passage_exit(
+    high: np.ndarray,
+    low: np.ndarray,
+    open_: np.ndarray,
+    close: np.ndarray,
+    start: int,
+    is_long: bool,
+    sl: float,
+    tp: float,
+    time_exit_index: int | None = None,
+    block: int = 256,
+) -> BracketExit:
+    """Exit of a fixed SL/TP bracket evaluated from bar `start`; SL wins when both levels print on one bar.
+
+    Brackets are checked on bars [start, time_exit_index); if neither level is touched the trade exits at
+    the open of `time_exit_index`, or at the last close when the time exit falls outside the data.
+    """
+    n = len(high)
+    stop = n if time_exit_index is None else min(int(time_exit_index), n)
+    pos = max(int(start), 0)
+    step = max(int(block), 1)
+    while pos < stop:
+        upper = min(pos + step, stop)
+        hi = high[pos:upper]
+        lo = low[pos:upper]
+        if is_long:
+            sl_hit = lo <= sl
+            tp_hit = hi >= tp
+        else:
+            sl_hit = hi >= sl
+            tp_hit = lo <= tp
+        hits = np.flatnonzero(sl_hit | tp_hit)
+        if hits.size:
+            offset = int(hits[0])
+            if sl_hit[offset]:
+                return BracketExit(index=pos + offset, reason=EXIT_SL, exit_mid=float(sl))
+            return BracketExit(index=pos + offset, reason=EXIT_TP, exit_mid=float(tp))
+        pos = upper
+        step *= 2
+    if time_exit_index is not None and int(time_exit_index) < n:
+        return BracketExit(index=int(time_exit_index), reason=EXIT_TIME, exit_mid=float(open_[int(time_exit_index)]))
+    return BracketExit(index=n - 1, reason=EXIT_END_OF_DATA, exit_mid=float(close[n - 1]))
+
+
+def first_passage_exits(
+    bars: pd.DataFrame,
+    trades: pd.DataFrame,
+    *,
+    start_col: str = "entry_index",
+    direction_col: str = "direction",
+    sl_col: str = "sl",
+    tp_col: str = "tp",
+    time_exit_col: str | None = None,
+) -> pd.DataFrame:
+    """Re-price a batch of trades under the brackets given in `trades`, returning exit index/reason/mid per row."""
+    high = bars["high"].to_numpy(dtype="float64")
+    low = bars["low"].to_numpy(dtype="float64")
+    open_ = bars["open"].to_numpy(dtype="float64")
+    close = bars["close"].to_numpy(dtype="float64")
+    rows: list[dict[str, Any]] = []
+    for idx, trade in trades.iterrows():
+        time_exit = None
+        if time_exit_col is not None and pd.notna(trade.get(time_exit_col)):
+            time_exit = int(trade[time_exit_col])
+        result = first_passage_exit(
+            high,
+            low,
+            open_,
+            close,
+            start=int(trade[start_col]),
+            is_long=str(trade[direction_col]).upper() in {"LONG", "BUY"},
+            sl=float(trade[sl_col]),
+            tp=float(trade[tp_col]),
+            time_exit_index=time_exit,
+        )
+        rows.append({"row": idx, "exit_index": result.index, "exit_reason": result.reason, "exit_mid": result.exit_mid})
+    return pd.DataFrame(rows, columns=["row", "exit_index", "exit_reason", "exit_mid"]).set_index("row")
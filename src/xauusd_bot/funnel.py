@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from xauusd_bot.run_archive import read_run_text, run_file_exists
+
+
+FUNNEL_FILE = "funnel.json"
+FUNNEL_VERSION = 1
+# Entry funnel stages: bars evaluated for an entry, entry signals raised, trades opened.
+STAGES = ("opportunities", "signals", "entries")
+# Label columns of each counter table; every row also carries a 24-slot count per UTC hour.
+TABLE_LABELS = {
+    "events": ("event_type", "mode", "regime"),
+    "signals": ("event_type", "state", "regime"),
+    "stages": ("stage", "mode", "regime"),
+}
+
+
+class FunnelCounters:
+    """In-engine counts of logged events, signal rows and funnel stages per label tuple and hour of day.
+
+    Each distinct label tuple owns one int64[24] array, so memory depends on the number of distinct reasons, not on
+    run length. The counts are what diagnostics would otherwise rebuild by parsing events.csv and signals.csv.
+    """
+
+    def __init__(self) -> None:
+        self.tables: dict[str, dict[tuple[str, ...], np.ndarray]] = {name: {} for name in TABLE_LABELS}
+
+    def _bump(self, table: str, key: tuple[str, ...], hour: int) -> None:
+        counts = self.tables[table].get(key)
+        if counts is None:
+            counts = self.tables[table][key] = np.zeros(24, dtype=np.int64)
+        counts[hour] += 1
+
+    def count_event(self, hour: int, event_type: str, mode: str, regime: str) -> None:
+        self._bump("events", (event_type, mode, regime), hour)
+
+    def count_signal(self, hour: int, event_type: str, state: str, regime: str) -> None:
+        self._bump("signals", (event_type, state, regime), hour)
+
+    def count_stage(self, hour: int, stage: str, mode: str, regime: str) -> None:
+        self._bump("stages", (stage, mode, regime), hour)
+
+    def to_dict(self) -> dict[str, Any]:
+        out: dict[str, Any] = {"version": FUNNEL_VERSION}
+        for name, labels in TABLE_LABELS.items():
+            out[name] = [
+                {**dict(zip(labels, key)), "by_hour": counts.tolist()}
+                for key, counts in sorted(self.tables[name].items())
+            ]
+        return out
+
+
+def write_funnel(path: str | Path, counters: FunnelCounters, log_verbosity: dict[str, Any] | None = None) -> Path:
+    """Write the counters; `log_verbosity` records which CSV rows were thinned out while they were counted."""
+    data = counters.to_dict()
+    if log_verbosity is not None:
+        data["log_verbosity"] = log_verbosity
+    out = Path(path)
+    out.write_text(json.dumps(data, indent=1), encoding="utf-8")
+    return out
+
+
+def load_funnel(path: str | Path) -> dict[str, Any] | None:
+    """Parsed funnel.json, or None when it is missing, unreadable or from another format version."""
+    funnel_path = Path(path)
+    if not run_file_exists(funnel_path):
+        return None
+    try:
+        data = json.loads(read_run_text(funnel_path))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("version") != FUNNEL_VERSION:
+        return None
+    return data
+
+
+def funnel_table(funnel: dict[str, Any], name: str) -> pd.DataFrame:
+    """Long frame of one counter table: its label columns, `hour_utc` and `count` (zero counts dropped)."""
+    labels = list(TABLE_LABELS[name])
+    rows = [
+        (*(str(rec.get(label, "")) for label in labels), hour, int(count))
+        for rec in funnel.get(name, [])
+        for hour, count in enumerate(rec.get("by_hour", []))
+        if count
+    ]
+    out = pd.DataFrame(rows, columns=[*labels, "hour_utc", "count"])
+    out["hour_utc"] = out["hour_utc"].astype("int64")
+    out["count"] = out["count"].astype("int64")
+    return out
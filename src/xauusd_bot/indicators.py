@@ -1,27 +1,44 @@
 from __future__ import annotations
 
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
 import pandas as pd
 
+if TYPE_CHECKING:
+    from xauusd_bot.kernels import Kernels
 
-def ema(series: pd.Series, period: int) -> pd.Series:
-    """EMA with SMA(period) initialization."""
-    n = max(int(period), 1)
-    out = pd.Series(index=series.index, dtype="float64")
-    if series.empty:
-        return out
 
-    values = series.astype(float).to_list()
-    if len(values) < n:
-        return out
+def ema(
+    series: pd.Series, period: int, state: dict[str, Any] | None = None, kernels: Kernels | None = None
+) -> pd.Series:
+    """EMA with SMA(period) initialization; pass `state` to continue the recursion over consecutive chunks.
 
+    With `kernels`, the recursion after the seed runs in the compiled kernel (same values).
+    """
+    n = max(int(period), 1)
+    state = {} if state is None else state
+    seed: list[float] = state.setdefault("seed", [])
+    prev: float | None = state.get("prev")
     k = 2.0 / (n + 1.0)
-    sma = sum(values[:n]) / n
-    out.iloc[n - 1] = sma
-    prev = sma
-    for i in range(n, len(values)):
-        prev = (values[i] * k) + (prev * (1.0 - k))
-        out.iloc[i] = prev
-    return out
+    values = series.astype(float).to_list()
+    result = [float("nan")] * len(values)
+    for i, value in enumerate(values):
+        if prev is not None and kernels is not None:
+            result[i:] = kernels.ema(np.array(values[i:], dtype="float64"), k, prev).tolist()
+            prev = result[-1]
+            break
+        if prev is None:
+            seed.append(value)
+            if len(seed) == n:
+                prev = sum(seed) / n
+                result[i] = prev
+                seed.clear()
+        else:
+            prev = (value * k) + (prev * (1.0 - k))
+            result[i] = prev
+    state["prev"] = prev
+    return pd.Series(result, index=series.index, dtype="float64")
 
 
 def true_range(
@@ -29,6 +46,7 @@ def true_range(
     high_col: str = "high",
     low_col: str = "low",
     close_col: str = "close",
+    state: dict[str, Any] | None = None,
 ) -> pd.Series:
     if df.empty:
         return pd.Series(dtype="float64")
@@ -37,6 +55,10 @@ def true_range(
     low = df[low_col].astype(float)
     close = df[close_col].astype(float)
     prev_close = close.shift(1)
+    if state is not None:
+        if state.get("prev_close") is not None:
+            prev_close.iloc[0] = state["prev_close"]
+        state["prev_close"] = float(close.iloc[-1])
 
     tr = pd.concat(
         [
@@ -55,22 +77,33 @@ def atr_wilder(
     high_col: str = "high",
     low_col: str = "low",
     close_col: str = "close",
+    state: dict[str, Any] | None = None,
+    kernels: Kernels | None = None,
 ) -> pd.Series:
-    """ATR Wilder with explicit init mean(TR first n)."""
+    """ATR Wilder with explicit init mean(TR first n); pass `state` to continue over consecutive chunks."""
     n = max(int(period), 1)
-    tr = true_range(df, high_col=high_col, low_col=low_col, close_col=close_col)
-    out = pd.Series(index=tr.index, dtype="float64")
-    if tr.empty or len(tr) < n:
-        return out
-
+    state = {} if state is None else state
+    tr = true_range(df, high_col=high_col, low_col=low_col, close_col=close_col, state=state.setdefault("tr", {}))
+    seed: list[float] = state.setdefault("seed", [])
+    prev: float | None = state.get("prev")
     values = tr.to_list()
-    seed = sum(values[:n]) / n
-    out.iloc[n - 1] = seed
-    prev = seed
-    for i in range(n, len(values)):
-        prev = ((prev * (n - 1)) + values[i]) / n
-        out.iloc[i] = prev
-    return out
+    result = [float("nan")] * len(values)
+    for i, value in enumerate(values):
+        if prev is not None and kernels is not None:
+            result[i:] = kernels.wilder(np.array(values[i:], dtype="float64"), n, prev).tolist()
+            prev = result[-1]
+            break
+        if prev is None:
+            seed.append(value)
+            if len(seed) == n:
+                prev = sum(seed) / n
+                result[i] = prev
+                seed.clear()
+        else:
+            prev = ((prev * (n - 1)) + value) / n
+            result[i] = prev
+    state["prev"] = prev
+    return pd.Series(result, index=tr.index, dtype="float64")
 
 
 def atr(
@@ -83,42 +116,69 @@ def atr(
     return atr_wilder(df=df, period=period, high_col=high_col, low_col=low_col, close_col=close_col)
 
 
-def rsi_wilder(series: pd.Series, period: int) -> pd.Series:
-    n = max(int(period), 1)
-    out = pd.Series(index=series.index, dtype="float64")
-    if series.empty:
-        return out
+def _rsi_value(avg_gain: float, avg_loss: float) -> float:
+    if avg_loss == 0.0:
+        return 100.0 if avg_gain > 0.0 else 50.0
+    rs = avg_gain / avg_loss
+    return 100.0 - (100.0 / (1.0 + rs))
+
 
+def rsi_wilder(
+    series: pd.Series, period: int, state: dict[str, Any] | None = None, kernels: Kernels | None = None
+) -> pd.Series:
+    n = max(int(period), 1)
+    state = {} if state is None else state
+    seed_gains: list[float] = state.setdefault("seed_gains", [])
+    seed_losses: list[float] = state.setdefault("seed_losses", [])
+    last: float | None = state.get("last")
+    prev_gain: float | None = state.get("prev_gain")
+    prev_loss: float | None = state.get("prev_loss")
     values = series.astype(float).to_list()
-    if len(values) <= n:
-        return out
-
-    gains: list[float] = [0.0]
-    losses: list[float] = [0.0]
-    for i in range(1, len(values)):
-        delta = values[i] - values[i - 1]
-        gains.append(max(delta, 0.0))
-        losses.append(max(-delta, 0.0))
-
-    avg_gain = sum(gains[1 : n + 1]) / n
-    avg_loss = sum(losses[1 : n + 1]) / n
-    if avg_loss == 0.0:
-        out.iloc[n] = 100.0 if avg_gain > 0.0 else 50.0
-    else:
-        rs = avg_gain / avg_loss
-        out.iloc[n] = 100.0 - (100.0 / (1.0 + rs))
-
-    prev_gain = avg_gain
-    prev_loss = avg_loss
-    for i in range(n + 1, len(values)):
-        prev_gain = ((prev_gain * (n - 1)) + gains[i]) / n
-        prev_loss = ((prev_loss * (n - 1)) + losses[i]) / n
-        if prev_loss == 0.0:
-            out.iloc[i] = 100.0 if prev_gain > 0.0 else 50.0
+    result = [float("nan")] * len(values)
+    for i, value in enumerate(values):
+        if kernels is not None and last is not None and prev_gain is not None and prev_loss is not None:
+            tail = np.array(values[i:], dtype="float64")
+            out, prev_gain, prev_loss = kernels.rsi(tail, n, last, prev_gain, prev_loss)
+            result[i:] = out.tolist()
+            last = values[-1]
+            prev_gain, prev_loss = float(prev_gain), float(prev_loss)
+            break
+        if last is None:
+            last = value
+            continue
+        delta = value - last
+        last = value
+        gain = max(delta, 0.0)
+        loss = max(-delta, 0.0)
+        if prev_gain is None or prev_loss is None:
+            seed_gains.append(gain)
+            seed_losses.append(loss)
+            if len(seed_gains) == n:
+                prev_gain = sum(seed_gains) / n
+                prev_loss = sum(seed_losses) / n
+                result[i] = _rsi_value(prev_gain, prev_loss)
+                seed_gains.clear()
+                seed_losses.clear()
         else:
-            rs = prev_gain / prev_loss
-            out.iloc[i] = 100.0 - (100.0 / (1.0 + rs))
-    return out
+            prev_gain = ((prev_gain * (n - 1)) + gain) / n
+            prev_loss = ((prev_loss * (n - 1)) + loss) / n
+            result[i] = _rsi_value(prev_gain, prev_loss)
+    state.update(last=last, prev_gain=prev_gain, prev_loss=prev_loss)
+    return pd.Series(result, index=series.index, dtype="float64")
+
+
+def rolling_mean(series: pd.Series, window: int) -> pd.Series:
+    """Rolling mean (min_periods=window) summed window by window, so values do not depend on where the series starts."""
+    n = max(int(window), 1)
+    values = series.astype(float).to_numpy(dtype="float64", na_value=np.nan)
+    out = np.full(len(values), np.nan)
+    if len(values) >= n:
+        windows = np.lib.stride_tricks.sliding_window_view(values, n)
+        total = windows[:, 0].copy()
+        for k in range(1, n):
+            total += windows[:, k]
+        out[n - 1 :] = total / n
+    return pd.Series(out, index=series.index, dtype="float64")
 
 
 def rolling_high(series: pd.Series, lookback: int) -> pd.Series:
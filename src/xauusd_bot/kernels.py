@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import importlib.util
+import os
+import warnings
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+
+# `kernel_backend` config values; the environment variable overrides the config when set.
+KERNEL_BACKENDS = ("auto", "python", "numba")
+KERNEL_ENV = "XAUUSD_KERNEL_BACKEND"
+
+# Exit codes returned by the position kernels.
+CODE_NONE = -1
+CODE_SL = 0
+CODE_TP = 1
+CODE_TIME = 2
+CODE_END_OF_DATA = 3
+
+
+@dataclass(frozen=True, slots=True)
+class Kernels:
+    """Array kernels of one compiled backend. The engine keeps `None` for the bar-by-bar Python path."""
+
+    backend: str
+    ema: Callable[..., np.ndarray]
+    wilder: Callable[..., np.ndarray]
+    rsi: Callable[..., tuple[np.ndarray, float, float]]
+    bracket_exit: Callable[..., tuple[int, int, float]]
+    vtm_exit: Callable[..., tuple]
+
+
+def numba_available() -> bool:
+    return importlib.util.find_spec("numba") is not None
+
+
+def resolve_backend(requested: str | None = None) -> str:
+    """`python` or `numba` for a `kernel_backend` value, with `XAUUSD_KERNEL_BACKEND` taking precedence.
+
+    `auto` uses Numba when it is installed; an explicit `numba` without it falls back to Python with a warning.
+    """
+    name = str(os.environ.get(KERNEL_ENV) or requested or "auto").strip().lower()
+    if name not in KERNEL_BACKENDS:
+        raise ValueError(f"Unknown kernel backend {name!r}. Expected one of: {', '.join(KERNEL_BACKENDS)}")
+    if name == "python":
+        return "python"
+    if numba_available():
+        return "numba"
+    if name == "numba":
+        _warn_numba_missing()
+    return "python"
+
+
+@lru_cache(maxsize=1)
+def _warn_numba_missing() -> None:
+    warnings.warn("kernel_backend 'numba' requested but numba is not installed; using Python.", RuntimeWarning, 2)
+
+
+@lru_cache(maxsize=None)
+def load_kernels(backend: str, jit: bool = True) -> Kernels | None:
+    """Kernels for `backend` (None for `python`). `jit=False` returns the uncompiled kernels, which run the same
+    array code in the interpreter; the equivalence tests use them where Numba is not installed."""
+    if backend == "python":
+        return None
+    if backend != "numba":
+        raise ValueError(f"Unknown kernel backend {backend!r}. Expected 'python' or 'numba'.")
+    if jit:
+        import numba
+
+        compile_ = numba.njit(cache=True)
+    else:
+        def compile_(func: Callable) -> Callable:
+            return func
+
+    return Kernels(
+        backend=backend,
+        ema=compile_(ema_recursion),
+        wilder=compile_(wilder_recursion),
+        rsi=compile_(rsi_recursion),
+        bracket_exit=compile_(bracket_exit),
+        vtm_exit=compile_(vtm_exit),
+    )
+
+
+# The kernels below are written for Numba's nopython mode: scalar loops over float64 arrays, no helper calls.
+# Comparisons mirror Python's `max(a, b)` / `min(a, b)` (first argument unless the second is strictly
+# greater / smaller) so both backends agree bit for bit, NaNs included.
+
+
+def ema_recursion(values: np.ndarray, k: float, prev: float) -> np.ndarray:
+    """EMA recursion after the SMA seed: `prev` is the last EMA value."""
+    out = np.empty(values.size)
+    for i in range(values.size):
+        prev = (values[i] * k) + (prev * (1.0 - k))
+        out[i] = prev
+    return out
+
+
+def wilder_recursion(values: np.ndarray, n: int, prev: float) -> np.ndarray:
+    """Wilder smoothing after the seed mean: `prev` is the last smoothed value."""
+    out = np.empty(values.size)
+    for i in range(values.size):
+        prev = ((prev * (n - 1)) + values[i]) / n
+        out[i] = prev
+    return out
+
+
+def rsi_recursion(
+    values: np.ndarray, n: int, last: float, avg_gain: float, avg_loss: float
+) -> tuple[np.ndarray, float, float]:
+    """Wilder RSI over `values` once the averages are seeded; returns the RSI and the final averages."""
+    out = np.empty(values.size)
+    for i in range(values.size):
+        delta = values[i] - last
+        last = values[i]
+        gain = 0.0 if 0.0 > delta else delta
+        loss = 0.0 if 0.0 > -delta else -delta
+        avg_gain = ((avg_gain * (n - 1)) + gain) / n
+        avg_loss = ((avg_loss * (n - 1)) + loss) / n
+        if avg_loss == 0.0:
+            out[i] = 100.0 if avg_gain > 0.0 else 50.0
+        else:
+            rs = avg_gain / avg_loss
+            out[i] = 100.0 - (100.0 / (1.0 + rs))
+    return out, avg_gain, avg_loss
+
+
+def bracket_exit(
+    high: np.ndarray,
+    low: np.ndarray,
+    open_: np.ndarray,
+    close: np.ndarray,
+    start: int,
+    time_exit: int,
+    is_long: bool,
+    sl: float,
+    tp: float,
+) -> tuple[int, int, float]:
+    """(index, code, exit_mid) of a fixed bracket with the rules of `exits.first_passage_exit`; `time_exit < 0`
+    means no time exit."""
+    n = high.size
+    stop = n if time_exit < 0 else min(time_exit, n)
+    for i in range(max(start, 0), stop):
+        if is_long:
+            sl_hit = low[i] <= sl
+            tp_hit = high[i] >= tp
+        else:
+            sl_hit = high[i] >= sl
+            tp_hit = low[i] <= tp
+        if sl_hit:
+            return i, CODE_SL, sl
+        if tp_hit:
+            return i, CODE_TP, tp
+    if 0 <= time_exit < n:
+        return time_exit, CODE_TIME, open_[time_exit]
+    return n - 1, CODE_END_OF_DATA, close[n - 1]
+
+
+def vtm_exit(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    sma: np.ndarray,
+    atr: np.ndarray,
+    start: int,
+    stop: int,
+    is_long: bool,
+    entry_mid: float,
+    risk: float,
+    sl: float,
+    tp: float,
+    fixed_target: bool,
+    exit_on_sma_cross: bool,
+    be_trigger_atr: float,
+    mfe: float,
+    mae: float,
+) -> tuple:
+    """VTM position path over bars [start, stop), as `_manage_open_position` walks it bar by bar.
+
+    Returns (exit_index, code, exit_mid, be_index, be_sl, be_logged, be_trigger_r, mfe_path, mae_path); exit_index
+    is -1 when neither stop nor target prints before `stop`, be_index is -1 when the stop never moves to entry, and
+    the paths hold the running MFE/MAE (in R) after each bar (only entries up to the exit bar are filled).
+    """
+    count = max(min(stop, high.size) - start, 0)
+    mfe_path = np.empty(count)
+    mae_path = np.empty(count)
+    be_index = -1
+    be_sl = sl
+    be_logged = False
+    be_trigger_r = np.nan
+    for j in range(count):
+        i = start + j
+        target = sma[i]
+        if is_long:
+            favorable = high[i] - entry_mid
+            adverse = entry_mid - low[i]
+            sl_hit = low[i] <= sl
+            if fixed_target:
+                tp_hit = high[i] >= tp
+            else:
+                tp_hit = False
+                if not np.isnan(target):
+                    tp_hit = high[i] >= target
+                    if exit_on_sma_cross and close[i] >= target:
+                        tp_hit = True
+        else:
+            favorable = entry_mid - low[i]
+            adverse = high[i] - entry_mid
+            sl_hit = high[i] >= sl
+            if fixed_target:
+                tp_hit = low[i] <= tp
+            else:
+                tp_hit = False
+                if not np.isnan(target):
+                    tp_hit = low[i] <= target
+                    if exit_on_sma_cross and close[i] <= target:
+                        tp_hit = True
+        favorable = favorable if favorable > 0.0 else 0.0
+        adverse = adverse if adverse > 0.0 else 0.0
+        if favorable / risk > mfe:
+            mfe = favorable / risk
+        if adverse / risk > mae:
+            mae = adverse / risk
+        mfe_path[j] = mfe
+        mae_path[j] = mae
+
+        if sl_hit:
+            return i, CODE_SL, sl, be_index, be_sl, be_logged, be_trigger_r, mfe_path, mae_path
+        if tp_hit:
+            if fixed_target:
+                exit_mid = tp
+            else:
+                exit_mid = close[i] if np.isnan(target) else target
+            return i, CODE_TP, exit_mid, be_index, be_sl, be_logged, be_trigger_r, mfe_path, mae_path
+
+        if be_trigger_atr > 0.0 and atr[i] > 0.0 and not be_logged:
+            trigger_r = (be_trigger_atr * atr[i]) / risk
+            if mfe >= trigger_r:
+                prev_sl = sl
+                if is_long:
+                    sl = entry_mid if entry_mid > sl else sl
+                else:
+                    sl = entry_mid if entry_mid < sl else sl
+                if sl != prev_sl:
+                    # The stop moves to entry at most once; moves under 1e-9 are applied without a BE event.
+                    be_index = i
+                    be_sl = sl
+                    be_logged = abs(sl - prev_sl) > 1e-9
+                    be_trigger_r = trigger_r
+    return -1, CODE_NONE, np.nan, be_index, be_sl, be_logged, be_trigger_r, mfe_path, mae_path
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import math
+from collections.abc import Mapping, Sequence
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from xauusd_bot.run_archive import read_run_csv, run_file_exists
+
+
+R_COL_CANDIDATES = (
+    "r_multiple",
+    "R_net",
+    "r_net",
+    "net_R",
+    "net_r",
+    "pnl_R",
+    "pnl_r",
+)
+TS_COL_CANDIDATES = (
+    "entry_time",
+    "open_time",
+    "entry_ts",
+    "timestamp",
+    "time",
+    "ts",
+)
+KPI_COLUMNS = (
+    "trades",
+    "winrate",
+    "expectancy_R",
+    "median_R",
+    "sum_R",
+    "pf",
+    "max_drawdown_r",
+    "active_months",
+    "active_years",
+)
+
+
+def find_col(df: pd.DataFrame, candidates: tuple[str, ...]) -> str | None:
+    lowered = {str(c).strip().lower(): c for c in df.columns}
+    for cand in candidates:
+        col = lowered.get(str(cand).lower())
+        if col is not None:
+            return col
+    return None
+
+
+def find_r_col(df: pd.DataFrame) -> str:
+    col = find_col(df, R_COL_CANDIDATES)
+    if col is None:
+        raise ValueError(f"No R column found in trades.csv. columns={list(df.columns)}")
+    return col
+
+
+def profit_factor(r: pd.Series) -> float:
+    gross_win = float(r[r > 0].sum())
+    gross_loss = float((-r[r < 0]).sum())
+    if gross_loss <= 0.0:
+        return float("inf") if gross_win > 0 else math.nan
+    return gross_win / gross_loss
+
+
+def max_drawdown_r(r: pd.Series) -> float:
+    """Largest drop of cumulative R from its running peak; the peak starts at the first trade, not at zero."""
+    if r.empty:
+        return math.nan
+    cum = r.cumsum()
+    return float((cum.cummax() - cum).max())
+
+
+def retention_pct(trades: int, baseline_trades: int) -> float:
+    if baseline_trades <= 0:
+        return math.nan
+    return float(100.0 * float(trades) / float(baseline_trades))
+
+
+def kpi_table(trades: pd.DataFrame, run_ids: Sequence[str] | None = None) -> pd.DataFrame:
+    """KPIs per run from a long trades frame (`run_id`, `r`, optional UTC `ts`), computed in grouped passes.
+
+    Rows with a non-numeric `r` are ignored for the R statistics; activity counts use every row with a valid `ts`.
+    Runs listed in `run_ids` without trades get `trades=0` and NaN elsewhere. Indexed by `run_id`.
+    """
+    ids = pd.Index(pd.unique(trades["run_id"]) if run_ids is None else list(run_ids), name="run_id")
+    out = pd.DataFrame(index=ids, columns=list(KPI_COLUMNS), dtype="float64")
+    r = pd.to_numeric(trades["r"], errors="coerce")
+    valid = r.notna().to_numpy()
+    r = r[valid]
+    keys = trades["run_id"].to_numpy()[valid]
+    by_run = r.groupby(keys, sort=False)
+
+    n = by_run.size()
+    gross_win = r.where(r > 0, 0.0).groupby(keys, sort=False).sum()
+    gross_loss = (-r).where(r < 0, 0.0).groupby(keys, sort=False).sum()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pf = np.where(gross_loss > 0.0, gross_win / gross_loss, np.where(gross_win > 0, np.inf, np.nan))
+    cum = by_run.cumsum()
+    drawdown = (cum.groupby(keys, sort=False).cummax() - cum).groupby(keys, sort=False).max()
+    stats = pd.DataFrame(
+        {
+            "trades": n,
+            "winrate": (r > 0).groupby(keys, sort=False).mean(),
+            "expectancy_R": by_run.mean(),
+            "median_R": by_run.median(),
+            "sum_R": by_run.sum(),
+            "pf": pd.Series(pf, index=gross_win.index),
+            "max_drawdown_r": drawdown,
+        }
+    )
+    out.update(stats)
+
+    if "ts" in trades.columns:
+        ts = trades["ts"]
+        has_ts = ts.notna().to_numpy()
+        ts = ts[has_ts]
+        ts_keys = trades["run_id"].to_numpy()[has_ts]
+        out["active_months"] = (ts.dt.year * 12 + ts.dt.month).groupby(ts_keys, sort=False).nunique()
+        out["active_years"] = ts.dt.year.groupby(ts_keys, sort=False).nunique()
+        out["active_months"] = out["active_months"].astype("float64")
+        out["active_years"] = out["active_years"].astype("float64")
+    out.loc[~out.index.isin(n.index), ["active_months", "active_years"]] = np.nan
+    out["trades"] = out["trades"].fillna(0).astype("int64")
+    return out
+
+
+def trade_kpis(trades: pd.DataFrame) -> dict[str, Any]:
+    """KPIs of one in-memory trades frame (e.g. a backtest result); raises when it has rows but no R column."""
+    if trades.empty:
+        return {"r_col": "", **kpi_records(kpi_table(pd.DataFrame({"run_id": [], "r": []}), run_ids=[""]))[""]}
+    r_col = find_r_col(trades)
+    ts_col = find_col(trades, TS_COL_CANDIDATES)
+    frame = pd.DataFrame({"run_id": "", "r": pd.to_numeric(trades[r_col], errors="coerce").to_numpy()})
+    if ts_col is not None:
+        frame["ts"] = pd.to_datetime(trades[ts_col], errors="coerce", utc=True).array
+    return {"r_col": str(r_col), **kpi_records(kpi_table(frame, run_ids=[""]))[""]}
+
+
+def load_trades(run_dirs: Mapping[str, str | Path]) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Trades of many runs as one frame (`run_id`, `r`, `ts`), plus a per-run status frame.
+
+    Only the R and entry-time columns of each `trades.csv` are read (archived runs included). The status frame is
+    indexed by `run_id` with `trade_status` (ok, missing_trades, empty_trades, missing_r_col, invalid_r_col), `r_col`
+    and `ts_col`.
+    """
+    parts: list[pd.DataFrame] = []
+    status: dict[str, dict[str, str]] = {}
+    for run_id, run_dir in run_dirs.items():
+        trades_path = Path(run_dir) / "trades.csv"
+        info = {"trade_status": "ok", "r_col": "", "ts_col": ""}
+        status[run_id] = info
+        if not run_file_exists(trades_path):
+            info["trade_status"] = "missing_trades"
+            continue
+        header = read_run_csv(trades_path, nrows=0)
+        r_col = find_col(header, R_COL_CANDIDATES)
+        ts_col = find_col(header, TS_COL_CANDIDATES)
+        usecols = [c for c in (r_col, ts_col) if c is not None] if r_col is not None else None
+        trades = read_run_csv(trades_path, usecols=usecols)
+        if trades.empty:
+            info["trade_status"] = "empty_trades"
+            continue
+        if r_col is None:
+            info["trade_status"] = "missing_r_col"
+            continue
+        r = pd.to_numeric(trades[r_col], errors="coerce")
+        if r.notna().sum() == 0:
+            info["trade_status"] = "invalid_r_col"
+            continue
+        info["r_col"] = str(r_col)
+        info["ts_col"] = str(ts_col) if ts_col is not None else ""
+        ts = (
+            pd.to_datetime(trades[ts_col], errors="coerce", utc=True)
+            if ts_col is not None
+            else pd.Series(pd.NaT, index=trades.index, dtype="datetime64[ns, UTC]")
+        )
+        parts.append(pd.DataFrame({"run_id": run_id, "r": r.to_numpy(dtype="float64"), "ts": ts.array}))
+    if parts:
+        frame = pd.concat(parts, ignore_index=True)
+    else:
+        frame = pd.DataFrame(
+            {
+                "run_id": pd.Series(dtype="object"),
+                "r": pd.Series(dtype="float64"),
+                "ts": pd.Series(dtype="datetime64[ns, UTC]"),
+            }
+        )
+    status_frame = pd.DataFrame.from_dict(status, orient="index", columns=["trade_status", "r_col", "ts_col"])
+    status_frame.index.name = "run_id"
+    return frame, status_frame
+
+
+def run_kpis(run_dirs: Mapping[str, str | Path], baseline_trades: int | None = None) -> pd.DataFrame:
+    """One KPI row per run (status columns first); `retention_vs_baseline_pct` is added when a baseline is given."""
+    trades, status = load_trades(run_dirs)
+    table = status.join(kpi_table(trades, run_ids=list(status.index)))
+    if baseline_trades is not None:
+        table["retention_vs_baseline_pct"] = [retention_pct(int(n), int(baseline_trades)) for n in table["trades"]]
+    return table
+
+
+def kpi_records(table: pd.DataFrame) -> dict[str, dict[str, Any]]:
+    """`run_kpis` rows as plain dicts of Python scalars, keyed by run_id."""
+    records: dict[str, dict[str, Any]] = {}
+    for run_id, row in table.iterrows():
+        rec: dict[str, Any] = {}
+        for key, value in row.items():
+            if key == "trades":
+                rec[key] = int(value)
+            elif isinstance(value, str):
+                rec[key] = value
+            else:
+                rec[key] = float(value)
+        records[str(run_id)] = rec
+    return records
+
+
+def load_trade_kpis(run_dir: str | Path, *, require_r_col: bool = False) -> dict[str, Any]:
+    """KPIs of a single run's `trades.csv`; with `require_r_col`, a trades file without an R column raises."""
+    run_dir = Path(run_dir)
+    table = run_kpis({run_dir.name: run_dir})
+    if require_r_col and table["trade_status"].iloc[0] == "missing_r_col":
+        find_r_col(read_run_csv(run_dir / "trades.csv", nrows=0))
+    return kpi_records(table)[run_dir.name]
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+from fnmatch import fnmatchcase
+from typing import Any
+
+
+# Verbosity levels, lowest first: `off` drops the event entirely, `counters` only feeds funnel.json,
+# `sampled` also writes every Nth row per event type, `full` writes every row.
+LOG_LEVELS = ("off", "counters", "sampled", "full")
+OFF, COUNTERS, SAMPLED, FULL = range(len(LOG_LEVELS))
+LOG_STREAMS = ("events", "signals")
+# events.csv rows cost_replay rebuilds trades from; a blanket `default` never lowers them, and the backtest suite
+# resimulates cost scenarios when an explicit entry does.
+REPLAY_EVENTS = frozenset(
+    {"TRADE_OPEN", "COST_FILTER_BLOCK", "COST_FILTER_BLOCK_OVERRIDE_HOUR", "BLOCKED_INVALID_SIZE"}
+)
+DEFAULT_LOG_VERBOSITY: dict[str, Any] = {"default": "full", "sample_every": 100, "events": {}, "signals": {}}
+
+
+def _level(value: Any, key: str) -> str:
+    level = str(value).strip().lower()
+    if level not in LOG_LEVELS:
+        raise ValueError(f"Config key '{key}' must be one of: {', '.join(LOG_LEVELS)}. Got: {value!r}")
+    return level
+
+
+def normalize_log_verbosity(raw: Any) -> dict[str, Any]:
+    """Validated `log_verbosity` mapping with every key present (levels lower-cased)."""
+    if raw is None:
+        raw = {}
+    if not isinstance(raw, dict):
+        raise ValueError("Config key 'log_verbosity' must be a mapping/object.")
+    unknown = sorted(set(raw) - set(DEFAULT_LOG_VERBOSITY))
+    if unknown:
+        raise ValueError(f"Unknown 'log_verbosity' keys: {', '.join(map(str, unknown))}")
+    out: dict[str, Any] = {"default": _level(raw.get("default", "full"), "log_verbosity.default")}
+    try:
+        out["sample_every"] = int(raw.get("sample_every", DEFAULT_LOG_VERBOSITY["sample_every"]))
+    except (TypeError, ValueError) as exc:
+        raise ValueError(f"Config key 'log_verbosity.sample_every' must be int. Got: {raw['sample_every']!r}") from exc
+    if out["sample_every"] < 1:
+        raise ValueError(f"Config key 'log_verbosity.sample_every' must be >= 1. Got: {out['sample_every']}")
+    for stream in LOG_STREAMS:
+        levels = raw.get(stream) or {}
+        if not isinstance(levels, dict):
+            raise ValueError(f"Config key 'log_verbosity.{stream}' must map event types (or patterns) to levels.")
+        out[stream] = {str(k): _level(v, f"log_verbosity.{stream}.{k}") for k, v in levels.items()}
+    return out
+
+
+def apply_log_verbosity_args(config: dict[str, Any], entries: list[str] | None, sample_every: int | None) -> None:
+    """Fold CLI overrides into `config["log_verbosity"]`: `LEVEL` sets the default, `TYPE=LEVEL` both streams."""
+    verbosity = normalize_log_verbosity(config.get("log_verbosity"))
+    for entry in entries or []:
+        pattern, sep, level = entry.rpartition("=")
+        if not sep:
+            verbosity["default"] = _level(level, "--log-verbosity")
+            continue
+        if not pattern:
+            raise ValueError(f"--log-verbosity expects LEVEL or EVENT_TYPE=LEVEL. Got: {entry!r}")
+        for stream in LOG_STREAMS:
+            verbosity[stream][pattern] = _level(level, f"--log-verbosity {pattern}")
+    if sample_every is not None:
+        verbosity["sample_every"] = sample_every
+    config["log_verbosity"] = normalize_log_verbosity(verbosity)
+
+
+def replay_events_complete(verbosity: dict[str, Any] | None) -> bool:
+    """Whether every `REPLAY_EVENTS` type gets a full events.csv row under `verbosity`."""
+    policy = LogPolicy(verbosity)
+    return all(policy.level("events", event_type) == FULL for event_type in REPLAY_EVENTS)
+
+
+class LogPolicy:
+    """Per-event-type verbosity for events.csv and signals.csv, resolved once per type and cached.
+
+    Stream entries map an exact event type or an fnmatch pattern (e.g. `V3_BLOCK_*`) to a level; exact entries win,
+    then patterns in config order, then `default`. Sampling is deterministic: rows 1, N+1, 2N+1, ... of each type.
+    """
+
+    def __init__(self, verbosity: dict[str, Any] | None = None):
+        cfg = normalize_log_verbosity(verbosity)
+        self.verbosity = cfg
+        self.default = LOG_LEVELS.index(cfg["default"])
+        self.sample_every = int(cfg["sample_every"])
+        self._rules = {stream: cfg[stream] for stream in LOG_STREAMS}
+        self._levels: dict[str, dict[str, int]] = {stream: {} for stream in LOG_STREAMS}
+        self._seen: dict[str, dict[str, int]] = {stream: {} for stream in LOG_STREAMS}
+
+    def reset(self) -> None:
+        self._seen = {stream: {} for stream in LOG_STREAMS}
+
+    def level(self, stream: str, event_type: str) -> int:
+        cached = self._levels[stream].get(event_type)
+        if cached is not None:
+            return cached
+        rules = self._rules[stream]
+        if event_type in rules:
+            level = LOG_LEVELS.index(rules[event_type])
+        else:
+            matched = next((lvl for pattern, lvl in rules.items() if fnmatchcase(event_type, pattern)), None)
+            if matched is not None:
+                level = LOG_LEVELS.index(matched)
+            elif stream == "events" and event_type in REPLAY_EVENTS:
+                level = FULL
+            else:
+                level = self.default
+        self._levels[stream][event_type] = level
+        return level
+
+    def write_row(self, stream: str, event_type: str, level: int) -> bool:
+        """Whether this occurrence gets a CSV row; call once per occurrence at `counters` level or above."""
+        if level == FULL:
+            return True
+        if level != SAMPLED:
+            return False
+        seen = self._seen[stream]
+        n = seen.get(event_type, 0)
+        seen[event_type] = n + 1
+        return n % self.sample_every == 0
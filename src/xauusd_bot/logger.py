@@ -6,6 +6,7 @@ from datetime import datetime
 from pathlib import Path
 from typing import Any
 
+from xauusd_bot.funnel import FUNNEL_FILE, FunnelCounters, write_funnel
 from xauusd_bot.models import Trade
 
 
@@ -83,10 +84,13 @@ class CsvLogger:
         self.trades_path = self.output_dir / "trades.csv"
         self.signals_path = self.output_dir / "signals.csv"
         self.fills_path = self.output_dir / "fills.csv"
+        self.funnel_path = self.output_dir / FUNNEL_FILE
         self._ensure_file(self.events_path, EVENT_HEADERS, reset=reset)
         self._ensure_file(self.trades_path, TRADE_HEADERS, reset=reset)
         self._ensure_file(self.signals_path, SIGNAL_HEADERS, reset=reset)
         self._ensure_file(self.fills_path, FILL_HEADERS, reset=reset)
+        if reset:
+            self.funnel_path.unlink(missing_ok=True)
 
     @staticmethod
     def _ensure_file(path: Path, headers: list[str], *, reset: bool) -> None:
@@ -161,6 +165,9 @@ class CsvLogger:
                 ]
             )
 
+    def log_funnel(self, counters: FunnelCounters, log_verbosity: dict[str, Any] | None = None) -> None:
+        write_funnel(self.funnel_path, counters, log_verbosity=log_verbosity)
+
     def log_fill(self, payload: dict[str, Any]) -> None:
         with self.fills_path.open("a", newline="", encoding="utf-8") as f:
             writer = csv.writer(f)
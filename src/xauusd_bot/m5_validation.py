@@ -0,0 +1,339 @@
+from __future__ import annotations
+
+import heapq
+import tempfile
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from xauusd_bot.binary_dataset import BinaryDatasetWriter
+from xauusd_bot.data_loader import DEFAULT_CHUNK_ROWS, iter_raw_csv
+
+
+TIMESTAMP_PREFERENCE = ("timestamp", "time", "datetime", "date", "ts")
+OHLC_COLUMNS = ("open", "high", "low", "close")
+OPTIONAL_NUMERIC = ("volume", "spread", "bid", "ask")
+NS_PER_MINUTE = 60_000_000_000
+CSV_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+# Upper edges (minutes) of the gap histogram buckets above the expected spacing; the last bucket is open-ended.
+GAP_EDGES_MINUTES = (30, 60, 360, 1440, 4320)
+GAP_EDGE_LABELS = ("30m", "1h", "6h", "1d", "3d")
+
+
+@dataclass(slots=True)
+class M5ValidationReport:
+    rows_read: int = 0
+    rows_written: int = 0
+    nat_timestamps: int = 0
+    non_numeric_ohlc: int = 0
+    duplicates: int = 0
+    out_of_order: int = 0
+    ohlc_violations: int = 0
+    start_ts: pd.Timestamp | None = None
+    end_ts: pd.Timestamp | None = None
+    unique_days: int = 0
+    dominant_delta_minutes: float | None = None
+    median_delta_minutes: float | None = None
+    gap_histogram: dict[str, int] = field(default_factory=dict)
+    delta_counts: dict[float, int] = field(default_factory=dict)
+    largest_gaps: list[tuple[pd.Timestamp, pd.Timestamp, float]] = field(default_factory=list)
+    ohlc_samples: list[dict[str, object]] = field(default_factory=list)
+    duplicate_samples: list[pd.Timestamp] = field(default_factory=list)
+    elapsed_sec: float = 0.0
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows_read / self.elapsed_sec if self.elapsed_sec > 0 else 0.0
+
+    def gaps_over(self, minutes: float) -> int:
+        return sum(count for delta, count in self.delta_counts.items() if delta > minutes)
+
+
+def _gap_labels(expected_minutes: int) -> list[str]:
+    labels = [f"={expected_minutes}m", f"<{expected_minutes}m"]
+    lower = f"{expected_minutes}m"
+    for label in GAP_EDGE_LABELS:
+        labels.append(f"{lower}-{label}")
+        lower = label
+    labels.append(f">{lower}")
+    return labels
+
+
+def _resolve_columns(raw: pd.DataFrame) -> dict[str, str]:
+    lower = {str(col).strip().lower(): col for col in raw.columns}
+    ts_col = next((lower[name] for name in TIMESTAMP_PREFERENCE if name in lower), None)
+    if ts_col is None:
+        raise ValueError(f"No timestamp-like column found. columns={list(raw.columns)}")
+    missing = [name for name in OHLC_COLUMNS if name not in lower]
+    if missing:
+        raise ValueError(f"Missing required OHLC columns: {missing}")
+    mapping = {"timestamp": ts_col}
+    for name in OHLC_COLUMNS + OPTIONAL_NUMERIC:
+        if name in lower:
+            mapping[name] = lower[name]
+    return mapping
+
+
+class StreamingM5Validator:
+    """Chunk-at-a-time integrity checks and normalization; state carried between chunks keeps results exact.
+
+    `parse` drops rows with an unparseable timestamp or OHLC value and counts rows that arrive earlier than an
+    earlier row (they are kept). `check` takes the surviving rows in timestamp order, keeps the last row for each
+    timestamp and runs the OHLC and gap checks; `iter_normalized_m5` does the sorting in between.
+    """
+
+    def __init__(self, expected_tf_minutes: int = 5, max_samples: int = 20):
+        self.expected_tf_minutes = int(expected_tf_minutes)
+        self.max_samples = int(max_samples)
+        self.report = M5ValidationReport(gap_histogram={label: 0 for label in _gap_labels(self.expected_tf_minutes)})
+        self.columns: dict[str, str] | None = None
+        self.source_columns: list[str] = []
+        self._max_seen_ns: int | None = None
+        self._held: pd.DataFrame | None = None
+        self._last_ns: int | None = None
+        self._days: set[int] = set()
+        self._delta_counts: dict[int, int] = {}
+        self._largest: list[tuple[int, int, int]] = []
+        self._started = time.perf_counter()
+
+    def parse(self, raw: pd.DataFrame) -> pd.DataFrame:
+        """Parsed rows of one raw chunk in input order, with the timestamp as int64 nanoseconds."""
+        report = self.report
+        if self.columns is None:
+            self.columns = _resolve_columns(raw)
+            self.source_columns = [str(col) for col in raw.columns]
+        report.rows_read += len(raw)
+
+        ts = pd.to_datetime(raw[self.columns["timestamp"]], errors="coerce")
+        if getattr(ts.dt, "tz", None) is not None:
+            ts = ts.dt.tz_convert("UTC").dt.tz_localize(None)
+        nat = ts.isna().to_numpy()
+        report.nat_timestamps += int(nat.sum())
+
+        out: dict[str, np.ndarray] = {}
+        bad_ohlc = np.zeros(len(raw), dtype=bool)
+        for name, col in self.columns.items():
+            if name == "timestamp":
+                continue
+            values = pd.to_numeric(raw[col], errors="coerce").to_numpy(dtype="float64")
+            if name in OHLC_COLUMNS:
+                bad_ohlc |= np.isnan(values)
+            out[name] = values
+        report.non_numeric_ohlc += int((bad_ohlc & ~nat).sum())
+
+        valid = ~nat & ~bad_ohlc
+        ts_ns = ts.to_numpy(dtype="datetime64[ns]").view("int64")[valid]
+        if len(ts_ns):
+            # Running max of the input so far: a row below it is out of order and has to be sorted into place.
+            seed = np.iinfo("int64").min if self._max_seen_ns is None else self._max_seen_ns
+            prior_max = np.maximum.accumulate(np.r_[seed, ts_ns[:-1]])
+            report.out_of_order += int((ts_ns < prior_max).sum())
+            self._max_seen_ns = int(max(prior_max[-1], ts_ns[-1]))
+        return pd.DataFrame({"timestamp": ts_ns, **{name: values[valid] for name, values in out.items()}})
+
+    def check(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """Validate parsed rows that continue the timestamp order of earlier calls and return the normalized rows.
+
+        The last row for each timestamp wins. The final row is held back until the next call or `flush`, since
+        the next chunk may repeat its timestamp.
+        """
+        if self._held is not None:
+            frame = pd.concat([self._held, frame], ignore_index=True)
+            self._held = None
+        if frame.empty:
+            return self._emit(frame)
+        ts_ns = frame["timestamp"].to_numpy()
+        dup = np.r_[ts_ns[:-1] == ts_ns[1:], False]
+        if dup.any():
+            self.report.duplicates += int(dup.sum())
+            room = self.max_samples - len(self.report.duplicate_samples)
+            if room > 0:
+                self.report.duplicate_samples.extend(pd.to_datetime(ts_ns[dup][:room]))
+            frame = frame[~dup]
+        self._held = frame.iloc[-1:]
+        return self._emit(frame.iloc[:-1])
+
+    def flush(self) -> pd.DataFrame:
+        """Normalized form of the row held back by `check` (empty when there is none)."""
+        held, self._held = self._held, None
+        if held is None:
+            return pd.DataFrame(columns=["timestamp", *(name for name in self.columns or {} if name != "timestamp")])
+        return self._emit(held)
+
+    def _emit(self, frame: pd.DataFrame) -> pd.DataFrame:
+        kept_ns = frame["timestamp"].to_numpy(dtype="int64")
+        normalized = frame.assign(timestamp=pd.to_datetime(kept_ns)).reset_index(drop=True)
+        if normalized.empty:
+            return normalized
+        self._check_ohlc(normalized)
+        self._track_gaps(kept_ns)
+        self.report.rows_written += len(normalized)
+        return normalized
+
+    def _check_ohlc(self, frame: pd.DataFrame) -> None:
+        o, h, l, c = (frame[name].to_numpy() for name in OHLC_COLUMNS)
+        bad = (h < np.maximum(o, c)) | (l > np.minimum(o, c)) | (h < l)
+        count = int(bad.sum())
+        if count == 0:
+            return
+        self.report.ohlc_violations += count
+        room = self.max_samples - len(self.report.ohlc_samples)
+        if room > 0:
+            cols = ["timestamp", *OHLC_COLUMNS]
+            self.report.ohlc_samples.extend(frame.loc[bad, cols].head(room).to_dict("records"))
+
+    def _track_gaps(self, kept_ns: np.ndarray) -> None:
+        report = self.report
+        prev = np.r_[self._last_ns, kept_ns[:-1]] if self._last_ns is not None else kept_ns[:-1]
+        curr = kept_ns if self._last_ns is not None else kept_ns[1:]
+        deltas = curr - prev
+        if len(deltas):
+            values, counts = np.unique(deltas, return_counts=True)
+            for delta, count in zip(values.tolist(), counts.tolist()):
+                self._delta_counts[delta] = self._delta_counts.get(delta, 0) + count
+            for idx in np.argsort(deltas)[::-1][: self.max_samples]:
+                item = (int(deltas[idx]), int(prev[idx]), int(curr[idx]))
+                if len(self._largest) < self.max_samples:
+                    heapq.heappush(self._largest, item)
+                elif item > self._largest[0]:
+                    heapq.heapreplace(self._largest, item)
+        self._days.update(np.unique(kept_ns // (1440 * NS_PER_MINUTE)).tolist())
+        if report.start_ts is None:
+            report.start_ts = pd.Timestamp(int(kept_ns[0]))
+        report.end_ts = pd.Timestamp(int(kept_ns[-1]))
+        self._last_ns = int(kept_ns[-1])
+
+    def finish(self) -> M5ValidationReport:
+        report = self.report
+        report.elapsed_sec = time.perf_counter() - self._started
+        report.unique_days = len(self._days)
+        labels = _gap_labels(self.expected_tf_minutes)
+        expected_ns = self.expected_tf_minutes * NS_PER_MINUTE
+        edges = np.asarray(GAP_EDGES_MINUTES, dtype="int64") * NS_PER_MINUTE
+        histogram = {label: 0 for label in labels}
+        for delta, count in self._delta_counts.items():
+            if delta == expected_ns:
+                histogram[labels[0]] += count
+            elif delta < expected_ns:
+                histogram[labels[1]] += count
+            else:
+                histogram[labels[2 + int(np.searchsorted(edges, delta, side="left"))]] += count
+        report.gap_histogram = histogram
+        report.delta_counts = {delta / NS_PER_MINUTE: count for delta, count in sorted(self._delta_counts.items())}
+
+        total = sum(self._delta_counts.values())
+        if total:
+            ordered = sorted(self._delta_counts.items())
+            report.dominant_delta_minutes = max(ordered, key=lambda item: item[1])[0] / NS_PER_MINUTE
+            seen = 0
+            for delta, count in ordered:
+                seen += count
+                if seen * 2 >= total:
+                    report.median_delta_minutes = delta / NS_PER_MINUTE
+                    break
+        report.largest_gaps = [
+            (pd.Timestamp(prev), pd.Timestamp(curr), delta / NS_PER_MINUTE)
+            for delta, prev, curr in sorted(self._largest, reverse=True)
+        ]
+        return report
+
+
+def _merge_sorted_runs(runs: list[dict[str, Path]], chunk_rows: int) -> Iterator[pd.DataFrame]:
+    """Merge runs that are each sorted by timestamp into chunks in global timestamp order.
+
+    Rows with equal timestamps keep run order and then row order, so they stay in input order. Every round takes
+    all rows up to the smallest block-end timestamp among the runs, so a timestamp never straddles two chunks.
+    """
+    arrays = [{name: np.load(path, mmap_mode="r") for name, path in run.items()} for run in runs]
+    pos = [0] * len(arrays)
+    step = max(chunk_rows // max(len(arrays), 1), 1024)
+    while True:
+        live = [k for k, cols in enumerate(arrays) if pos[k] < len(cols["timestamp"])]
+        if not live:
+            return
+        cutoff = min(arrays[k]["timestamp"][min(pos[k] + step, len(arrays[k]["timestamp"])) - 1] for k in live)
+        parts: list[dict[str, np.ndarray]] = []
+        for k in live:
+            end = pos[k] + int(np.searchsorted(arrays[k]["timestamp"][pos[k]:], cutoff, side="right"))
+            if end > pos[k]:
+                parts.append({name: np.asarray(col[pos[k] : end]) for name, col in arrays[k].items()})
+                pos[k] = end
+        merged = {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+        order = np.argsort(merged["timestamp"], kind="stable")
+        yield pd.DataFrame({name: values[order] for name, values in merged.items()})
+
+
+def iter_normalized_m5(
+    input_path: str | Path,
+    validator: StreamingM5Validator,
+    *,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> Iterator[pd.DataFrame]:
+    """Normalized rows of `input_path` in timestamp order, keeping the last row for each timestamp.
+
+    Each parsed chunk is sorted and spilled to a temporary run; the runs are then merged, so exports that are
+    newest-first or interleaved are sorted without holding the file in memory.
+    """
+    with tempfile.TemporaryDirectory(prefix="m5_sort_") as tmp:
+        runs: list[dict[str, Path]] = []
+        for raw in iter_raw_csv(input_path, chunk_rows=chunk_rows):
+            frame = validator.parse(raw)
+            if frame.empty:
+                continue
+            order = np.argsort(frame["timestamp"].to_numpy(), kind="stable")
+            run: dict[str, Path] = {}
+            for name in frame.columns:
+                run[name] = Path(tmp) / f"run{len(runs)}_{name}.npy"
+                np.save(run[name], frame[name].to_numpy()[order])
+            runs.append(run)
+        for chunk in _merge_sorted_runs(runs, chunk_rows):
+            frame = validator.check(chunk)
+            if not frame.empty:
+                yield frame
+    frame = validator.flush()
+    if not frame.empty:
+        yield frame
+
+
+def normalize_m5_stream(
+    input_path: str | Path,
+    output_path: str | Path | None = None,
+    *,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    expected_tf_minutes: int = 5,
+    max_samples: int = 20,
+) -> M5ValidationReport:
+    """Validate `input_path` chunk by chunk, optionally writing the normalized rows in timestamp order.
+
+    An `output_path` ending in ".csv" gets a CSV; anything else becomes a binary dataset directory.
+    """
+    validator = StreamingM5Validator(expected_tf_minutes=expected_tf_minutes, max_samples=max_samples)
+    out = Path(output_path) if output_path is not None else None
+    writer: BinaryDatasetWriter | None = None
+    wrote_csv_header = False
+    if out is not None:
+        out.parent.mkdir(parents=True, exist_ok=True)
+        if out.suffix.lower() != ".csv":
+            writer = BinaryDatasetWriter(out)
+        else:
+            out.unlink(missing_ok=True)
+    try:
+        for frame in iter_normalized_m5(input_path, validator, chunk_rows=chunk_rows):
+            if out is None:
+                continue
+            if "volume" not in frame.columns:
+                frame["volume"] = 0.0
+            if writer is not None:
+                writer.append(frame)
+            else:
+                # Fixed format: a chunk of midnight-only rows would otherwise be written as bare dates.
+                frame.to_csv(out, mode="a", header=not wrote_csv_header, index=False, date_format=CSV_DATE_FORMAT)
+                wrote_csv_header = True
+    finally:
+        if writer is not None:
+            writer.close()
+    return validator.finish()
@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+from xauusd_bot.shared_dataset import AttachedDataset, SharedDataset, SharedDatasetSpec, attach_dataset, pool_context
+
+if TYPE_CHECKING:
+    from xauusd_bot.engine import SimulationEngine
+
+
+# Bars x horizon cells evaluated per vectorized first-passage block; bounds the temporary matrices to a few MB.
+BLOCK_CELLS = 1 << 20
+
+_BARS: NullBars | None = None
+_ATTACHED: AttachedDataset | None = None
+_TEMPLATES: NullTemplates | None = None
+
+
+@dataclass(slots=True)
+class NullBars:
+    """Prepared M5 arrays for null entries: prices, the ATR known at each entry and the bar each entry times out on.
+
+    `time_exit[i]` follows `first_passage_exit`: an entry on bar i is bracketed on bars [i, time_exit[i]) and exits
+    at the open of `time_exit[i]`, or at the last close when that falls past the data.
+    """
+
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    atr: np.ndarray
+    time_exit: np.ndarray
+    hour: np.ndarray
+
+    def frame(self) -> pd.DataFrame:
+        return pd.DataFrame({name: getattr(self, name) for name in self.__slots__})
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> NullBars:
+        return cls(**{name: frame[name].to_numpy() for name in cls.__slots__})
+
+
+@dataclass(slots=True)
+class NullTemplates:
+    """One row per candidate trade: entry hour, bracket distances in ATRs of the signal bar and round-trip cost."""
+
+    hour: np.ndarray
+    sl_atr: np.ndarray
+    tp_atr: np.ndarray
+    cost: np.ndarray
+    pool: np.ndarray
+    pool_start: np.ndarray
+    pool_size: np.ndarray
+
+    def __len__(self) -> int:
+        return int(self.hour.size)
+
+
+def _session_time_exit(outside: np.ndarray) -> np.ndarray:
+    """Per-bar time exit of the V4 trade-window close: the open after the first outside-window bar at or after it."""
+    n = len(outside)
+    positions = np.flatnonzero(outside)
+    at = np.searchsorted(positions, np.arange(n))
+    first_outside = np.append(positions, n)[at]
+    return np.where(first_outside < n, first_outside + 1, n + 1)
+
+
+def null_bars(engine: SimulationEngine, m5: pd.DataFrame, hold_bars: int) -> NullBars:
+    """Arrays of the engine-prepared `m5` frame with the family's time stop and session close as per-bar exits.
+
+    V4 exits at the trade-window end (as `_solve_v4_exit`), VTM after `holding_bars` (as `_manage_open_position`);
+    other families, and V4 without the window exit, are capped at `hold_bars`.
+    """
+    n = len(m5)
+    index = np.arange(n, dtype=np.int64)
+    if engine.enable_strategy_vtm:
+        hold_bars = engine.vtm_holding_bars
+    time_exit = index + max(int(hold_bars), 1)
+    open_ts = m5["timestamp"] - engine.bar_delta
+    minute = ((open_ts.dt.hour * 60) + open_ts.dt.minute).to_numpy(dtype="int64")
+    if engine.enable_strategy_v4_orb and (engine.v4_time_stop or engine.v4_exit_at_trade_end):
+        outside = ~engine._window_mask(minute, [(engine.v4_trade_start, engine.v4_trade_end)])
+        time_exit = _session_time_exit(outside)
+    atr = m5["atr_m5"].to_numpy(dtype="float64")
+    return NullBars(
+        open=m5["open"].to_numpy(dtype="float64"),
+        high=m5["high"].to_numpy(dtype="float64"),
+        low=m5["low"].to_numpy(dtype="float64"),
+        close=m5["close"].to_numpy(dtype="float64"),
+        atr=np.r_[np.nan, atr[:-1]],  # the last closed bar's ATR when an entry fills at this bar's open
+        time_exit=time_exit.astype(np.int64),
+        hour=(minute // 60).astype(np.int64),
+    )
+
+
+def entry_indices(m5: pd.DataFrame, entry_time: pd.Series) -> np.ndarray:
+    """Bar index of each trade's entry timestamp, -1 where the time is missing or not a bar of `m5`."""
+    stamps = pd.DatetimeIndex(pd.to_datetime(m5["timestamp"]))
+    times = pd.DatetimeIndex(pd.to_datetime(entry_time, errors="coerce", utc=stamps.tz is not None))
+    if stamps.tz is not None:
+        times = times.tz_convert(stamps.tz)
+    pos = stamps.get_indexer(times.as_unit(stamps.unit))
+    return np.where(times.isna(), -1, pos)
+
+
+def null_templates(bars: NullBars, trades: pd.DataFrame, entry_index: np.ndarray) -> NullTemplates:
+    """Bracket templates of the candidate trades that map to a bar with a valid ATR and a positive risk distance."""
+    def column(name: str) -> np.ndarray:
+        return pd.to_numeric(trades[name], errors="coerce").to_numpy(dtype=float)
+
+    entry_mid, sl, tp = column("entry_mid"), column("sl"), column("tp")
+    cost = np.nan_to_num(np.abs(column("entry_price") - entry_mid) + np.abs(column("exit_price") - column("exit_mid")))
+    eligible = (bars.atr > 0) & (np.arange(len(bars.atr)) < len(bars.atr) - 1)
+    pools = [np.flatnonzero(eligible & (bars.hour == h)) for h in range(24)]
+    pool_size = np.array([p.size for p in pools], dtype=np.int64)
+
+    found = entry_index >= 0
+    at = np.where(found, entry_index, 0)
+    atr = np.where(found, bars.atr[at], np.nan)
+    risk = np.abs(entry_mid - sl)
+    usable = found & (atr > 0) & (risk > 1e-9) & (pool_size[bars.hour[at]] > 0)
+    target = np.abs(tp - entry_mid)
+    tp_atr = np.where(np.isfinite(target) & (target > 0), target / atr, np.inf)
+    return NullTemplates(
+        hour=bars.hour[at][usable],
+        sl_atr=(risk / atr)[usable],
+        tp_atr=tp_atr[usable],
+        cost=cost[usable],
+        pool=np.concatenate(pools).astype(np.int64),
+        pool_start=np.r_[0, np.cumsum(pool_size)[:-1]].astype(np.int64),
+        pool_size=pool_size,
+    )
+
+
+def bracket_exit_mid(
+    bars: NullBars, entry: np.ndarray, is_long: np.ndarray, sl: np.ndarray, tp: np.ndarray
+) -> np.ndarray:
+    """Exit mid of many fixed SL/TP brackets at once, with the tie, time-exit and end-of-data rules of
+    `first_passage_exit`; entries are processed in blocks of at most `BLOCK_CELLS` bar cells."""
+    n = len(bars.high)
+    span = np.minimum(bars.time_exit[entry], n) - entry
+    time_exit = bars.time_exit[entry]
+    exit_mid = np.where(time_exit < n, bars.open[np.minimum(time_exit, n - 1)], bars.close[-1])
+    rows = max(BLOCK_CELLS // max(int(span.max(initial=1)), 1), 1)
+    for a in range(0, entry.size, rows):
+        b = min(a + rows, entry.size)
+        steps = np.arange(max(int(span[a:b].max()), 1))
+        idx = np.minimum(entry[a:b, None] + steps, n - 1)
+        live = steps < span[a:b, None]
+        hi = bars.high[idx]
+        lo = bars.low[idx]
+        long = is_long[a:b, None]
+        sl_hit = np.where(long, lo <= sl[a:b, None], hi >= sl[a:b, None]) & live
+        tp_hit = np.where(long, hi >= tp[a:b, None], lo <= tp[a:b, None]) & live
+        hit = sl_hit | tp_hit
+        first = hit.argmax(axis=1)
+        row = np.arange(b - a)
+        touched = hit[row, first]
+        level = np.where(sl_hit[row, first], sl[a:b], tp[a:b])
+        exit_mid[a:b] = np.where(touched, level, exit_mid[a:b])
+    return exit_mid
+
+
+def simulate_null_batch(
+    bars: NullBars, templates: NullTemplates, strategies: int, seed: np.random.SeedSequence
+) -> np.ndarray:
+    """Mean net R of `strategies` random-entry strategies, each taking one trade per candidate template.
+
+    Every template keeps its entry hour, bracket distances (in ATRs at the new entry) and cost; the entry bar is
+    drawn uniformly from that hour's bars and the direction is a coin flip.
+    """
+    rng = np.random.default_rng(seed)
+    shape = (strategies, len(templates))
+    hour = np.broadcast_to(templates.hour, shape)
+    entry = templates.pool[
+        templates.pool_start[hour] + (rng.random(shape) * templates.pool_size[hour]).astype(np.int64)
+    ].ravel()
+    is_long = rng.random(shape).ravel() < 0.5
+    risk = (np.broadcast_to(templates.sl_atr, shape).ravel()) * bars.atr[entry]
+    target = (np.broadcast_to(templates.tp_atr, shape).ravel()) * bars.atr[entry]
+    entry_mid = bars.open[entry]
+    side = np.where(is_long, 1.0, -1.0)
+    exit_mid = bracket_exit_mid(bars, entry, is_long, entry_mid - side * risk, entry_mid + side * target)
+    r = (side * (exit_mid - entry_mid) - np.broadcast_to(templates.cost, shape).ravel()) / risk
+    return r.reshape(shape).mean(axis=1)
+
+
+def _init_null_worker(spec: SharedDatasetSpec, templates: NullTemplates) -> None:
+    global _ATTACHED, _BARS, _TEMPLATES
+    _ATTACHED = attach_dataset(spec)
+    _BARS = NullBars.from_frame(_ATTACHED.frame())
+    _TEMPLATES = templates
+
+
+def _null_worker(strategies: int, seed: np.random.SeedSequence) -> np.ndarray:
+    if _BARS is None or _TEMPLATES is None:
+        raise RuntimeError("Null-model worker started without bars.")
+    return simulate_null_batch(_BARS, _TEMPLATES, strategies, seed)
+
+
+def simulate_null(
+    bars: NullBars,
+    templates: NullTemplates,
+    strategies: int,
+    seed: int = 42,
+    batch: int = 250,
+    workers: int = 1,
+) -> np.ndarray:
+    """Mean net R of `strategies` null strategies, simulated in batches of `batch`.
+
+    Each batch draws from its own child of `seed`, so the distribution does not depend on `workers`; with
+    `workers > 1` the bars are published to shared memory and batches run in a process pool.
+    """
+    if strategies <= 0 or len(templates) == 0:
+        return np.empty(0, dtype=float)
+    sizes = [min(batch, strategies - start) for start in range(0, strategies, max(int(batch), 1))]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    if workers <= 1 or len(sizes) == 1:
+        return np.concatenate([simulate_null_batch(bars, templates, s, q) for s, q in zip(sizes, seeds)])
+    with SharedDataset(bars.frame()) as shared, ProcessPoolExecutor(
+        max_workers=min(workers, len(sizes)),
+        mp_context=pool_context(),
+        initializer=_init_null_worker,
+        initargs=(shared.spec, templates),
+    ) as pool:
+        return np.concatenate(list(pool.map(_null_worker, sizes, seeds)))
+
+
+def null_percentile(candidate: float, null_means: np.ndarray) -> tuple[float, float]:
+    """Mid-rank percentile (0-100) of `candidate` in the null distribution and the one-sided p-value of beating it."""
+    if null_means.size == 0 or not np.isfinite(candidate):
+        return float("nan"), float("nan")
+    below = int((null_means < candidate).sum())
+    ties = int((null_means == candidate).sum())
+    percentile = 100.0 * (below + 0.5 * ties) / null_means.size
+    p_value = (1 + int((null_means >= candidate).sum())) / (null_means.size + 1)
+    return percentile, p_value
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+PROGRESS_FILE = "progress.jsonl"
+PROGRESS_VERSION = 1
+
+
+def rss_mb() -> float | None:
+    """Current resident set size in MiB (peak RSS where the current value is unavailable), or None."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as f:
+            return round(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20, 1)
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (2**20 if sys.platform == "darwin" else 2**10), 1)
+
+
+def _utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
+
+
+class ProgressStream:
+    """JSONL progress channel for orchestrators: one record per line, flushed as written.
+
+    Record kinds (`record`): `phase` when an engine run starts, `progress` at most every `every_sec` of wall clock
+    while it runs, `phase_end` when it finishes, and one final `summary` per run (with the run id).
+    `target` is a file path (appended to) or `fd:N` for an inherited file descriptor.
+    """
+
+    def __init__(self, target: str | Path, every_sec: float = 5.0, run_id: str = ""):
+        text = str(target)
+        self.target = text
+        if text.startswith("fd:"):
+            self._fh: IO[str] = open(int(text[3:]), "w", encoding="utf-8", closefd=False)
+        else:
+            path = Path(text)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._fh = path.open("a", encoding="utf-8")
+        self.every_sec = max(float(every_sec), 0.0)
+        self.run_id = run_id
+        self.started = time.monotonic()
+        self.phase = ""
+        self._phase_started = self.started
+        self._next_due = self.started
+        self._bars_total = 0
+        self._sim_start: pd.Timestamp | None = None
+        self._sim_span = 1.0
+
+    def __enter__(self) -> ProgressStream:
+        return self
+
+    def __exit__(self, exc_type: object, exc: object, tb: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if not self._fh.closed:
+            self._fh.close()
+
+    def emit(self, record: str, **fields: Any) -> None:
+        payload = {"v": PROGRESS_VERSION, "record": record, "ts_utc": _utc_now(), "run_id": self.run_id, **fields}
+        self._fh.write(json.dumps(payload, ensure_ascii=True, default=str) + "\n")
+        self._fh.flush()
+
+    def due(self) -> bool:
+        return time.monotonic() >= self._next_due
+
+    def begin(self, phase: str, *, bars_total: int, sim_start: Any, sim_end: Any) -> None:
+        # Deferred: orchestrators import this module for PROGRESS_FILE / read_progress without loading pandas.
+        import pandas as pd
+
+        self.phase = phase
+        self._phase_started = time.monotonic()
+        self._next_due = self._phase_started + self.every_sec
+        self._bars_total = int(bars_total)
+        self._sim_start = pd.Timestamp(sim_start)
+        self._sim_span = max((pd.Timestamp(sim_end) - self._sim_start).total_seconds(), 1.0)
+        self.emit("phase", phase=phase, bars_total=self._bars_total, sim_start=str(sim_start), sim_end=str(sim_end))
+
+    def _throughput(self, bars_done: int) -> dict[str, Any]:
+        elapsed = time.monotonic() - self._phase_started
+        rate = bars_done / elapsed if elapsed > 0 else 0.0
+        remaining = max(self._bars_total - bars_done, 0)
+        return {
+            "phase": self.phase,
+            "elapsed_sec": round(elapsed, 3),
+            "bars_done": int(bars_done),
+            "bars_total": self._bars_total,
+            "bars_per_sec": round(rate, 1),
+            "eta_sec": round(remaining / rate, 1) if rate > 0 else None,
+            "rss_mb": rss_mb(),
+        }
+
+    def update(self, *, bars_done: int, sim_ts: pd.Timestamp, trades_closed: int, equity: float) -> None:
+        self._next_due = time.monotonic() + self.every_sec
+        sim_pct = 0.0
+        if self._sim_start is not None:
+            sim_pct = min(max((sim_ts - self._sim_start).total_seconds() / self._sim_span, 0.0), 1.0) * 100.0
+        self.emit(
+            "progress",
+            **self._throughput(bars_done),
+            sim_ts=sim_ts.isoformat(),
+            sim_pct=round(sim_pct, 2),
+            trades_closed=int(trades_closed),
+            equity=round(float(equity), 2),
+        )
+
+    def end(self, *, bars_done: int, trades_closed: int, equity: float, aborted_reason: str | None = None) -> None:
+        fields = self._throughput(bars_done)
+        fields.pop("eta_sec")
+        self.emit(
+            "phase_end",
+            **fields,
+            trades_closed=int(trades_closed),
+            equity=round(float(equity), 2),
+            aborted_reason=aborted_reason,
+        )
+
+    def summary(self, status: str, **fields: Any) -> None:
+        self.emit("summary", status=status, elapsed_sec=round(time.monotonic() - self.started, 3), **fields)
+
+
+def read_progress(path: str | Path) -> list[dict[str, Any]]:
+    """Records of a progress JSONL; torn or foreign lines (e.g. a line still being written) are skipped."""
+    progress_path = Path(path)
+    if not progress_path.is_file():
+        return []
+    records: list[dict[str, Any]] = []
+    for raw in progress_path.read_text(encoding="utf-8", errors="replace").splitlines():
+        try:
+            rec = json.loads(raw)
+        except ValueError:
+            continue
+        if isinstance(rec, dict) and "record" in rec:
+            records.append(rec)
+    return records
@@ -5,8 +5,11 @@ import random
 from dataclasses import dataclass
 from typing import Any
 
+import numpy as np
 import pandas as pd
 
+from xauusd_bot.funnel import funnel_table
+
 
 @dataclass(slots=True)
 class MetricsBundle:
@@ -25,25 +28,33 @@ def _safe_float(value: Any, default: float = 0.0) -> float:
         return default
 
 
-def _profit_factor(pnl: pd.Series) -> float:
-    if pnl.empty:
+def _profit_factor(pnl: pd.Series | np.ndarray) -> float:
+    values = np.asarray(pnl, dtype="float64")
+    if values.size == 0:
         return 0.0
-    gross_win = float(pnl[pnl > 0].sum())
-    gross_loss = float((-pnl[pnl < 0]).sum())
+    gross_win = float(values[values > 0].sum())
+    gross_loss = float((-values[values < 0]).sum())
     if gross_loss <= 0:
         return float("inf") if gross_win > 0 else 0.0
     return gross_win / gross_loss
 
 
-def _max_drawdown_from_equity(equity: pd.Series) -> float:
-    if equity.empty:
+def _max_drawdown_from_equity(equity: pd.Series | np.ndarray) -> float:
+    values = np.asarray(equity, dtype="float64")
+    if values.size == 0:
         return 0.0
-    peak = equity.cummax()
-    dd = (peak - equity) / peak.replace(0.0, pd.NA)
-    dd = dd.fillna(0.0)
+    peak = np.fmax.accumulate(values)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dd = np.where(peak != 0.0, (peak - values) / peak, 0.0)
+    dd = np.where(np.isnan(dd), 0.0, dd)
     return float(dd.max())
 
 
+def _running_equity(starting_equity: float, pnl: np.ndarray) -> np.ndarray:
+    """Equity after each trade; seeding the running sum adds the trades in the same order as a Python loop would."""
+    return np.cumsum(np.concatenate(([float(starting_equity)], pnl)))[1:]
+
+
 def _ensure_trade_types(trades: pd.DataFrame) -> pd.DataFrame:
     if trades.empty:
         return trades.copy()
@@ -60,16 +71,45 @@ def _ensure_trade_types(trades: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
+@dataclass(slots=True)
+class _ExitOrder:
+    """Typed trades sorted once by exit time (missing exit times last), shared by the global and period metrics."""
+
+    frame: pd.DataFrame
+    curve_pnl: np.ndarray  # pnl in exit order, non-finite values counted as 0 like the equity curve does
+    source_pos: np.ndarray  # input row position of each sorted trade; period sums add in input order
+    source_pnl: np.ndarray
+    exit_ns: np.ndarray  # int64 ns exit times of the trades that have one (a prefix of `frame`)
+
+
+def _exit_order(trades: pd.DataFrame) -> _ExitOrder:
+    df = _ensure_trade_types(trades).reset_index(drop=True)
+    if df.empty:
+        empty = np.zeros(0)
+        return _ExitOrder(df, empty, np.zeros(0, dtype=np.int64), empty, np.zeros(0, dtype=np.int64))
+    frame = df.sort_values("exit_time")
+    curve_pnl = frame["pnl"].to_numpy(dtype="float64") if "pnl" in frame.columns else np.zeros(len(frame))
+    exit_time = frame["exit_time"]
+    with_exit = int(exit_time.notna().sum())
+    return _ExitOrder(
+        frame=frame,
+        curve_pnl=np.where(np.isfinite(curve_pnl), curve_pnl, 0.0),
+        source_pos=frame.index.to_numpy(),
+        source_pnl=df["pnl"].to_numpy(dtype="float64") if "pnl" in df.columns else np.zeros(len(df)),
+        exit_ns=pd.DatetimeIndex(exit_time.iloc[:with_exit]).as_unit("ns").asi8,
+    )
+
+
 def equity_curve_from_trades(trades: pd.DataFrame, starting_equity: float) -> pd.DataFrame:
     if trades.empty:
         return pd.DataFrame({"timestamp": [pd.NaT], "equity": [starting_equity]})
-    df = _ensure_trade_types(trades).sort_values("exit_time").copy()
-    eq = starting_equity
-    rows: list[dict[str, Any]] = []
-    for _, row in df.iterrows():
-        eq += _safe_float(row.get("pnl"))
-        rows.append({"timestamp": row.get("exit_time"), "equity": eq})
-    return pd.DataFrame(rows)
+    order = _exit_order(trades)
+    return pd.DataFrame(
+        {
+            "timestamp": order.frame["exit_time"].reset_index(drop=True),
+            "equity": _running_equity(starting_equity, order.curve_pnl),
+        }
+    )
 
 
 def compute_global_metrics(
@@ -78,7 +118,16 @@ def compute_global_metrics(
     period_start: pd.Timestamp,
     period_end: pd.Timestamp,
 ) -> dict[str, Any]:
-    df = _ensure_trade_types(trades)
+    return _global_metrics(_exit_order(trades), starting_equity, period_start, period_end)
+
+
+def _global_metrics(
+    order: _ExitOrder,
+    starting_equity: float,
+    period_start: pd.Timestamp,
+    period_end: pd.Timestamp,
+) -> dict[str, Any]:
+    df = order.frame
     if df.empty:
         months = max(1.0, (period_end - period_start).days / 30.4375) if pd.notna(period_start) and pd.notna(period_end) else 1.0
         return {
@@ -102,12 +151,10 @@ def compute_global_metrics(
             "months": months,
         }
 
-    df = df.sort_values("exit_time")
     pnl = df["pnl"]
     final_equity = starting_equity + float(pnl.sum())
     total_return = (final_equity / starting_equity) - 1.0 if starting_equity > 0 else 0.0
-    curve = equity_curve_from_trades(df, starting_equity)
-    mdd = _max_drawdown_from_equity(curve["equity"])
+    mdd = _max_drawdown_from_equity(_running_equity(starting_equity, order.curve_pnl))
     pf = _profit_factor(pnl)
 
     wins = df[df["pnl"] > 0]
@@ -149,50 +196,78 @@ def compute_global_metrics(
     }
 
 
+def _period_metrics(
+    order: _ExitOrder,
+    starts: pd.DatetimeIndex,
+    ends: pd.DatetimeIndex,
+    starting_equity: float,
+) -> list[dict[str, Any]]:
+    """PnL, profit factor, drawdown and start/end equity of each [start, end] exit-time period, chained in order.
+
+    Periods are contiguous slices of the exit-ordered trades, found with two binary searches; trades outside every
+    period are ignored. The drawdown runs over the equity after each trade of the period, starting from the
+    period's opening equity.
+    """
+    lo = np.searchsorted(order.exit_ns, starts.as_unit("ns").asi8, side="left")
+    hi = np.searchsorted(order.exit_ns, ends.as_unit("ns").asi8, side="right")
+    rows: list[dict[str, Any]] = []
+    running_eq = starting_equity
+    for a, b in zip(lo.tolist(), hi.tolist()):
+        pnl_sum = pf = dd = 0.0
+        if b > a:
+            pnl = order.source_pnl[np.sort(order.source_pos[a:b])]
+            pnl_sum = float(pnl.sum())
+            pf = _profit_factor(pnl)
+            dd = _max_drawdown_from_equity(_running_equity(running_eq, order.curve_pnl[a:b]))
+        rows.append(
+            {
+                "pnl": pnl_sum,
+                "profit_factor": pf,
+                "max_drawdown": dd,
+                "trades": max(0, b - a),
+                "equity_start": running_eq,
+                "equity_end": running_eq + pnl_sum,
+            }
+        )
+        running_eq += pnl_sum
+    return rows
+
+
 def build_monthly_metrics(
     trades: pd.DataFrame,
     starting_equity: float,
     period_start: pd.Timestamp,
     period_end: pd.Timestamp,
+) -> pd.DataFrame:
+    return _monthly_metrics(_exit_order(trades), starting_equity, period_start, period_end)
+
+
+def _monthly_metrics(
+    order: _ExitOrder,
+    starting_equity: float,
+    period_start: pd.Timestamp,
+    period_end: pd.Timestamp,
 ) -> pd.DataFrame:
     if pd.isna(period_start) or pd.isna(period_end):
         return pd.DataFrame()
-    df = _ensure_trade_types(trades)
     months = pd.period_range(period_start.to_period("M"), period_end.to_period("M"), freq="M")
     rows: list[dict[str, Any]] = []
-    running_eq = starting_equity
-    for month in months:
-        m_start = month.start_time
-        m_end = month.end_time
-        if df.empty:
-            m_trades = df
-        else:
-            m_trades = df[(df["exit_time"] >= m_start) & (df["exit_time"] <= m_end)]
-
-        month_pnl = float(m_trades["pnl"].sum()) if not m_trades.empty else 0.0
-        month_pf = _profit_factor(m_trades["pnl"]) if not m_trades.empty else 0.0
-        month_curve = equity_curve_from_trades(m_trades, running_eq) if not m_trades.empty else pd.DataFrame({"equity": [running_eq]})
-        month_dd = _max_drawdown_from_equity(month_curve["equity"]) if not month_curve.empty else 0.0
-        eq_start = running_eq
-        eq_end = running_eq + month_pnl
-        compounded_return = (eq_end / eq_start - 1.0) if eq_start > 0 else 0.0
-        simple_return = (month_pnl / starting_equity) if starting_equity > 0 else 0.0
-
+    for month, stats in zip(months, _period_metrics(order, months.start_time, months.end_time, starting_equity)):
+        eq_start = stats["equity_start"]
+        eq_end = stats["equity_end"]
         rows.append(
             {
                 "month": str(month),
-                "return_compounded": compounded_return,
-                "return_simple": simple_return,
-                "profit_factor": month_pf,
-                "max_drawdown": month_dd,
-                "trades": int(len(m_trades)),
-                "pnl": month_pnl,
+                "return_compounded": (eq_end / eq_start - 1.0) if eq_start > 0 else 0.0,
+                "return_simple": (stats["pnl"] / starting_equity) if starting_equity > 0 else 0.0,
+                "profit_factor": stats["profit_factor"],
+                "max_drawdown": stats["max_drawdown"],
+                "trades": stats["trades"],
+                "pnl": stats["pnl"],
                 "equity_start": eq_start,
                 "equity_end": eq_end,
             }
         )
-        running_eq = eq_end
-
     return pd.DataFrame(rows)
 
 
@@ -201,40 +276,37 @@ def build_yearly_metrics(
     starting_equity: float,
     period_start: pd.Timestamp,
     period_end: pd.Timestamp,
+) -> pd.DataFrame:
+    return _yearly_metrics(_exit_order(trades), starting_equity, period_start, period_end)
+
+
+def _yearly_metrics(
+    order: _ExitOrder,
+    starting_equity: float,
+    period_start: pd.Timestamp,
+    period_end: pd.Timestamp,
 ) -> pd.DataFrame:
     if pd.isna(period_start) or pd.isna(period_end):
         return pd.DataFrame()
-    df = _ensure_trade_types(trades)
     years = list(range(period_start.year, period_end.year + 1))
+    starts = pd.DatetimeIndex([pd.Timestamp(year=y, month=1, day=1) for y in years])
+    ends = pd.DatetimeIndex([pd.Timestamp(year=y, month=12, day=31, hour=23, minute=59, second=59) for y in years])
     rows: list[dict[str, Any]] = []
-    running_eq = starting_equity
-    for y in years:
-        start = pd.Timestamp(year=y, month=1, day=1)
-        end = pd.Timestamp(year=y, month=12, day=31, hour=23, minute=59, second=59)
-        if df.empty:
-            y_trades = df
-        else:
-            y_trades = df[(df["exit_time"] >= start) & (df["exit_time"] <= end)]
-        y_pnl = float(y_trades["pnl"].sum()) if not y_trades.empty else 0.0
-        y_pf = _profit_factor(y_trades["pnl"]) if not y_trades.empty else 0.0
-        y_curve = equity_curve_from_trades(y_trades, running_eq) if not y_trades.empty else pd.DataFrame({"equity": [running_eq]})
-        y_dd = _max_drawdown_from_equity(y_curve["equity"]) if not y_curve.empty else 0.0
-        eq_start = running_eq
-        eq_end = running_eq + y_pnl
-        y_ret = (eq_end / eq_start - 1.0) if eq_start > 0 else 0.0
+    for y, stats in zip(years, _period_metrics(order, starts, ends, starting_equity)):
+        eq_start = stats["equity_start"]
+        eq_end = stats["equity_end"]
         rows.append(
             {
                 "year": y,
-                "return": y_ret,
-                "profit_factor": y_pf,
-                "max_drawdown": y_dd,
-                "trades": int(len(y_trades)),
-                "pnl": y_pnl,
+                "return": (eq_end / eq_start - 1.0) if eq_start > 0 else 0.0,
+                "profit_factor": stats["profit_factor"],
+                "max_drawdown": stats["max_drawdown"],
+                "trades": stats["trades"],
+                "pnl": stats["pnl"],
                 "equity_start": eq_start,
                 "equity_end": eq_end,
             }
         )
-        running_eq = eq_end
     return pd.DataFrame(rows)
 
 
@@ -244,9 +316,10 @@ def compute_metrics_bundle(
     period_start: pd.Timestamp,
     period_end: pd.Timestamp,
 ) -> MetricsBundle:
-    global_metrics = compute_global_metrics(trades, starting_equity, period_start, period_end)
-    monthly = build_monthly_metrics(trades, starting_equity, period_start, period_end)
-    yearly = build_yearly_metrics(trades, starting_equity, period_start, period_end)
+    order = _exit_order(trades)
+    global_metrics = _global_metrics(order, starting_equity, period_start, period_end)
+    monthly = _monthly_metrics(order, starting_equity, period_start, period_end)
+    yearly = _yearly_metrics(order, starting_equity, period_start, period_end)
     return MetricsBundle(global_metrics=global_metrics, monthly=monthly, yearly=yearly)
 
 
@@ -321,40 +394,38 @@ def mode_performance(trades: pd.DataFrame, starting_equity: float) -> pd.DataFra
     return pd.DataFrame(rows)
 
 
-def block_summary(events: pd.DataFrame) -> pd.DataFrame:
-    if events.empty or ("event_type" not in events.columns):
-        return pd.DataFrame(
-            [
-                {"block_type": "COST_FILTER_BLOCK", "count": 0},
-                {"block_type": "SESSION_BLOCK", "count": 0},
-                {"block_type": "SHOCK_BLOCK", "count": 0},
-                {"block_type": "BLOCKED_MAX_TRADES_DAY", "count": 0},
-                {"block_type": "MAX_TRADES_BLOCK", "count": 0},
-                {"block_type": "HOUR_BLACKLIST", "count": 0},
-                {"block_type": "HOUR_NOT_IN_WHITELIST", "count": 0},
-                {"block_type": "COST_GATE_OVERRIDE_HOUR", "count": 0},
-            ]
-        )
-    text = events["event_type"].fillna("").astype(str).str.upper()
-    counts = text.value_counts().to_dict()
-    max_trades_count = int(counts.get("BLOCKED_MAX_TRADES_DAY", 0))
-    hour_blacklist_count = int(text.str.contains("HOUR_BLACKLIST", regex=False).sum())
-    hour_whitelist_count = int(text.str.contains("HOUR_NOT_IN_WHITELIST", regex=False).sum())
-    cost_override_count = int(
-        (
-            text.str.contains("COST_GATE_OVERRIDE_HOUR", regex=False)
-            | text.str.contains("COST_FILTER_BLOCK_OVERRIDE_HOUR", regex=False)
-        ).sum()
-    )
+def block_summary(events: pd.DataFrame, funnel: dict[str, Any] | None = None) -> pd.DataFrame:
+    """Block counts from events.csv rows, or from the engine's funnel.json counters when `funnel` is given."""
+    if funnel is not None:
+        table = funnel_table(funnel, "events")
+        text = table["event_type"].str.upper()
+        weights = table["count"]
+    elif events.empty or ("event_type" not in events.columns):
+        text = pd.Series([], dtype="object")
+        weights = pd.Series([], dtype="int64")
+    else:
+        text = events["event_type"].fillna("").astype(str).str.upper()
+        weights = pd.Series(1, index=text.index, dtype="int64")
+
+    def count(mask: pd.Series) -> int:
+        return int(weights[mask].sum())
+
+    def contains(token: str) -> pd.Series:
+        return text.str.contains(token, regex=False)
+
+    max_trades_count = count(text == "BLOCKED_MAX_TRADES_DAY")
     rows = [
-        {"block_type": "COST_FILTER_BLOCK", "count": int(text.str.contains("COST_FILTER_BLOCK", regex=False).sum())},
-        {"block_type": "SESSION_BLOCK", "count": int(text.str.contains("SESSION_BLOCK", regex=False).sum())},
-        {"block_type": "SHOCK_BLOCK", "count": int(text.str.contains("SHOCK_BLOCK", regex=False).sum())},
+        {"block_type": "COST_FILTER_BLOCK", "count": count(contains("COST_FILTER_BLOCK"))},
+        {"block_type": "SESSION_BLOCK", "count": count(contains("SESSION_BLOCK"))},
+        {"block_type": "SHOCK_BLOCK", "count": count(contains("SHOCK_BLOCK"))},
         {"block_type": "BLOCKED_MAX_TRADES_DAY", "count": max_trades_count},
         {"block_type": "MAX_TRADES_BLOCK", "count": max_trades_count},
-        {"block_type": "HOUR_BLACKLIST", "count": hour_blacklist_count},
-        {"block_type": "HOUR_NOT_IN_WHITELIST", "count": hour_whitelist_count},
-        {"block_type": "COST_GATE_OVERRIDE_HOUR", "count": cost_override_count},
+        {"block_type": "HOUR_BLACKLIST", "count": count(contains("HOUR_BLACKLIST"))},
+        {"block_type": "HOUR_NOT_IN_WHITELIST", "count": count(contains("HOUR_NOT_IN_WHITELIST"))},
+        {
+            "block_type": "COST_GATE_OVERRIDE_HOUR",
+            "count": count(contains("COST_GATE_OVERRIDE_HOUR") | contains("COST_FILTER_BLOCK_OVERRIDE_HOUR")),
+        },
     ]
     return pd.DataFrame(rows)
 
@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+import shutil
+import zipfile
+from collections.abc import Iterable
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+
+
+ARCHIVE_SUFFIX = ".runzip"
+ARCHIVE_VERSION = 1
+MANIFEST = "manifest.json"
+# How many parent directories of a run file may separate it from its run root (e.g. sensitivity/<case>/trades.csv).
+_MAX_RUN_DEPTH = 4
+
+
+def archive_path(run_dir: str | Path) -> Path:
+    run_dir = Path(run_dir)
+    return run_dir.with_name(run_dir.name + ARCHIVE_SUFFIX)
+
+
+def _split_columns(raw: bytes) -> list[list[str]] | None:
+    """CSV text as one list per column (header first), or None when it is not a clean rectangular table."""
+    try:
+        rows = list(csv.reader(io.StringIO(raw.decode("utf-8"), newline="")))
+    except (UnicodeDecodeError, csv.Error):
+        return None
+    if not rows or not rows[0]:
+        return None
+    width = len(rows[0])
+    if any(len(row) > width for row in rows):
+        return None
+    return [[row[i] if i < len(row) else "" for row in rows if row] for i in range(width)]
+
+
+def _column_member(rel: str, index: int) -> str:
+    return f"tables/{rel}/{index}.csv"
+
+
+def _write_archive(target: Path, run_id: str, files: dict[str, bytes]) -> None:
+    manifest: dict[str, Any] = {
+        "version": ARCHIVE_VERSION,
+        "run_id": run_id,
+        "created_utc": datetime.now(timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z"),
+        "files": {},
+    }
+    tmp = target.with_name(target.name + ".tmp")
+    with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=6) as zf:
+        for rel, raw in sorted(files.items()):
+            columns = _split_columns(raw) if rel.lower().endswith(".csv") else None
+            if columns is None:
+                zf.writestr(f"files/{rel}", raw)
+                manifest["files"][rel] = {"kind": "blob", "bytes": len(raw)}
+                continue
+            for i, values in enumerate(columns):
+                buf = io.StringIO(newline="")
+                writer = csv.writer(buf, lineterminator="\n")
+                writer.writerows([value] for value in values)
+                zf.writestr(_column_member(rel, i), buf.getvalue())
+            manifest["files"][rel] = {
+                "kind": "table",
+                "bytes": len(raw),
+                "rows": len(columns[0]) - 1,
+                "columns": [values[0] for values in columns],
+            }
+        zf.writestr(MANIFEST, json.dumps(manifest, indent=1))
+    tmp.replace(target)
+
+
+def archive_run(run_dir: str | Path, *, remove: bool = True) -> Path:
+    """Pack `run_dir` into `<run_dir>.runzip` and (by default) delete the directory.
+
+    CSV tables are stored column by column, so readers decompress only the columns they ask for; every other file is
+    stored whole. Files already in an existing archive for the run are kept unless the directory has a newer copy.
+    """
+    run_dir = Path(run_dir)
+    if not run_dir.is_dir():
+        raise FileNotFoundError(f"Run directory not found: {run_dir}")
+    target = archive_path(run_dir)
+    files: dict[str, bytes] = {}
+    if target.is_file():
+        with RunArchive(target) as existing:
+            files = {rel: existing.read_bytes(rel) for rel in existing.names()}
+    for path in sorted(run_dir.rglob("*")):
+        if path.is_file():
+            files[path.relative_to(run_dir).as_posix()] = path.read_bytes()
+    _write_archive(target, run_dir.name, files)
+    if remove:
+        shutil.rmtree(run_dir)
+    return target
+
+
+def extract_run(archive: str | Path, dest: str | Path | None = None) -> Path:
+    """Restore an archived run as a plain directory (next to the archive by default)."""
+    archive = Path(archive)
+    out = Path(dest) if dest is not None else archive.with_name(archive.name[: -len(ARCHIVE_SUFFIX)])
+    with RunArchive(archive) as run:
+        for rel in run.names():
+            target = out / rel
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(run.read_bytes(rel))
+    return out
+
+
+class RunArchive:
+    """Read access to one `.runzip`: file listing, whole files, and CSV tables by column."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._zip = zipfile.ZipFile(self.path)
+        try:
+            self.manifest: dict[str, Any] = json.loads(self._zip.read(MANIFEST))
+        except KeyError as exc:
+            self._zip.close()
+            raise ValueError(f"Not a run archive (no {MANIFEST}): {self.path}") from exc
+        if self.manifest.get("version") != ARCHIVE_VERSION:
+            self._zip.close()
+            raise ValueError(f"Unsupported run archive version {self.manifest.get('version')!r}: {self.path}")
+        self.files: dict[str, dict[str, Any]] = self.manifest["files"]
+
+    def __enter__(self) -> RunArchive:
+        return self
+
+    def __exit__(self, exc_type: object, exc: object, tb: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._zip.close()
+
+    def names(self) -> list[str]:
+        return list(self.files)
+
+    def has(self, rel: str) -> bool:
+        return rel in self.files
+
+    def _entry(self, rel: str) -> dict[str, Any]:
+        entry = self.files.get(rel)
+        if entry is None:
+            raise FileNotFoundError(f"{rel} not in run archive {self.path}")
+        return entry
+
+    def read_bytes(self, rel: str) -> bytes:
+        entry = self._entry(rel)
+        if entry["kind"] == "blob":
+            return self._zip.read(f"files/{rel}")
+        return self._table_bytes(rel, range(len(entry["columns"])))
+
+    def _table_bytes(self, rel: str, indices: Iterable[int]) -> bytes:
+        """CSV text of the given columns of an archived table, header included."""
+        columns = [
+            list(csv.reader(io.StringIO(self._zip.read(_column_member(rel, i)).decode("utf-8"), newline="")))
+            for i in indices
+        ]
+        buf = io.StringIO(newline="")
+        writer = csv.writer(buf, lineterminator="\n")
+        writer.writerows([col[r][0] for col in columns] for r in range(int(self._entry(rel)["rows"]) + 1))
+        return buf.getvalue().encode("utf-8")
+
+    def read_text(self, rel: str, encoding: str = "utf-8", errors: str = "strict") -> str:
+        return self.read_bytes(rel).decode(encoding, errors=errors)
+
+    def read_csv(self, rel: str, columns: list[str] | None = None, **kwargs: Any) -> pd.DataFrame:
+        """`pd.read_csv` of an archived file; for tables only the wanted columns (or `usecols`) are decompressed.
+
+        The wanted columns are joined back into CSV text before parsing, so every `pd.read_csv` option (`parse_dates`,
+        `index_col`, `dtype`, ...) applies as it would to the original file.
+        """
+        entry = self._entry(rel)
+        usecols = kwargs.pop("usecols", None)
+        wanted = columns if columns is not None else usecols
+        if entry["kind"] == "blob":
+            return pd.read_csv(io.BytesIO(self._zip.read(f"files/{rel}")), usecols=wanted, **kwargs)
+        names: list[str] = entry["columns"]
+        if wanted is None or callable(wanted) or not all(isinstance(name, str) for name in wanted):
+            # Positional or callable `usecols` is resolved by pandas against the full table.
+            return pd.read_csv(io.BytesIO(self._table_bytes(rel, range(len(names)))), usecols=wanted, **kwargs)
+        wanted_set = set(wanted)
+        missing = sorted(wanted_set - set(names))
+        if missing:
+            raise ValueError(f"Usecols do not match columns, columns expected but not found: {missing}")
+        indices = [i for i, name in enumerate(names) if name in wanted_set]
+        if not indices:
+            return pd.DataFrame(index=pd.RangeIndex(int(entry["rows"])))
+        return pd.read_csv(io.BytesIO(self._table_bytes(rel, indices)), **kwargs)
+
+
+def _locate(path: Path) -> tuple[Path, str] | None:
+    """(archive, member) for a file path under an archived run directory."""
+    for depth, parent in enumerate(path.parents):
+        if depth >= _MAX_RUN_DEPTH:
+            break
+        archive = archive_path(parent)
+        if archive.is_file():
+            return archive, path.relative_to(parent).as_posix()
+    return None
+
+
+def run_exists(run_dir: str | Path) -> bool:
+    run_dir = Path(run_dir)
+    return run_dir.is_dir() or archive_path(run_dir).is_file()
+
+
+def run_file_exists(path: str | Path) -> bool:
+    """Whether a run file exists on disk or inside its run's archive."""
+    path = Path(path)
+    if path.exists():
+        return True
+    located = _locate(path)
+    if located is None:
+        return False
+    with RunArchive(located[0]) as run:
+        return run.has(located[1])
+
+
+def read_run_csv(path: str | Path, **kwargs: Any) -> pd.DataFrame:
+    """`pd.read_csv` that also reads files of archived runs, decompressing only the requested `usecols`."""
+    path = Path(path)
+    if path.exists():
+        return pd.read_csv(path, **kwargs)
+    located = _locate(path)
+    if located is None:
+        raise FileNotFoundError(f"No such file or archived run file: {path}")
+    with RunArchive(located[0]) as run:
+        return run.read_csv(located[1], **kwargs)
+
+
+def read_run_text(path: str | Path, encoding: str = "utf-8", errors: str = "strict") -> str:
+    path = Path(path)
+    if path.exists():
+        return path.read_text(encoding=encoding, errors=errors)
+    located = _locate(path)
+    if located is None:
+        raise FileNotFoundError(f"No such file or archived run file: {path}")
+    with RunArchive(located[0]) as run:
+        return run.read_text(located[1], encoding=encoding, errors=errors)
+
+
+def iter_runs(runs_root: str | Path) -> list[Path]:
+    """Run directory paths under `runs_root`, archived runs included (as the directory path they unpack to)."""
+    root = Path(runs_root)
+    if not root.exists():
+        return []
+    runs = {p.name: p for p in root.iterdir() if p.is_dir()}
+    for p in root.glob(f"*{ARCHIVE_SUFFIX}"):
+        name = p.name[: -len(ARCHIVE_SUFFIX)]
+        runs.setdefault(name, root / name)
+    return [runs[name] for name in sorted(runs)]
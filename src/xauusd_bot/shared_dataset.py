@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import multiprocessing
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True, slots=True)
+class SharedColumn:
+    name: str
+    block: str
+    dtype: str
+
+
+@dataclass(frozen=True, slots=True)
+class SharedDatasetSpec:
+    """Picklable descriptor of a published dataset: hand it to workers and `attach_dataset` it there."""
+
+    rows: int
+    columns: tuple[SharedColumn, ...]
+    attrs: dict[str, Any] = field(default_factory=dict)
+
+
+def _column_values(series: pd.Series) -> np.ndarray:
+    if series.dtype == object:
+        # e.g. all-NA feature columns; the engine only tests them with `pd.notna`, so NaN is equivalent.
+        series = pd.to_numeric(series, errors="raise")
+    values = series.to_numpy()
+    if values.dtype.kind not in "biufM":
+        raise ValueError(f"Column `{series.name}` has unsupported dtype {values.dtype} for shared memory.")
+    return np.ascontiguousarray(values)
+
+
+def _open_block(name: str) -> shared_memory.SharedMemory:
+    try:
+        # Python 3.13+: attaching processes must not unlink the block when they exit.
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedDataset:
+    """Parent-side copy of an M5 frame (OHLCV plus any prepared feature columns) in shared memory blocks.
+
+    Workers attach through `spec` and read the same pages, so an N-worker sweep holds one dataset. The owner must
+    outlive the workers; `close` unlinks the blocks. Before Python 3.13 attach only from `multiprocessing` children,
+    which share the owner's resource tracker.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self._blocks: list[shared_memory.SharedMemory] = []
+        columns: list[SharedColumn] = []
+        try:
+            for name in df.columns:
+                values = _column_values(df[name])
+                block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+                self._blocks.append(block)
+                np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)[:] = values
+                columns.append(SharedColumn(name=str(name), block=block.name, dtype=values.dtype.str))
+        except BaseException:
+            self.close()
+            raise
+        self.spec = SharedDatasetSpec(rows=len(df), columns=tuple(columns), attrs=dict(df.attrs))
+
+    def __enter__(self) -> SharedDataset:
+        return self
+
+    def __exit__(self, exc_type: object, exc: object, tb: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+
+class AttachedDataset:
+    """Worker-side read-only NumPy views over a `SharedDataset`."""
+
+    def __init__(self, spec: SharedDatasetSpec):
+        self.spec = spec
+        self._blocks: list[shared_memory.SharedMemory] = []
+        self.arrays: dict[str, np.ndarray] = {}
+        for col in spec.columns:
+            block = _open_block(col.block)
+            self._blocks.append(block)
+            view = np.ndarray((spec.rows,), dtype=np.dtype(col.dtype), buffer=block.buf)
+            view.flags.writeable = False
+            self.arrays[col.name] = view
+
+    def frame(self) -> pd.DataFrame:
+        """DataFrame over the shared views (no copy); keeps the publisher's `attrs`, e.g. the M5 feature tag."""
+        df = pd.DataFrame(self.arrays, copy=False)
+        df.attrs.update(self.spec.attrs)
+        return df
+
+    def close(self) -> None:
+        """Detach; every frame and view obtained from this object must be released first."""
+        self.arrays = {}
+        for block in self._blocks:
+            block.close()
+        self._blocks = []
+
+
+def attach_dataset(spec: SharedDatasetSpec) -> AttachedDataset:
+    return AttachedDataset(spec)
+
+
+def pool_context() -> multiprocessing.context.BaseContext:
+    """Start method for pools over a shared dataset; workers attach either way, fork only saves interpreter start-up."""
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context()
@@ -0,0 +1,851 @@
+from __future__ import annotations
+
+import os
+import shutil
+from collections.abc import Callable
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from datetime import timedelta
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+
+from xauusd_bot.csv_utils import read_csv_tolerant
+from xauusd_bot.configuration import load_config
+from xauusd_bot.cost_replay import CostScenario, replay_costs
+from xauusd_bot.data_loader import M5Scan, iter_m5_csv, iter_m5_day_blocks, load_m5_csv, scan_m5_csv
+from xauusd_bot.engine import SimulationEngine
+from xauusd_bot.funnel import FUNNEL_FILE, load_funnel
+from xauusd_bot.log_policy import apply_log_verbosity_args, replay_events_complete
+from xauusd_bot.logger import CsvLogger
+from xauusd_bot.progress import ProgressStream
+from xauusd_bot.reporting import (
+    MetricsBundle,
+    average_entry_cost_multiplier,
+    block_summary,
+    compute_metrics_bundle,
+    markdown_table,
+    mode_performance,
+    monte_carlo_execution,
+    monthly_health,
+)
+from xauusd_bot.shared_dataset import AttachedDataset, SharedDataset, SharedDatasetSpec, attach_dataset, pool_context
+
+
+def _run_backtest_once(
+    data: pd.DataFrame,
+    config: dict[str, Any],
+    output_dir: Path,
+    progress: ProgressStream | None = None,
+    phase: str = "full",
+) -> dict[str, Any]:
+    cfg = dict(config)
+    cfg["output_dir"] = str(output_dir)
+
+    logger = CsvLogger(output_dir=output_dir, reset=True)
+    engine = SimulationEngine(config=cfg, logger=logger, progress=progress, progress_phase=phase)
+    summary = engine.run(data)
+    period_start = pd.Timestamp(data["timestamp"].min()) if not data.empty else pd.NaT
+    period_end = pd.Timestamp(data["timestamp"].max()) if not data.empty else pd.NaT
+    return _collect_backtest_result(summary, logger, cfg, period_start, period_end)
+
+
+def _run_backtest_chunked(
+    data_path: str | Path,
+    scan: M5Scan,
+    chunk_rows: int,
+    config: dict[str, Any],
+    output_dir: Path,
+    progress: ProgressStream | None = None,
+    phase: str = "full",
+) -> dict[str, Any]:
+    cfg = dict(config)
+    cfg["output_dir"] = str(output_dir)
+
+    logger = CsvLogger(output_dir=output_dir, reset=True)
+    engine = SimulationEngine(config=cfg, logger=logger, progress=progress, progress_phase=phase)
+    blocks = iter_m5_day_blocks(iter_m5_csv(data_path, chunk_rows=chunk_rows), min_rows=chunk_rows)
+    summary = engine.run_chunked(blocks, scan)
+    return _collect_backtest_result(summary, logger, cfg, scan.start_ts, scan.end_ts)
+
+
+def _load_m5_since(data_path: str | Path, start: pd.Timestamp, chunk_rows: int) -> pd.DataFrame:
+    parts = [chunk.loc[chunk["timestamp"] >= start] for chunk in iter_m5_csv(data_path, chunk_rows=chunk_rows)]
+    parts = [part for part in parts if not part.empty]
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=["timestamp", "open", "high", "low", "close"])
+
+
+def _collect_backtest_result(
+    summary: dict[str, Any],
+    logger: CsvLogger,
+    cfg: dict[str, Any],
+    period_start: pd.Timestamp,
+    period_end: pd.Timestamp,
+) -> dict[str, Any]:
+    read_warnings: list[str] = []
+    trades = read_csv_tolerant(logger.trades_path, label="trades", warnings=read_warnings)
+    fills = read_csv_tolerant(logger.fills_path, label="fills", warnings=read_warnings)
+    events = read_csv_tolerant(logger.events_path, label="events", warnings=read_warnings)
+    starting_equity = float(cfg.get("starting_balance", 10_000.0))
+    bundle = compute_metrics_bundle(trades, starting_equity, period_start, period_end)
+    month_health = monthly_health(bundle.monthly)
+    mode_df = mode_performance(trades, starting_equity)
+    blocks_df = block_summary(events, funnel=load_funnel(logger.funnel_path))
+    avg_cost_mult = average_entry_cost_multiplier(fills)
+    return {
+        "summary": summary,
+        "logger": logger,
+        "trades": trades,
+        "fills": fills,
+        "events": events,
+        "bundle": bundle,
+        "month_health": month_health,
+        "mode_df": mode_df,
+        "blocks_df": blocks_df,
+        "avg_cost_multiplier": avg_cost_mult,
+        "period_start": period_start,
+        "period_end": period_end,
+        "starting_equity": starting_equity,
+        "read_warnings": read_warnings,
+    }
+
+
+def _replay_backtest_costs(
+    base_result: dict[str, Any],
+    config: dict[str, Any],
+    scenario: CostScenario,
+    output_dir: Path,
+) -> dict[str, Any] | None:
+    # Thinned TRADE_OPEN / COST_FILTER_BLOCK* rows would hide trades the scenario costs let through.
+    if not replay_events_complete(config.get("log_verbosity")):
+        return None
+    replay = replay_costs(
+        base_result["trades"],
+        base_result["fills"],
+        config,
+        scenario,
+        events=base_result["events"],
+    )
+    if replay.requires_resimulation:
+        return None
+    output_dir.mkdir(parents=True, exist_ok=True)
+    replay.trades.to_csv(output_dir / "trades.csv", index=False)
+    replay.fills.to_csv(output_dir / "fills.csv", index=False)
+    bundle = compute_metrics_bundle(
+        replay.trades,
+        base_result["starting_equity"],
+        base_result["period_start"],
+        base_result["period_end"],
+    )
+    return {"trades": replay.trades, "fills": replay.fills, "bundle": bundle, "read_warnings": []}
+
+
+@dataclass(frozen=True, slots=True)
+class _Scenario:
+    """One engine run of the suite: rows [start, stop) of the loaded data, or the streamed CSV when `rows` is None."""
+
+    cfg: dict[str, Any]
+    output_dir: Path
+    phase: str
+    rows: tuple[int, int] | None
+
+
+@dataclass(frozen=True, slots=True)
+class _ScenarioSource:
+    """What a scenario reads besides its rows: the streamed CSV of a chunked full run and where progress goes."""
+
+    data_path: str | Path | None
+    scan: M5Scan | None
+    chunk_rows: int
+    progress_target: str | None = None
+    progress_every_sec: float = 5.0
+    run_id: str = ""
+
+
+def _run_scenario(
+    data: pd.DataFrame,
+    source: _ScenarioSource,
+    scenario: _Scenario,
+    progress: ProgressStream | None,
+) -> dict[str, Any]:
+    if scenario.rows is None:
+        return _run_backtest_chunked(
+            source.data_path,
+            source.scan,
+            source.chunk_rows,
+            scenario.cfg,
+            scenario.output_dir,
+            progress=progress,
+            phase=scenario.phase,
+        )
+    start, stop = scenario.rows
+    window = data if (start, stop) == (0, len(data)) else data.iloc[start:stop]
+    return _run_backtest_once(window, scenario.cfg, output_dir=scenario.output_dir, progress=progress, phase=scenario.phase)
+
+
+_WORKER_DATASET: AttachedDataset | None = None
+_WORKER_DATA: pd.DataFrame | None = None
+_WORKER_SOURCE: _ScenarioSource | None = None
+_WORKER_PROGRESS: ProgressStream | None = None
+
+
+def _init_scenario_worker(spec: SharedDatasetSpec, source: _ScenarioSource) -> None:
+    global _WORKER_DATASET, _WORKER_DATA, _WORKER_SOURCE, _WORKER_PROGRESS
+    _WORKER_DATASET = attach_dataset(spec)
+    _WORKER_DATA = _WORKER_DATASET.frame()
+    _WORKER_SOURCE = source
+    if source.progress_target is not None:
+        _WORKER_PROGRESS = ProgressStream(
+            source.progress_target, every_sec=source.progress_every_sec, run_id=source.run_id
+        )
+
+
+def _scenario_worker(scenario: _Scenario) -> dict[str, Any]:
+    if _WORKER_DATA is None or _WORKER_SOURCE is None:
+        raise RuntimeError("Scenario worker started without a dataset.")
+    return _run_scenario(_WORKER_DATA, _WORKER_SOURCE, scenario, _WORKER_PROGRESS)
+
+
+class _Deferred:
+    """In-process stand-in for a future: the scenario runs when its result is first read."""
+
+    def __init__(self, run: Callable[[], dict[str, Any]]):
+        self._run: Callable[[], dict[str, Any]] | None = run
+        self._result: dict[str, Any] | None = None
+
+    def result(self) -> dict[str, Any]:
+        if self._run is not None:
+            self._result = self._run()
+            self._run = None
+        return self._result  # type: ignore[return-value]
+
+
+class _ScenarioPool:
+    """Dispatches suite scenarios to `workers` processes that share the loaded data, or runs them in-process.
+
+    With one worker a scenario runs when its result is read, so the engine runs keep the suite's sequential order.
+    Results are always read in the suite's order, so the report does not depend on which worker finishes first.
+    """
+
+    def __init__(self, data: pd.DataFrame, source: _ScenarioSource, progress: ProgressStream | None, workers: int):
+        self.data = data
+        self.source = source
+        self.progress = progress
+        self.workers = workers
+        self._shared: SharedDataset | None = None
+        self._pool: ProcessPoolExecutor | None = None
+
+    def __enter__(self) -> _ScenarioPool:
+        if self.workers > 1:
+            context = pool_context()
+            source = self.source
+            if self.progress is not None and (
+                context.get_start_method() == "fork" or not self.progress.target.startswith("fd:")
+            ):
+                # Workers append their own phase records; an inherited descriptor only survives fork.
+                source = replace(
+                    source,
+                    progress_target=self.progress.target,
+                    progress_every_sec=self.progress.every_sec,
+                    run_id=self.progress.run_id,
+                )
+            self._shared = SharedDataset(self.data.select_dtypes(include=["number", "bool", "datetime"]))
+            try:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=context,
+                    initializer=_init_scenario_worker,
+                    initargs=(self._shared.spec, source),
+                )
+            except BaseException:
+                self._shared.close()
+                raise
+        return self
+
+    def __exit__(self, exc_type: object, exc: object, tb: object) -> None:
+        try:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True, cancel_futures=True)
+        finally:
+            if self._shared is not None:
+                self._shared.close()
+            self._pool = None
+            self._shared = None
+
+    def submit(self, scenario: _Scenario) -> Future[dict[str, Any]] | _Deferred:
+        if self._pool is not None:
+            return self._pool.submit(_scenario_worker, scenario)
+        return _Deferred(lambda: _run_scenario(self.data, self.source, scenario, self.progress))
+
+
+def _row_span(data: pd.DataFrame, part: pd.DataFrame) -> tuple[int, int]:
+    """Row range of `part` in `data`; year-test slices of time-sorted data are contiguous."""
+    if part.empty:
+        return (0, 0)
+    start = int(data.index.get_loc(part.index[0]))
+    return (start, start + len(part))
+
+
+def _slice_year_data(data: pd.DataFrame, mode: str) -> tuple[pd.DataFrame, str, pd.Timestamp, pd.Timestamp]:
+    if data.empty:
+        return data.copy(), "empty", pd.NaT, pd.NaT
+
+    max_ts = pd.Timestamp(data["timestamp"].max())
+    min_ts = pd.Timestamp(data["timestamp"].min())
+
+    if mode == "last_12_full_calendar_months":
+        first_this_month = max_ts.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        end_exclusive = first_this_month
+        start = (end_exclusive - pd.DateOffset(months=12)).replace(hour=0, minute=0, second=0, microsecond=0)
+        year_df = data[(data["timestamp"] >= start) & (data["timestamp"] < end_exclusive)].copy()
+        if year_df.empty:
+            start = max_ts - pd.Timedelta(days=365)
+            year_df = data[data["timestamp"] >= start].copy()
+            label = "fallback_last_365_days"
+        else:
+            label = "last_12_full_calendar_months"
+        return year_df, label, pd.Timestamp(year_df["timestamp"].min()), pd.Timestamp(year_df["timestamp"].max())
+
+    start = max_ts - pd.Timedelta(days=365)
+    year_df = data[data["timestamp"] >= start].copy()
+    if year_df.empty:
+        year_df = data.copy()
+        label = "full_dataset_fallback"
+    else:
+        label = "last_365_days"
+    return year_df, label, pd.Timestamp(year_df["timestamp"].min()), pd.Timestamp(year_df["timestamp"].max())
+
+
+def _format_pct(value: float) -> str:
+    return f"{value * 100.0:.2f}%"
+
+
+def _verdict(
+    year_metrics: dict[str, Any],
+    year_month_health: dict[str, Any],
+    bad_cost_metrics: dict[str, Any],
+    monte_carlo: dict[str, Any],
+) -> tuple[str, list[str]]:
+    reasons: list[str] = []
+    fails = 0
+
+    pf = float(year_metrics.get("profit_factor", 0.0))
+    mdd = float(year_metrics.get("max_drawdown", 0.0))
+    expectancy = float(year_metrics.get("expectancy_R", 0.0))
+    pos_months = float(year_month_health.get("positive_months_pct", 0.0))
+    bad_pf = float(bad_cost_metrics.get("profit_factor", 0.0))
+    bad_mdd = float(bad_cost_metrics.get("max_drawdown", 0.0))
+    mc_pos = float(monte_carlo.get("positive_pct", 0.0))
+
+    if pf < 1.3:
+        fails += 1
+        reasons.append(f"PF OOS bajo ({pf:.2f} < 1.30).")
+    if mdd > 0.30:
+        fails += 1
+        reasons.append(f"MDD OOS alto ({_format_pct(mdd)} > 30%).")
+    elif mdd > 0.20:
+        reasons.append(f"MDD OOS por encima del ideal ({_format_pct(mdd)} > 20%).")
+    if expectancy < 0.10:
+        fails += 1
+        reasons.append(f"Expectancy R bajo ({expectancy:.3f} < 0.10).")
+    if pos_months < 0.60:
+        fails += 1
+        reasons.append(f"Porcentaje de meses positivos bajo ({_format_pct(pos_months)} < 60%).")
+    if bad_pf < 1.0:
+        fails += 1
+        reasons.append(f"Escenario de costes malo pierde robustez (PF={bad_pf:.2f} < 1.00).")
+    if bad_mdd > 0.35:
+        fails += 1
+        reasons.append(f"Escenario de costes malo con DD elevado ({_format_pct(bad_mdd)} > 35%).")
+    if mc_pos < 0.70:
+        fails += 1
+        reasons.append(f"Monte Carlo insuficiente ({_format_pct(mc_pos)} positivos < 70%).")
+
+    if pf < 1.0 or expectancy < 0.0 or fails >= 4:
+        return "No fiable", reasons
+    if fails >= 1:
+        return "Dudoso", reasons
+    return "Aprobado", reasons or ["Cumple umbrales de PF, DD, expectancy, meses positivos y robustez."]
+
+
+def _write_report(
+    report_path: Path,
+    full_result: dict[str, Any],
+    year_result: dict[str, Any],
+    year_label: str,
+    cost_df: pd.DataFrame,
+    mc: dict[str, Any],
+    sensitivity_df: pd.DataFrame,
+    verdict: str,
+    verdict_reasons: list[str],
+) -> None:
+    full_g = full_result["bundle"].global_metrics
+    full_m = full_result["bundle"].monthly
+    full_y = full_result["bundle"].yearly
+    full_h = full_result["month_health"]
+    full_mode = full_result["mode_df"]
+    full_blocks = full_result["blocks_df"]
+    full_avg_cost = float(full_result["avg_cost_multiplier"])
+
+    year_g = year_result["bundle"].global_metrics
+    year_m = year_result["bundle"].monthly
+    year_y = year_result["bundle"].yearly
+    year_h = year_result["month_health"]
+    year_mode = year_result["mode_df"]
+    year_blocks = year_result["blocks_df"]
+    year_avg_cost = float(year_result["avg_cost_multiplier"])
+
+    compare_df = pd.DataFrame(
+        [
+            {
+                "scope": "full",
+                "total_return": full_g["total_return"],
+                "final_equity": full_g["final_equity"],
+                "profit_factor": full_g["profit_factor"],
+                "max_drawdown": full_g["max_drawdown"],
+                "winrate": full_g["winrate"],
+                "expectancy_R": full_g["expectancy_R"],
+                "trades": full_g["trades"],
+            },
+            {
+                "scope": f"year_test ({year_label})",
+                "total_return": year_g["total_return"],
+                "final_equity": year_g["final_equity"],
+                "profit_factor": year_g["profit_factor"],
+                "max_drawdown": year_g["max_drawdown"],
+                "winrate": year_g["winrate"],
+                "expectancy_R": year_g["expectancy_R"],
+                "trades": year_g["trades"],
+            },
+        ]
+    )
+
+    lines: list[str] = []
+    lines.append("# Reporte de Backtest y Fiabilidad")
+    lines.append("")
+    lines.append("## Resumen Ejecutivo")
+    lines.append("")
+    lines.append(f"- Veredicto: **{verdict}**")
+    lines.append(f"- Prueba del ano usada: `{year_label}`")
+    lines.append(f"- Equity final (full): `{full_g['final_equity']:.2f}`")
+    lines.append(f"- Equity final (ano): `{year_g['final_equity']:.2f}`")
+    lines.append(f"- Backend de kernels: `{full_result['summary']['kernel_backend']}`")
+    lines.append(f"- PF (ano): `{year_g['profit_factor']:.3f}`")
+    lines.append(f"- MDD (ano): `{_format_pct(year_g['max_drawdown'])}`")
+    lines.append(f"- Expectancy R (ano): `{year_g['expectancy_R']:.3f}`")
+    lines.append(
+        "- Objetivo 4-8% mensual: "
+        f"`{_format_pct(year_h['pct_months_ge_4'])}` de meses >=4%, "
+        f"mediana mensual = `{_format_pct(year_h['median_monthly_return'])}`"
+    )
+    lines.append("")
+    lines.append("Motivos del veredicto:")
+    for reason in verdict_reasons:
+        lines.append(f"- {reason}")
+    lines.append("")
+    lines.append("## Metricas Globales")
+    lines.append("")
+    lines.append(markdown_table(compare_df, float_cols={"total_return", "final_equity", "profit_factor", "max_drawdown", "winrate", "expectancy_R"}))
+    lines.append("")
+    lines.append("## Performance por Modo")
+    lines.append("")
+    lines.append("### Full")
+    lines.append("")
+    lines.append(markdown_table(full_mode, float_cols={"return", "profit_factor", "winrate", "expectancy_R"}))
+    lines.append("")
+    lines.append("### Year Test")
+    lines.append("")
+    lines.append(markdown_table(year_mode, float_cols={"return", "profit_factor", "winrate", "expectancy_R"}))
+    lines.append("")
+    lines.append("## Bloqueos y Coste Efectivo")
+    lines.append("")
+    lines.append(f"- Cost multiplier medio por entrada (full): `{full_avg_cost:.4f}`")
+    lines.append(f"- Cost multiplier medio por entrada (ano): `{year_avg_cost:.4f}`")
+    lines.append("")
+    lines.append("### Bloqueos Full")
+    lines.append("")
+    lines.append(markdown_table(full_blocks))
+    lines.append("")
+    lines.append("### Bloqueos Year Test")
+    lines.append("")
+    lines.append(markdown_table(year_blocks))
+    lines.append("")
+    lines.append("### MAE/MFE (Full)")
+    lines.append("")
+    lines.append(
+        f"- MAE_R mean/median/p90: `{full_g['mae_r_mean']:.3f}` / `{full_g['mae_r_median']:.3f}` / `{full_g['mae_r_p90']:.3f}`"
+    )
+    lines.append(
+        f"- MFE_R mean/median/p90: `{full_g['mfe_r_mean']:.3f}` / `{full_g['mfe_r_median']:.3f}` / `{full_g['mfe_r_p90']:.3f}`"
+    )
+    lines.append("")
+    lines.append("## Metricas Mensuales (Full)")
+    lines.append("")
+    lines.append(
+        f"- % meses positivos: `{_format_pct(full_h['positive_months_pct'])}` | racha max meses negativos: `{full_h['max_negative_streak']}` | "
+        f"mejor mes: `{full_h['best_month']}` | peor mes: `{full_h['worst_month']}`"
+    )
+    lines.append("")
+    lines.append(markdown_table(full_m, float_cols={"return_compounded", "return_simple", "profit_factor", "max_drawdown", "pnl", "equity_start", "equity_end"}))
+    lines.append("")
+    lines.append("## Metricas por ano (Full)")
+    lines.append("")
+    lines.append(markdown_table(full_y, float_cols={"return", "profit_factor", "max_drawdown", "pnl", "equity_start", "equity_end"}))
+    lines.append("")
+    lines.append(f"## Prueba del ano ({year_label})")
+    lines.append("")
+    lines.append(
+        f"- % meses positivos: `{_format_pct(year_h['positive_months_pct'])}` | racha max meses negativos: `{year_h['max_negative_streak']}` | "
+        f"mejor mes: `{year_h['best_month']}` | peor mes: `{year_h['worst_month']}`"
+    )
+    lines.append("")
+    lines.append(markdown_table(year_m, float_cols={"return_compounded", "return_simple", "profit_factor", "max_drawdown", "pnl", "equity_start", "equity_end"}))
+    lines.append("")
+    lines.append("## Chequeo Objetivo Mensual (4-8%)")
+    lines.append("")
+    monthly_target_df = pd.DataFrame(
+        [
+            {
+                "scope": "full",
+                "avg_monthly_return": full_h["avg_monthly_return"],
+                "median_monthly_return": full_h["median_monthly_return"],
+                "pct_months_ge_4": full_h["pct_months_ge_4"],
+                "pct_months_ge_8": full_h["pct_months_ge_8"],
+            },
+            {
+                "scope": f"year_test ({year_label})",
+                "avg_monthly_return": year_h["avg_monthly_return"],
+                "median_monthly_return": year_h["median_monthly_return"],
+                "pct_months_ge_4": year_h["pct_months_ge_4"],
+                "pct_months_ge_8": year_h["pct_months_ge_8"],
+            },
+        ]
+    )
+    lines.append(
+        markdown_table(
+            monthly_target_df,
+            float_cols={"avg_monthly_return", "median_monthly_return", "pct_months_ge_4", "pct_months_ge_8"},
+        )
+    )
+    lines.append("")
+    lines.append("## Robustez de Costes")
+    lines.append("")
+    lines.append(markdown_table(cost_df, float_cols={"spread_usd", "slippage_usd", "total_return", "profit_factor", "max_drawdown"}))
+    lines.append("")
+    lines.append("## Monte Carlo de Ejecucion")
+    lines.append("")
+    lines.append(f"- Simulaciones: `{mc['sims']}`")
+    lines.append(f"- Retorno P5/P50/P95: `{_format_pct(mc['return_p5'])}` / `{_format_pct(mc['return_p50'])}` / `{_format_pct(mc['return_p95'])}`")
+    lines.append(f"- DD P5/P50/P95: `{_format_pct(mc['dd_p5'])}` / `{_format_pct(mc['dd_p50'])}` / `{_format_pct(mc['dd_p95'])}`")
+    lines.append(f"- % simulaciones positivas: `{_format_pct(mc['positive_pct'])}`")
+    lines.append("")
+    lines.append("## Sensibilidad Rapida")
+    lines.append("")
+    lines.append(markdown_table(sensitivity_df, float_cols={"value", "total_return", "profit_factor", "max_drawdown"}))
+    lines.append("")
+    lines.append("## Recomendaciones")
+    lines.append("")
+    if verdict == "Aprobado":
+        lines.append("- Mantener auditoria periodica de costes reales y drift de slippage.")
+        lines.append("- Revisar trimestralmente estabilidad de parametros en ventana rodante.")
+    elif verdict == "Dudoso":
+        lines.append("- Reducir riesgo por trade y repetir analisis en subperiodos.")
+        lines.append("- Priorizar mejora de robustez en escenario de costes malo.")
+    else:
+        lines.append("- No usar en produccion sin rediseno de logica de entrada/salida.")
+        lines.append("- Replantear filtros de regimen y gestion de riesgo antes de re-evaluar.")
+    lines.append("")
+
+    report_path.write_text("\n".join(lines), encoding="utf-8")
+
+
+def run_backtest_suite(
+    data: pd.DataFrame,
+    config: dict[str, Any],
+    run_dir: Path,
+    *,
+    output_dir: Path | None = None,
+    scan: M5Scan | None = None,
+    data_path: str | Path | None = None,
+    chunk_rows: int = 0,
+    progress: ProgressStream | None = None,
+    workers: int = 1,
+) -> dict[str, Any]:
+    """Full run, year test, cost scenarios, Monte Carlo and sensitivity written to `run_dir` with report.md.
+
+    `data` is the whole history, or only the year-test tail when `scan` is given (full runs then stream `data_path`).
+    Each engine run reports to `progress` under its own phase name. With `workers` > 1 the engine runs go to a process
+    pool sharing `data`; the report is assembled in the same order either way.
+    """
+    run_dir.mkdir(parents=True, exist_ok=True)
+    output_dir = Path(config["output_dir"]) if output_dir is None else output_dir
+    source = _ScenarioSource(data_path=data_path, scan=scan, chunk_rows=chunk_rows)
+    full_rows = None if scan is not None else (0, len(data))
+
+    year_data, year_label, year_start, year_end = _slice_year_data(data, str(config.get("year_test_mode", "last_365_days")))
+    year_rows = _row_span(data, year_data)
+
+    sensitivity_cfg = config.get("sensitivity", {})
+    sensitivity_cases: list[tuple[str, float, _Scenario]] = []
+    for param in ("trailing_mult", "body_ratio", "shock_threshold"):
+        for value in sensitivity_cfg.get(param, []):
+            case_name = f"{param}_{str(value).replace('.', '_')}"
+            case_dir = run_dir / "sensitivity" / case_name
+            case = _Scenario(config | {param: float(value)}, case_dir, f"sensitivity/{case_name}", year_rows)
+            sensitivity_cases.append((param, float(value), case))
+    cost_scenarios = [
+        {"scenario": "base", "spread_usd": 0.41, "slippage_usd": 0.05},
+        {"scenario": "bad", "spread_usd": 0.70, "slippage_usd": 0.15},
+        {"scenario": "good", "spread_usd": 0.30, "slippage_usd": 0.00},
+    ]
+
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    workers = min(workers, 2 + len(cost_scenarios) + len(sensitivity_cases))
+    with _ScenarioPool(data, source, progress, workers) as pool:
+        full_future = pool.submit(_Scenario(config, output_dir, "full", full_rows))
+        year_future = pool.submit(_Scenario(config, run_dir / "year_test", "year_test", year_rows))
+        sensitivity_futures = [(param, value, pool.submit(case)) for param, value, case in sensitivity_cases]
+
+        full_result = full_future.result()
+        for warning in full_result.get("read_warnings", []):
+            print(f"WARN: {warning}")
+
+        for name in ("events.csv", "trades.csv", "signals.csv", "fills.csv", FUNNEL_FILE):
+            src = output_dir / name
+            if src.exists() and src.resolve() != (run_dir / name).resolve():
+                shutil.copy2(src, run_dir / name)
+
+        year_result = year_future.result()
+        for warning in year_result.get("read_warnings", []):
+            print(f"WARN: {warning}")
+
+        cost_cases: list[tuple[dict[str, Any], str, Future[dict[str, Any]] | _Deferred | dict[str, Any]]] = []
+        for item in cost_scenarios:
+            cfg_case = dict(config)
+            cfg_case["spread_usd"] = item["spread_usd"]
+            cfg_case["slippage_usd"] = item["slippage_usd"]
+            case_dir = run_dir / f"cost_{item['scenario']}"
+            scenario = CostScenario(name=item["scenario"], spread_usd=item["spread_usd"], slippage_usd=item["slippage_usd"])
+            replayed = _replay_backtest_costs(full_result, config, scenario, output_dir=case_dir)
+            if replayed is not None:
+                cost_cases.append((item, "replay", replayed))
+            else:
+                resim = _Scenario(cfg_case, case_dir, f"cost_{item['scenario']}", full_rows)
+                cost_cases.append((item, "resim", pool.submit(resim)))
+
+        cost_rows: list[dict[str, Any]] = []
+        cost_metrics_map: dict[str, dict[str, Any]] = {}
+        for item, method, outcome in cost_cases:
+            case_result = outcome if isinstance(outcome, dict) else outcome.result()
+            for warning in case_result.get("read_warnings", []):
+                print(f"WARN: {warning}")
+            g = case_result["bundle"].global_metrics
+            cost_rows.append(
+                {
+                    "scenario": item["scenario"],
+                    "spread_usd": item["spread_usd"],
+                    "slippage_usd": item["slippage_usd"],
+                    "total_return": g["total_return"],
+                    "profit_factor": g["profit_factor"],
+                    "max_drawdown": g["max_drawdown"],
+                    "method": method,
+                }
+            )
+            cost_metrics_map[item["scenario"]] = g
+        cost_df = pd.DataFrame(cost_rows)
+
+        mc = monte_carlo_execution(
+            trades=year_result["trades"],
+            fills=year_result["fills"],
+            starting_equity=float(config.get("starting_balance", 10_000.0)),
+            sims=int(config.get("monte_carlo_sims", 300)),
+            seed=int(config.get("monte_carlo_seed", 42)),
+            spread_low=0.30,
+            spread_high=0.70,
+            slip_low=0.00,
+            slip_high=0.15,
+        )
+
+        sensitivity_rows: list[dict[str, Any]] = []
+        for param, value, future in sensitivity_futures:
+            case_result = future.result()
+            for warning in case_result.get("read_warnings", []):
+                print(f"WARN: {warning}")
+            g = case_result["bundle"].global_metrics
+            sensitivity_rows.append(
+                {
+                    "parameter": param,
+                    "value": value,
+                    "total_return": g["total_return"],
+                    "profit_factor": g["profit_factor"],
+                    "max_drawdown": g["max_drawdown"],
+                    "trades": g["trades"],
+                }
+            )
+    sensitivity_df = pd.DataFrame(sensitivity_rows)
+
+    verdict, verdict_reasons = _verdict(
+        year_metrics=year_result["bundle"].global_metrics,
+        year_month_health=year_result["month_health"],
+        bad_cost_metrics=cost_metrics_map.get("bad", {}),
+        monte_carlo=mc,
+    )
+
+    report_path = run_dir / "report.md"
+    _write_report(
+        report_path=report_path,
+        full_result=full_result,
+        year_result=year_result,
+        year_label=year_label,
+        cost_df=cost_df,
+        mc=mc,
+        sensitivity_df=sensitivity_df,
+        verdict=verdict,
+        verdict_reasons=verdict_reasons,
+    )
+
+    return {
+        "full_result": full_result,
+        "year_result": year_result,
+        "year_label": year_label,
+        "year_start": year_start,
+        "year_end": year_end,
+        "verdict": verdict,
+        "report_path": report_path,
+    }
+
+
+def run_command(
+    data_path: str,
+    config_path: str,
+    chunk_rows: int = 0,
+    run_dir: str | Path | None = None,
+    log_verbosity: list[str] | None = None,
+    log_sample_every: int | None = None,
+    progress_jsonl: str | None = None,
+    progress_every_sec: float | None = None,
+    workers: int = 1,
+) -> int:
+    config = load_config(config_path)
+    apply_log_verbosity_args(config, log_verbosity, log_sample_every)
+    if progress_every_sec is not None:
+        config["progress_every_sec"] = float(progress_every_sec)
+    data_path_abs = Path(data_path).resolve() if Path(data_path).exists() else data_path
+    scan: M5Scan | None = None
+    if chunk_rows > 0:
+        # Full history is streamed block by block; only the year-test window is held in memory.
+        scan = scan_m5_csv(data_path, chunk_rows=chunk_rows)
+        year_floor = min(
+            scan.end_ts - pd.Timedelta(days=365),
+            scan.end_ts.replace(day=1, hour=0, minute=0, second=0, microsecond=0) - pd.DateOffset(months=12),
+        )
+        data = _load_m5_since(data_path, year_floor, chunk_rows)
+        rows, min_ts, max_ts, unique_days = scan.rows, scan.start_ts, scan.end_ts, scan.unique_days
+    else:
+        data = load_m5_csv(data_path)
+        rows = len(data)
+        min_ts = data["timestamp"].min() if len(data) else "N/A"
+        max_ts = data["timestamp"].max() if len(data) else "N/A"
+        unique_days = int(data["timestamp"].dt.date.nunique()) if len(data) else 0
+
+    print("")
+    print("DATA SUMMARY")
+    print(f"file_used: {data_path_abs}")
+    print(f"rows: {rows}")
+    print(f"min_ts: {min_ts}")
+    print(f"max_ts: {max_ts}")
+    print(f"unique_days: {unique_days}")
+
+    if run_dir is None:
+        run_stamp = pd.Timestamp.utcnow().strftime("%Y%m%d_%H%M%S")
+        suite_dir = Path(config["runs_output_dir"]) / run_stamp
+        output_dir = None
+    else:
+        # An explicit run dir also takes the raw CSVs, so concurrent runs never share `output_dir`.
+        suite_dir = Path(run_dir)
+        output_dir = suite_dir
+    progress = (
+        ProgressStream(progress_jsonl, every_sec=float(config["progress_every_sec"]), run_id=suite_dir.name)
+        if progress_jsonl
+        else None
+    )
+    try:
+        suite = run_backtest_suite(
+            data,
+            config,
+            suite_dir,
+            output_dir=output_dir,
+            scan=scan,
+            data_path=data_path,
+            chunk_rows=chunk_rows,
+            progress=progress,
+            workers=workers,
+        )
+    except BaseException as exc:
+        if progress is not None:
+            progress.summary("failed", run_dir=str(suite_dir), error=f"{exc.__class__.__name__}: {exc}")
+            progress.close()
+        raise
+    full_result = suite["full_result"]
+    year_result = suite["year_result"]
+    year_label, year_start, year_end = suite["year_label"], suite["year_start"], suite["year_end"]
+    verdict, report_path = suite["verdict"], suite["report_path"]
+    if progress is not None:
+        progress.summary(
+            "ok",
+            run_dir=str(suite_dir),
+            rows=int(rows),
+            closed_trades=int(full_result["summary"]["closed_trades"]),
+            final_equity=float(full_result["summary"]["final_equity"]),
+            kernel_backend=full_result["summary"]["kernel_backend"],
+            verdict=verdict,
+            report_path=str(report_path),
+        )
+        progress.close()
+
+    full_g = full_result["bundle"].global_metrics
+    year_g = year_result["bundle"].global_metrics
+
+    print("")
+    print("Simulation finished")
+    print(f"events.csv: {full_result['summary']['events_path']}")
+    print(f"trades.csv: {full_result['summary']['trades_path']}")
+    print(f"signals.csv: {full_result['summary']['signals_path']}")
+    print(f"fills.csv: {full_result['summary']['fills_path']}")
+    print(f"closed_trades: {full_result['summary']['closed_trades']}")
+    print(f"states_visited: {', '.join(full_result['summary']['states_visited'])}")
+    print("")
+    print("SIM SUMMARY")
+    print(f"sim_start_ts: {full_result['summary']['sim_start_ts']}")
+    print(f"sim_end_ts: {full_result['summary']['sim_end_ts']}")
+    print(f"sim_days: {full_result['summary']['sim_days']}")
+    print(f"kernel_backend: {full_result['summary']['kernel_backend']}")
+    print(f"closed_trades: {full_result['summary']['closed_trades']}")
+    print(f"final_equity: {full_g['final_equity']:.2f}")
+    print(f"total_return: {_format_pct(full_g['total_return'])}")
+    print(f"PF: {full_g['profit_factor']:.3f}")
+    print(f"MDD: {_format_pct(full_g['max_drawdown'])}")
+    print(f"winrate: {_format_pct(full_g['winrate'])}")
+    print(f"expectancy_R: {full_g['expectancy_R']:.3f}")
+    print("")
+    print("YEAR TEST")
+    print(f"mode: {year_label}")
+    print(f"period_start: {year_start}")
+    print(f"period_end: {year_end}")
+    print(f"year_final_equity: {year_g['final_equity']:.2f}")
+    print(f"year_total_return: {_format_pct(year_g['total_return'])}")
+    print(f"year_PF: {year_g['profit_factor']:.3f}")
+    print(f"year_MDD: {_format_pct(year_g['max_drawdown'])}")
+    print(f"year_expectancy_R: {year_g['expectancy_R']:.3f}")
+    print(
+        "year_monthly_target: "
+        f"pct>=4={_format_pct(year_result['month_health']['pct_months_ge_4'])} | "
+        f"pct>=8={_format_pct(year_result['month_health']['pct_months_ge_8'])} | "
+        f"median={_format_pct(year_result['month_health']['median_monthly_return'])}"
+    )
+    print("")
+    print(f"quick_verdict: {verdict}")
+    print(f"report_path: {report_path.resolve()}")
+    return 0
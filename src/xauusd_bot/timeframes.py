@@ -1,33 +1,107 @@
 from __future__ import annotations
 
+import numpy as np
 import pandas as pd
 
 
-def resample_from_m5(m5_df: pd.DataFrame, rule: str) -> pd.DataFrame:
+NS_PER_MINUTE = 60_000_000_000
+RULE_MINUTES = {
+    "5min": 5,
+    "15min": 15,
+    "30min": 30,
+    "1h": 60,
+    "4h": 240,
+    "1d": 1440,
+    "m5": 5,
+    "m15": 15,
+    "m30": 30,
+    "h1": 60,
+    "h4": 240,
+    "d1": 1440,
+}
+
+
+def rule_minutes(rule: str) -> int:
+    minutes = RULE_MINUTES.get(str(rule).strip().lower())
+    if minutes is None:
+        raise ValueError(f"Unsupported resample rule: {rule!r} (expected one of M5/M15/M30/H1/H4/D1 or 15min/1h/...)")
+    return minutes
+
+
+def _anchor_minutes(anchor: str | None) -> int:
+    if anchor is None:
+        return 0
+    hh, mm = str(anchor).split(":")
+    return (int(hh) * 60) + int(mm)
+
+
+def bucket_end_ns(ts_ns: np.ndarray, rule: str, anchor: str | None = None) -> np.ndarray:
+    """Right-closed bucket label (bucket end) for int64 ns timestamps; `anchor` ("HH:MM") shifts the bucket grid."""
+    step = rule_minutes(rule) * NS_PER_MINUTE
+    offset = (_anchor_minutes(anchor) * NS_PER_MINUTE) % step
+    shifted = ts_ns.astype("int64") - offset
+    # Ceil division: a bar stamped exactly on an edge closes the bucket ending there.
+    return (-((-shifted) // step)) * step + offset
+
+
+def resample_from_m5(
+    m5_df: pd.DataFrame,
+    rule: str,
+    *,
+    anchor: str | None = None,
+    gap_info: bool = False,
+) -> pd.DataFrame:
+    """Right-labelled, right-closed OHLCV bars from M5 via reduceat; empty buckets (weekends, holidays) are skipped.
+
+    `anchor` aligns the bucket grid to a time of day (e.g. "22:00" for broker-session daily bars). With
+    `gap_info`, `m5_bars` counts the source bars per bucket and `missing_before` the empty buckets skipped
+    since the previous bar.
+    """
     if m5_df.empty:
         return m5_df.copy()
 
-    df = m5_df.copy()
-    df = df.set_index("timestamp")
+    df = m5_df.dropna(subset=["open", "high", "low", "close"])
+    ts = df["timestamp"]
+    if not ts.is_monotonic_increasing:
+        df = df.sort_values("timestamp", kind="stable")
+        ts = df["timestamp"]
+    tz = getattr(ts.dt, "tz", None)
+    naive = ts.dt.tz_convert("UTC").dt.tz_localize(None) if tz is not None else ts
+    ts_ns = naive.to_numpy(dtype="datetime64[ns]").view("int64")
+    if len(ts_ns) == 0:
+        return m5_df.iloc[0:0].copy()
+
+    ends = bucket_end_ns(ts_ns, rule, anchor)
+    starts = np.flatnonzero(np.r_[True, ends[1:] != ends[:-1]])
+    lasts = np.r_[starts[1:] - 1, len(ends) - 1]
+    counts = np.diff(np.r_[starts, len(ends)])
 
-    agg = {
-        "open": "first",
-        "high": "max",
-        "low": "min",
-        "close": "last",
-        "volume": "sum",
+    labels = pd.to_datetime(ends[starts])
+    if tz is not None:
+        labels = labels.tz_localize("UTC").tz_convert(tz)
+    out: dict[str, object] = {
+        "timestamp": labels.as_unit(ts.dt.unit),
+        "open": df["open"].to_numpy(dtype="float64")[starts],
+        "high": np.maximum.reduceat(df["high"].to_numpy(dtype="float64"), starts),
+        "low": np.minimum.reduceat(df["low"].to_numpy(dtype="float64"), starts),
+        "close": df["close"].to_numpy(dtype="float64")[lasts],
     }
+    if "volume" in df.columns:
+        out["volume"] = np.add.reduceat(df["volume"].fillna(0).to_numpy(), starts)
     for optional in ("bid", "ask", "spread"):
         if optional in df.columns:
-            agg[optional] = "mean"
-
-    resampled = (
-        df.resample(rule, label="right", closed="right")
-        .agg(agg)
-        .dropna(subset=["open", "high", "low", "close"])
-        .reset_index()
-    )
-    return resampled
+            values = df[optional].to_numpy(dtype="float64")
+            valid = ~np.isnan(values)
+            sums = np.add.reduceat(np.where(valid, values, 0.0), starts)
+            valid_counts = np.add.reduceat(valid.astype("int64"), starts)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                out[optional] = np.where(valid_counts > 0, sums / np.maximum(valid_counts, 1), np.nan)
+    if gap_info:
+        step = rule_minutes(rule) * NS_PER_MINUTE
+        labels = ends[starts]
+        out["m5_bars"] = counts
+        out["missing_before"] = np.r_[0, (np.diff(labels) // step) - 1]
+    return pd.DataFrame(out)
 
 
 def closed_bars_count_up_to(resampled_df: pd.DataFrame, current_ts: pd.Timestamp) -> int:
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from datetime import tzinfo
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+
+# Column kinds: float/int/bool store the value, "time" stores int64 ns since the epoch (None -> NaT) and "label"
+# stores an int32 code into the store's list of distinct strings (read back as a categorical).
+KIND_DTYPES = {"float": np.float64, "int": np.int64, "bool": np.bool_, "time": np.int64, "label": np.int32}
+NAT_NS = np.iinfo(np.int64).min
+
+EQUITY_COLUMNS = {"timestamp": "time", "equity": "float"}
+
+
+class ColumnStore:
+    """Growable per-column NumPy arrays for append-only run records (the engine's equity curve).
+
+    Rows are appended as positional values in schema order and only become a DataFrame in `to_frame`, so a record
+    costs a few bytes per column instead of a dict or dataclass per row. Capacity doubles when full.
+    """
+
+    __slots__ = ("kinds", "unit", "tz", "_arrays", "_labels", "_codes", "_size")
+
+    def __init__(
+        self,
+        kinds: dict[str, str],
+        *,
+        unit: str = "ns",
+        tz: str | tzinfo | None = None,
+        capacity: int = 256,
+    ) -> None:
+        unknown = sorted(set(kinds.values()) - set(KIND_DTYPES))
+        if unknown:
+            raise ValueError(f"Unknown column kinds {unknown}; expected one of {sorted(KIND_DTYPES)}")
+        self.kinds = dict(kinds)
+        self.unit = unit
+        self.tz = tz
+        self._arrays = {name: np.empty(max(1, capacity), dtype=KIND_DTYPES[kind]) for name, kind in kinds.items()}
+        self._labels: dict[str, list[str]] = {name: [] for name, kind in kinds.items() if kind == "label"}
+        self._codes: dict[str, dict[str, int]] = {name: {} for name in self._labels}
+        self._size = 0
+
+    @classmethod
+    def like(cls, kinds: dict[str, str], timestamp: pd.Timestamp) -> ColumnStore:
+        """Empty store whose time columns read back in the unit and time zone of `timestamp`."""
+        return cls(kinds, unit=timestamp.unit, tz=timestamp.tz)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, *values: Any) -> None:
+        if len(values) != len(self._arrays):
+            raise ValueError(f"Expected {len(self._arrays)} values ({', '.join(self._arrays)}), got {len(values)}")
+        i = self._size
+        if i == len(next(iter(self._arrays.values()))):
+            for name, array in self._arrays.items():
+                grown = np.empty(2 * len(array), dtype=array.dtype)
+                grown[:i] = array
+                self._arrays[name] = grown
+        for (name, array), value in zip(self._arrays.items(), values):
+            kind = self.kinds[name]
+            if kind == "label":
+                codes = self._codes[name]
+                code = codes.get(value)
+                if code is None:
+                    code = codes[value] = len(self._labels[name])
+                    self._labels[name].append(value)
+                array[i] = code
+            elif kind == "time":
+                array[i] = NAT_NS if value is None else value
+            elif kind == "float" and value is None:
+                array[i] = np.nan
+            else:
+                array[i] = value
+        self._size = i + 1
+
+    def column(self, name: str) -> np.ndarray:
+        """Raw stored values of one column (ns integers for time columns, codes for label columns)."""
+        return self._arrays[name][: self._size]
+
+    def to_frame(self) -> pd.DataFrame:
+        data: dict[str, Any] = {}
+        for name, kind in self.kinds.items():
+            values = self.column(name).copy()
+            if kind == "time":
+                stamps = pd.DatetimeIndex(values.view("datetime64[ns]"))
+                if self.tz is not None:
+                    stamps = stamps.tz_localize("UTC").tz_convert(self.tz)
+                data[name] = stamps.as_unit(self.unit)
+            elif kind == "label":
+                data[name] = pd.Categorical.from_codes(values, categories=pd.Index(self._labels[name], dtype=object))
+            else:
+                data[name] = values
+        return pd.DataFrame(data)
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+BARS_PER_DAY = 288
+
+
+def random_walk_bars(days: int, seed: int, start: str = "2024-03-04 00:00:00") -> pd.DataFrame:
+    """Synthetic M5 OHLCV: a Gaussian random walk of closes with each open at the previous close."""
+    rng = np.random.default_rng(seed)
+    ts = pd.date_range(start, periods=days * BARS_PER_DAY, freq="5min")
+    close = 2050.0 + np.cumsum(rng.normal(0.0, 0.6, len(ts)))
+    open_ = np.r_[close[0], close[:-1]]
+    return pd.DataFrame(
+        {
+            "timestamp": ts,
+            "open": open_,
+            "high": np.maximum(open_, close) + 0.3,
+            "low": np.minimum(open_, close) - 0.3,
+            "close": close,
+            "volume": 100.0,
+        }
+    )
+
+
+@pytest.fixture
+def random_walk() -> Callable[..., pd.DataFrame]:
+    return random_walk_bars
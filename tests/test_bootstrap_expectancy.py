@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+try:
+    from scripts.bootstrap_expectancy import _block_sums, _stationary_lengths, expectancy_ci, write_boot_ci
+except ModuleNotFoundError:
+    from bootstrap_expectancy import _block_sums, _stationary_lengths, expectancy_ci, write_boot_ci
+
+
+def _ar1(n: int, phi: float, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    noise = rng.normal(0.0, 1.0, n)
+    r = np.empty(n)
+    r[0] = noise[0]
+    for i in range(1, n):
+        r[i] = phi * r[i - 1] + noise[i]
+    return r
+
+
+def test_prefix_sum_blocks_match_explicit_circular_blocks() -> None:
+    rng = np.random.default_rng(3)
+    r = rng.normal(size=97)
+    prefix = np.concatenate([[0.0], np.cumsum(np.concatenate([r, r]))])
+    lengths = _stationary_lengths(rng, 40, r.size, 6.0)
+    starts = rng.integers(0, r.size, size=lengths.shape)
+    assert (lengths.sum(axis=1) == r.size).all()
+
+    sums = _block_sums(prefix, starts, lengths).sum(axis=1)
+    for row in range(40):
+        index = np.concatenate([(s + np.arange(k)) % r.size for s, k in zip(starts[row], lengths[row])])
+        assert index.size == r.size
+        assert sums[row] == pytest.approx(r[index].sum(), abs=1e-9)
+
+
+@pytest.mark.parametrize("method", ["iid", "block", "stationary"])
+def test_intervals_are_seeded_per_chunk_and_cover_the_mean(method: str) -> None:
+    r = _ar1(1200, 0.5, 1)
+    sequential = expectancy_ci(r, resamples=1300, seed=9, method=method, block_len=8)
+    assert sequential == expectancy_ci(r, resamples=1300, seed=9, method=method, block_len=8, workers=2)
+    mean, low, high = sequential
+    assert mean == r.mean() and low < mean < high
+    assert expectancy_ci(np.full(50, 0.25), resamples=600, method=method) == pytest.approx((0.25, 0.25, 0.25))
+
+
+def test_block_methods_widen_the_interval_for_clustered_trades() -> None:
+    r = _ar1(3000, 0.7, 2)
+    width = {}
+    for method in ("iid", "block", "stationary"):
+        _, low, high = expectancy_ci(r, resamples=2000, method=method, block_len=40)
+        width[method] = high - low
+    assert width["block"] > 1.5 * width["iid"] and width["stationary"] > 1.5 * width["iid"]
+
+    with pytest.raises(ValueError, match="Unknown bootstrap method"):
+        expectancy_ci(r, method="moving")
+
+
+def test_boot_csv_keeps_its_columns_and_records_the_method(tmp_path: Path) -> None:
+    trades = pd.DataFrame({"r_multiple": _ar1(400, 0.3, 4)})
+    _, iid = write_boot_ci(tmp_path / "run", trades, resamples=500)
+    out_csv, block = write_boot_ci(tmp_path / "run", trades, resamples=500, method="stationary")
+
+    base = ["run_id", "r_col", "n", "seed", "resamples", "mean", "ci_low", "ci_high", "crosses_zero"]
+    assert list(pd.read_csv(out_csv).columns) == [*base, "method", "block_len"]
+    assert iid["method"].iloc[0] == "iid" and pd.isna(iid["block_len"].iloc[0])
+    assert block["method"].iloc[0] == "stationary" and block["block_len"].iloc[0] == 7.0
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from xauusd_bot.configuration import load_config
+from xauusd_bot.data_loader import iter_m5_csv, iter_m5_day_blocks, load_m5_csv, scan_m5_csv
+from xauusd_bot.engine import SimulationEngine
+from xauusd_bot.logger import CsvLogger
+
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _write_slice(tmp_path: Path, rows: int) -> Path:
+    path = tmp_path / "m5.csv"
+    pd.read_csv(ROOT / "data" / "xauusd_m5_HOLDOUT20.csv", nrows=rows).to_csv(path, index=False)
+    return path
+
+
+def test_day_blocks_keep_whole_days_and_scan_matches_loader(tmp_path: Path) -> None:
+    path = _write_slice(tmp_path, 3000)
+    data = load_m5_csv(path)
+    blocks = list(iter_m5_day_blocks(iter_m5_csv(path, chunk_rows=500), min_rows=500))
+    assert len(blocks) > 2
+    assert sum(len(block) for block in blocks) == len(data)
+    for prev, nxt in zip(blocks, blocks[1:]):
+        assert prev["timestamp"].iloc[-1].date() < nxt["timestamp"].iloc[0].date()
+
+    scan = scan_m5_csv(path, chunk_rows=500)
+    assert scan.rows == len(data)
+    assert (scan.start_ts, scan.end_ts) == (data["timestamp"].iloc[0], data["timestamp"].iloc[-1])
+    assert scan.bar_delta == data["timestamp"].diff().dropna().median()
+
+
+@pytest.mark.parametrize(
+    "config_path",
+    [
+        "configs/config_v3_AUTO.yaml",
+        "configs/edge_discovery_candidates/config_edge_vtm_mr_balanced_v1.yaml",
+    ],
+)
+def test_chunked_run_matches_in_memory_run(tmp_path: Path, config_path: str) -> None:
+    path = _write_slice(tmp_path, 6000)
+    summaries = {}
+    for mode in ("full", "chunked"):
+        cfg = load_config(ROOT / config_path)
+        cfg["progress_every_days"] = 0
+        engine = SimulationEngine(config=cfg, logger=CsvLogger(output_dir=tmp_path / mode))
+        if mode == "full":
+            summaries[mode] = engine.run(load_m5_csv(path))
+        else:
+            blocks = iter_m5_day_blocks(iter_m5_csv(path, chunk_rows=700), min_rows=700)
+            summaries[mode] = engine.run_chunked(blocks, scan_m5_csv(path, chunk_rows=700))
+
+    assert summaries["full"]["closed_trades"] > 0
+    for key in ("closed_trades", "final_equity", "sim_start_ts", "sim_end_ts", "regime_stats", "states_visited"):
+        assert summaries["chunked"][key] == summaries["full"][key]
+    for name in ("trades.csv", "fills.csv", "events.csv", "signals.csv"):
+        assert (tmp_path / "chunked" / name).read_bytes() == (tmp_path / "full" / name).read_bytes()
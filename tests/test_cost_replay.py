@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from xauusd_bot.configuration import load_config
+from xauusd_bot.cost_replay import CostScenario, replay_run_dir
+from xauusd_bot.engine import SimulationEngine
+from xauusd_bot.logger import CsvLogger
+
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _run(cfg: dict, data: pd.DataFrame, out_dir: Path) -> pd.DataFrame:
+    SimulationEngine(config=cfg, logger=CsvLogger(output_dir=out_dir)).run(data)
+    return pd.read_csv(out_dir / "trades.csv")
+
+
+def test_replay_matches_engine_and_flags_gate_changes(tmp_path: Path) -> None:
+    data = pd.read_csv(ROOT / "data" / "xauusd_m5_HOLDOUT20.csv", nrows=6000)
+    data["timestamp"] = pd.to_datetime(data["timestamp"])
+    cfg = load_config(ROOT / "configs" / "v4_candidates" / "v4a_orb_01.yaml")
+    cfg["progress_every_days"] = 0
+    base_trades = _run(cfg, data, tmp_path / "base")
+    assert len(base_trades) > 0
+
+    same = replay_run_dir(tmp_path / "base", cfg, CostScenario("base", cfg["spread_usd"], cfg["slippage_usd"]))
+    assert not same.requires_resimulation
+    assert np.allclose(same.trades["pnl"], base_trades["pnl"], atol=1e-3)
+
+    cheaper = CostScenario("cheap", 0.30, 0.0)
+    replay = replay_run_dir(tmp_path / "base", cfg, cheaper)
+    resim = _run({**cfg, "spread_usd": 0.30, "slippage_usd": 0.0}, data, tmp_path / "cheap")
+    assert not replay.requires_resimulation
+    assert len(replay.trades) == len(resim)
+    assert np.allclose(replay.trades["pnl"], resim["pnl"], atol=1e-3)
+    assert np.allclose(replay.trades["r_multiple"], resim["r_multiple"], atol=1e-3)
+
+    costly = replay_run_dir(tmp_path / "base", cfg, CostScenario("costly", 5.0, 1.0))
+    assert costly.requires_resimulation
+    assert "COST_GATE_WOULD_BLOCK" in set(costly.flags["flag"])
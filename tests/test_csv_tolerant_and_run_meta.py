@@ -9,6 +9,7 @@ import pandas as pd
 
 from scripts import run_and_tag
 from xauusd_bot.csv_utils import read_csv_tolerant
+from xauusd_bot.kernels import KERNEL_ENV, resolve_backend
 
 
 def test_read_csv_tolerant_skips_bad_lines() -> None:
@@ -39,11 +40,12 @@ def test_run_and_tag_writes_meta_even_when_run_fails(tmp_path: Path, monkeypatch
         if cmd0 == "git":
             return subprocess.CompletedProcess(cmd, 0, stdout="deadbeef\n", stderr="")
         if "-m" in cmd and "xauusd_bot" in cmd:
-            created_run.mkdir(parents=True, exist_ok=True)
+            assert cmd[cmd.index("--run-dir") + 1] == str(created_run)
             raise subprocess.CalledProcessError(returncode=2, cmd=cmd)
         raise AssertionError(f"Unexpected command: {cmd}")
 
     monkeypatch.setattr(run_and_tag.subprocess, "run", fake_subprocess_run)
+    monkeypatch.delenv(KERNEL_ENV, raising=False)
     monkeypatch.setattr(
         sys,
         "argv",
@@ -55,6 +57,8 @@ def test_run_and_tag_writes_meta_even_when_run_fails(tmp_path: Path, monkeypatch
             str(config_path),
             "--runs-root",
             str(runs_root),
+            "--run-id",
+            created_run.name,
         ],
     )
 
@@ -66,4 +70,5 @@ def test_run_and_tag_writes_meta_even_when_run_fails(tmp_path: Path, monkeypatch
     assert meta["postprocess_ok"] is False
     assert int(meta["process_returncode"]) == 2
     assert "postprocess_error" in meta
+    assert meta["kernel_backend"] == resolve_backend("auto")
     assert (created_run / "config_used.yaml").exists()
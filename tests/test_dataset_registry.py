@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import json
+import math
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from xauusd_bot.binary_dataset import BinaryDatasetWriter
+from xauusd_bot.data_loader import iter_m5_csv, load_m5_csv
+from xauusd_bot.dataset_registry import find_dataset, master_hash, register_master, register_slice
+
+try:
+    from scripts.run_and_tag import write_run_meta
+except ModuleNotFoundError:
+    from run_and_tag import write_run_meta
+
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _master(tmp_path: Path) -> tuple[pd.DataFrame, Path]:
+    full = load_m5_csv(ROOT / "data" / "xauusd_m5_HOLDOUT20.csv")
+    master = tmp_path / "data" / "xauusd_m5_full"
+    with BinaryDatasetWriter(master) as writer:
+        writer.append(full)
+    registry = tmp_path / "data" / "datasets.json"
+    register_master("FULL", master, registry=registry)
+    register_slice("DEV80", "FULL", fraction=(0.0, 0.8), registry=registry)
+    register_slice("HOLDOUT20", "FULL", fraction=(0.8, 1.0), registry=registry)
+    register_slice("DEC_JAN", "FULL", start="2025-12", end="2026-01", registry=registry)
+    register_slice("DEV_LATE", "DEV80", start="2026-01-10", registry=registry)
+    return full, registry
+
+
+def _memmap_backed(values: np.ndarray) -> bool:
+    while values is not None:
+        if isinstance(values, np.memmap):
+            return True
+        values = values.base
+    return False
+
+
+def test_specs_resolve_to_zero_copy_row_ranges_of_the_master(tmp_path: Path) -> None:
+    full, registry = _master(tmp_path)
+    assert json.loads(registry.read_text())["masters"] == {"FULL": "xauusd_m5_full"}
+    n = len(full)
+    cut = math.floor(0.8 * n)
+    ts = full["timestamp"]
+    expected = {
+        "FULL": (0, n),
+        "DEV80": (0, cut),
+        "HOLDOUT20": (cut, n),
+        "FULL[0.2:0.4]": (math.floor(0.2 * n), math.floor(0.4 * n)),
+        "FULL[:0.5]": (0, math.floor(0.5 * n)),
+        "DEC_JAN": (int((ts < "2025-12-01").sum()), int((ts < "2026-02-01").sum())),
+        "FULL[2025-12-01:2025-12-15]": (int((ts < "2025-12-01").sum()), int((ts < "2025-12-16").sum())),
+        "DEV_LATE": (int((ts < "2026-01-10").sum()), cut),
+        "DEV80[2026]": (int((ts < "2026-01-01").sum()), cut),
+    }
+    for spec, (start, stop) in expected.items():
+        dataset = find_dataset(spec, registry=registry)
+        assert dataset is not None and (dataset.start_row, dataset.stop_row) == (start, stop), spec
+        frame = dataset.frame()
+        pd.testing.assert_frame_equal(frame, full.iloc[start:stop].reset_index(drop=True), check_dtype=False)
+        assert _memmap_backed(frame["close"].to_numpy()), spec
+
+    assert find_dataset("UNKNOWN", registry=registry) is None
+    assert find_dataset("data/some.csv", registry=registry) is None
+    with pytest.raises(ValueError, match="mixes fraction and time"):
+        find_dataset("FULL[0.5:2026]", registry=registry)
+    with pytest.raises(ValueError, match="Bad time bound"):
+        find_dataset("FULL[soon:]", registry=registry)
+
+
+def test_loaders_and_run_meta_accept_registry_names(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    full, registry = _master(tmp_path)
+    monkeypatch.chdir(tmp_path)
+
+    holdout = load_m5_csv("HOLDOUT20")
+    assert len(holdout) == len(full) - math.floor(0.8 * len(full))
+    chunks = list(iter_m5_csv("HOLDOUT20", chunk_rows=1000))
+    assert len(chunks) == math.ceil(len(holdout) / 1000)
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), holdout)
+
+    run_dir = tmp_path / "run"
+    run_dir.mkdir()
+    config = ROOT / "configs" / "config_smoke_baseline.yaml"
+    meta_path = write_run_meta(
+        run_dir=run_dir,
+        run_id="run",
+        data_path="DEV80[2026]",
+        config_path=config,
+        postprocess_ok=True,
+        postprocess_error="",
+        process_returncode=0,
+    )
+    dataset = json.loads(meta_path.read_text())["dataset"]
+    assert dataset["spec"] == "DEV80[2026]" and dataset["master"] == "FULL"
+    assert dataset["master_hash"] == master_hash(tmp_path / "data" / "xauusd_m5_full")
+    assert dataset["bounds"] == [{"fraction": [0.0, 0.8]}, {"start": "2026", "end": "2026"}]
+    assert dataset["stop_row"] == math.floor(0.8 * len(full))
+    assert pd.Timestamp(dataset["start_ts"]) == full.loc[full["timestamp"] >= "2026-01-01", "timestamp"].iloc[0]
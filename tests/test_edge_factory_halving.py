@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from xauusd_bot.configuration import load_config
+from xauusd_bot.engine import SimulationEngine
+from xauusd_bot.kpi import max_drawdown_r
+from xauusd_bot.logger import CsvLogger
+
+try:
+    from scripts.lib.edge_factory_halving import parse_rungs, screen_candidate
+except ModuleNotFoundError:
+    from lib.edge_factory_halving import parse_rungs, screen_candidate
+
+
+ROOT = Path(__file__).resolve().parents[1]
+CONFIG = ROOT / "configs" / "config_smoke_baseline.yaml"
+
+
+def _full_trades(data: pd.DataFrame, tmp_path: Path) -> pd.DataFrame:
+    cfg = load_config(CONFIG)
+    cfg["progress_every_days"] = 0
+    SimulationEngine(config=cfg, logger=CsvLogger(tmp_path / "full")).run(data)
+    return pd.read_csv(tmp_path / "full" / "trades.csv")
+
+
+def test_promoted_screen_sees_the_same_trades_as_the_full_run(
+    tmp_path: Path, random_walk: Callable[..., pd.DataFrame]
+) -> None:
+    data = random_walk(days=8, seed=7)
+    trades = _full_trades(data, tmp_path)
+
+    out = screen_candidate(CONFIG, data, {"min_trades": 1}, rungs=[0.25, 0.5])
+
+    assert out["status"] == "promoted"
+    assert [snap["rung"] for snap in out["rungs"]] == [0.25, 0.5]
+    for snap in out["rungs"]:
+        closed_before = trades[pd.to_datetime(trades["exit_time"]) < pd.Timestamp(snap["day"])]
+        assert snap["trades_closed"] == len(closed_before)
+    assert out["rungs"][-1]["trades_closed"] > 0
+
+
+def test_sound_screen_prunes_unreachable_gates(tmp_path: Path, random_walk: Callable[..., pd.DataFrame]) -> None:
+    data = random_walk(days=8, seed=7)
+    trades = _full_trades(data, tmp_path)
+
+    too_many = screen_candidate(CONFIG, data, {"min_trades": 99 * 8 + 1}, rungs=[0.5])
+    assert too_many["status"] == "pruned"
+    assert too_many["note"].startswith("trades can reach at most 792")
+
+    half = screen_candidate(CONFIG, data, {"min_trades": 1}, rungs=[0.5])
+    cut = pd.Timestamp(half["rungs"][0]["day"])
+    early_dd = max_drawdown_r(trades.loc[pd.to_datetime(trades["exit_time"]) < cut, "r_multiple"])
+    assert early_dd > 0
+    deep = screen_candidate(CONFIG, data, {"min_trades": 1, "max_drawdown_r": early_dd / 2}, rungs=[0.5])
+    assert deep["status"] == "pruned"
+    assert deep["note"].startswith("max_drawdown_r=")
+    # Pruning is sound: the full run breaches the same drawdown gate.
+    assert max_drawdown_r(trades["r_multiple"]) > early_dd / 2
+
+
+def test_parse_rungs_validates_fractions() -> None:
+    assert parse_rungs("") == []
+    assert parse_rungs("0.25, 0.5") == [0.25, 0.5]
+    with pytest.raises(ValueError):
+        parse_rungs("0.5,0.25")
+    with pytest.raises(ValueError):
+        parse_rungs("1.0")
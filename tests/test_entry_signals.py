@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from xauusd_bot.configuration import load_config
+from xauusd_bot.data_loader import load_m5_csv
+from xauusd_bot.engine import SimulationEngine
+from xauusd_bot.logger import CsvLogger
+from xauusd_bot.models import EntrySignal
+
+
+ROOT = Path(__file__).resolve().parents[1]
+CASES: dict[str, tuple[str, dict[str, Any]]] = {
+    "v4_box": ("configs/config_smoke_baseline.yaml", {}),
+    "v4_break_wick": (
+        "configs/config_smoke_baseline.yaml",
+        {
+            "v4_session_orb": {
+                "asia_start": "02:00",
+                "asia_end": "05:00",
+                "trade_start": "00:00",
+                "buffer_atr_mult": 0.2,
+                "stop_buffer_atr_mult": 0.1,
+                "stop_mode": "break_wick",
+            }
+        },
+    ),
+    "vtm_mr": ("configs/edge_discovery_candidates2/config_edge_mr_vtm_core_v1.yaml", {}),
+    "vtm_mr_slope": (
+        "configs/edge_discovery_candidates2/config_edge_mr_vtm_core_v1.yaml",
+        {"vtm_vol_mr": {"vol_filter_min": 0.0, "slope_threshold": 0.05, "excluded_windows": ["12:00-13:00"]}},
+    ),
+    "vtm_shock": (
+        "configs/edge_discovery_candidates3/mr_session_shock_london_t25_tp08.yaml",
+        {"vtm_vol_mr": {"shock_threshold": 1.2, "entry_windows": ["06:00-09:00", "13:00-16:00"]}},
+    ),
+}
+
+
+def _engine(tmp_path: Path, case: str) -> SimulationEngine:
+    config_path, overrides = CASES[case]
+    cfg = load_config(ROOT / config_path)
+    for key, value in overrides.items():
+        cfg[key] = {**cfg.get(key, {}), **value} if isinstance(value, dict) else value
+    return SimulationEngine(config=cfg, logger=CsvLogger(output_dir=tmp_path / "out"))
+
+
+@pytest.mark.parametrize("case", sorted(CASES))
+def test_signal_arrays_match_scalar_evaluators(tmp_path: Path, case: str) -> None:
+    engine = _engine(tmp_path, case)
+    m5 = engine.prepare_m5_features(load_m5_csv(ROOT / "data" / "xauusd_m5_HOLDOUT20.csv").iloc[:8000])
+    if case == "vtm_shock":
+        # Per-bar spreads exercise the spread filter; a few gaps fall back to the configured spread.
+        m5["spread"] = np.where(np.arange(len(m5)) % 97 == 0, np.nan, 0.3 + (np.arange(len(m5)) % 11) * 0.08)
+    evaluate = engine._evaluate_v4_entry_signal if engine.enable_strategy_v4_orb else engine._evaluate_vtm_entry_signal
+    arrays = engine._entry_signal_arrays(m5)
+    assert arrays is not None
+
+    events: set[str] = set()
+    fired = 0
+    for k in range(len(m5)):
+        row = m5.iloc[k]
+        expected = evaluate(row=row, signal_ts=pd.Timestamp(row["timestamp"]))
+        assert engine._entry_signal_at(arrays, k, row) == expected, (k, expected[1])
+        events.add(expected[1])
+        fired += expected[0] != EntrySignal.NONE
+
+    assert fired > 0 and len(events) >= 4, sorted(events)
+    assert int(np.count_nonzero(arrays.signal)) == fired
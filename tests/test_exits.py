@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from xauusd_bot.configuration import load_config
+from xauusd_bot.engine import SimulationEngine
+from xauusd_bot.exits import first_passage_exit, first_passage_exits
+from xauusd_bot.logger import CsvLogger
+
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _bars() -> dict[str, np.ndarray]:
+    return {
+        "open": np.array([100.0, 100.0, 100.5, 101.0, 100.0, 99.0]),
+        "high": np.array([100.4, 100.8, 101.2, 102.5, 100.2, 99.5]),
+        "low": np.array([99.6, 99.8, 100.1, 98.5, 99.0, 98.0]),
+        "close": np.array([100.0, 100.5, 101.0, 100.0, 99.0, 99.2]),
+    }
+
+
+def test_first_passage_prefers_sl_when_both_levels_print_on_one_bar() -> None:
+    b = _bars()
+    out = first_passage_exit(b["high"], b["low"], b["open"], b["close"], start=0, is_long=True, sl=99.0, tp=102.0)
+    assert (out.index, out.reason, out.exit_mid) == (3, "SL", 99.0)
+
+
+def test_first_passage_tp_time_and_end_of_data() -> None:
+    b = _bars()
+    tp = first_passage_exit(b["high"], b["low"], b["open"], b["close"], start=0, is_long=True, sl=97.0, tp=101.1, block=1)
+    assert (tp.index, tp.reason, tp.exit_mid) == (2, "TP", 101.1)
+
+    timed = first_passage_exit(
+        b["high"], b["low"], b["open"], b["close"], start=0, is_long=False, sl=110.0, tp=90.0, time_exit_index=4
+    )
+    assert (timed.index, timed.reason, timed.exit_mid) == (4, "TIME", 100.0)
+
+    end = first_passage_exit(b["high"], b["low"], b["open"], b["close"], start=1, is_long=False, sl=110.0, tp=90.0)
+    assert (end.index, end.reason, end.exit_mid) == (5, "END_OF_DATA", 99.2)
+
+
+def test_first_passage_exits_reprices_batch() -> None:
+    bars = pd.DataFrame(_bars())
+    trades = pd.DataFrame(
+        {"entry_index": [0, 1], "direction": ["LONG", "SHORT"], "sl": [99.0, 103.0], "tp": [102.0, 98.9]}
+    )
+    out = first_passage_exits(bars, trades)
+    assert out["exit_index"].tolist() == [3, 3]
+    assert out["exit_reason"].tolist() == ["SL", "TP"]
+
+
+def test_v4_fast_exit_matches_bar_by_bar(tmp_path: Path) -> None:
+    data = pd.read_csv(ROOT / "data" / "xauusd_m5_HOLDOUT20.csv", nrows=6000)
+    data["timestamp"] = pd.to_datetime(data["timestamp"])
+    outputs = {}
+    for fast in (False, True):
+        cfg = load_config(ROOT / "configs" / "v4_candidates" / "v4a_orb_01.yaml")
+        cfg["progress_every_days"] = 0
+        cfg["max_trades_per_day"] = 3
+        cfg["v4_session_orb"].update(rr=0.5, trade_end="13:00", fast_exit=fast)
+        out_dir = tmp_path / ("fast" if fast else "slow")
+        summary = SimulationEngine(config=cfg, logger=CsvLogger(output_dir=out_dir)).run(data)
+        outputs[fast] = (summary, pd.read_csv(out_dir / "trades.csv"), pd.read_csv(out_dir / "fills.csv"))
+
+    slow_summary, slow_trades, slow_fills = outputs[False]
+    fast_summary, fast_trades, fast_fills = outputs[True]
+    assert slow_summary["closed_trades"] > 0
+    assert {"V4_EXIT_SL", "V4_EXIT_TP", "V4_EXIT_TRADE_WINDOW_END"} <= set(slow_trades["exit_reason"])
+    assert fast_summary["final_equity"] == slow_summary["final_equity"]
+    pd.testing.assert_frame_equal(fast_trades, slow_trades)
+    pd.testing.assert_frame_equal(fast_fills, slow_fills)
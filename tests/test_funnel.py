@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+from xauusd_bot.configuration import load_config
+from xauusd_bot.data_loader import load_m5_csv
+from xauusd_bot.engine import SimulationEngine
+from xauusd_bot.funnel import FUNNEL_FILE, funnel_table, load_funnel
+from xauusd_bot.logger import CsvLogger
+from xauusd_bot.reporting import block_summary
+
+
+ROOT = Path(__file__).resolve().parents[1]
+FUNNEL_TABLES = (
+    "E_blocks.csv",
+    "F_blocks_by_hour_utc.csv",
+    "G_signals_by_hour_utc.csv",
+    "J_signals_state_counts.csv",
+    "O_trades_blocked_by_rule.csv",
+    "P_trades_blocked_by_hour.csv",
+)
+
+
+def _run(tmp_path: Path) -> tuple[Path, dict]:
+    path = tmp_path / "m5.csv"
+    pd.read_csv(ROOT / "data" / "xauusd_m5_HOLDOUT20.csv", nrows=4000).to_csv(path, index=False)
+    cfg = load_config(ROOT / "configs" / "config_v3_AUTO.yaml")
+    cfg["progress_every_days"] = 0
+    run_dir = tmp_path / "run"
+    summary = SimulationEngine(config=cfg, logger=CsvLogger(output_dir=run_dir)).run(load_m5_csv(path))
+    return run_dir, summary
+
+
+def test_counters_match_logged_events_and_trades(tmp_path: Path) -> None:
+    run_dir, summary = _run(tmp_path)
+    funnel = load_funnel(run_dir / FUNNEL_FILE)
+    assert funnel is not None
+    assert summary["funnel_path"] == str(run_dir / FUNNEL_FILE)
+
+    events = pd.read_csv(run_dir / "events.csv")
+    counted = funnel_table(funnel, "events").groupby("event_type")["count"].sum().sort_index()
+    logged = events["event_type"].value_counts().sort_index()
+    pd.testing.assert_series_equal(counted, logged, check_names=False)
+
+    signals = pd.read_csv(run_dir / "signals.csv")
+    assert int(funnel_table(funnel, "signals")["count"].sum()) == len(signals)
+
+    stages = funnel_table(funnel, "stages").groupby("stage")["count"].sum()
+    assert stages["entries"] == int((events["event_type"] == "TRADE_OPEN").sum()) > 0
+    assert stages["opportunities"] >= stages["signals"] >= stages["entries"]
+
+    with_counts = block_summary(events, funnel=funnel)
+    assert int(with_counts["count"].sum()) > 0
+    pd.testing.assert_frame_equal(with_counts, block_summary(events))
+
+
+def test_diagnostics_from_counters_match_csv_scan(tmp_path: Path) -> None:
+    run_dir, _ = _run(tmp_path)
+    cmd = [sys.executable, "scripts/diagnose_run.py", str(run_dir)]
+    tables = {}
+    for source in ("funnel", "csv"):
+        if source == "csv":
+            (run_dir / FUNNEL_FILE).unlink()
+        diag = subprocess.run(cmd, cwd=str(ROOT), capture_output=True, text=True, encoding="utf-8", errors="replace")
+        assert diag.returncode == 0, f"stdout={diag.stdout}\nstderr={diag.stderr}"
+        tables[source] = {name: pd.read_csv(run_dir / "diagnostics" / name) for name in FUNNEL_TABLES}
+        shutil.rmtree(run_dir / "diagnostics")
+
+    for name in FUNNEL_TABLES:
+        pd.testing.assert_frame_equal(tables["funnel"][name], tables["csv"][name], obj=name)
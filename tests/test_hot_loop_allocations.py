@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import gc
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+
+import pandas as pd
+
+from conftest import BARS_PER_DAY
+from xauusd_bot.configuration import load_config
+from xauusd_bot.engine import SimulationEngine
+from xauusd_bot.logger import CsvLogger
+
+
+ROOT = Path(__file__).resolve().parents[1]
+DAYS = 16
+# With a gen-0 threshold of 1 the collector runs whenever tracked objects outnumber those left by the previous
+# collection, so collections per bar count the containers the loop builds and drops. The flat loop needs about 30;
+# building an iloc Series, Timestamps and an M15Context per bar takes it past 80.
+MAX_GEN0_COLLECTIONS_PER_BAR = 45.0
+# Live blocks and bytes the flat loop may keep per bar; leaking even one object per bar exceeds them.
+MAX_RETAINED_BLOCKS_PER_BAR = 0.25
+MAX_RETAINED_BYTES_PER_BAR = 32.0
+
+
+def test_flat_loop_keeps_allocations_bounded_per_bar(tmp_path: Path, random_walk: Callable[..., pd.DataFrame]) -> None:
+    cfg = load_config(ROOT / "configs" / "config_smoke_baseline.yaml")
+    cfg["progress_every_days"] = 0
+    cfg["log_verbosity"] = {"default": "counters"}
+    cfg["v4_session_orb"]["buffer_atr_mult"] = 1000.0  # no breakout ever clears the buffer: the run stays flat
+    engine = SimulationEngine(config=cfg, logger=CsvLogger(output_dir=tmp_path / "out"))
+    data = engine.prepare_m5_features(random_walk(days=DAYS, seed=5, start="2024-03-04 00:05:00"))
+
+    # Day 1 warms up lazily created state; churn and retention are measured from day 2 to the last day boundary.
+    days_seen = 0
+    collections: dict[str, int] = {}
+    snapshots: dict[str, tracemalloc.Snapshot] = {}
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+
+    def sample(_engine: SimulationEngine, _open_ts: pd.Timestamp) -> None:
+        nonlocal days_seen
+        days_seen += 1
+        if days_seen == DAYS:
+            collections["last"] = gc.get_stats()[0]["collections"]
+        if days_seen in (2, DAYS):
+            gc.collect()
+            snapshots["warm" if days_seen == 2 else "last"] = tracemalloc.take_snapshot().filter_traces(ignore)
+        if days_seen == 2:
+            collections["warm"] = gc.get_stats()[0]["collections"]
+        return None
+
+    thresholds = gc.get_threshold()
+    gc.set_threshold(1, *thresholds[1:])
+    tracemalloc.start()
+    try:
+        summary = engine.run(data, stop_check=sample)
+    finally:
+        tracemalloc.stop()
+        gc.set_threshold(*thresholds)
+
+    assert summary["closed_trades"] == 0 and engine.funnel.to_dict()["stages"]
+    assert days_seen == DAYS
+    bars = (DAYS - 2) * BARS_PER_DAY
+    churn = (collections["last"] - collections["warm"]) / bars
+    assert churn <= MAX_GEN0_COLLECTIONS_PER_BAR, churn
+
+    diff = snapshots["last"].compare_to(snapshots["warm"], "filename")
+    assert sum(stat.count_diff for stat in diff) / bars <= MAX_RETAINED_BLOCKS_PER_BAR, diff[:5]
+    assert sum(stat.size_diff for stat in diff) / bars <= MAX_RETAINED_BYTES_PER_BAR, diff[:5]
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+
+ROOT = Path(__file__).resolve().parents[1]
+HEAVY = ("pandas", "numpy", "yaml")
+# Entry point -> (python args, modules that must not be imported, cumulative import budget in seconds).
+# Budgets are several times the measured cost so a slow machine does not flake; the module checks are exact.
+ENTRY_POINTS = {
+    "cli": (["-m", "xauusd_bot", "--help"], HEAVY, 0.5),
+    "watch": (["-m", "xauusd_bot", "watch", "--file", "{signals}", "--once", "--tail", "5"], HEAVY, 0.5),
+    "run_and_tag": (["scripts/run_and_tag.py", "--help"], HEAVY, 0.5),
+    "suite": (["-c", "import xauusd_bot.suite"], ("matplotlib", "PIL", "scipy"), 3.0),
+}
+
+
+def _import_profile(args: list[str]) -> tuple[set[str], float]:
+    """Modules imported by `python -X importtime <args>` and their total cumulative import time in seconds."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=str(ROOT),
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    modules: set[str] = set()
+    total_us = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        modules.add(name.strip().split(".")[0])
+        if len(name) - len(name.lstrip()) == 1:  # top-level import; nested ones are inside its cumulative time
+            total_us += int(cumulative)
+    return modules, total_us / 1e6
+
+
+@pytest.mark.parametrize("entry", sorted(ENTRY_POINTS))
+def test_entry_point_import_budget(entry: str, tmp_path: Path) -> None:
+    signals = tmp_path / "signals.csv"
+    signals.write_text("ts,event_type,payload_json\n2024-01-02 10:00:00,TRADE_OPEN,{}\n", encoding="utf-8")
+    args, forbidden, budget_sec = ENTRY_POINTS[entry]
+    modules, total_sec = _import_profile([a.replace("{signals}", str(signals)) for a in args])
+
+    assert not modules & set(forbidden), f"{entry} imports {sorted(modules & set(forbidden))}"
+    assert total_sec < budget_sec, f"{entry} imports took {total_sec:.3f}s (budget {budget_sec}s)"
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import pandas as pd
 
-from xauusd_bot.indicators import atr_wilder, ema
+from xauusd_bot.indicators import atr_wilder, ema, rsi_wilder
 
 
 def test_ema_uses_sma_initialization() -> None:
@@ -30,3 +30,23 @@ def test_atr_wilder_matches_expected_small_series() -> None:
     assert pd.isna(out.iloc[0])
     assert abs(float(out.iloc[1]) - 2.5) < 1e-9
     assert abs(float(out.iloc[2]) - 2.25) < 1e-9
+
+
+def test_stateful_indicators_continue_across_chunks() -> None:
+    df = pd.DataFrame(
+        {
+            "high": [10.0, 12.0, 13.0, 12.5, 14.0, 13.2, 15.1],
+            "low": [8.0, 9.0, 11.0, 10.4, 12.2, 11.9, 13.0],
+            "close": [9.0, 11.0, 12.0, 11.1, 13.5, 12.4, 14.8],
+        }
+    )
+    ema_state: dict = {}
+    rsi_state: dict = {}
+    atr_state: dict = {}
+    parts = [(0, 2), (2, 3), (3, 7)]
+    ema_parts = [ema(df["close"].iloc[a:b], 3, state=ema_state) for a, b in parts]
+    rsi_parts = [rsi_wilder(df["close"].iloc[a:b], 3, state=rsi_state) for a, b in parts]
+    atr_parts = [atr_wilder(df.iloc[a:b], 3, state=atr_state) for a, b in parts]
+    pd.testing.assert_series_equal(pd.concat(ema_parts), ema(df["close"], 3))
+    pd.testing.assert_series_equal(pd.concat(rsi_parts), rsi_wilder(df["close"], 3))
+    pd.testing.assert_series_equal(pd.concat(atr_parts), atr_wilder(df, 3))
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import json
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+try:
+    from scripts.lib.job_graph import Job, JobGraphRunner
+except ModuleNotFoundError:
+    from lib.job_graph import Job, JobGraphRunner
+
+
+def _py(code: str) -> list[str]:
+    return [sys.executable, "-c", code]
+
+
+def _stamp(path: Path, sleep: float = 0.0) -> list[str]:
+    return _py(f"import time; time.sleep({sleep}); open({str(path)!r}, 'a').write(str(time.time()) + '\\n')")
+
+
+def test_independent_jobs_overlap_and_dependents_wait(tmp_path: Path) -> None:
+    jobs = [
+        Job(name="a", cmd=_stamp(tmp_path / "a", 0.8)),
+        Job(name="b", cmd=_stamp(tmp_path / "b", 0.8)),
+        Job(name="c", cmd=_stamp(tmp_path / "c"), deps=("a", "b")),
+    ]
+    started = time.perf_counter()
+    results = JobGraphRunner(jobs, max_parallel=2).run()
+    elapsed = time.perf_counter() - started
+
+    assert [r.status for r in results.values()] == ["ok", "ok", "ok"]
+    assert elapsed < 2 * 0.8 + 0.5
+    done_a, done_b, done_c = (float((tmp_path / name).read_text()) for name in "abc")
+    assert done_c >= max(done_a, done_b)
+
+
+def test_timeout_retry_and_skip(tmp_path: Path) -> None:
+    jobs = [
+        Job(name="slow", cmd=_py("import time; time.sleep(30)"), timeout_sec=0.5),
+        Job(name="after_slow", cmd=_stamp(tmp_path / "skipped"), deps=("slow",)),
+        Job(name="cleanup", cmd=_stamp(tmp_path / "cleanup"), after=("slow",)),
+        Job(name="flaky", cmd=_py("raise SystemExit(3)"), retries=1, retry_cmd=_py("print('fallback')")),
+    ]
+    results = JobGraphRunner(jobs, max_parallel=4).run()
+
+    assert results["slow"].status == "timeout"
+    assert results["after_slow"].status == "skipped"
+    assert not (tmp_path / "skipped").exists()
+    assert results["cleanup"].status == "ok"
+    assert results["flaky"].status == "ok"
+    assert results["flaky"].attempts == 2
+    assert results["flaky"].stdout.strip() == "fallback"
+
+
+def test_resume_skips_jobs_completed_with_the_same_command(tmp_path: Path) -> None:
+    progress = tmp_path / "progress.jsonl"
+    first = [
+        Job(name="ok", cmd=_stamp(tmp_path / "ok")),
+        Job(name="bad", cmd=_py("raise SystemExit(1)")),
+    ]
+    JobGraphRunner(first, progress_path=progress).run()
+
+    second = [
+        Job(name="ok", cmd=_stamp(tmp_path / "ok")),
+        Job(name="bad", cmd=_stamp(tmp_path / "bad")),
+    ]
+    results = JobGraphRunner(second, progress_path=progress, resume=True).run()
+
+    assert results["ok"].status == "resumed"
+    assert results["bad"].status == "ok"
+    assert len((tmp_path / "ok").read_text().splitlines()) == 1
+    records = [json.loads(line) for line in progress.read_text().splitlines()]
+    assert [(r["job"], r["status"]) for r in records] == [("ok", "ok"), ("bad", "failed"), ("bad", "ok")]
+
+
+def test_resume_reruns_callable_jobs_whose_command_changed(tmp_path: Path) -> None:
+    progress = tmp_path / "progress.jsonl"
+    JobGraphRunner([Job(name="gen", cmd=lambda _: _py("print(['a'])"))], progress_path=progress).run()
+
+    same = JobGraphRunner([Job(name="gen", cmd=lambda _: _py("print(['a'])"))], progress_path=progress, resume=True)
+    assert same.run()["gen"].status == "resumed"
+    changed = [Job(name="gen", cmd=lambda _: _py("print(['a', 'b'])"))]
+    results = JobGraphRunner(changed, progress_path=progress, resume=True).run()
+    assert results["gen"].status == "ok"
+    assert results["gen"].stdout.strip() == "['a', 'b']"
+
+
+def test_graph_validation() -> None:
+    with pytest.raises(ValueError, match="cycle"):
+        JobGraphRunner([Job(name="a", cmd=["x"], deps=("b",)), Job(name="b", cmd=["x"], deps=("a",))])
+    with pytest.raises(ValueError, match="unknown"):
+        JobGraphRunner([Job(name="a", cmd=["x"], after=("missing",))])
+
+
+def test_job_without_heartbeat_is_killed_as_stalled(tmp_path: Path) -> None:
+    beat = tmp_path / "beat"
+    beating = (
+        f"import time, pathlib\n"
+        f"for _ in range(8):\n"
+        f"    pathlib.Path({str(beat)!r}).write_text('x'); time.sleep(0.15)\n"
+    )
+    jobs = [
+        Job(name="quiet", cmd=_py("import time; time.sleep(30)"), heartbeat=tmp_path / "never", stall_sec=0.5),
+        Job(name="beating", cmd=_py(beating), heartbeat=beat, stall_sec=0.5),
+    ]
+    started = time.perf_counter()
+    results = JobGraphRunner(jobs, max_parallel=2).run()
+
+    assert results["quiet"].status == "stalled"
+    assert results["beating"].status == "ok"
+    assert time.perf_counter() - started < 5.0
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import filecmp
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from xauusd_bot.configuration import load_config
+from xauusd_bot.data_loader import load_m5_csv
+from xauusd_bot.engine import SimulationEngine
+from xauusd_bot.indicators import atr_wilder, ema, rsi_wilder
+from xauusd_bot.kernels import KERNEL_ENV, load_kernels, numba_available, resolve_backend
+from xauusd_bot.logger import CsvLogger
+
+
+ROOT = Path(__file__).resolve().parents[1]
+CONFIGS = {
+    "v3": "configs/config_v3_AUTO.yaml",
+    "v4": "configs/v4_candidates/v4a_orb_01.yaml",
+    "vtm": "configs/vtm_candidates/vtm_edge1_baseline.yaml",
+    "vtm_shock": "configs/edge_discovery_candidates3/mr_session_shock_london_t25_tp08.yaml",
+}
+# Backends under test: the uncompiled kernels always, Numba where it is installed.
+BACKENDS = [pytest.param(False, id="interpreted"), pytest.param(True, id="numba")]
+
+
+def _kernels(jit: bool):
+    if jit and not numba_available():
+        pytest.skip("numba is not installed")
+    return load_kernels("numba", jit=jit)
+
+
+def _run(tmp_path: Path, name: str, family: str, kernels) -> Path:
+    cfg = load_config(ROOT / CONFIGS[family])
+    cfg["progress_every_days"] = 0
+    out_dir = tmp_path / name
+    engine = SimulationEngine(config=cfg, logger=CsvLogger(output_dir=out_dir))
+    engine.kernels = kernels
+    data = load_m5_csv(ROOT / "data" / "xauusd_m5_HOLDOUT20.csv").iloc[:6000].reset_index(drop=True)
+    engine.run(data)
+    return out_dir
+
+
+@pytest.mark.parametrize("jit", BACKENDS)
+def test_indicator_kernels_match_python_loops(jit: bool) -> None:
+    kernels = _kernels(jit)
+    rng = np.random.default_rng(7)
+    close = pd.Series(2000.0 + rng.normal(0.0, 1.0, 500).cumsum())
+    close.iloc[[40, 41, 300]] = [np.nan, close.iloc[39], close.iloc[299]]
+    df = pd.DataFrame({"high": close + rng.random(500), "low": close - rng.random(500), "close": close})
+
+    pd.testing.assert_series_equal(ema(close, 20, kernels=kernels), ema(close, 20), check_exact=True)
+    pd.testing.assert_series_equal(rsi_wilder(close, 14, kernels=kernels), rsi_wilder(close, 14), check_exact=True)
+    pd.testing.assert_series_equal(atr_wilder(df, 14, kernels=kernels), atr_wilder(df, 14), check_exact=True)
+
+    state: dict = {}
+    parts = [rsi_wilder(close.iloc[a:b], 14, state=state, kernels=kernels) for a, b in [(0, 9), (9, 200), (200, 500)]]
+    pd.testing.assert_series_equal(pd.concat(parts), rsi_wilder(close, 14), check_exact=True)
+
+
+@pytest.mark.parametrize("jit", BACKENDS)
+@pytest.mark.parametrize("family", sorted(CONFIGS))
+def test_kernel_backend_writes_the_same_run(tmp_path: Path, family: str, jit: bool) -> None:
+    kernels = _kernels(jit)
+    python_dir = _run(tmp_path, "python", family, None)
+    kernel_dir = _run(tmp_path, "kernels", family, kernels)
+
+    trades = pd.read_csv(python_dir / "trades.csv")
+    assert len(trades) > 0
+    files = sorted(p.name for p in python_dir.iterdir())
+    assert files == sorted(p.name for p in kernel_dir.iterdir())
+    for name in files:
+        assert filecmp.cmp(python_dir / name, kernel_dir / name, shallow=False), name
+
+
+def test_backend_selection(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv(KERNEL_ENV, raising=False)
+    assert resolve_backend("python") == "python"
+    assert resolve_backend("auto") == ("numba" if numba_available() else "python")
+    monkeypatch.setenv(KERNEL_ENV, "python")
+    assert resolve_backend("numba") == "python"
+    monkeypatch.setenv(KERNEL_ENV, "fortran")
+    with pytest.raises(ValueError, match="Unknown kernel backend"):
+        resolve_backend("auto")
+    assert load_kernels("python") is None
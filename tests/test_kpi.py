@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import math
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from xauusd_bot.kpi import (
+    KPI_COLUMNS,
+    kpi_records,
+    load_trade_kpis,
+    max_drawdown_r,
+    profit_factor,
+    run_kpis,
+    trade_kpis,
+)
+from xauusd_bot.run_archive import archive_run
+
+
+def _write_trades(run_dir: Path, frame: pd.DataFrame) -> None:
+    run_dir.mkdir(parents=True)
+    frame.to_csv(run_dir / "trades.csv", index=False)
+
+
+def test_grouped_kpis_match_per_run_formulas(tmp_path: Path) -> None:
+    rng = np.random.default_rng(7)
+    run_dirs: dict[str, Path] = {}
+    for i, n in enumerate((1, 25, 80, 300)):
+        run_dir = tmp_path / f"run_{i}"
+        r = rng.normal(0.05, 1.2, n).round(4)
+        if n > 1:
+            r[1] = np.nan
+        entry = pd.date_range("2021-01-03", periods=n, freq="37h", tz="UTC").strftime("%Y-%m-%d %H:%M:%S+00:00")
+        _write_trades(run_dir, pd.DataFrame({"entry_time": entry, "exit_time": entry, "r_multiple": r}))
+        run_dirs[run_dir.name] = run_dir
+    _write_trades(tmp_path / "empty", pd.DataFrame(columns=["entry_time", "r_multiple"]))
+    _write_trades(tmp_path / "no_r", pd.DataFrame({"entry_time": ["2021-01-04"], "pnl": [1.0]}))
+    _write_trades(tmp_path / "bad_r", pd.DataFrame({"entry_time": ["2021-01-04"], "r_multiple": ["x"]}))
+    for name in ("empty", "no_r", "bad_r", "missing"):
+        run_dirs[name] = tmp_path / name
+    archive_run(run_dirs["run_3"])
+
+    records = kpi_records(run_kpis(run_dirs, baseline_trades=200))
+    assert list(records) == list(run_dirs)
+    for name in ("run_0", "run_1", "run_2"):
+        trades = pd.read_csv(run_dirs[name] / "trades.csv")
+        r = pd.to_numeric(trades["r_multiple"], errors="coerce").dropna()
+        ts = pd.to_datetime(trades["entry_time"], utc=True)
+        got = records[name]
+        assert got["trade_status"] == "ok" and got["r_col"] == "r_multiple" and got["ts_col"] == "entry_time"
+        assert got["trades"] == len(r)
+        expected = {
+            "winrate": float((r > 0).mean()),
+            "expectancy_R": float(r.mean()),
+            "median_R": float(r.median()),
+            "sum_R": float(r.sum()),
+            "pf": profit_factor(r),
+            "max_drawdown_r": max_drawdown_r(r),
+            "active_months": float(ts.dt.tz_convert(None).dt.to_period("M").nunique()),
+            "active_years": float(ts.dt.year.nunique()),
+            "retention_vs_baseline_pct": 100.0 * len(r) / 200,
+        }
+        for key, value in expected.items():
+            assert got[key] == pytest.approx(value, rel=1e-12, nan_ok=True), (name, key)
+        in_memory = trade_kpis(trades)
+        assert {k: in_memory[k] for k in KPI_COLUMNS} == {k: got[k] for k in KPI_COLUMNS}
+
+    assert records["run_3"]["trades"] == 299
+    assert [records[n]["trade_status"] for n in ("empty", "no_r", "bad_r", "missing")] == [
+        "empty_trades",
+        "missing_r_col",
+        "invalid_r_col",
+        "missing_trades",
+    ]
+    assert all(records[n]["trades"] == 0 and math.isnan(records[n]["pf"]) for n in ("empty", "no_r", "bad_r"))
+
+    single = load_trade_kpis(run_dirs["run_2"])
+    assert single == {k: v for k, v in records["run_2"].items() if k != "retention_vs_baseline_pct"}
+    with pytest.raises(ValueError, match="No R column"):
+        load_trade_kpis(run_dirs["no_r"], require_r_col=True)
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from xauusd_bot.configuration import load_config
+from xauusd_bot.data_loader import load_m5_csv
+from xauusd_bot.engine import SimulationEngine
+from xauusd_bot.funnel import FUNNEL_FILE, load_funnel
+from xauusd_bot.log_policy import (
+    COUNTERS,
+    FULL,
+    OFF,
+    REPLAY_EVENTS,
+    SAMPLED,
+    LogPolicy,
+    apply_log_verbosity_args,
+    replay_events_complete,
+)
+from xauusd_bot.logger import CsvLogger
+from xauusd_bot.suite import run_backtest_suite
+
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_levels_resolve_exact_then_pattern_then_default() -> None:
+    policy = LogPolicy(
+        {
+            "default": "counters",
+            "sample_every": 3,
+            "events": {"V3_BLOCK_SESSION": "full", "V3_BLOCK_*": "sampled", "SHOCK_DETECTED": "off"},
+        }
+    )
+    assert policy.level("events", "V3_BLOCK_SESSION") == FULL
+    assert policy.level("events", "V3_BLOCK_TREND_ATR_FILTER") == SAMPLED
+    assert policy.level("events", "SHOCK_DETECTED") == OFF
+    assert policy.level("events", "REGIME_TREND_ENTER") == COUNTERS
+    # Rows cost replay depends on stay full unless configured explicitly.
+    assert policy.level("events", "TRADE_OPEN") == FULL
+    assert policy.level("signals", "V3_BLOCK_SESSION") == COUNTERS
+
+    written = [policy.write_row("events", "V3_BLOCK_NO_BREAKOUT", SAMPLED) for _ in range(7)]
+    assert written == [True, False, False, True, False, False, True]
+    assert not policy.write_row("events", "REGIME_TREND_ENTER", COUNTERS)
+
+    with pytest.raises(ValueError, match="log_verbosity.events.X"):
+        LogPolicy({"events": {"X": "verbose"}})
+    with pytest.raises(ValueError, match="sample_every"):
+        LogPolicy({"sample_every": 0})
+
+
+def test_cli_overrides_fold_into_config() -> None:
+    cfg = load_config(ROOT / "configs" / "config_v3_AUTO.yaml")
+    assert cfg["log_verbosity"]["default"] == "full"
+    apply_log_verbosity_args(cfg, ["counters", "TRADE_CLOSE=sampled"], 10)
+    assert cfg["log_verbosity"] == {
+        "default": "counters",
+        "sample_every": 10,
+        "events": {"TRADE_CLOSE": "sampled"},
+        "signals": {"TRADE_CLOSE": "sampled"},
+    }
+    with pytest.raises(ValueError, match="EVENT_TYPE=LEVEL"):
+        apply_log_verbosity_args(cfg, ["=full"], None)
+
+
+def test_counters_mode_keeps_trades_and_counts_but_drops_rows(tmp_path: Path) -> None:
+    path = tmp_path / "m5.csv"
+    pd.read_csv(ROOT / "data" / "xauusd_m5_HOLDOUT20.csv", nrows=4000).to_csv(path, index=False)
+    data = load_m5_csv(path)
+    out = {}
+    for level in ("full", "counters"):
+        cfg = load_config(ROOT / "configs" / "config_v3_AUTO.yaml")
+        cfg["progress_every_days"] = 0
+        cfg["log_verbosity"]["default"] = level
+        SimulationEngine(config=cfg, logger=CsvLogger(output_dir=tmp_path / level)).run(data)
+        out[level] = tmp_path / level
+
+    full_trades = pd.read_csv(out["full"] / "trades.csv")
+    assert len(full_trades) > 0
+    pd.testing.assert_frame_equal(pd.read_csv(out["counters"] / "trades.csv"), full_trades)
+
+    funnels = {level: load_funnel(run_dir / FUNNEL_FILE) for level, run_dir in out.items()}
+    assert funnels["counters"]["log_verbosity"]["default"] == "counters"
+    for name in ("events", "signals", "stages"):
+        assert funnels["counters"][name] == funnels["full"][name]
+
+    events = pd.read_csv(out["counters"] / "events.csv")
+    assert set(events["event_type"]) <= REPLAY_EVENTS
+    assert int((events["event_type"] == "TRADE_OPEN").sum()) == len(full_trades["trade_id"].unique())
+    assert pd.read_csv(out["counters"] / "signals.csv").empty
+
+
+def test_suite_resimulates_costs_when_replay_events_are_thinned(tmp_path: Path) -> None:
+    data = load_m5_csv(ROOT / "data" / "xauusd_m5_HOLDOUT20.csv").iloc[:6000].reset_index(drop=True)
+    for name, entries in (("full", []), ("off", ["*=off"])):
+        cfg = load_config(ROOT / "configs" / "config_smoke_baseline.yaml")
+        cfg["progress_every_days"] = 0
+        # Base costs with a tight gate: some entries blocked at base costs pass in the cheaper "good" scenario.
+        cfg.update(spread_usd=0.41, slippage_usd=0.05, cost_max_sl_frac=0.05)
+        apply_log_verbosity_args(cfg, entries, None)
+        run_backtest_suite(data, cfg, tmp_path / name, output_dir=tmp_path / name)
+
+    assert replay_events_complete({"default": "off"})
+    assert not replay_events_complete({"events": {"COST_FILTER_BLOCK*": "off"}})
+    assert "| resim |" in (tmp_path / "off" / "report.md").read_text(encoding="utf-8")
+    for case in ("cost_base", "cost_bad", "cost_good"):
+        full_trades = pd.read_csv(tmp_path / "full" / case / "trades.csv", parse_dates=["entry_time"])
+        off_trades = pd.read_csv(tmp_path / "off" / case / "trades.csv", parse_dates=["entry_time"])
+        assert len(full_trades) > 0 and len(off_trades) == len(full_trades), case
+        assert off_trades["entry_time"].tolist() == full_trades["entry_time"].tolist(), case
+        assert np.allclose(off_trades["pnl"], full_trades["pnl"], atol=1e-3), case
+        assert np.allclose(off_trades["r_multiple"], full_trades["r_multiple"], atol=1e-3), case
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from xauusd_bot.configuration import load_config
+from xauusd_bot.data_loader import load_m5_csv
+from xauusd_bot.engine import M5_FEATURES, STRATEGY_M5_FEATURES, SimulationEngine
+from xauusd_bot.logger import CsvLogger
+
+
+ROOT = Path(__file__).resolve().parents[1]
+CONFIGS = {
+    "v4": "configs/config_smoke_baseline.yaml",
+    "vtm": "configs/vtm_candidates/vtm_edge1_hold4.yaml",
+    "v3": "configs/config_v3_AUTO.yaml",
+    "baseline": "configs/config.yaml",
+}
+
+
+def _engine(tmp_path: Path, family: str, **overrides: object) -> SimulationEngine:
+    cfg = load_config(ROOT / CONFIGS[family])
+    cfg.update(overrides)
+    return SimulationEngine(config=cfg, logger=CsvLogger(output_dir=tmp_path / "out"))
+
+
+def test_registry_dependencies_are_declared() -> None:
+    declared = set(M5_FEATURES)
+    required = set().union(*(feature.requires for feature in M5_FEATURES.values()))
+    read = set().union(*STRATEGY_M5_FEATURES.values())
+    assert required <= declared and read <= declared
+    assert read | required == declared, "every registered column is read by some strategy"
+
+
+@pytest.mark.parametrize("family", sorted(CONFIGS))
+def test_prepare_m5_builds_only_the_enabled_family_columns(tmp_path: Path, family: str) -> None:
+    data = load_m5_csv(ROOT / "data" / "xauusd_m5_HOLDOUT20.csv").iloc[:3000]
+    engine = _engine(tmp_path, family)
+    prepared = engine._prepare_m5(data)
+
+    expected = set(STRATEGY_M5_FEATURES["core"]) | set(STRATEGY_M5_FEATURES[family])
+    for name in list(expected):
+        expected |= set(M5_FEATURES[name].requires)
+    assert set(prepared.columns) - set(data.columns) == expected == set(engine.m5_features())
+
+    # Columns match the ones built by a family that shares them (same params, different closure).
+    other = _engine(tmp_path, "baseline" if family != "baseline" else "v4")._prepare_m5(data)
+    for name in expected & set(other.columns):
+        pd.testing.assert_series_equal(prepared[name], other[name], obj=name)
+
+
+def test_feature_key_ignores_params_of_disabled_families(tmp_path: Path) -> None:
+    key = _engine(tmp_path, "v4").m5_feature_key()
+    assert _engine(tmp_path, "v4", bos_lookback=9, v3_rsi_period=3).m5_feature_key() == key
+    assert _engine(tmp_path, "v4", atr_period=9).m5_feature_key() != key
+    assert _engine(tmp_path, "vtm").m5_feature_key() != key
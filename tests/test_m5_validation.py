@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from xauusd_bot.binary_dataset import is_binary_dataset, load_binary_dataset
+from xauusd_bot.data_loader import iter_m5_csv, load_m5_csv
+from xauusd_bot.m5_validation import normalize_m5_stream
+
+
+def _messy_csv(path: Path) -> None:
+    rows = [
+        ("2024-01-05 21:45:00", 2000.0, 2000.5, 1999.5, 2000.2),
+        ("2024-01-05 21:50:00", 2000.2, 2000.6, 2000.0, 2000.4),
+        ("2024-01-05 21:50:00", 2000.2, 2000.6, 2000.0, 2000.45),  # duplicate, the last row wins
+        ("2024-01-05 21:55:00", 2000.4, 2000.7, 2000.1, 2000.3),
+        ("2024-01-05 21:40:00", 2000.0, 2000.5, 1999.5, 2000.2),  # out of order, sorted into place
+        ("not a date", 2000.0, 2000.5, 1999.5, 2000.2),
+        ("2024-01-07 23:00:00", "n/a", 2001.0, 2000.0, 2000.5),  # non-numeric open
+        ("2024-01-07 23:05:00", 2000.5, 2001.0, 2000.0, 2000.8),  # weekend gap
+        ("2024-01-07 23:10:00", 2000.8, 2000.7, 2000.2, 2000.9),  # high below close
+        ("2024-01-07 23:20:00", 2000.9, 2001.2, 2000.6, 2001.0),
+    ]
+    pd.DataFrame(rows, columns=["Time", "Open", "High", "Low", "Close"]).to_csv(path, index=False)
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 3, 1000])
+def test_streaming_report_is_chunk_size_independent(tmp_path: Path, chunk_rows: int) -> None:
+    src = tmp_path / "messy.csv"
+    _messy_csv(src)
+
+    report = normalize_m5_stream(src, chunk_rows=chunk_rows)
+
+    assert report.rows_read == 10
+    assert report.rows_written == 7
+    assert report.nat_timestamps == 1
+    assert report.non_numeric_ohlc == 1
+    assert report.duplicates == 1
+    assert report.out_of_order == 1
+    assert report.ohlc_violations == 1
+    assert report.dominant_delta_minutes == 5.0
+    assert report.gap_histogram["=5m"] == 4
+    assert report.gap_histogram["5m-30m"] == 1
+    assert report.gap_histogram["1d-3d"] == 1
+    assert report.gaps_over(60) == 1
+    assert report.largest_gaps[0][:2] == (pd.Timestamp("2024-01-05 21:55:00"), pd.Timestamp("2024-01-07 23:05:00"))
+    assert report.unique_days == 2
+
+
+def test_normalized_output_round_trips_through_loader(tmp_path: Path) -> None:
+    src = tmp_path / "messy.csv"
+    _messy_csv(src)
+    csv_out = tmp_path / "clean.csv"
+    bin_out = tmp_path / "clean_m5"
+
+    normalize_m5_stream(src, csv_out, chunk_rows=2)
+    normalize_m5_stream(src, bin_out, chunk_rows=2)
+
+    assert is_binary_dataset(bin_out)
+    from_csv = load_m5_csv(csv_out)
+    from_bin = load_m5_csv(bin_out)
+    assert len(from_bin) == 7
+    assert from_bin["timestamp"].is_monotonic_increasing
+    assert from_bin["timestamp"].iloc[0] == pd.Timestamp("2024-01-05 21:40:00")
+    assert from_bin.loc[from_bin["timestamp"] == pd.Timestamp("2024-01-05 21:50:00"), "close"].tolist() == [2000.45]
+    pd.testing.assert_frame_equal(
+        from_csv[["open", "high", "low", "close", "volume"]],
+        from_bin[["open", "high", "low", "close", "volume"]],
+        check_dtype=False,
+    )
+    assert list(from_csv["timestamp"].astype("datetime64[ns]")) == list(from_bin["timestamp"])
+
+    chunks = list(iter_m5_csv(bin_out, chunk_rows=4))
+    assert [len(chunk) for chunk in chunks] == [4, 3]
+    assert load_binary_dataset(bin_out, start=3, stop=4)["timestamp"].iloc[0] == pd.Timestamp("2024-01-05 21:55:00")
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 2, 1000])
+def test_newest_first_export_is_sorted_not_dropped(tmp_path: Path, chunk_rows: int) -> None:
+    ts = pd.date_range("2024-01-02", periods=2000, freq="5min")
+    close = 2000.0 + (pd.Series(range(2000)) % 7).to_numpy()
+    bars = pd.DataFrame({"timestamp": ts, "open": close, "high": close + 1.0, "low": close - 1.0, "close": close})
+    src = tmp_path / "newest_first.csv"
+    bars.iloc[::-1].to_csv(src, index=False)
+    out = tmp_path / "sorted.csv"
+
+    report = normalize_m5_stream(src, out, chunk_rows=chunk_rows)
+
+    assert report.rows_written == 2000
+    assert report.out_of_order == 1999
+    assert report.duplicates == 0
+    assert report.gap_histogram["=5m"] == 1999
+    loaded = load_m5_csv(out)
+    assert list(loaded["timestamp"].astype("datetime64[ns]")) == list(ts)
+    assert loaded["close"].tolist() == close.tolist()
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from xauusd_bot.configuration import load_config
+from xauusd_bot.data_loader import load_m5_csv
+from xauusd_bot.engine import SimulationEngine
+from xauusd_bot.exits import first_passage_exit, first_true_index
+from xauusd_bot.logger import CsvLogger
+from xauusd_bot.null_model import (
+    NullBars,
+    bracket_exit_mid,
+    entry_indices,
+    null_bars,
+    null_percentile,
+    null_templates,
+    simulate_null,
+)
+
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _bars(n: int, seed: int) -> NullBars:
+    rng = np.random.default_rng(seed)
+    close = 2000.0 + np.cumsum(rng.normal(0.0, 1.0, n))
+    open_ = np.r_[close[0], close[:-1]]
+    return NullBars(
+        open=open_,
+        high=np.maximum(open_, close) + rng.random(n),
+        low=np.minimum(open_, close) - rng.random(n),
+        close=close,
+        atr=np.full(n, 1.5),
+        time_exit=np.arange(n) + rng.integers(1, 40, n),
+        hour=(np.arange(n) // 12) % 24,
+    )
+
+
+def test_vectorized_brackets_match_first_passage_exit() -> None:
+    bars = _bars(3000, 3)
+    rng = np.random.default_rng(4)
+    entry = rng.integers(0, 3000, 4000)
+    is_long = rng.random(4000) < 0.5
+    side = np.where(is_long, 1.0, -1.0)
+    sl = bars.open[entry] - side * rng.uniform(0.5, 6.0, 4000)
+    tp = bars.open[entry] + side * np.where(rng.random(4000) < 0.1, np.inf, rng.uniform(0.5, 6.0, 4000))
+
+    got = bracket_exit_mid(bars, entry, is_long, sl, tp)
+    for i in range(entry.size):
+        ref = first_passage_exit(
+            bars.high, bars.low, bars.open, bars.close, int(entry[i]), bool(is_long[i]), sl[i], tp[i],
+            time_exit_index=int(bars.time_exit[entry[i]]),
+        )
+        assert got[i] == ref.exit_mid, i
+
+
+def test_null_distribution_is_seeded_per_batch_and_ranks_the_candidate() -> None:
+    bars = _bars(5000, 7)
+    trades = pd.DataFrame(
+        {
+            "entry_mid": bars.open[[100, 700, 1500]],
+            "sl": bars.open[[100, 700, 1500]] - 3.0,
+            "tp": bars.open[[100, 700, 1500]] + [4.5, np.nan, 6.0],
+            "entry_price": bars.open[[100, 700, 1500]] + 0.2,
+            "exit_price": [1.0, 2.0, 3.0],
+            "exit_mid": [1.1, 2.1, 3.1],
+        }
+    )
+    templates = null_templates(bars, trades, np.array([100, 700, -1]))
+    assert len(templates) == 2 and np.isinf(templates.tp_atr[1])
+    np.testing.assert_allclose(templates.sl_atr, 2.0)
+    np.testing.assert_allclose(templates.cost, 0.3)
+
+    sequential = simulate_null(bars, templates, 900, seed=5, batch=200)
+    pooled = simulate_null(bars, templates, 900, seed=5, batch=200, workers=2)
+    assert sequential.shape == (900,) and (sequential == pooled).all()
+    assert not (sequential == simulate_null(bars, templates, 900, seed=6, batch=200)).all()
+
+    assert null_percentile(1e9, sequential) == (100.0, 1 / 901) and np.isnan(null_percentile(np.nan, sequential)[0])
+    percentile, p_value = null_percentile(float(np.median(sequential)), sequential)
+    assert 40.0 <= percentile <= 60.0 and 0.4 <= p_value <= 0.6
+
+
+def test_v4_null_entries_exit_at_the_trade_window_close(tmp_path: Path) -> None:
+    cfg = load_config(ROOT / "configs" / "config_smoke_baseline.yaml")
+    cfg["progress_every_days"] = 0
+    logger = CsvLogger(output_dir=tmp_path / "out")
+    engine = SimulationEngine(config=cfg, logger=logger)
+    m5 = engine.prepare_m5_features(load_m5_csv(ROOT / "data" / "xauusd_m5_HOLDOUT20.csv").iloc[:6000])
+    engine.run(m5)
+    trades = pd.read_csv(logger.trades_path)
+
+    bars = null_bars(engine, m5, hold_bars=10)
+    open_ts = m5["timestamp"] - engine.bar_delta
+    minute = (open_ts.dt.hour * 60 + open_ts.dt.minute).to_numpy()
+    outside = ~engine._window_mask(minute, [(engine.v4_trade_start, engine.v4_trade_end)])
+    for i in range(0, len(m5), 97):
+        window_end = first_true_index(outside, i)
+        assert bars.time_exit[i] == (len(m5) + 1 if window_end is None else window_end + 1)
+
+    entry = entry_indices(m5, trades["entry_time"])
+    assert len(trades) > 0 and (entry >= 0).all()
+    assert (m5["open"].to_numpy()[entry] == trades["entry_mid"].to_numpy()).all()
+    templates = null_templates(bars, trades, entry)
+    assert len(templates) == len(trades)
+    assert set(templates.hour) <= set(bars.hour[entry])
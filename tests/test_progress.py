@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import os
+from collections.abc import Callable
+from pathlib import Path
+
+import pandas as pd
+
+from xauusd_bot.configuration import load_config
+from xauusd_bot.engine import SimulationEngine
+from xauusd_bot.logger import CsvLogger
+from xauusd_bot.progress import ProgressStream, read_progress
+
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_engine_streams_phase_progress_and_summary_records(
+    tmp_path: Path, random_walk: Callable[..., pd.DataFrame]
+) -> None:
+    data = random_walk(days=3, seed=5)
+    cfg = load_config(ROOT / "configs" / "config_smoke_baseline.yaml")
+    cfg["progress_every_days"] = 0
+    path = tmp_path / "progress.jsonl"
+    with ProgressStream(path, every_sec=0.0, run_id="r1") as progress:
+        engine = SimulationEngine(config=cfg, logger=CsvLogger(tmp_path / "out"), progress=progress)
+        summary = engine.run(data)
+        progress.summary("ok", closed_trades=summary["closed_trades"])
+    with path.open("a", encoding="utf-8") as f:
+        f.write('{"v": 1, "record": "prog')  # a torn trailing line is skipped
+
+    records = read_progress(path)
+    kinds = [rec["record"] for rec in records]
+    assert kinds[0] == "phase" and kinds[-2:] == ["phase_end", "summary"]
+    assert {rec["run_id"] for rec in records} == {"r1"}
+    ticks = [rec for rec in records if rec["record"] == "progress"]
+    # every_sec=0 emits on every bar.
+    assert [rec["bars_done"] for rec in ticks] == list(range(1, len(data) + 1))
+    assert ticks[-1]["sim_pct"] == 100.0 and ticks[-1]["eta_sec"] == 0.0
+    assert all(rec["phase"] == "full" and rec["bars_total"] == len(data) for rec in ticks)
+    end = records[-2]
+    assert end["bars_done"] == len(data)
+    assert end["trades_closed"] == summary["closed_trades"] == records[-1]["closed_trades"]
+    assert end["equity"] == summary["final_equity"]
+    assert end["bars_per_sec"] > 0
+
+
+def test_stream_writes_to_an_inherited_file_descriptor(tmp_path: Path) -> None:
+    path = tmp_path / "fd.jsonl"
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT)
+    try:
+        with ProgressStream(f"fd:{fd}", run_id="r2") as progress:
+            progress.summary("failed", error="boom")
+        os.write(fd, b"")  # the stream leaves the descriptor open for its owner
+    finally:
+        os.close(fd)
+    (record,) = read_progress(path)
+    assert (record["record"], record["status"], record["error"]) == ("summary", "failed", "boom")
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from xauusd_bot.reporting import (
+    build_monthly_metrics,
+    build_yearly_metrics,
+    compute_global_metrics,
+    compute_metrics_bundle,
+    equity_curve_from_trades,
+)
+
+
+def _trades(n: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    exit_time = pd.Timestamp("2021-11-20") + pd.to_timedelta(rng.integers(0, 2 * 365 * 288, n) * 5, unit="min")
+    trades = pd.DataFrame(
+        {
+            "trade_id": np.arange(n),
+            "exit_time": exit_time.astype(str),
+            "pnl": rng.normal(0.0, 60.0, n) * rng.random(n) ** 2,
+            "r_multiple": rng.normal(0.0, 1.0, n),
+            "mae_r": rng.random(n),
+            "mfe_r": rng.random(n),
+        }
+    )
+    trades.loc[3, "exit_time"] = "not a time"
+    trades.loc[4, "pnl"] = np.inf
+    return trades
+
+
+def _reference_periods(
+    trades: pd.DataFrame, bounds: list[tuple[pd.Timestamp, pd.Timestamp]], start_eq: float
+) -> list[dict[str, Any]]:
+    """Per-period filter over the whole frame, as the metrics were computed before the single-pass rewrite."""
+    df = trades.assign(exit_time=pd.to_datetime(trades["exit_time"], errors="coerce"))
+    rows = []
+    running_eq = start_eq
+    for lo, hi in bounds:
+        sub = df[(df["exit_time"] >= lo) & (df["exit_time"] <= hi)]
+        pnl = float(sub["pnl"].sum()) if not sub.empty else 0.0
+        dd = 0.0
+        if not sub.empty:
+            equity = equity_curve_from_trades(sub, running_eq)["equity"]
+            peak = equity.cummax()
+            dd = float(((peak - equity) / peak).fillna(0.0).max())
+        rows.append({"pnl": pnl, "trades": len(sub), "max_drawdown": dd, "equity_end": running_eq + pnl})
+        running_eq += pnl
+    return rows
+
+
+@pytest.mark.parametrize("seed", [1, 2])
+def test_period_metrics_match_per_period_filtering(seed: int) -> None:
+    trades = _trades(600, seed)
+    start, end = pd.Timestamp("2022-01-10"), pd.Timestamp("2023-08-31 23:55")
+
+    monthly = build_monthly_metrics(trades, 10_000.0, start, end)
+    months = pd.period_range(start.to_period("M"), end.to_period("M"), freq="M")
+    expected = _reference_periods(trades, list(zip(months.start_time, months.end_time)), 10_000.0)
+    assert monthly["month"].tolist() == [str(m) for m in months]
+    for column in ("pnl", "trades", "max_drawdown", "equity_end"):
+        assert monthly[column].tolist() == [row[column] for row in expected], column
+    assert monthly["equity_start"].iloc[1:].tolist() == monthly["equity_end"].iloc[:-1].tolist()
+
+    yearly = build_yearly_metrics(trades, 10_000.0, start, end)
+    years = [(pd.Timestamp(f"{y}-01-01"), pd.Timestamp(f"{y}-12-31 23:59:59")) for y in (2022, 2023)]
+    expected = _reference_periods(trades, years, 10_000.0)
+    for column in ("pnl", "trades", "max_drawdown", "equity_end"):
+        assert yearly[column].tolist() == [row[column] for row in expected], column
+
+
+def test_bundle_shares_one_ordering_with_the_standalone_builders() -> None:
+    trades = _trades(300, 5)
+    start, end = pd.Timestamp("2021-11-01"), pd.Timestamp("2023-12-31")
+    bundle = compute_metrics_bundle(trades, 5_000.0, start, end)
+
+    assert str(bundle.global_metrics) == str(compute_global_metrics(trades, 5_000.0, start, end))
+    pd.testing.assert_frame_equal(bundle.monthly, build_monthly_metrics(trades, 5_000.0, start, end), check_exact=True)
+    pd.testing.assert_frame_equal(bundle.yearly, build_yearly_metrics(trades, 5_000.0, start, end), check_exact=True)
+    assert bundle.monthly["trades"].sum() == bundle.global_metrics["trades"] - 1  # the unparseable exit time
+
+    empty = compute_metrics_bundle(trades.iloc[:0], 5_000.0, start, end)
+    assert empty.global_metrics["trades"] == 0 and (empty.monthly["equity_end"] == 5_000.0).all()
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_rolling_holdout_runs_windows_in_process(tmp_path: Path) -> None:
+    data_path = tmp_path / "m5.csv"
+    ts = pd.date_range("2024-03-04 00:00:00", periods=1440, freq="5min")
+    close = pd.Series(range(len(ts)), dtype="float64").mul(0.01).add(2050.0)
+    pd.DataFrame(
+        {
+            "timestamp": ts,
+            "open": close.shift(1).fillna(close.iloc[0]),
+            "high": close + 0.1,
+            "low": close - 0.1,
+            "close": close,
+            "volume": 100.0,
+        }
+    ).to_csv(data_path, index=False)
+    runs_root = tmp_path / "runs"
+    out_dir = tmp_path / "rolling"
+
+    proc = subprocess.run(
+        [
+            sys.executable,
+            "scripts/rolling_holdout_eval.py",
+            "--data",
+            str(data_path),
+            "--config",
+            "configs/config_smoke_baseline.yaml",
+            "--windows",
+            "0.0:0.5,0.5:1.0",
+            "--runs-root",
+            str(runs_root),
+            "--out-dir",
+            str(out_dir),
+            "--report",
+            str(tmp_path / "ROLLING.md"),
+            "--resamples",
+            "50",
+            "--workers",
+            "2",
+        ],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    assert proc.returncode == 0, proc.stderr
+
+    summary = json.loads((out_dir / "rolling_holdout_summary.json").read_text(encoding="utf-8"))
+    assert summary["windows_ok"] == 2
+    runs = pd.read_csv(out_dir / "rolling_holdout_runs.csv", dtype={"run_id": str})
+    assert runs["run_id"].nunique() == 2
+    for _, row in runs.iterrows():
+        run_dir = runs_root / row["run_id"]
+        for name in ("trades.csv", "events.csv", "report.md", "config_used.yaml", "diagnostics/BOOT_expectancy_ci.csv"):
+            assert (run_dir / name).exists(), name
+        meta = json.loads((run_dir / "run_meta.json").read_text(encoding="utf-8"))
+        assert meta["data_rows"] == [int(v) for v in row["data_rows"].split(":")]
+
+        # Diagnostics built from the in-memory suite tables match a run of diagnose_run.py over the written CSVs.
+        in_memory = {p.name: p.read_bytes() for p in (run_dir / "diagnostics").glob("*.csv")}
+        diag = subprocess.run([sys.executable, "scripts/diagnose_run.py", str(run_dir)], cwd=ROOT, capture_output=True)
+        assert diag.returncode == 0, diag.stderr
+        from_disk = {p.name: p.read_bytes() for p in (run_dir / "diagnostics").glob("*.csv")}
+        assert len(in_memory) > 1 and in_memory == from_disk
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["ROLLING.md", "m5.csv", "rolling", "runs"]
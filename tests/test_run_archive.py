@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+from xauusd_bot.configuration import load_config
+from xauusd_bot.data_loader import load_m5_csv
+from xauusd_bot.engine import SimulationEngine
+from xauusd_bot.logger import CsvLogger
+from xauusd_bot.run_archive import (
+    RunArchive,
+    archive_path,
+    archive_run,
+    extract_run,
+    iter_runs,
+    read_run_csv,
+    run_exists,
+    run_file_exists,
+)
+
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _run(tmp_path: Path) -> Path:
+    path = tmp_path / "m5.csv"
+    pd.read_csv(ROOT / "data" / "xauusd_m5_HOLDOUT20.csv", nrows=4000).to_csv(path, index=False)
+    cfg = load_config(ROOT / "configs" / "config_v3_AUTO.yaml")
+    cfg["progress_every_days"] = 0
+    run_dir = tmp_path / "runs" / "20260101_000000"
+    SimulationEngine(config=cfg, logger=CsvLogger(output_dir=run_dir)).run(load_m5_csv(path))
+    (run_dir / "run_meta.json").write_text('{"run_id": "20260101_000000"}', encoding="utf-8")
+    return run_dir
+
+
+def test_archive_round_trips_tables_and_reads_columns(tmp_path: Path) -> None:
+    run_dir = _run(tmp_path)
+    original = shutil.copytree(run_dir, tmp_path / "original")
+    archive = archive_run(run_dir)
+
+    assert archive == archive_path(run_dir) and not run_dir.exists()
+    assert run_exists(run_dir) and iter_runs(run_dir.parent) == [run_dir]
+    assert run_file_exists(run_dir / "events.csv") and not run_file_exists(run_dir / "nope.csv")
+    with RunArchive(archive) as run:
+        assert run.files["trades.csv"]["kind"] == "table"
+        assert run.files["run_meta.json"]["kind"] == "blob"
+        for name in ("trades.csv", "events.csv", "signals.csv", "fills.csv"):
+            pd.testing.assert_frame_equal(run.read_csv(name), pd.read_csv(original / name), obj=name)
+
+    cols = ["event_type", "details_json"]
+    pd.testing.assert_frame_equal(
+        read_run_csv(run_dir / "events.csv", usecols=cols), pd.read_csv(original / "events.csv", usecols=cols)
+    )
+    options = [
+        {"parse_dates": ["timestamp"]},
+        {"index_col": 0},
+        {"usecols": ["timestamp", "event_type"], "index_col": "timestamp", "parse_dates": True},
+        {"dtype": {"event_type": "category"}, "converters": {"details_json": len}, "nrows": 25},
+        {"usecols": [0, 1]},
+    ]
+    for kwargs in options:
+        pd.testing.assert_frame_equal(
+            read_run_csv(run_dir / "events.csv", **kwargs), pd.read_csv(original / "events.csv", **kwargs), obj=kwargs
+        )
+
+    restored = extract_run(archive, tmp_path / "restored")
+    for path in original.rglob("*"):
+        if path.is_file() and path.suffix != ".csv":
+            assert (restored / path.relative_to(original)).read_bytes() == path.read_bytes()
+    pd.testing.assert_frame_equal(pd.read_csv(restored / "events.csv"), pd.read_csv(original / "events.csv"))
+
+
+def test_diagnose_reads_archived_run(tmp_path: Path) -> None:
+    run_dir = _run(tmp_path)
+    original = shutil.copytree(run_dir, tmp_path / "original")
+    archive = archive_run(run_dir)
+
+    outputs = {}
+    for target in (original, archive):
+        cmd = [sys.executable, "scripts/diagnose_run.py", str(target)]
+        diag = subprocess.run(cmd, cwd=str(ROOT), capture_output=True, text=True, encoding="utf-8", errors="replace")
+        assert diag.returncode == 0, f"stdout={diag.stdout}\nstderr={diag.stderr}"
+        out_dir = (original if target == original else run_dir) / "diagnostics"
+        outputs[target] = {p.name: p.read_bytes() for p in out_dir.glob("*.csv")}
+
+    assert outputs[archive] and outputs[archive] == outputs[original]
+
+    # Re-archiving folds the new diagnostics into the existing archive.
+    archive_run(run_dir)
+    with RunArchive(archive) as run:
+        assert run.has("diagnostics/E_blocks.csv") and run.has("trades.csv")
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import multiprocessing
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from xauusd_bot.configuration import load_config
+from xauusd_bot.engine import SimulationEngine
+from xauusd_bot.logger import CsvLogger
+from xauusd_bot.shared_dataset import SharedDataset, SharedDatasetSpec, attach_dataset
+
+
+ROOT = Path(__file__).resolve().parents[1]
+CONFIG = ROOT / "configs" / "config_smoke_baseline.yaml"
+
+
+def _engine(out_dir: Path) -> SimulationEngine:
+    cfg = load_config(CONFIG)
+    cfg["progress_every_days"] = 0
+    return SimulationEngine(config=cfg, logger=CsvLogger(out_dir))
+
+
+def _worker_run(spec: SharedDatasetSpec, out_dir: str) -> tuple[float, int]:
+    attached = attach_dataset(spec)
+    frame = attached.frame()
+    engine = _engine(Path(out_dir))
+    assert engine._prepare_m5(frame) is frame
+    summary = engine.run(frame)
+    return float(frame["close"].sum()), int(summary["closed_trades"])
+
+
+def test_attached_views_share_memory_and_reuse_prepared_features(
+    tmp_path: Path, random_walk: Callable[..., pd.DataFrame]
+) -> None:
+    data = random_walk(days=4, seed=11)
+    prepared = _engine(tmp_path / "prep").prepare_m5_features(data)
+
+    with SharedDataset(prepared) as shared:
+        attached = attach_dataset(shared.spec)
+        frame = attached.frame()
+        assert list(frame.columns) == list(prepared.columns)
+        assert not frame["close"].to_numpy().flags.writeable
+        assert np.shares_memory(frame["close"].to_numpy(), attached.arrays["close"])
+        assert frame["timestamp"].equals(prepared["timestamp"])
+
+        # A config with different M5 feature params rebuilds the features from the shared OHLCV.
+        cfg = load_config(CONFIG)
+        cfg["v4_session_orb"]["atr_period"] = 9
+        other = SimulationEngine(config=cfg, logger=CsvLogger(tmp_path / "other"))
+        rebuilt = other._prepare_m5(frame)
+        assert rebuilt is not frame
+        assert "m5_features" not in rebuilt.attrs
+
+        _engine(tmp_path / "shared").run(frame)
+        del frame
+        attached.close()
+    _engine(tmp_path / "plain").run(data)
+
+    shared_trades = pd.read_csv(tmp_path / "shared" / "trades.csv")
+    plain_trades = pd.read_csv(tmp_path / "plain" / "trades.csv")
+    assert len(plain_trades) > 0
+    pd.testing.assert_frame_equal(shared_trades, plain_trades)
+
+
+def test_spawned_workers_attach_to_one_published_copy(tmp_path: Path, random_walk: Callable[..., pd.DataFrame]) -> None:
+    data = random_walk(days=4, seed=11)
+    prepared = _engine(tmp_path / "prep").prepare_m5_features(data)
+    expected_trades = int(_engine(tmp_path / "plain").run(data)["closed_trades"])
+
+    with SharedDataset(prepared) as shared:
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=2, mp_context=ctx) as pool:
+            outs = list(pool.map(_worker_run, [shared.spec] * 2, [str(tmp_path / f"w{i}") for i in range(2)]))
+
+    assert outs == [(float(data["close"].sum()), expected_trades)] * 2
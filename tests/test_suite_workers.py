@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from xauusd_bot.configuration import load_config
+from xauusd_bot.data_loader import load_m5_csv
+from xauusd_bot.progress import ProgressStream, read_progress
+from xauusd_bot.suite import run_backtest_suite
+
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _suite(tmp_path: Path, name: str, workers: int) -> Path:
+    data = load_m5_csv(ROOT / "data" / "xauusd_m5_HOLDOUT20.csv").iloc[:6000].reset_index(drop=True)
+    run_dir = tmp_path / name
+    cfg = load_config(ROOT / "configs" / "config_smoke_baseline.yaml")
+    cfg["progress_every_days"] = 0
+    with ProgressStream(tmp_path / f"{name}.jsonl") as progress:
+        run_backtest_suite(data, cfg, run_dir, output_dir=run_dir, progress=progress, workers=workers)
+    return run_dir
+
+
+def test_pooled_scenarios_write_the_same_run(tmp_path: Path) -> None:
+    sequential = _suite(tmp_path, "seq", workers=1)
+    pooled = _suite(tmp_path, "pool", workers=3)
+
+    files = sorted(p.relative_to(sequential) for p in sequential.rglob("*") if p.is_file())
+    assert files == sorted(p.relative_to(pooled) for p in pooled.rglob("*") if p.is_file())
+    assert any(part.parts[0] == "sensitivity" for part in files)
+    for rel in files:
+        assert (sequential / rel).read_bytes() == (pooled / rel).read_bytes(), rel
+
+    seq_phases, pool_phases = (
+        [r["phase"] for r in read_progress(tmp_path / f"{name}.jsonl") if r["record"] == "phase_end"]
+        for name in ("seq", "pool")
+    )
+    assert seq_phases[:2] == ["full", "year_test"] and sorted(seq_phases) == sorted(pool_phases)
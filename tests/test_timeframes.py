@@ -23,3 +23,48 @@ def test_resample_m5_to_m15_and_h1_counts() -> None:
 
     assert len(m15) == 8
     assert len(h1) == 2
+
+
+def _pandas_resample(df: pd.DataFrame, rule: str, offset: str | None = None) -> pd.DataFrame:
+    agg = {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}
+    kwargs = {"offset": offset, "origin": "epoch"} if offset else {}
+    return (
+        df.set_index("timestamp")
+        .resample(rule, label="right", closed="right", **kwargs)
+        .agg(agg)
+        .dropna(subset=["open", "high", "low", "close"])
+        .reset_index()
+    )
+
+
+def _weekend_frame() -> pd.DataFrame:
+    friday = pd.date_range("2026-01-02 18:05:00", "2026-01-02 22:00:00", freq="5min")
+    sunday = pd.date_range("2026-01-04 23:05:00", "2026-01-05 03:00:00", freq="5min")
+    timestamps = friday.append(sunday)
+    base = pd.Series(range(len(timestamps)), dtype="float64")
+    return pd.DataFrame(
+        {
+            "timestamp": timestamps,
+            "open": 100.0 + base,
+            "high": 101.0 + base + (base % 3),
+            "low": 99.0 + base - (base % 4),
+            "close": 100.5 + base,
+            "volume": (base % 7).astype("int64"),
+        }
+    )
+
+
+def test_resample_matches_pandas_semantics_across_weekend_gap() -> None:
+    df = _weekend_frame()
+    for rule, pandas_rule in (("M15", "15min"), ("M30", "30min"), ("H1", "1h"), ("H4", "4h"), ("D1", "24h")):
+        pd.testing.assert_frame_equal(resample_from_m5(df, rule), _pandas_resample(df, pandas_rule))
+
+
+def test_session_anchored_daily_bars_and_gap_info() -> None:
+    df = _weekend_frame()
+    d1 = resample_from_m5(df, "D1", anchor="22:00", gap_info=True)
+    expected = _pandas_resample(df, "24h", offset="22h")
+    pd.testing.assert_frame_equal(d1.drop(columns=["m5_bars", "missing_before"]), expected)
+    assert d1["timestamp"].tolist() == [pd.Timestamp("2026-01-02 22:00:00"), pd.Timestamp("2026-01-05 22:00:00")]
+    assert d1["m5_bars"].tolist() == [48, 48]
+    assert d1["missing_before"].tolist() == [0, 2]
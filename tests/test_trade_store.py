@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from xauusd_bot.configuration import load_config
+from xauusd_bot.data_loader import load_m5_csv
+from xauusd_bot.engine import SimulationEngine
+from xauusd_bot.logger import CsvLogger
+from xauusd_bot.reporting import equity_curve_from_trades
+from xauusd_bot.trade_store import ColumnStore
+
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_column_store_grows_and_reads_back_typed_columns() -> None:
+    kinds = {"t": "time", "x": "float", "n": "int", "flag": "bool", "reason": "label"}
+    store = ColumnStore(kinds, unit="us", tz="UTC", capacity=2)
+    start = pd.Timestamp("2024-01-02 10:00", tz="UTC")
+    for i in range(5):
+        stamp = None if i == 3 else (start + pd.Timedelta(minutes=5 * i)).value
+        store.append(stamp, None if i == 4 else i / 2, i, i % 2 == 0, "TP" if i % 2 else "SL")
+
+    frame = store.to_frame()
+    assert len(store) == 5 and list(frame.columns) == ["t", "x", "n", "flag", "reason"]
+    assert str(frame["t"].dtype) == "datetime64[us, UTC]"
+    assert frame["t"].iloc[1] == start + pd.Timedelta(minutes=5) and pd.isna(frame["t"].iloc[3])
+    assert frame["x"].iloc[2] == 1.0 and np.isnan(frame["x"].iloc[4])
+    assert frame["n"].tolist() == [0, 1, 2, 3, 4] and frame["flag"].tolist() == [True, False, True, False, True]
+    assert list(frame["reason"].cat.categories) == ["SL", "TP"] and frame["reason"].tolist()[:2] == ["SL", "TP"]
+
+    with pytest.raises(ValueError, match="Expected 5 values"):
+        store.append(1, 2.0)
+    with pytest.raises(ValueError, match="Unknown column kinds"):
+        ColumnStore({"x": "decimal"})
+
+
+def test_engine_equity_curve_matches_logged_fills(tmp_path: Path) -> None:
+    cfg = load_config(ROOT / "configs" / "config_smoke_baseline.yaml")
+    cfg["progress_every_days"] = 0
+    logger = CsvLogger(output_dir=tmp_path / "out")
+    engine = SimulationEngine(config=cfg, logger=logger)
+    summary = engine.run(load_m5_csv(ROOT / "data" / "xauusd_m5_HOLDOUT20.csv").iloc[:6000])
+
+    fills = pd.read_csv(logger.fills_path)
+    exits = fills[fills["fill_type"] != "ENTRY"]
+    assert summary["closed_trades"] > 0
+    curve = summary["equity_curve"]
+    assert len(curve) == len(engine.equity_curve) == 1 + len(exits)
+    np.testing.assert_allclose(curve["equity"].iloc[1:], exits["equity_after"], atol=0.005)
+    assert (curve["timestamp"].iloc[1:].to_numpy() == pd.to_datetime(exits["timestamp"]).to_numpy()).all()
+    assert curve["equity"].iloc[-1] == pytest.approx(summary["final_equity"], abs=0.005)
+
+
+def test_equity_curve_from_trades_matches_running_sum() -> None:
+    rng = np.random.default_rng(11)
+    exit_time = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 500, 3000) * 5, unit="min")
+    pnl = rng.normal(0.0, 40.0, 3000)
+    pnl[[5, 17]] = [np.inf, np.nan]
+    trades = pd.DataFrame({"trade_id": np.arange(3000), "exit_time": exit_time, "pnl": pnl})
+
+    curve = equity_curve_from_trades(trades, 10_000.0)
+    ordered = trades.sort_values("exit_time")
+    equity = 10_000.0
+    expected = []
+    for value in ordered["pnl"]:
+        equity += value if np.isfinite(value) else 0.0
+        expected.append(equity)
+    assert curve["equity"].tolist() == expected
+    assert (curve["timestamp"].to_numpy() == ordered["exit_time"].to_numpy()).all()
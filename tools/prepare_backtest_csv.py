@@ -5,6 +5,9 @@ from pathlib import Path
 
 import pandas as pd
 
+from xauusd_bot.m5_validation import normalize_m5_stream
+from xauusd_bot.timeframes import resample_from_m5, rule_minutes
+
 
 REQUIRED = ["timestamp", "open", "high", "low", "close"]
 OPTIONAL_ORDER = ["volume", "spread", "bid", "ask"]
@@ -38,7 +41,7 @@ def _read_any_csv(path: Path) -> pd.DataFrame:
     return df_no_header
 
 
-def prepare_csv(input_path: Path, output_path: Path) -> int:
+def prepare_csv(input_path: Path, output_path: Path, timeframe: str = "M5", anchor: str | None = None) -> int:
     df = _read_any_csv(input_path)
     df.columns = [_norm(c) for c in df.columns]
 
@@ -66,6 +69,8 @@ def prepare_csv(input_path: Path, output_path: Path) -> int:
     ordered_cols = REQUIRED + [c for c in OPTIONAL_ORDER if c in df.columns and c not in REQUIRED]
     df = df[ordered_cols]
     df = df.sort_values("timestamp").drop_duplicates(subset=["timestamp"], keep="first").reset_index(drop=True)
+    if rule_minutes(timeframe) != 5 or anchor is not None:
+        df = resample_from_m5(df, timeframe, anchor=anchor)[ordered_cols]
 
     output_path.parent.mkdir(parents=True, exist_ok=True)
     df.to_csv(output_path, index=False)
@@ -73,6 +78,7 @@ def prepare_csv(input_path: Path, output_path: Path) -> int:
     print("PREPARE CSV SUMMARY")
     print(f"input: {input_path.resolve()}")
     print(f"output: {output_path.resolve()}")
+    print(f"timeframe: {timeframe}" + (f" (anchor {anchor})" if anchor else ""))
     print(f"rows: {len(df)}")
     print(f"min_ts: {df['timestamp'].min()}")
     print(f"max_ts: {df['timestamp'].max()}")
@@ -81,10 +87,37 @@ def prepare_csv(input_path: Path, output_path: Path) -> int:
     return 0
 
 
+def prepare_csv_streaming(input_path: Path, output_path: Path, chunk_rows: int) -> int:
+    """Chunked M5 normalization for files too large to load at once; rows are sorted with an external merge."""
+    report = normalize_m5_stream(input_path, output_path, chunk_rows=chunk_rows)
+    print("PREPARE CSV SUMMARY")
+    print(f"input: {input_path.resolve()}")
+    print(f"output: {output_path.resolve()}")
+    print("timeframe: M5 (streamed)")
+    print(f"rows: {report.rows_written}")
+    print(f"min_ts: {report.start_ts}")
+    print(f"max_ts: {report.end_ts}")
+    print(f"unique_days: {report.unique_days}")
+    print(
+        f"dropped: nat={report.nat_timestamps} non_numeric={report.non_numeric_ohlc} "
+        f"duplicates={report.duplicates} out_of_order={report.out_of_order}"
+    )
+    print(f"throughput_rows_per_sec: {report.rows_per_sec:.0f}")
+    return 0
+
+
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Normalize M5 CSV into backtest-ready canonical format.")
     parser.add_argument("--csv", required=True, help="Input CSV path")
     parser.add_argument("--out", required=True, help="Output CSV path")
+    parser.add_argument("--timeframe", default="M5", help="Output timeframe: M5, M15, M30, H1, H4 or D1")
+    parser.add_argument("--anchor", default=None, help="Bucket anchor HH:MM, e.g. 22:00 for broker-session daily bars")
+    parser.add_argument(
+        "--chunk-rows",
+        type=int,
+        default=0,
+        help="Stream M5 output in chunks of this many rows (0 = load in memory); --out may then be a binary dataset dir",
+    )
     return parser
 
 
@@ -94,7 +127,12 @@ def main(argv: list[str] | None = None) -> int:
     if not in_path.exists():
         print(f"ERROR: input CSV not found: {in_path}")
         return 2
-    return prepare_csv(in_path, Path(args.out))
+    if args.chunk_rows > 0:
+        if rule_minutes(args.timeframe) != 5 or args.anchor is not None:
+            print("ERROR: --chunk-rows only supports M5 output without --anchor")
+            return 2
+        return prepare_csv_streaming(in_path, Path(args.out), chunk_rows=args.chunk_rows)
+    return prepare_csv(in_path, Path(args.out), timeframe=args.timeframe, anchor=args.anchor)
 
 
 if __name__ == "__main__":